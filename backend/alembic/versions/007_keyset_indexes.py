@@ -0,0 +1,38 @@
+"""Add keyset pagination indexes for admin reservation listing
+
+Revision ID: 007_keyset_indexes
+Revises: 006_perf_indexes
+Create Date: 2026-10-19 10:00:00.000000
+
+El listado admin pagina por cursor sobre (created_at, id) o (check_in, id); con
+estos índices cada página es un index range scan de LIMIT filas, sin sort ni OFFSET.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "007_keyset_indexes"
+down_revision: Union[str, None] = "006_perf_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "idx_reservation_created_id": ["created_at", "id"],
+    "idx_reservation_checkin_id": ["check_in", "id"],
+}
+
+
+def upgrade() -> None:
+    """Create (sort column, id) indexes without locking the table."""
+    # CREATE INDEX CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, "reservations", columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Drop keyset pagination indexes."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name="reservations", postgresql_concurrently=True)
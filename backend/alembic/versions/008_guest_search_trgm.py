@@ -0,0 +1,50 @@
+"""Add trigram indexes and phone digits column for admin guest search
+
+Revision ID: 008_guest_search_trgm
+Revises: 007_keyset_indexes
+Create Date: 2026-10-19 12:00:00.000000
+
+La búsqueda admin es ``LIKE '%term%'`` sobre nombre, email y teléfono; un B-tree no
+sirve para substrings, un GIN ``gin_trgm_ops`` sí (y además habilita ``similarity``
+y el operador ``%`` para el ranking). El teléfono se indexa normalizado a dígitos.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008_guest_search_trgm"
+down_revision: Union[str, None] = "007_keyset_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "idx_reservation_guest_name_trgm": "lower(guest_name)",
+    "idx_reservation_guest_email_trgm": "lower(guest_email)",
+    "idx_reservation_guest_phone_digits_trgm": "guest_phone_digits",
+}
+
+
+def upgrade() -> None:
+    """Add guest_phone_digits, backfill it and create GIN trigram indexes."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column("reservations", sa.Column("guest_phone_digits", sa.String(20), nullable=True))
+    op.execute(
+        "UPDATE reservations SET guest_phone_digits = regexp_replace(guest_phone, '\\D', '', 'g')"
+    )
+    # CREATE INDEX CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, expression in INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON reservations USING gin ({expression} gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    """Drop trigram indexes and guest_phone_digits."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.drop_column("reservations", "guest_phone_digits")
@@ -0,0 +1,59 @@
+"""Add occupancy_nights fact table for the admin calendar
+
+Revision ID: 009_occupancy_nights
+Revises: 008_guest_search_trgm
+Create Date: 2026-10-19 14:00:00.000000
+
+Una fila por alojamiento × noche ocupada por una reserva activa; la mantiene la
+app en cada transición de la reserva. El upgrade la completa desde reservations.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009_occupancy_nights"
+down_revision: Union[str, None] = "008_guest_search_trgm"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create occupancy_nights and backfill it from active reservations."""
+    op.create_table(
+        "occupancy_nights",
+        sa.Column(
+            "accommodation_id",
+            sa.Integer(),
+            sa.ForeignKey("accommodations.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("night", sa.Date(), nullable=False),
+        sa.Column(
+            "reservation_id",
+            sa.Integer(),
+            sa.ForeignKey("reservations.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.PrimaryKeyConstraint("accommodation_id", "night", "reservation_id"),
+    )
+    op.create_index("idx_occupancy_night", "occupancy_nights", ["night"])
+    op.create_index("idx_occupancy_reservation", "occupancy_nights", ["reservation_id"])
+    op.execute(
+        """
+        INSERT INTO occupancy_nights (accommodation_id, night, reservation_id, status)
+        SELECT r.accommodation_id, d::date, r.id, r.reservation_status
+        FROM reservations r,
+             generate_series(r.check_in, r.check_out - 1, interval '1 day') AS d
+        WHERE r.reservation_status IN ('pre_reserved', 'confirmed')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop occupancy_nights."""
+    op.drop_index("idx_occupancy_reservation", table_name="occupancy_nights")
+    op.drop_index("idx_occupancy_night", table_name="occupancy_nights")
+    op.drop_table("occupancy_nights")
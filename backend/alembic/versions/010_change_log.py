@@ -0,0 +1,38 @@
+"""Add change_log table for the admin delta-sync feed
+
+Revision ID: 010_change_log
+Revises: 009_occupancy_nights
+Create Date: 2026-10-19 16:00:00.000000
+
+Secuencia monotónica de cambios de reservas y pagos; el panel admin pide
+``seq > since`` (range scan por PK) en lugar de recargar listas completas.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "010_change_log"
+down_revision: Union[str, None] = "009_occupancy_nights"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create change_log."""
+    op.create_table(
+        "change_log",
+        sa.Column("seq", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("entity", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("op", sa.String(10), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("idx_change_log_created", "change_log", ["created_at"])
+
+
+def downgrade() -> None:
+    """Drop change_log."""
+    op.drop_index("idx_change_log_created", table_name="change_log")
+    op.drop_table("change_log")
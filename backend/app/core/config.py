@@ -49,6 +49,18 @@ class Settings(BaseSettings):
     JOB_EXPIRATION_INTERVAL_SECONDS: int = 60
     JOB_ICAL_INTERVAL_SECONDS: int = 300
     ICAL_SYNC_MAX_AGE_MINUTES: int = 20
+    # Dashboard admin: TTL del snapshot de estadísticas compartido entre sesiones
+    DASHBOARD_STATS_TTL_SECONDS: int = 15
+    # WebSocket admin: cola de envío por cliente y política para clientes lentos
+    WS_CLIENT_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    WS_SLOW_CLIENT_POLICY: str = "drop_oldest"  # drop_oldest | disconnect
+    # Delta-sync del panel admin (change_log)
+    CHANGE_FEED_RETENTION_HOURS: int = 72
+    CHANGE_FEED_POLL_SECONDS: float = 2.0
+    # Agregador de latencias HTTP (dashboard y /admin/perf)
+    PERF_FLUSH_INTERVAL_SECONDS: float = 10.0
+    PERF_WINDOW_MINUTES: int = 5
     # Rate limit (simple)
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS: int = 60
@@ -60,6 +72,13 @@ class Settings(BaseSettings):
     # Audio / NLU
     AUDIO_MODEL: str = "base"
     AUDIO_MIN_CONFIDENCE: float = 0.6
+    AUDIO_WORKERS: int = 2  # procesos del pool de transcripción (0 = deshabilitado)
+    AUDIO_QUEUE_MAX_DEPTH: int = 16  # trabajos en cola + en curso antes de rechazar
+    AUDIO_TRANSCRIBE_TIMEOUT_SECONDS: float = 60.0
+    AUDIO_MAX_BYTES: int = 16 * 1024 * 1024  # límite de notas de voz de WhatsApp (16 MB)
+    AUDIO_TRANSCRIPTION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # 0 = sin cache
+    NLU_CACHE_MAX_ENTRIES: int = 4096  # por worker (0 = sin cache)
+    NLU_CACHE_TTL_SECONDS: int = 900
 
     # Security
     ALLOWED_ORIGINS: str = "http://localhost:3000"
@@ -1,9 +1,13 @@
+import hashlib
+import inspect
 import os
-from typing import Any, AsyncGenerator, Dict, Optional
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Sequence
 
 import redis.asyncio as redis
 import structlog
 from app.core.config import get_settings
+from redis.exceptions import NoScriptError
 
 logger = structlog.get_logger()
 settings = get_settings()
@@ -11,6 +15,36 @@
 # Redis connection pool
 redis_pool: Optional[redis.ConnectionPool] = None
 
+# Cliente compartido por proceso (ver RedisClient / get_redis_client)
+shared_client: Optional["RedisClient"] = None
+
+# Hook de instrumentación: (operation, duration_seconds, error) -> None
+RedisHook = Callable[[str, float, bool], None]
+
+# Scripts Lua usados en hot paths. El SHA1 se calcula localmente para poder usar
+# EVALSHA sin un SCRIPT LOAD previo; si Redis no lo tiene en cache (NOSCRIPT) se
+# envía el source una sola vez con EVAL, que además lo deja cacheado.
+LUA_SCRIPTS: Dict[str, str] = {
+    "release_lock": """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("DEL", KEYS[1])
+    else
+        return 0
+    end
+    """,
+    "extend_lock": """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("EXPIRE", KEYS[1], ARGV[2])
+    else
+        return 0
+    end
+    """,
+}
+SCRIPT_SHAS: Dict[str, str] = {
+    name: hashlib.sha1(source.encode("utf-8")).hexdigest()  # nosec B324  # SHA1 exigido por Redis
+    for name, source in LUA_SCRIPTS.items()
+}
+
 
 def get_redis_pool() -> redis.ConnectionPool:
     """Get or create Redis connection pool"""
@@ -34,14 +68,149 @@ def get_redis_pool() -> redis.ConnectionPool:
     return redis_pool
 
 
-async def get_redis() -> AsyncGenerator[redis.Redis, None]:
+def _observe_redis_metrics(operation: str, duration: float, error: bool) -> None:
+    """Hook por defecto: exporta latencia y errores de Redis a Prometheus."""
+    from app.metrics import REDIS_COMMAND_DURATION, REDIS_COMMAND_ERRORS
+
+    REDIS_COMMAND_DURATION.labels(operation=operation).observe(duration)
+    if error:
+        REDIS_COMMAND_ERRORS.labels(operation=operation).inc()
+
+
+class RedisClient:
+    """Fachada de proceso sobre el pool Redis compartido.
+
+    - Un único ``redis.Redis`` reutilizado por todos los módulos (sin crear/cerrar
+      un cliente por llamada).
+    - Los comandos se delegan al cliente subyacente (``await client.get(...)``) y
+      notifican a los hooks de instrumentación con su duración y si fallaron. Los
+      métodos síncronos (``pubsub()``, ``lock()``...) devuelven su resultado directo.
+    - ``execute_pipeline`` ejecuta un pipeline instrumentado como una operación.
+    - ``run_script`` usa EVALSHA con los SHA precalculados (fallback NOSCRIPT).
+    """
+
+    def __init__(self, client: redis.Redis, hooks: Optional[List[RedisHook]] = None) -> None:
+        self.client = client
+        self.hooks: List[RedisHook] = list(hooks) if hooks is not None else []
+
+    def add_hook(self, hook: RedisHook) -> None:
+        """Registrar un hook de instrumentación adicional."""
+        self.hooks.append(hook)
+
+    def _notify(self, operation: str, duration: float, error: bool) -> None:
+        for hook in self.hooks:
+            try:
+                hook(operation, duration, error)
+            except Exception as e:  # pragma: no cover - un hook nunca rompe el comando
+                logger.warning("redis_hook_failed", operation=operation, error=str(e))
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def _instrumented(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                result = getattr(self.client, name)(*args, **kwargs)
+            except Exception:
+                self._notify(name, time.perf_counter() - start, True)
+                raise
+            # Métodos síncronos (pubsub(), lock(), register_script()...) pasan tal cual
+            if not inspect.isawaitable(result):
+                return result
+            return self._observe(name, result, start)
+
+        # Cachear el wrapper: los próximos accesos no pasan por __getattr__
+        self.__dict__[name] = _instrumented
+        return _instrumented
+
+    async def _observe(self, name: str, awaitable: Awaitable[Any], start: float) -> Any:
+        error = False
+        try:
+            return await awaitable
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._notify(name, time.perf_counter() - start, error)
+
+    def pipeline(self, transaction: bool = True) -> Any:
+        """Crear un pipeline sobre el cliente compartido (usar con execute_pipeline)."""
+        return self.client.pipeline(transaction=transaction)
+
+    async def execute_pipeline(self, pipe: Any) -> List[Any]:
+        """Ejecutar un pipeline (1 round trip) registrándolo como operación 'pipeline'."""
+        start = time.perf_counter()
+        error = False
+        try:
+            return await pipe.execute()
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._notify("pipeline", time.perf_counter() - start, error)
+
+    async def run_script(self, name: str, keys: Sequence[str], args: Sequence[Any]) -> Any:
+        """Ejecutar un script de LUA_SCRIPTS por SHA (EVALSHA) con fallback a EVAL."""
+        return await _run_script(self, name, keys, args)
+
+    async def load_scripts(self) -> None:
+        """Precargar los scripts en Redis (SCRIPT LOAD) para que EVALSHA no falle."""
+        for name, source in LUA_SCRIPTS.items():
+            sha = await self.client.script_load(source)
+            if sha != SCRIPT_SHAS[name]:  # pragma: no cover - defensivo
+                logger.warning("redis_script_sha_mismatch", script=name)
+                SCRIPT_SHAS[name] = sha
+        logger.info("redis_scripts_loaded", scripts=list(LUA_SCRIPTS))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def get_redis_client() -> RedisClient:
+    """Devuelve el cliente Redis compartido del proceso (lo crea si no existe)."""
+    global shared_client
+    if shared_client is None:
+        shared_client = RedisClient(
+            redis.Redis(connection_pool=get_redis_pool()),
+            hooks=[_observe_redis_metrics],
+        )
+    return shared_client
+
+
+async def init_redis_client() -> RedisClient:
+    """Inicializar el cliente compartido al arranque y precargar scripts (fail-open)."""
+    client = get_redis_client()
+    try:
+        await client.load_scripts()
+    except Exception as e:
+        # Sin precarga, run_script cae a EVAL en la primera invocación
+        logger.warning("redis_scripts_preload_failed", error=str(e))
+    return client
+
+
+async def close_redis_client() -> None:
+    """Cerrar el cliente compartido (shutdown)."""
+    global shared_client
+    if shared_client is not None:
+        await shared_client.close()
+        shared_client = None
+
+
+async def get_redis() -> AsyncGenerator[RedisClient, None]:
     """Get Redis client for dependency injection"""
-    pool = get_redis_pool()
-    client = redis.Redis(connection_pool=pool)
+    yield get_redis_client()
+
+
+async def _run_script(
+    redis_client: Any, name: str, keys: Sequence[str], args: Sequence[Any]
+) -> Any:
+    """EVALSHA del script registrado; ante NOSCRIPT envía el source con EVAL."""
     try:
-        yield client
-    finally:
-        await client.close()
+        return await redis_client.evalsha(SCRIPT_SHAS[name], len(keys), *keys, *args)
+    except NoScriptError:
+        return await redis_client.eval(LUA_SCRIPTS[name], len(keys), *keys, *args)
 
 
 # Utility functions for locks
@@ -52,31 +221,13 @@ async def acquire_lock(redis_client: redis.Redis, key: str, value: str, ttl: int
 
 async def release_lock(redis_client: redis.Redis, key: str, value: str) -> bool:
     """Release a lock only if we own it"""
-    lua_script = """
-    if redis.call("GET", KEYS[1]) == ARGV[1] then
-        return redis.call("DEL", KEYS[1])
-    else
-        return 0
-    end
-    """
-    # Usar register_script para ejecutar scripts Lua
-    script = redis_client.register_script(lua_script)
-    result = await script(keys=[key], args=[value])
+    result = await _run_script(redis_client, "release_lock", [key], [value])
     return bool(result)
 
 
 async def extend_lock(redis_client: redis.Redis, key: str, value: str, ttl: int = 900) -> bool:
     """Extend a lock TTL only if we own it"""
-    lua_script = """
-    if redis.call("GET", KEYS[1]) == ARGV[1] then
-        return redis.call("EXPIRE", KEYS[1], ARGV[2])
-    else
-        return 0
-    end
-    """
-    # Usar register_script para ejecutar scripts Lua
-    script = redis_client.register_script(lua_script)
-    result = await script(keys=[key], args=[value, str(ttl)])
+    result = await _run_script(redis_client, "extend_lock", [key], [value, str(ttl)])
     return bool(result)
 
 
@@ -84,11 +235,9 @@ async def extend_lock(redis_client: redis.Redis, key: str, value: str, ttl: int
 async def check_redis_health() -> dict:
     """Check Redis connectivity and return status"""
     try:
-        pool = get_redis_pool()
-        client = redis.Redis(connection_pool=pool)
+        client = get_redis_client()
         await client.ping()
         info = await client.info()
-        await client.close()
         return {
             "status": "ok",
             "connected_clients": info.get("connected_clients", 0),
@@ -14,7 +14,9 @@
 )
 from app.models import Reservation
 from app.models.enums import ReservationStatus
+from app.services.change_feed import record_changes
 from app.services.email import email_service
+from app.services.occupancy import sync_reservation_nights
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -64,6 +66,8 @@ async def expire_prereservations(db: AsyncSession, batch_size: int = 200) -> int
             )
         )
         await db.execute(upd)
+        await sync_reservation_nights(db, ids)
+        await record_changes(db, "reservation", ids)
         await db.commit()
 
         # Incrementar métricas por alojamiento
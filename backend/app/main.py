@@ -7,7 +7,7 @@
 from app.core.database import async_session_maker
 from app.core.logging import setup_logging
 from app.core.middleware import TraceIDMiddleware
-from app.core.redis import get_redis_pool
+from app.core.redis import close_redis_client, get_redis_client, init_redis_client
 from app.jobs.cleanup import expire_prereservations, send_prereservation_reminders
 from app.jobs.import_ical import run_ical_sync
 from app.middleware.idempotency import IdempotencyMiddleware
@@ -19,6 +19,12 @@
 from app.routers import nlu as nlu_router
 from app.routers import reservations as reservations_router
 from app.routers import whatsapp as whatsapp_router
+from app.services.audio import transcription_enabled
+from app.services.change_feed import prune_change_log
+from app.services.media_pipeline import close_media_pipeline
+from app.services.notification_hub import notification_hub
+from app.services.perf_aggregator import perf_aggregator
+from app.services.transcription import start_transcription_pool, stop_transcription_pool
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -40,6 +46,17 @@ async def lifespan(app: FastAPI):
     from app.core.database import engine
     from app.models.base import Base
 
+    # Cliente Redis compartido del proceso + precarga de scripts Lua
+    redis_client = await init_redis_client()
+    # Notificaciones admin: suscripción pub/sub para el fan-out entre workers
+    await notification_hub.start(redis_client)
+    # Latencias HTTP: envío periódico de los contadores del worker a Redis
+    perf_aggregator.start()
+
+    # Pool de transcripción: los workers cargan Whisper en background
+    if transcription_enabled():
+        start_transcription_pool()
+
     # Create tables if not exist (development only)
     if settings.ENVIRONMENT == "development":
         async with engine.begin() as conn:
@@ -60,6 +77,7 @@ async def expiration_worker():
                     reminders = await send_prereservation_reminders(session)
                     if reminders:
                         logger.info("pre_reservations_reminders_sent", count=reminders)
+                    await prune_change_log(session, settings.CHANGE_FEED_RETENTION_HOURS)
             except Exception as e:  # pragma: no cover
                 logger.error("expiration_worker_error", error=str(e))
             finally:
@@ -101,6 +119,11 @@ async def ical_worker():
 
     # Shutdown tasks
     logger.info("application_shutdown")
+    await close_media_pipeline()
+    await notification_hub.stop()
+    await perf_aggregator.stop()
+    stop_transcription_pool()
+    await close_redis_client()
     await engine.dispose()
 
 
@@ -147,6 +170,8 @@ async def ical_worker():
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paginación por cursor del listado admin (el frontend lee estos headers)
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated", "X-Change-Seq"],
 )
 
 
@@ -179,15 +204,13 @@ async def rate_limit(request: Request, call_next):
 
         # clave por IP + path, ventana deslizante básica (fixed window)
         key = f"ratelimit:{client_ip}:{path}"
-        pool = get_redis_pool()
-        import redis.asyncio as redis
+        r = get_redis_client()
 
-        r = redis.Redis(connection_pool=pool)
-
-        # Incrementar y setear TTL si clave nueva
-        count = await r.incr(key)
-        if count == 1:
-            await r.expire(key, settings.RATE_LIMIT_WINDOW_SECONDS)
+        # INCR + EXPIRE NX (TTL solo si clave nueva) en un único round trip
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, settings.RATE_LIMIT_WINDOW_SECONDS, nx=True)
+            count, _ = await r.execute_pipeline(pipe)
 
         # Actualizar métrica de contador actual
         from app.metrics import RATE_LIMIT_CURRENT_COUNT
@@ -230,8 +253,15 @@ async def add_request_id(request: Request, call_next):
         pass
     # Usar datetime UTC aware para evitar deprecation warnings
     start_time = datetime.now(UTC)
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    except Exception:
+        # Excepción no manejada: la responde ServerErrorMiddleware como 500
+        duration_ms = (datetime.now(UTC) - start_time).total_seconds() * 1000
+        perf_aggregator.record(request.url.path, duration_ms, 500)
+        raise
     duration_ms = (datetime.now(UTC) - start_time).total_seconds() * 1000
+    perf_aggregator.record(request.url.path, duration_ms, response.status_code)
     logger.info(
         "http_request",
         method=request.method,
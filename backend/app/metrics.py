@@ -13,6 +13,12 @@
     ["action", "source"],
 )
 
+NLU_BATCH_SIZE = Histogram(
+    "nlu_batch_size",
+    "Mensajes por request de /nlu/analyze:batch",
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500],
+)
+
 # Background Jobs Metrics
 PRERESERVATIONS_EXPIRED = Counter(
     "prereservations_expired_total",
@@ -121,3 +127,20 @@
     "Errores en el middleware de idempotencia (fail-open)",
     ["endpoint", "error_type"],
 )
+
+# ============================================================================
+# MÉTRICAS DE REDIS (cliente compartido)
+# ============================================================================
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Latencia de comandos Redis del cliente compartido",
+    ["operation"],  # nombre del comando o 'pipeline'
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0],
+)
+
+REDIS_COMMAND_ERRORS = Counter(
+    "redis_command_errors_total",
+    "Comandos Redis que terminaron con excepción",
+    ["operation"],
+)
@@ -1,7 +1,9 @@
 from .accommodation import Accommodation
 from .base import Base, TimestampMixin
+from .change_log import ChangeLog
 from .enums import AccommodationType, ChannelSource, MessageType, PaymentStatus, ReservationStatus
 from .idempotency import IdempotencyKey
+from .occupancy import OccupancyNight
 from .payment import Payment
 from .reservation import Reservation
 
@@ -12,6 +14,8 @@
     "Reservation",
     "Payment",
     "IdempotencyKey",
+    "ChangeLog",
+    "OccupancyNight",
     "ReservationStatus",
     "PaymentStatus",
     "AccommodationType",
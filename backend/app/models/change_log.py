@@ -0,0 +1,77 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, event, insert
+from sqlalchemy.orm import Session
+
+from .base import Base
+
+
+class ChangeLog(Base):
+    """Feed de cambios para el delta-sync del panel admin.
+
+    ``seq`` es la secuencia monotónica del feed; una fila por alta/modificación/baja
+    de una reserva o pago. Las escrituras ORM se registran solas (``after_flush``);
+    los ``UPDATE`` en bloque llaman a ``app.services.change_feed.record_changes``.
+    En ambos casos las filas se insertan al commitear (``before_commit``).
+    """
+
+    __tablename__ = "change_log"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)  # reservation | payment
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)  # upsert | delete
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
+
+    __table_args__ = (Index("idx_change_log_created", "created_at"),)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ChangeLog seq={self.seq} {self.entity}:{self.entity_id} {self.op}>"
+
+
+# tabla -> nombre de entidad en el feed
+TRACKED_TABLES = {"reservations": "reservation", "payments": "payment"}
+
+
+PENDING_KEY = "change_log_pending"
+
+
+def queue_changes(session: Session, rows: list[dict]) -> None:
+    """Encolar filas ``{entity, entity_id, op}`` para escribirlas al commitear."""
+    session.info.setdefault(PENDING_KEY, []).extend(rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_orm_changes(session: Session, flush_context) -> None:  # type: ignore[no-untyped-def]
+    """Encolar las reservas/pagos escritos en este flush."""
+    rows = []
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    for op, objects in (("upsert", session.new), ("upsert", dirty), ("delete", session.deleted)):
+        for obj in objects:
+            entity = TRACKED_TABLES.get(getattr(obj, "__tablename__", ""))
+            if entity is None:
+                continue
+            rows.append({"entity": entity, "entity_id": obj.id, "op": op})
+    if rows:
+        queue_changes(session, rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_changes(session: Session) -> None:
+    """Insertar los cambios encolados justo antes del COMMIT.
+
+    ``seq`` y ``created_at`` se asignan al commitear y no al primer flush: una
+    transacción larga (rebuild de ocupación, webhook lento) no deja un ``seq`` bajo
+    sin commitear que los clientes ya adelantados saltearían. Lo que queda entre
+    este INSERT y el COMMIT lo cubre ``SETTLE_SECONDS`` del feed.
+    """
+    session.flush()  # before_commit corre antes del flush final del commit
+    rows = session.info.pop(PENDING_KEY, None)
+    if rows:
+        now = datetime.now(UTC)
+        session.connection().execute(insert(ChangeLog), [dict(row, created_at=now) for row in rows])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String
+
+from .base import Base
+
+
+class OccupancyNight(Base):
+    """Tabla de hechos: una fila por alojamiento × noche ocupada por una reserva activa.
+
+    Se mantiene en la misma transacción que cada cambio de estado de la reserva
+    (``app.services.occupancy.sync_reservation_nights``); las noches libres no tienen fila.
+    """
+
+    __tablename__ = "occupancy_nights"
+
+    accommodation_id = Column(
+        Integer, ForeignKey("accommodations.id", ondelete="CASCADE"), primary_key=True
+    )
+    night = Column(Date, primary_key=True)
+    reservation_id = Column(
+        Integer, ForeignKey("reservations.id", ondelete="CASCADE"), primary_key=True
+    )
+    status = Column(String(20), nullable=False)  # pre_reserved | confirmed
+
+    __table_args__ = (
+        # Calendario / ocupación de todos los alojamientos en un rango de fechas
+        Index("idx_occupancy_night", "night"),
+        Index("idx_occupancy_reservation", "reservation_id"),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<OccupancyNight acc={self.accommodation_id} night={self.night}>"
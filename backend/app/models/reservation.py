@@ -5,6 +5,7 @@
 
 from app.models.base import Base, TimestampMixin
 from app.models.enums import PaymentStatus, ReservationStatus
+from app.utils.phone import phone_digits
 from sqlalchemy import (
     NUMERIC,
     Boolean,
@@ -19,7 +20,7 @@
     Text,
 )
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 
 class Reservation(Base, TimestampMixin):
@@ -38,6 +39,8 @@ class Reservation(Base, TimestampMixin):
 
     guest_name = Column(String(100), nullable=False)
     guest_phone = Column(String(20), nullable=False, index=True)
+    # Solo dígitos de guest_phone, para la búsqueda trigram (índice GIN, migración 008)
+    guest_phone_digits = Column(String(20))
     guest_email = Column(String(100))
     guest_document = Column(String(20))
     guests_count = Column(Integer, nullable=False)
@@ -75,7 +78,15 @@ class Reservation(Base, TimestampMixin):
         CheckConstraint("total_price >= 0", name="ck_total_price_positive"),
         Index("idx_reservation_dates", "accommodation_id", "check_in", "check_out"),
         Index("idx_reservation_expires", "expires_at"),
+        # Paginación keyset del listado admin: ORDER BY (col, id)
+        Index("idx_reservation_created_id", "created_at", "id"),
+        Index("idx_reservation_checkin_id", "check_in", "id"),
     )
 
+    @validates("guest_phone")
+    def _sync_phone_digits(self, key: str, value: str | None) -> str | None:
+        self.guest_phone_digits = phone_digits(value)
+        return value
+
     def __repr__(self) -> str:  # pragma: no cover
         return f"<Reservation code={self.code} acc={self.accommodation_id}>"
@@ -2,10 +2,7 @@
 from __future__ import annotations
 
 import asyncio
-import csv
-import io
-from datetime import UTC, datetime, timedelta
-from decimal import Decimal
+from datetime import UTC, date, datetime
 from typing import Optional
 
 import structlog
@@ -15,7 +12,11 @@
 from app.models.reservation import Reservation
 from app.schemas.admin import (
     ActionResponse,
+    BulkActionRequest,
+    BulkActionResponse,
     CalendarEvent,
+    CalendarNight,
+    CalendarNightsResponse,
     CalendarResponse,
     CancelReservationRequest,
     ConfirmReservationRequest,
@@ -24,24 +25,44 @@
     DashboardPerformance,
     DashboardResponse,
     DashboardTotals,
+    OccupancyResponse,
+    PerfResponse,
     ReservationDetailResponse,
     TimelineEvent,
 )
+from app.services import analytics_export, bulk_actions, change_feed, guest_search, occupancy
+from app.services.dashboard import dashboard_snapshot
 from app.services.email import email_service
+from app.services.notification_hub import notification_hub
+from app.services.perf_aggregator import perf_aggregator
+from app.services.reservation_export import stream_reservations_csv
+from app.services.reservation_listing import (
+    COUNT_MODES,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_SORT,
+    MAX_PAGE_SIZE,
+    SORTS,
+    InvalidCursor,
+    count_reservations,
+    fetch_page,
+    reservation_filters,
+)
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Body,
     Depends,
     Header,
     HTTPException,
     Query,
+    Request,
+    Response,
     WebSocket,
     WebSocketDisconnect,
 )
 from fastapi.responses import StreamingResponse
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 logger = structlog.get_logger()
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -87,178 +108,228 @@ async def get_dashboard_stats(
         - Últimas 24h: nuevas reservas, pagos recibidos
         - Health: DB, Redis, iCal
         - Performance: error rate, P95
-    """
-    now = datetime.utcnow()
-    last_24h = now - timedelta(hours=24)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # Totales generales
-    confirmed_count = (
-        await db.scalar(
-            select(func.count(Reservation.id)).where(Reservation.reservation_status == "confirmed")
-        )
-        or 0
-    )
-
-    pre_reserved_count = (
-        await db.scalar(
-            select(func.count(Reservation.id)).where(
-                Reservation.reservation_status == "pre_reserved"
-            )
-        )
-        or 0
-    )
 
-    cancelled_count = (
-        await db.scalar(
-            select(func.count(Reservation.id)).where(Reservation.reservation_status == "cancelled")
-        )
-        or 0
-    )
-
-    # Revenue total y del mes
-    total_revenue = await db.scalar(
-        select(func.sum(Reservation.total_price)).where(
-            Reservation.reservation_status == "confirmed"
-        )
-    ) or Decimal("0")
-
-    month_revenue = await db.scalar(
-        select(func.sum(Reservation.total_price)).where(
-            and_(
-                Reservation.reservation_status == "confirmed",
-                Reservation.confirmed_at >= month_start,
-            )
-        )
-    ) or Decimal("0")
+    Los KPIs salen de un snapshot compartido (una consulta agregada por intervalo
+    ``DASHBOARD_STATS_TTL_SECONDS``, sin importar cuántos admins estén mirando).
+    """
+    snap = await dashboard_snapshot.get(db)
+    stats = snap.stats
 
-    # Conversión (confirmadas / total de reservas creadas)
-    total_created = await db.scalar(select(func.count(Reservation.id))) or 0
+    total_created = stats["total_created"]
     conversion_rate = (
-        round((confirmed_count / total_created) * 100, 2) if total_created > 0 else 0.0
+        round((stats["confirmed"] / total_created) * 100, 2) if total_created > 0 else 0.0
     )
 
-    # Últimas 24h
-    new_reservations_24h = (
-        await db.scalar(
-            select(func.count(Reservation.id)).where(Reservation.created_at >= last_24h)
-        )
-        or 0
+    db_latency = stats["db_latency_ms"]
+    redis_latency = snap.redis_latency_ms
+    ical_age = stats["ical_last_sync_age_minutes"]
+    degraded = (
+        db_latency > 500
+        or redis_latency is None
+        or redis_latency > 200
+        or (ical_age is not None and ical_age > settings.ICAL_SYNC_MAX_AGE_MINUTES)
     )
 
-    payments_received_24h = (
-        await db.scalar(
-            select(func.count(Reservation.id)).where(
-                and_(
-                    Reservation.payment_status == "paid",
-                    Reservation.confirmed_at >= last_24h,
-                )
-            )
-        )
-        or 0
-    )
-
-    # Health checks simplificado (en producción usar valores reales de /healthz)
-    health_status_value = "healthy"  # Placeholder
-    db_latency = 10  # Placeholder
-    redis_latency = 5  # Placeholder
-    ical_sync_age = 15  # Placeholder
-
-    # Performance placeholder (en producción usar Prometheus metrics)
-    error_rate = 0.5  # Placeholder
-    p95_latency = 250  # Placeholder
-
     return DashboardResponse(
         totals=DashboardTotals(
-            confirmed=confirmed_count,
-            pre_reserved=pre_reserved_count,
-            cancelled=cancelled_count,
-            total_revenue=float(total_revenue),
-            month_revenue=float(month_revenue),
+            confirmed=stats["confirmed"],
+            pre_reserved=stats["pre_reserved"],
+            cancelled=stats["cancelled"],
+            total_revenue=float(stats["total_revenue"]),
+            month_revenue=float(stats["month_revenue"]),
         ),
         conversion_rate=conversion_rate,
         last_24h=DashboardLast24h(
-            new_reservations=new_reservations_24h,
-            payments_received=payments_received_24h,
+            new_reservations=stats["new_reservations_24h"],
+            payments_received=stats["payments_received_24h"],
         ),
         health=DashboardHealth(
-            status=health_status_value,
-            db_latency_ms=db_latency,
-            redis_latency_ms=redis_latency,
-            ical_last_sync_age_minutes=ical_sync_age,
+            status="degraded" if degraded else "healthy",
+            db_latency_ms=round(db_latency),
+            redis_latency_ms=round(redis_latency) if redis_latency is not None else None,
+            ical_last_sync_age_minutes=round(ical_age) if ical_age is not None else None,
         ),
         performance=DashboardPerformance(
-            error_rate=error_rate,
-            p95_latency_ms=p95_latency,
+            error_rate=snap.performance["error_rate"],
+            p50_latency_ms=round(snap.performance["p50_latency_ms"]),
+            p95_latency_ms=round(snap.performance["p95_latency_ms"]),
+            p99_latency_ms=round(snap.performance["p99_latency_ms"]),
         ),
-        timestamp=now.isoformat(),
+        timestamp=stats["computed_at"],
     )
 
 
 @router.get("/reservations")
 async def list_reservations(
+    response: Response,
     status: Optional[str] = Query(default=None),
     accommodation_id: Optional[int] = Query(default=None),
-    from_date: Optional[str] = Query(default=None),
-    to_date: Optional[str] = Query(default=None),
+    from_date: Optional[date] = Query(default=None),
+    to_date: Optional[date] = Query(default=None),
     search: Optional[str] = Query(
         default=None, description="Buscar por nombre, email o teléfono del huésped"
     ),
+    sort: str = Query(default=DEFAULT_SORT, description=f"Orden: {', '.join(SORTS)}"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor de la página previa"),
+    count: str = Query(default="none", description=f"Total: {', '.join(COUNT_MODES)}"),
     db: AsyncSession = Depends(get_db),
     _admin=Depends(require_admin),
 ):
-    """Listar reservas con filtros opcionales."""
-    filters = []
-    if status:
-        filters.append(Reservation.reservation_status == status)
-    if accommodation_id:
-        filters.append(Reservation.accommodation_id == accommodation_id)
-    if from_date:
-        filters.append(Reservation.check_in >= from_date)
-    if to_date:
-        filters.append(Reservation.check_out <= to_date)
-    if search:
-        # Búsqueda case-insensitive en guest_name, guest_email, guest_phone
-        search_pattern = f"%{search}%"
-        filters.append(
-            or_(
-                Reservation.guest_name.ilike(search_pattern),
-                Reservation.guest_email.ilike(search_pattern),
-                Reservation.guest_phone.ilike(search_pattern),
-            )
-        )
+    """Listar reservas con filtros opcionales, paginado por cursor.
 
-    stmt = select(Reservation).where(and_(*filters)) if filters else select(Reservation)
+    El body sigue siendo la lista de reservas de la página; la siguiente página se pide
+    con ``cursor`` = header ``X-Next-Cursor`` (ausente en la última). Con ``count``
+    exact/estimate se agrega ``X-Total-Count`` (y ``X-Total-Count-Estimated``).
+    ``X-Change-Seq`` es el ``since`` del feed de cambios que corresponde a esta lectura.
+    """
+    if sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"sort inválido; opciones: {list(SORTS)}")
+    if count not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count inválido; opciones: {COUNT_MODES}")
+
+    filters = reservation_filters(status, accommodation_id, from_date, to_date, search)
+    # Antes de leer las filas: lo commiteado después llega por el feed
+    response.headers["X-Change-Seq"] = str(await change_feed.head_seq(db))
+    try:
+        rows, next_cursor = await fetch_page(db, filters, sort, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # O4: Eager loading para prevenir N+1 queries
-    # Si en el futuro se accede a r.accommodation.name, no generará queries adicionales
-    stmt = stmt.options(selectinload(Reservation.accommodation))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if count != "none":
+        total, estimated = await count_reservations(db, filters, count)
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Total-Count-Estimated"] = "true" if estimated else "false"
 
-    result = await db.execute(stmt)
-    rows = result.scalars().all()
     return [
         {
-            "code": r.code,
-            "accommodation_id": r.accommodation_id,
-            "guest_name": r.guest_name,
-            "guest_email": r.guest_email,
-            "guest_phone": r.guest_phone,
-            "check_in": getattr(r, "check_in").isoformat()
-            if getattr(r, "check_in", None) is not None
-            else None,
-            "check_out": getattr(r, "check_out").isoformat()
-            if getattr(r, "check_out", None) is not None
-            else None,
-            "status": r.reservation_status,
-            "total_price": r.total_price,
-            "created_at": getattr(r, "created_at").isoformat()
-            if getattr(r, "created_at", None) is not None
-            else None,
+            "id": r["id"],
+            "code": r["code"],
+            "accommodation_id": r["accommodation_id"],
+            "guest_name": r["guest_name"],
+            "guest_email": r["guest_email"],
+            "guest_phone": r["guest_phone"],
+            "check_in": r["check_in"].isoformat() if r["check_in"] is not None else None,
+            "check_out": r["check_out"].isoformat() if r["check_out"] is not None else None,
+            "status": r["reservation_status"],
+            "total_price": r["total_price"],
+            "created_at": r["created_at"].isoformat() if r["created_at"] is not None else None,
         }
         for r in rows
     ]
 
 
+@router.get("/reservations/export.csv")
+async def export_reservations_csv(
+    status: Optional[str] = Query(default=None),
+    accommodation_id: Optional[int] = Query(default=None),
+    from_date: Optional[date] = Query(default=None),
+    to_date: Optional[date] = Query(default=None),
+    search: Optional[str] = Query(default=None),
+    gzip: bool = Query(default=False, description="Descargar como reservations.csv.gz"),
+    _admin=Depends(require_admin),
+):
+    """Exportar reservas a CSV en streaming (mismos filtros que el listado)."""
+    filters = reservation_filters(status, accommodation_id, from_date, to_date, search)
+    filename = "reservations.csv.gz" if gzip else "reservations.csv"
+    return StreamingResponse(
+        stream_reservations_csv(filters, compress=gzip),
+        media_type="application/gzip" if gzip else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/reservations/search")
+async def search_reservations(
+    q: str = Query(min_length=2, max_length=100, description="Nombre, email o teléfono"),
+    limit: int = Query(default=guest_search.DEFAULT_LIMIT, ge=1, le=guest_search.MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    _admin=Depends(require_admin),
+):
+    """Buscar reservas por huésped, ordenadas por relevancia (``score`` 0..1)."""
+    rows = await guest_search.search_reservations(db, q, limit)
+    return [
+        {
+            "id": r["id"],
+            "code": r["code"],
+            "accommodation_id": r["accommodation_id"],
+            "guest_name": r["guest_name"],
+            "guest_email": r["guest_email"],
+            "guest_phone": r["guest_phone"],
+            "check_in": r["check_in"].isoformat() if r["check_in"] is not None else None,
+            "check_out": r["check_out"].isoformat() if r["check_out"] is not None else None,
+            "status": r["reservation_status"],
+            "score": r["score"],
+        }
+        for r in rows
+    ]
+
+
+@router.get("/changes")
+async def list_changes(
+    since: int = Query(default=0, ge=0, description="Último seq aplicado (0 = desde el inicio)"),
+    limit: int = Query(default=change_feed.DEFAULT_LIMIT, ge=1, le=change_feed.MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    _admin=Depends(require_admin),
+):
+    """Cambios de reservas/pagos posteriores a ``since`` (delta-sync del dashboard).
+
+    Cada cambio trae la fila actual (``op=upsert``) o ``op=delete``; repetir con
+    ``since=next`` mientras ``has_more``. 410 si ``since`` ya no está retenido.
+    """
+    try:
+        return await change_feed.fetch_changes(db, since, limit)
+    except change_feed.ChangesExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+
+@router.get("/changes/stream")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(default=None, ge=0, description="Sin since: desde ahora"),
+    token: Optional[str] = Query(default=None, description="JWT (EventSource no envía headers)"),
+    authorization: str = Header(default=""),
+    last_event_id: Optional[int] = Header(default=None),
+):
+    """Feed de cambios por Server-Sent Events (eventos ``change`` y ``reset``)."""
+    await require_admin(authorization or f"Bearer {token or ''}")
+    # Reconexión automática de EventSource: retomar desde el último evento recibido
+    start = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        change_feed.stream_changes(start, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/exports/{table}")
+async def export_analytics(
+    table: str,
+    format: str = Query(default="parquet", description="parquet | arrow (IPC stream)"),
+    from_date: Optional[date] = Query(default=None, description="created_at >= (inclusive)"),
+    to_date: Optional[date] = Query(default=None, description="created_at < (exclusivo)"),
+    _admin=Depends(require_admin),
+):
+    """Export columnar tipado (reservations, payments, accommodations) en streaming."""
+    if table not in analytics_export.EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Tabla no exportable: {table}")
+    if format not in analytics_export.FORMATS:
+        raise HTTPException(status_code=400, detail="format debe ser parquet o arrow")
+    if not analytics_export.PYARROW_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Export analítico no disponible (pyarrow)")
+
+    media_type, ext = analytics_export.FORMATS[format]
+    return StreamingResponse(
+        analytics_export.stream_export(
+            analytics_export.EXPORT_TABLES[table], format, from_date, to_date
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{ext}"'},
+    )
+
+
 @router.get("/reservations/{reservation_id}", response_model=ReservationDetailResponse)
 async def get_reservation_detail(
     reservation_id: int,
@@ -334,6 +405,90 @@ async def get_reservation_detail(
     )
 
 
+async def _bulk_targets(db: AsyncSession, request: BulkActionRequest) -> dict:
+    filters = None
+    if request.filter is not None:
+        f = request.filter
+        filters = reservation_filters(
+            f.status, f.accommodation_id, f.from_date, f.to_date, f.search
+        )
+    try:
+        return await bulk_actions.select_targets(db, request.codes, filters)
+    except bulk_actions.BulkSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _bulk_response(
+    result: bulk_actions.BulkResult,
+    request: BulkActionRequest,
+    background_tasks: BackgroundTasks,
+    notification_type: Optional[str],
+) -> BulkActionResponse:
+    # Códigos inexistentes también se informan como skipped
+    requested = list(dict.fromkeys(request.codes)) if request.codes is not None else []
+    skipped = sorted(set(result.skipped) | (set(requested) - set(result.updated)))
+    if result.notifications:
+        background_tasks.add_task(bulk_actions.send_notification_emails, result.notifications)
+    if notification_type and result.updated:
+        # Un solo evento por lote (no uno por reserva)
+        await broadcast_notification(
+            notification_type,
+            {"count": len(result.updated), "reservation_codes": result.updated[:100]},
+        )
+    return BulkActionResponse(
+        action=result.action,
+        requested=max(result.requested, len(requested)),
+        updated=result.updated,
+        skipped=skipped,
+        notifications_queued=len(result.notifications),
+        timestamp=datetime.now(UTC).isoformat(),
+    )
+
+
+@router.post("/reservations/bulk/confirm", response_model=BulkActionResponse)
+async def bulk_confirm_reservations(
+    request: BulkActionRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    _admin=Depends(require_admin),
+):
+    """Confirmar en bloque las pre-reservas elegidas (las demás quedan en ``skipped``)."""
+    targets = await _bulk_targets(db, request)
+    result = await bulk_actions.apply_transition(db, "confirm", targets)
+    return await _bulk_response(result, request, background_tasks, "reservations_bulk_confirmed")
+
+
+@router.post("/reservations/bulk/cancel", response_model=BulkActionResponse)
+async def bulk_cancel_reservations(
+    request: BulkActionRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    _admin=Depends(require_admin),
+):
+    """Cancelar en bloque pre-reservas y reservas confirmadas."""
+    if not request.reason:
+        raise HTTPException(status_code=400, detail="reason es obligatorio para cancelar")
+    targets = await _bulk_targets(db, request)
+    result = await bulk_actions.apply_transition(db, "cancel", targets, request.reason)
+    return await _bulk_response(result, request, background_tasks, "reservations_bulk_cancelled")
+
+
+@router.post("/reservations/bulk/resend-email", response_model=BulkActionResponse)
+async def bulk_resend_email(
+    request: BulkActionRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    _admin=Depends(require_admin),
+    x_csrf_token: str | None = Header(default=None),
+):
+    """Reenviar en bloque el email correspondiente al estado de cada reserva."""
+    if not x_csrf_token or len(x_csrf_token) < 8:
+        raise HTTPException(status_code=403, detail="Missing CSRF token")
+    targets = await _bulk_targets(db, request)
+    result = await bulk_actions.resend_targets(db, targets)
+    return await _bulk_response(result, request, background_tasks, None)
+
+
 @router.post("/reservations/{reservation_id}/confirm", response_model=ActionResponse)
 async def confirm_reservation(
     reservation_id: int,
@@ -362,6 +517,7 @@ async def confirm_reservation(
     if request.notes:
         reservation.notes = (reservation.notes or "") + f"\n[Admin] {request.notes}"
 
+    await occupancy.sync_reservation_nights(db, [reservation.id])
     await db.commit()
 
     # Broadcast notification a WebSockets
@@ -411,6 +567,7 @@ async def cancel_reservation(
 
     reservation.notes = (reservation.notes or "") + cancellation_note
 
+    await occupancy.sync_reservation_nights(db, [reservation.id])
     await db.commit()
 
     # Broadcast notification
@@ -434,52 +591,6 @@ async def cancel_reservation(
     )
 
 
-@router.get("/reservations/export.csv")
-async def export_reservations_csv(
-    db: AsyncSession = Depends(get_db),
-    _admin=Depends(require_admin),
-):
-    """Exportar reservas a CSV."""
-    # O4: Eager loading proactivo para export
-    stmt = select(Reservation).options(selectinload(Reservation.accommodation))
-    result = await db.execute(stmt)
-    rows = result.scalars().all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "code",
-            "accommodation_id",
-            "guest_name",
-            "guest_email",
-            "guest_phone",
-            "check_in",
-            "check_out",
-            "status",
-            "total_price",
-            "created_at",
-        ]
-    )
-    for r in rows:
-        writer.writerow(
-            [
-                r.code,
-                r.accommodation_id,
-                r.guest_name,
-                r.guest_email,
-                r.guest_phone,
-                r.check_in,
-                r.check_out,
-                r.reservation_status,
-                r.total_price,
-                r.created_at,
-            ]
-        )
-    output.seek(0)
-    return StreamingResponse(iter([output.getvalue()]), media_type="text/csv")
-
-
 @router.post("/actions/resend-email/{code}")
 async def resend_email(
     code: str,
@@ -588,116 +699,99 @@ async def get_calendar_availability(
         CalendarResponse con lista de eventos y métricas
     """
     from calendar import monthrange
-    from datetime import date
 
     # Calcular rango de fechas del mes
     _, last_day = monthrange(year, month)
     start_date = date(year, month, 1)
     end_date = date(year, month, last_day)
 
-    # Obtener reservas que se solapen con el mes
-    res_query = select(Reservation).where(
-        and_(
-            Reservation.reservation_status.in_(["pre_reserved", "confirmed"]),
-            or_(
-                # Reservas que empiezan en el mes
-                and_(Reservation.check_in >= start_date, Reservation.check_in <= end_date),
-                # Reservas que terminan en el mes
-                and_(Reservation.check_out >= start_date, Reservation.check_out <= end_date),
-                # Reservas que abarcan todo el mes
-                and_(Reservation.check_in <= start_date, Reservation.check_out >= end_date),
-            ),
+    # Reservas con alguna noche en el mes (range scan sobre occupancy_nights)
+    res_query = select(
+        Reservation.id,
+        Reservation.code,
+        Reservation.accommodation_id,
+        Reservation.guest_name,
+        Reservation.check_in,
+        Reservation.check_out,
+        Reservation.reservation_status,
+        Reservation.total_price,
+        Reservation.channel_source,
+    ).where(
+        Reservation.id.in_(
+            occupancy.reservation_ids_in_range(start_date, end_date, accommodation_id)
         )
     )
+    result = await db.execute(res_query.order_by(Reservation.check_in, Reservation.id))
 
-    if accommodation_id:
-        res_query = res_query.where(Reservation.accommodation_id == accommodation_id)
-
-    result = await db.execute(res_query)
-    reservations = result.scalars().all()
-
-    # Convertir reservas a eventos
     events = [
         CalendarEvent(
             id=r.id,
             code=r.code,
             accommodation_id=r.accommodation_id,
             guest_name=r.guest_name,
-            check_in=r.check_in.isoformat() if r.check_in else "",
-            check_out=r.check_out.isoformat() if r.check_out else "",
+            check_in=r.check_in.isoformat(),
+            check_out=r.check_out.isoformat(),
             status=r.reservation_status,
             total_price=float(r.total_price),
-            channel_source=r.channel_source,
+            channel_source=r.channel_source or "",
         )
-        for r in reservations
+        for r in result.all()
     ]
 
-    # Calcular tasa de ocupación del mes
-    total_days_in_month = last_day
-    occupied_days = 0
-
-    for res in reservations:
-        if res.reservation_status == "confirmed":
-            # Contar días ocupados dentro del mes
-            res_start = max(res.check_in, start_date) if res.check_in else start_date
-            res_end = min(res.check_out, end_date) if res.check_out else end_date
-            days = (res_end - res_start).days
-            occupied_days += max(0, days)
-
-    occupancy_rate = (
-        round((occupied_days / total_days_in_month) * 100, 1) if total_days_in_month > 0 else 0.0
-    )
+    summary = await occupancy.occupancy_summary(db, start_date, end_date, accommodation_id)
 
     return CalendarResponse(
         events=events,
         month=f"{year}-{month:02d}",
-        occupancy_rate=occupancy_rate,
+        occupancy_rate=summary["occupancy_rate"],
     )
 
 
-# WebSocket connection manager
-class ConnectionManager:
-    """Gestiona conexiones WebSocket activas para alertas real-time."""
-
-    def __init__(self) -> None:
-        """Initialize connection manager."""
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket) -> None:
-        """Connect a new websocket client."""
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info("websocket_connected", total_connections=len(self.active_connections))
+def _validate_range(from_date: date, to_date: date) -> None:
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date debe ser >= from_date")
+    if (to_date - from_date).days >= occupancy.MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Rango máximo: {occupancy.MAX_RANGE_DAYS} días"
+        )
 
-    def disconnect(self, websocket: WebSocket) -> None:
-        """Disconnect a websocket client."""
-        self.active_connections.remove(websocket)
-        logger.info("websocket_disconnected", total_connections=len(self.active_connections))
 
-    async def broadcast(self, message: dict) -> None:
-        """Send a message to all connected clients.
+@router.get("/calendar/nights", response_model=CalendarNightsResponse)
+async def get_calendar_nights(
+    from_date: date = Query(...),
+    to_date: date = Query(..., description="Inclusive"),
+    accommodation_id: Optional[int] = Query(None),
+    _admin=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Grilla de noches ocupadas (alojamiento × noche → estado); las libres no aparecen."""
+    _validate_range(from_date, to_date)
+    rows = await occupancy.calendar_nights(db, from_date, to_date, accommodation_id)
+    return CalendarNightsResponse(
+        from_date=from_date,
+        to_date=to_date,
+        nights=[CalendarNight(**r) for r in rows],
+    )
 
-        Args:
-            message: Message dictionary to broadcast
-        """
-        dead_connections = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error("websocket_send_failed", error=str(e))
-                dead_connections.append(connection)
 
-        # Limpiar conexiones muertas
-        for conn in dead_connections:
-            try:
-                self.disconnect(conn)
-            except ValueError:
-                pass  # Ya removida
+@router.get("/occupancy", response_model=OccupancyResponse)
+async def get_occupancy(
+    from_date: date = Query(...),
+    to_date: date = Query(..., description="Inclusive"),
+    accommodation_id: Optional[int] = Query(None),
+    _admin=Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ocupación por día y total del rango (confirmadas / días × alojamientos)."""
+    _validate_range(from_date, to_date)
+    summary = await occupancy.occupancy_summary(db, from_date, to_date, accommodation_id)
+    return OccupancyResponse(**summary)
 
 
-# Instancia global del connection manager
-ws_manager = ConnectionManager()
+@router.get("/perf", response_model=PerfResponse)
+async def get_perf(_admin=Depends(require_admin)):
+    """p50/p95/p99 y tasa de errores HTTP por grupo de rutas (últimos minutos, todos los workers)."""
+    return PerfResponse(**await perf_aggregator.summary())
 
 
 @router.websocket("/ws")
@@ -732,12 +826,12 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
         await websocket.close(code=4001, reason="Invalid token")
         return
 
-    # Conectar
-    await ws_manager.connect(websocket)
+    # Conectar: todo envío pasa por la cola del cliente (una sola tarea escribe)
+    client = await notification_hub.connect(websocket)
 
     try:
         # Enviar mensaje de bienvenida
-        await websocket.send_json(
+        client.offer(
             {
                 "type": "connected",
                 "data": {"message": "Conectado al sistema de alertas"},
@@ -745,34 +839,30 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
             }
         )
 
-        # Mantener conexión viva (el servidor enviará notificaciones via broadcast)
-        while True:
+        # Mantener conexión viva (el servidor enviará notificaciones via el hub)
+        while not client.closed:
             # Esperar mensajes del cliente (ping/pong)
             try:
                 data = await asyncio.wait_for(websocket.receive_text(), timeout=60.0)
                 # Echo para keep-alive
                 if data == "ping":
-                    await websocket.send_json(
-                        {"type": "pong", "timestamp": datetime.now(UTC).isoformat()}
-                    )
+                    client.offer({"type": "pong", "timestamp": datetime.now(UTC).isoformat()})
             except asyncio.TimeoutError:
                 # Enviar ping periódico
-                await websocket.send_json(
-                    {"type": "ping", "timestamp": datetime.now(UTC).isoformat()}
-                )
+                client.offer({"type": "ping", "timestamp": datetime.now(UTC).isoformat()})
     except WebSocketDisconnect:
-        ws_manager.disconnect(websocket)
         logger.info("websocket_client_disconnected")
     except Exception as e:
         logger.error("websocket_error", error=str(e))
-        ws_manager.disconnect(websocket)
+    finally:
+        client.close(None)
 
 
 async def broadcast_notification(
     notification_type: str,
     data: dict,
 ):
-    """Broadcast notification to all connected WebSocket clients.
+    """Broadcast notification to all connected WebSocket clients (every worker).
 
     Use from anywhere in the code:
         await broadcast_notification("nueva_reserva", {
@@ -782,9 +872,5 @@ async def broadcast_notification(
         })
     """
     message = {"type": notification_type, "data": data, "timestamp": datetime.now(UTC).isoformat()}
-    await ws_manager.broadcast(message)
-    logger.info(
-        "websocket_notification_sent",
-        type=notification_type,
-        recipients=len(ws_manager.active_connections),
-    )
+    await notification_hub.publish(message)
+    logger.info("websocket_notification_sent", type=notification_type)
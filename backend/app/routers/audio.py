@@ -1,20 +1,33 @@
+import json
+
+from app.core.config import get_settings
 from app.services import nlu
-from app.services.audio import transcribe_audio
+from app.services.audio import (
+    AudioTooLarge,
+    read_upload_capped,
+    transcribe_audio,
+    transcribe_audio_stream,
+)
 from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 
 router = APIRouter(prefix="/audio", tags=["audio"])
 
+SUPPORTED_CONTENT_TYPES = ("audio/ogg", "audio/opus", "application/octet-stream")
+
 
 @router.post("/transcribe")
 async def transcribe(file: UploadFile = File(...)):
-    if file.content_type not in ("audio/ogg", "audio/opus", "application/octet-stream"):
+    if file.content_type not in SUPPORTED_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="Formato no soportado")
     result = await transcribe_audio(file)
+    if result.get("error") == "file_too_large":
+        raise HTTPException(status_code=413, detail="Audio demasiado grande")
     if "error" in result:
         # Caso low confidence u otro error
         return {"status": "needs_text", **result}
     analysis = (
-        nlu.analyze(result["text"])
+        nlu.analyze_cached(result["text"])
         if result.get("text")
         else {"intents": ["desconocido"], "dates": []}
     )
@@ -24,3 +37,27 @@ async def transcribe(file: UploadFile = File(...)):
         "confidence": result["confidence"],
         "nlu": analysis,
     }
+
+
+@router.post("/transcribe/stream")
+async def transcribe_stream(file: UploadFile = File(...)):
+    """Transcripción segmentada como NDJSON: un evento por segmento y uno final.
+
+    Cada evento ``partial`` incluye el análisis NLU del texto acumulado, de modo que la
+    intención suele estar disponible con el primer segmento de una nota larga.
+    """
+    if file.content_type not in SUPPORTED_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Formato no soportado")
+    try:
+        # El upload se lee antes de responder: FastAPI lo cierra al volver del endpoint
+        raw = await read_upload_capped(file, get_settings().AUDIO_MAX_BYTES)
+    except AudioTooLarge:
+        raise HTTPException(status_code=413, detail="Audio demasiado grande")
+
+    async def events():
+        async for event in transcribe_audio_stream(raw):
+            if event["type"] in ("partial", "final") and event.get("text"):
+                event["nlu"] = nlu.analyze_cached(event["text"])
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
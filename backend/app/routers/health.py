@@ -4,11 +4,10 @@
 from datetime import datetime, timezone
 from typing import Dict, Optional
 
-import redis.asyncio as redis
 import structlog
 from app.core.config import get_settings
 from app.core.database import get_db
-from app.core.redis import get_redis_pool
+from app.core.redis import get_redis_client
 from app.metrics import ICAL_LAST_SYNC_AGE_MIN
 from app.models import Accommodation
 from fastapi import APIRouter, Depends
@@ -56,8 +55,7 @@ async def health_check(db: AsyncSession = Depends(get_db)) -> Dict:
     # Check Redis with latency
     redis_start = time.monotonic()
     try:
-        pool = get_redis_pool()
-        redis_conn = redis.Redis(connection_pool=pool)
+        redis_conn = get_redis_client()
         await redis_conn.ping()
         redis_latency_ms = round((time.monotonic() - redis_start) * 1000, 2)
         redis_status = "ok"
@@ -74,7 +72,6 @@ async def health_check(db: AsyncSession = Depends(get_db)) -> Dict:
             "connected_clients": info.get("connected_clients"),
             "used_memory_human": info.get("used_memory_human"),
         }
-        await redis_conn.close()
     except Exception as e:
         redis_latency_ms = round((time.monotonic() - redis_start) * 1000, 2)
         health_status["checks"]["redis"] = {
@@ -4,13 +4,12 @@
 from typing import Any, Dict, List, Optional
 
 from app.core.database import get_db
-from app.metrics import NLU_PRE_RESERVE
-from app.models import Accommodation
+from app.metrics import NLU_BATCH_SIZE, NLU_PRE_RESERVE
 from app.services import nlu as nlu_service
+from app.services.accommodation_index import get_accommodation_index
 from app.services.reservations import ReservationService
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/nlu", tags=["nlu"])
@@ -27,6 +26,32 @@ class AnalyzeResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
 
 
+MAX_BATCH_SIZE = 500
+
+
+class BatchItem(BaseModel):
+    text: str = Field(..., min_length=1)
+    accommodation_id: Optional[int] = None
+
+
+class BatchAnalyzeRequest(BaseModel):
+    items: List[BatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchAnalyzeResult(BaseModel):
+    nlu: Dict[str, Any]
+    action: str  # ready | needs_slots
+    accommodation_id: Optional[int] = None
+    check_in: Optional[date] = None
+    check_out: Optional[date] = None
+    missing: List[str] = []
+
+
+class BatchAnalyzeResponse(BaseModel):
+    count: int
+    results: List[BatchAnalyzeResult]
+
+
 def _parse_dates(dates: List[str]) -> Optional[tuple[date, date]]:
     if not dates:
         return None
@@ -42,26 +67,14 @@ def _parse_dates(dates: List[str]) -> Optional[tuple[date, date]]:
     return None
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(payload: AnalyzeRequest, db: AsyncSession = Depends(get_db)):
-    analysis = nlu_service.analyze(payload.text)
-
-    # Extraer slots
-    dates = analysis.get("dates") or []
-    guests = analysis.get("guests")
-    parsed = _parse_dates(dates)
+def _slots(
+    analysis: Dict[str, Any], acc_id: Optional[int]
+) -> tuple[Optional[date], Optional[date], List[str]]:
+    """check_in, check_out y slots faltantes para pre-reservar."""
+    parsed = _parse_dates(analysis.get("dates") or [])
     check_in: Optional[date] = parsed[0] if parsed else None
     check_out: Optional[date] = parsed[1] if parsed else None
 
-    # Resolver alojamiento
-    acc_id = payload.accommodation_id
-    if not acc_id:
-        # Si hay exactamente 1 alojamiento activo, usarlo
-        q = await db.execute(select(Accommodation).where(Accommodation.active.is_(True)).limit(2))
-        rows = q.scalars().all()
-        if len(rows) == 1:
-            acc_id = rows[0].id
-
     missing: List[str] = []
     if not acc_id:
         missing.append("accommodation_id")
@@ -69,8 +82,21 @@ async def analyze(payload: AnalyzeRequest, db: AsyncSession = Depends(get_db)):
         missing.append("check_in")
     if not check_out:
         missing.append("check_out")
-    if not guests:
+    if not analysis.get("guests"):
         missing.append("guests")
+    return check_in, check_out, missing
+
+
+@router.post("/analyze", response_model=AnalyzeResponse)
+async def analyze(payload: AnalyzeRequest, db: AsyncSession = Depends(get_db)):
+    analysis = nlu_service.analyze_cached(payload.text)
+    guests = analysis.get("guests")
+
+    # Resolver alojamiento: explícito, único activo o mencionado por nombre
+    acc_id = payload.accommodation_id or (await get_accommodation_index(db)).resolve_id(
+        payload.text
+    )
+    check_in, check_out, missing = _slots(analysis, acc_id)
 
     if missing:
         NLU_PRE_RESERVE.labels(action="needs_slots", source="api").inc()
@@ -94,3 +120,32 @@ async def analyze(payload: AnalyzeRequest, db: AsyncSession = Depends(get_db)):
         return AnalyzeResponse(nlu=analysis, action="error", data=result)
     NLU_PRE_RESERVE.labels(action="pre_reserved", source="api").inc()
     return AnalyzeResponse(nlu=analysis, action="pre_reserved", data=result)
+
+
+@router.post("/analyze:batch", response_model=BatchAnalyzeResponse)
+async def analyze_batch(payload: BatchAnalyzeRequest, db: AsyncSession = Depends(get_db)):
+    """Analizar hasta MAX_BATCH_SIZE mensajes en un request (sin crear pre-reservas).
+
+    Pensado para backfills de analytics sobre conversaciones históricas y load tests del
+    NLU: el análisis usa ``analyze_many`` (un ``now`` común, textos repetidos una sola
+    vez) y el índice de alojamientos se obtiene una sola vez para todo el lote.
+    """
+    analyses = nlu_service.analyze_many(item.text for item in payload.items)
+    index = await get_accommodation_index(db)
+
+    results = []
+    for item, analysis in zip(payload.items, analyses):
+        acc_id = item.accommodation_id or index.resolve_id(item.text)
+        check_in, check_out, missing = _slots(analysis, acc_id)
+        results.append(
+            BatchAnalyzeResult(
+                nlu=analysis,
+                action="needs_slots" if missing else "ready",
+                accommodation_id=acc_id,
+                check_in=check_in,
+                check_out=check_out,
+                missing=missing,
+            )
+        )
+    NLU_BATCH_SIZE.observe(len(results))
+    return BatchAnalyzeResponse(count=len(results), results=results)
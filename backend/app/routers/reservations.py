@@ -3,7 +3,8 @@
 from typing import Any, Dict, Optional
 
 from app.core.database import get_db
-from app.models import Accommodation, Reservation
+from app.models import Reservation
+from app.services.catalog import get_active_accommodations
 from app.services.reservations import ReservationService
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
@@ -110,8 +111,7 @@ async def cancel_reservation(
 @router.get("/accommodations")
 async def list_accommodations(db: AsyncSession = Depends(get_db)):
     """List all active accommodations (for E2E tests)."""
-    result = await db.execute(select(Accommodation).where(Accommodation.active.is_(True)))
-    accommodations = result.scalars().all()
+    accommodations = await get_active_accommodations(db)
     return [
         {
             "id": acc.id,
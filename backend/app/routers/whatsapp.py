@@ -6,14 +6,10 @@
 
 from app.core.database import get_db
 from app.core.security import verify_whatsapp_signature
-from app.metrics import NLU_PRE_RESERVE
-from app.models import Accommodation
-from app.services import nlu
 from app.services.button_handlers import handle_button_callback
-from app.services.reservations import ReservationService
-from app.services.whatsapp import send_text_message
+from app.services.media_pipeline import media_pipeline_enabled, schedule_audio_message
+from app.services.message_flow import handle_text_message
 from fastapi import APIRouter, Depends, Query, Request
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
@@ -97,7 +93,7 @@ async def whatsapp_webhook(request: Request, db: AsyncSession = Depends(get_db))
         texto = (msg.get("text") or {}).get("body")
     elif msg_type == "audio":
         audio = msg.get("audio", {})
-        media_url = audio.get("id")  # En la API real se intercambia por URL via /{media-id}
+        media_url = audio.get("id")  # media_id: el pipeline lo resuelve a URL via /{media-id}
         metadata["mime_type"] = audio.get("mime_type")
         metadata["voice"] = audio.get("voice")
         metadata["file_size"] = audio.get("file_size")
@@ -152,7 +148,7 @@ async def whatsapp_webhook(request: Request, db: AsyncSession = Depends(get_db))
         "media_url": media_url,
         "metadata": metadata,
     }
-    # Orquestación mínima: si es texto, intentar NLU -> pre-reserva
+    # Orquestación mínima: texto -> NLU -> pre-reserva; audio -> pipeline de media
     try:
         if msg_type == "text" and (texto or "").strip():
             # Si es callback de botón, manejar primero
@@ -165,105 +161,15 @@ async def whatsapp_webhook(request: Request, db: AsyncSession = Depends(get_db))
                 normalized["button_result"] = button_result
                 return normalized
 
-            # Si no es botón, procesar con NLU
-            analysis = nlu.analyze(texto or "")
-            normalized["nlu"] = analysis
-
-            # Extraer slots
-            dates = analysis.get("dates") or []
-            guests = analysis.get("guests")
-            parsed: list[str] = [d for d in dates if isinstance(d, str)]
-            check_in_iso: Optional[str] = (
-                parsed[0] if len(parsed) >= 2 else (parsed[0] if len(parsed) == 1 else None)
-            )
-            check_out_iso: Optional[str] = parsed[1] if len(parsed) >= 2 else None
-
-            missing = []
-            # Resolver alojamiento: si hay exactamente 1 activo
-            acc_id: Optional[int] = None
-            q = await db.execute(
-                select(Accommodation).where(Accommodation.active.is_(True)).limit(2)
-            )
-            accs = q.scalars().all()
-            if len(accs) == 1:
-                acc_id = accs[0].id
-            else:
-                missing.append("accommodation_id")
-
-            if not check_in_iso:
-                missing.append("check_in")
-            if not check_out_iso:
-                missing.append("check_out")
-            if not guests:
-                missing.append("guests")
-
-            if missing:
-                normalized["auto_action"] = "needs_slots"
-                normalized["missing"] = missing
-                try:
-                    NLU_PRE_RESERVE.labels(action="needs_slots", source="whatsapp").inc()
-                except Exception:
-                    pass
-                # Enviar prompt simple de slots faltantes (no-op en dev/test)
-                try:
-                    missing_human = ", ".join(missing)
-                    await send_text_message(
-                        str(from_user), f"Para avanzar necesito: {missing_human}."
-                    )
-                except Exception:
-                    pass
-                return normalized
-
-            # Crear pre-reserva
-            from datetime import date as _date
-
-            try:
-                ci = _date.fromisoformat(check_in_iso)  # type: ignore[arg-type]
-                co = _date.fromisoformat(check_out_iso)  # type: ignore[arg-type]
-            except Exception:
-                normalized["auto_action"] = "needs_slots"
-                normalized["missing"] = ["check_in", "check_out"]
-                return normalized
-
-            service = ReservationService(db)
-            result = await service.create_prereservation(
-                accommodation_id=acc_id,  # type: ignore[arg-type]
-                check_in=ci,
-                check_out=co,
-                guests=int(guests),
-                channel="whatsapp",
-                contact_name="Cliente WhatsApp",
-                contact_phone=str(from_user),
-                contact_email=None,
-            )
-            if result.get("error"):
-                normalized["auto_action"] = "error"
-                normalized["error"] = result["error"]
-                try:
-                    NLU_PRE_RESERVE.labels(action="error", source="whatsapp").inc()
-                except Exception:
-                    pass
-                try:
-                    await send_text_message(
-                        str(from_user), f"No pude crear la pre-reserva: {result['error']}"
-                    )
-                except Exception:
-                    pass
+            # Si no es botón, procesar con NLU -> pre-reserva
+            normalized.update(await handle_text_message(db, str(from_user), texto or ""))
+        elif msg_type == "audio" and media_url:
+            # Nota de voz: descarga + transcripción + NLU en background (no bloquea a Meta)
+            if media_pipeline_enabled():
+                schedule_audio_message(message_id, str(from_user), media_url)
+                normalized["auto_action"] = "audio_queued"
             else:
-                normalized["auto_action"] = "pre_reserved"
-                normalized["pre_reservation"] = result
-                try:
-                    NLU_PRE_RESERVE.labels(action="pre_reserved", source="whatsapp").inc()
-                except Exception:
-                    pass
-                try:
-                    code = result.get("code", "")
-                    exp = result.get("expires_at", "")
-                    await send_text_message(
-                        str(from_user), f"Listo! Pre-reserva {code} creada. Vence: {exp}"
-                    )
-                except Exception:
-                    pass
+                normalized["auto_action"] = "audio_unavailable"
     except Exception:  # pragma: no cover - no romper webhook ante errores no previstos
         normalized["auto_action"] = "error"
         normalized["error"] = "internal"
@@ -1,4 +1,5 @@
 """Schemas Pydantic para endpoints de administración."""
+from datetime import date
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
@@ -28,16 +29,39 @@ class DashboardHealth(BaseModel):
     """Estado de salud del sistema."""
 
     status: str = Field(description="healthy | degraded | unhealthy")
-    db_latency_ms: int = Field(description="Latencia DB en ms")
-    redis_latency_ms: int = Field(description="Latencia Redis en ms")
-    ical_last_sync_age_minutes: int = Field(description="Minutos desde última sync iCal")
+    db_latency_ms: int = Field(description="Latencia DB en ms (consulta agregada)")
+    redis_latency_ms: Optional[int] = Field(description="Latencia Redis en ms")
+    ical_last_sync_age_minutes: Optional[int] = Field(
+        description="Minutos desde última sync iCal (None si nunca sincronizó)"
+    )
 
 
 class DashboardPerformance(BaseModel):
     """Métricas de performance."""
 
-    error_rate: float = Field(description="Tasa de error (%)")
-    p95_latency_ms: int = Field(description="P95 latencia en ms")
+    error_rate: float = Field(description="Tasa de error 5xx (%) de todos los workers")
+    p50_latency_ms: int = Field(0, description="P50 latencia HTTP en ms")
+    p95_latency_ms: int = Field(description="P95 latencia HTTP en ms de todos los workers")
+    p99_latency_ms: int = Field(0, description="P99 latencia HTTP en ms")
+
+
+class PerfGroupStats(BaseModel):
+    """Latencias y errores de un grupo de rutas (o del total)."""
+
+    requests: int
+    error_rate: float = Field(description="Tasa de error 5xx (%)")
+    p50_latency_ms: float
+    p95_latency_ms: float
+    p99_latency_ms: float
+
+
+class PerfResponse(BaseModel):
+    """Performance HTTP agregada de todos los workers en la ventana."""
+
+    window_minutes: int
+    source: str = Field(description="redis (todos los workers) | local (solo este worker)")
+    overall: PerfGroupStats
+    groups: Dict[str, PerfGroupStats]
 
 
 class DashboardResponse(BaseModel):
@@ -182,6 +206,35 @@ class CancelReservationRequest(BaseModel):
     )
 
 
+class BulkReservationFilter(BaseModel):
+    """Filtros del listado para elegir reservas de una acción en bloque."""
+
+    status: Optional[str] = None
+    accommodation_id: Optional[int] = None
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    search: Optional[str] = None
+
+
+class BulkActionRequest(BaseModel):
+    """Request de acción en bloque: ``codes`` o ``filter`` (uno de los dos)."""
+
+    codes: Optional[List[str]] = Field(default=None, description="Códigos de reserva")
+    filter: Optional[BulkReservationFilter] = Field(default=None, description="Filtros")
+    reason: Optional[str] = Field(default=None, description="Motivo (cancelación)")
+
+
+class BulkActionResponse(BaseModel):
+    """Resultado de una acción en bloque."""
+
+    action: str
+    requested: int = Field(description="Reservas seleccionadas")
+    updated: List[str] = Field(description="Códigos procesados")
+    skipped: List[str] = Field(description="Códigos sin cambios (estado inválido / sin email)")
+    notifications_queued: int
+    timestamp: str
+
+
 class ActionResponse(BaseModel):
     """Respuesta genérica de acciones."""
 
@@ -217,6 +270,45 @@ class CalendarResponse(BaseModel):
     occupancy_rate: float = Field(description="Tasa de ocupación del mes (%)")
 
 
+class CalendarNight(BaseModel):
+    """Noche ocupada de un alojamiento."""
+
+    accommodation_id: int
+    night: date
+    status: str = Field(description="pre_reserved | confirmed")
+    reservation_id: int
+
+
+class CalendarNightsResponse(BaseModel):
+    """Grilla de noches ocupadas de un rango."""
+
+    from_date: date
+    to_date: date
+    nights: List[CalendarNight]
+
+
+class OccupancyDay(BaseModel):
+    """Ocupación de un día."""
+
+    day: date
+    confirmed: int
+    pre_reserved: int
+    occupancy_rate: float = Field(description="Confirmadas / alojamientos (%)")
+
+
+class OccupancyResponse(BaseModel):
+    """Ocupación de un rango de fechas."""
+
+    from_date: date
+    to_date: date
+    accommodations: int
+    nights_available: int
+    nights_confirmed: int
+    nights_pre_reserved: int
+    occupancy_rate: float = Field(description="Confirmadas / (días × alojamientos) (%)")
+    days: List[OccupancyDay]
+
+
 # ============================================================================
 # Webhooks Monitor Schemas
 # ============================================================================
@@ -0,0 +1,182 @@
+"""Índice de nombres de alojamientos para resolver menciones en mensajes del NLU.
+
+Con más de un alojamiento activo, el flujo NLU pedía siempre ``accommodation_id``.
+Este índice resuelve menciones como "la cabaña del lago" o "el depto centro" contra
+el catálogo en memoria:
+
+- Nombres y alias (``location["aliases"]``, opcional) normalizados: minúsculas, sin
+  tildes, sin stopwords ni palabras genéricas (cabaña, casa, depto...).
+- Match exacto de la frase completa del nombre/alias (gana siempre).
+- Match por token distintivo ("lago") exacto o difuso por similitud de trigramas
+  (tolera errores de tipeo: "bosqe" -> "bosque").
+- Se exige un ganador claro: empates o scores cercanos devuelven ``None``.
+
+El índice se reconstruye solo cuando cambia el snapshot del catálogo (recarga por
+versión en Redis, ver ``app.services.catalog``).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import structlog
+from app.services.catalog import AccommodationSnapshot, CatalogSnapshot, catalog
+from app.services.date_grammar import normalize
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+STOPWORDS = frozenset({"el", "la", "los", "las", "de", "del", "y", "en", "al", "un", "una"})
+GENERIC_WORDS = frozenset(
+    {
+        "cabana",
+        "cabanas",
+        "casa",
+        "depto",
+        "dpto",
+        "departamento",
+        "apartamento",
+        "loft",
+        "suite",
+        "habitacion",
+        "cuarto",
+        "domo",
+    }
+)
+FUZZY_MIN_SCORE = 0.4
+MIN_MARGIN = 0.1
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+NAME_RESOLUTIONS = Counter(
+    "accommodation_name_resolutions_total",
+    "Resolución de alojamientos mencionados en mensajes",
+    ["result"],  # phrase | token | fuzzy | ambiguous | none
+)
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(normalize(text))
+
+
+def trigrams(token: str) -> FrozenSet[str]:
+    padded = f"  {token} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    accommodation_id: int
+    score: float
+    method: str  # phrase | token | fuzzy
+    matched: str
+
+
+class AccommodationIndex:
+    """Índice inmutable construido a partir de un snapshot del catálogo."""
+
+    def __init__(self, accommodations: Tuple[AccommodationSnapshot, ...]) -> None:
+        self.size = len(accommodations)
+        # Con un único alojamiento activo no hace falta mencionarlo
+        self.only_id: Optional[int] = accommodations[0].id if self.size == 1 else None
+        self._phrases: Dict[str, Set[int]] = {}
+        self._vocab: Dict[str, Set[int]] = {}
+        for acc in accommodations:
+            aliases = acc.location.get("aliases") or ()
+            for name in (acc.name, *aliases):
+                tokens = _tokens(str(name))
+                if not tokens:
+                    continue
+                self._phrases.setdefault(" ".join(tokens), set()).add(acc.id)
+                for token in tokens:
+                    if token in STOPWORDS or token in GENERIC_WORDS or token.isdigit():
+                        continue
+                    self._vocab.setdefault(token, set()).add(acc.id)
+        self._vocab_trigrams = {token: trigrams(token) for token in self._vocab}
+        # Frases más largas primero para que "cabana 10" no matchee como "cabana 1"
+        phrases = sorted(self._phrases, key=len, reverse=True)
+        self._phrase_pattern = (
+            re.compile(r"\b(?:" + "|".join(re.escape(p) for p in phrases) + r")\b")
+            if phrases
+            else None
+        )
+
+    def resolve_id(self, text: str) -> Optional[int]:
+        """Alojamiento para ``text``: el único activo, o el mencionado por nombre/alias."""
+        if self.only_id is not None:
+            return self.only_id
+        match = self.resolve(text)
+        return match.accommodation_id if match else None
+
+    def resolve(self, text: str) -> Optional[NameMatch]:
+        """Alojamiento mencionado en ``text`` o None si no hay uno claro."""
+        match, reason = self._resolve(text)
+        NAME_RESOLUTIONS.labels(result=match.method if match else reason).inc()
+        return match
+
+    def _resolve(self, text: str) -> Tuple[Optional[NameMatch], str]:
+        """``(match, método)`` o ``(None, motivo)`` con motivo ``none`` | ``ambiguous``."""
+        tokens = _tokens(text)
+        if self._phrase_pattern is not None:
+            found = {
+                acc_id
+                for m in self._phrase_pattern.finditer(" ".join(tokens))
+                for acc_id in self._phrases[m.group()]
+            }
+            if len(found) == 1:
+                (acc_id,) = found
+                return NameMatch(acc_id, 1.0, "phrase", ""), "phrase"
+
+        scores: Dict[int, Tuple[float, str, str]] = {}
+        for token in tokens:
+            if token in STOPWORDS or token in GENERIC_WORDS or len(token) < 3:
+                continue
+            if token in self._vocab:
+                candidates = [(token, 1.0)]
+            else:
+                token_trigrams = trigrams(token)
+                candidates = [
+                    (word, _similarity(token_trigrams, word_trigrams))
+                    for word, word_trigrams in self._vocab_trigrams.items()
+                ]
+            for word, score in candidates:
+                if score < FUZZY_MIN_SCORE:
+                    continue
+                method = "token" if score == 1.0 else "fuzzy"
+                for acc_id in self._vocab[word]:
+                    if score > scores.get(acc_id, (0.0, "", ""))[0]:
+                        scores[acc_id] = (score, method, word)
+
+        if not scores:
+            return None, "none"
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)
+        best_id, (best, method, word) = ranked[0]
+        if len(ranked) > 1 and best - ranked[1][1][0] < MIN_MARGIN:
+            return None, "ambiguous"
+        return NameMatch(best_id, round(best, 3), method, word), method
+
+
+_index: Optional[AccommodationIndex] = None
+_indexed_snapshot: Optional[CatalogSnapshot] = None
+
+
+async def get_accommodation_index(db: AsyncSession) -> AccommodationIndex:
+    """Índice de los alojamientos activos; se reconstruye si el catálogo cambió."""
+    global _index, _indexed_snapshot
+    snapshot = await catalog.snapshot(db)
+    if _index is None or snapshot is not _indexed_snapshot:
+        _index = AccommodationIndex(snapshot.active)
+        _indexed_snapshot = snapshot
+        logger.info("accommodation_index_built", version=snapshot.version, size=_index.size)
+    return _index
+
+
+async def resolve_accommodation_id(db: AsyncSession, text: str) -> Optional[int]:
+    """Atajo de ``AccommodationIndex.resolve_id`` sobre el índice vigente."""
+    return (await get_accommodation_index(db)).resolve_id(text)
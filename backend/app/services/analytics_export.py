@@ -0,0 +1,280 @@
+"""Export columnar (Parquet / Arrow IPC) de reservas, pagos y alojamientos.
+
+Para análisis el CSV pierde tipos (precios Decimal, timestamps con zona) y hay que
+volver a parsearlo. Este export arma ``pyarrow.RecordBatch`` tipados directamente
+desde los lotes del cursor de la DB (``session.stream`` + ``yield_per``) y los
+escribe como row groups de Parquet o mensajes de un stream Arrow IPC a medida que
+llegan: la memoria queda acotada a un lote.
+
+- Endpoint admin: ``GET /admin/exports/{table}?format=parquet|arrow&from_date&to_date``
+- CLI: ``scripts/export_analytics.py`` (particiona por mes/día en directorios
+  ``{table}/{partition}=.../part-0.parquet``, estilo Hive)
+
+``pyarrow`` es una dependencia opcional: sin instalar, el endpoint responde 503.
+Se excluyen datos personales de huéspedes y secretos (tokens iCal).
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from app.core.database import async_session_maker
+from app.models import Accommodation, Payment, Reservation
+from sqlalchemy import JSON, Boolean, Date, DateTime, Integer, Numeric, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+EXPORT_BATCH_SIZE = 5000
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+PARTITIONS = ("month", "day", "none")
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    model: Any
+    partition_column: Any
+    exclude: frozenset = frozenset()
+
+    @property
+    def columns(self) -> List[Any]:
+        return [
+            c
+            for c in self.model.__table__.columns
+            if c.name not in self.exclude and not isinstance(c.type, JSON)
+        ]
+
+
+EXPORT_TABLES: Dict[str, ExportTable] = {
+    "reservations": ExportTable(
+        Reservation,
+        Reservation.created_at,
+        frozenset(
+            {
+                "guest_name",
+                "guest_phone",
+                "guest_phone_digits",
+                "guest_email",
+                "guest_document",
+                "internal_notes",
+                "special_requests",
+                "lock_value",
+            }
+        ),
+    ),
+    "payments": ExportTable(Payment, Payment.created_at),
+    "accommodations": ExportTable(
+        Accommodation, Accommodation.created_at, frozenset({"ical_export_token"})
+    ),
+}
+
+
+class AnalyticsExportUnavailable(RuntimeError):
+    """pyarrow no está instalado."""
+
+
+def _require_pyarrow() -> Any:
+    if not PYARROW_AVAILABLE:
+        raise AnalyticsExportUnavailable("pyarrow no instalado")
+    import pyarrow as pa
+
+    return pa
+
+
+def _arrow_type(pa: Any, column: Any) -> Any:
+    column_type = column.type
+    if isinstance(column_type, Numeric):
+        return pa.decimal128(column_type.precision or 18, column_type.scale or 2)
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    return pa.string()  # String, Text, UUID
+
+
+def arrow_schema(table: ExportTable) -> Any:
+    pa = _require_pyarrow()
+    return pa.schema(
+        [pa.field(c.name, _arrow_type(pa, c), nullable=c.nullable) for c in table.columns]
+    )
+
+
+def _convert(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)  # SQLite devuelve naive (UTC)
+    return value
+
+
+def _utc_bound(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def export_statement(
+    table: ExportTable, from_date: Optional[date] = None, to_date: Optional[date] = None
+) -> Any:
+    """SELECT del rango ``[from_date, to_date)`` sobre la columna de partición."""
+    stmt = select(*table.columns)
+    if from_date:
+        stmt = stmt.where(table.partition_column >= _utc_bound(from_date))
+    if to_date:
+        stmt = stmt.where(table.partition_column < _utc_bound(to_date))
+    return stmt.order_by(table.partition_column, table.model.id).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+
+
+async def iter_record_batches(
+    session: AsyncSession,
+    table: ExportTable,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+) -> AsyncIterator[Any]:
+    """``RecordBatch`` tipados, uno por lote del cursor."""
+    pa = _require_pyarrow()
+    schema = arrow_schema(table)
+    result = await session.stream(export_statement(table, from_date, to_date))
+    async for rows in result.partitions():
+        columns = list(zip(*rows))
+        yield pa.record_batch(
+            [
+                pa.array([_convert(v) for v in values], type=field.type)
+                for values, field in zip(columns, schema)
+            ],
+            schema=schema,
+        )
+
+
+class _ChunkSink:
+    """Destino file-like que acumula lo escrito para drenarlo en cada lote."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def new_writer(fmt: str, sink: Any, schema: Any) -> Any:
+    """Writer Parquet (un row group por lote) o Arrow IPC stream."""
+    pa = _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+
+async def stream_export(
+    table: ExportTable,
+    fmt: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+) -> AsyncIterator[bytes]:
+    """Bytes del archivo Parquet/Arrow emitidos a medida que se escribe cada lote.
+
+    Abre su propia sesión (se consume dentro de un ``StreamingResponse``).
+    """
+    pa = _require_pyarrow()
+    sink = _ChunkSink()
+    writer = new_writer(fmt, pa.PythonFile(sink, mode="w"), arrow_schema(table))
+    async with async_session_maker() as session:
+        try:
+            async for batch in iter_record_batches(session, table, from_date, to_date):
+                writer.write_batch(batch)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            writer.close()
+    yield sink.drain()
+
+
+def partition_ranges(
+    from_date: date, to_date: date, partition: str
+) -> Iterator[Tuple[str, date, date]]:
+    """Rangos ``(etiqueta, desde, hasta)`` que cubren ``[from_date, to_date)``."""
+    if partition == "none":
+        yield "all", from_date, to_date
+        return
+    start = from_date
+    while start < to_date:
+        if partition == "day":
+            end = start + timedelta(days=1)
+            label = start.isoformat()
+        else:
+            end = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            label = start.strftime("%Y-%m")
+        end = min(end, to_date)
+        yield label, start, end
+        start = end
+
+
+async def export_to_directory(
+    session: AsyncSession,
+    table_name: str,
+    fmt: str,
+    out_dir: Path,
+    from_date: date,
+    to_date: date,
+    partition: str = "month",
+) -> List[Tuple[Path, int]]:
+    """Escribir ``{out_dir}/{table}/{partition}={label}/part-0.{ext}``; devuelve (path, filas).
+
+    Las particiones sin filas no generan archivo.
+    """
+    pa = _require_pyarrow()
+    table = EXPORT_TABLES[table_name]
+    schema = arrow_schema(table)
+    _, ext = FORMATS[fmt]
+    written: List[Tuple[Path, int]] = []
+    for label, start, end in partition_ranges(from_date, to_date, partition):
+        path = out_dir / table_name / f"{partition}={label}" / f"part-0.{ext}"
+        sink = writer = None
+        rows = 0
+        try:
+            async for batch in iter_record_batches(session, table, start, end):
+                if writer is None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    sink = pa.OSFile(str(path), "wb")
+                    writer = new_writer(fmt, sink, schema)
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+            if sink is not None:
+                sink.close()
+        if rows:
+            written.append((path, rows))
+    return written
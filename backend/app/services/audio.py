@@ -1,87 +1,215 @@
-import io
+import hashlib
+import importlib.util
+import json
 import uuid
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
+import structlog
 from app.core.config import get_settings
+from app.core.redis import get_redis_client
+from app.services.transcription import (
+    AudioDecodeError,
+    TranscriptionQueueFull,
+    TranscriptionTimeout,
+    confidence_from_logprobs,
+    get_transcription_pool,
+)
 from fastapi import UploadFile
+from prometheus_client import Counter
 
-try:  # pragma: no cover - carga perezosa del modelo (puede ser pesado)
-    import whisper  # type: ignore
-
-    WHISPER_AVAILABLE = True
-except Exception:  # pragma: no cover
-    whisper = None  # type: ignore
-    WHISPER_AVAILABLE = False
+# Whisper se importa solo en los workers del pool (app.services.transcription);
+# el proceso API únicamente verifica que esté instalado.
+WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
 
 settings = get_settings()
+logger = structlog.get_logger()
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+TRANSCRIPTION_CACHE_LOOKUPS = Counter(
+    "audio_transcription_cache_lookups_total",
+    "Consultas al cache de transcripciones por hash del audio",
+    ["result"],  # hit | miss | error
+)
+
 
-_model_instance = None  # type: ignore
+class AudioTooLarge(Exception):
+    """El audio supera AUDIO_MAX_BYTES."""
+
+
+async def read_upload_capped(
+    file: UploadFile, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> bytes:
+    """Leer un UploadFile por chunks cortando apenas se supera ``max_bytes``.
+
+    Evita cargar en memoria uploads arbitrariamente grandes antes de validar el tamaño.
+    """
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return bytes(buffer)
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise AudioTooLarge()
 
 
-def get_model():  # type: ignore
-    global _model_instance
-    if not WHISPER_AVAILABLE:
+def transcription_enabled() -> bool:
+    return WHISPER_AVAILABLE and settings.AUDIO_WORKERS > 0
+
+
+def transcription_cache_key(raw: bytes, model_name: str) -> str:
+    """Clave direccionada por contenido: mismo audio + mismo modelo -> misma transcripción."""
+    return f"transcription:{model_name}:{hashlib.sha256(raw).hexdigest()}"
+
+
+async def get_cached_transcription(key: str) -> Optional[Dict[str, Any]]:
+    """Transcripción cacheada ({text, confidence}) o None. Falla abierto si Redis no responde."""
+    if settings.AUDIO_TRANSCRIPTION_CACHE_TTL_SECONDS <= 0:
+        return None
+    try:
+        cached = await get_redis_client().get(key)
+    except Exception as e:
+        TRANSCRIPTION_CACHE_LOOKUPS.labels(result="error").inc()
+        logger.warning("transcription_cache_get_failed", error=str(e))
+        return None
+    if cached is None:
+        TRANSCRIPTION_CACHE_LOOKUPS.labels(result="miss").inc()
         return None
-    if _model_instance is None and whisper is not None:
-        # Uso CPU por simplicidad MVP
-        _model_instance = whisper.load_model(settings.AUDIO_MODEL)
-    return _model_instance
+    TRANSCRIPTION_CACHE_LOOKUPS.labels(result="hit").inc()
+    return json.loads(cached)
+
+
+async def store_transcription(key: str, text: str, confidence: float) -> None:
+    ttl = settings.AUDIO_TRANSCRIPTION_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return
+    payload = json.dumps({"text": text, "confidence": confidence}, ensure_ascii=False)
+    try:
+        await get_redis_client().set(key, payload, ex=ttl)
+    except Exception as e:
+        logger.warning("transcription_cache_set_failed", error=str(e))
 
 
 async def transcribe_audio(file: UploadFile) -> Dict[str, Any]:
     """Transcribe audio OGG/OPUS -> texto
 
     Pipeline mínima MVP:
-    - Lee bytes en memoria (evita escribir disco)
-    - Intenta transcribir (si modelo no disponible -> devuelve pseudo low confidence)
+    - Lee bytes en memoria por chunks con tope AUDIO_MAX_BYTES (sin archivos temporales)
+    - Busca primero en el cache (sha256 del audio + modelo): reenvíos y reintentos del
+      mismo audio no vuelven a correr inferencia
+    - Transcribe en el pool de procesos; el worker decodifica a PCM por pipe de ffmpeg
+      (si modelo no disponible -> devuelve pseudo low confidence)
     - Calcula confidence promedio simple (promedio de segment probabilities si disponible)
     - Si confidence < threshold -> error audio_unclear
     """
-    raw = await file.read()
+    try:
+        raw = await read_upload_capped(file, settings.AUDIO_MAX_BYTES)
+    except AudioTooLarge:
+        return {"error": "file_too_large"}
+    return await transcribe_audio_bytes(raw)
+
+
+async def transcribe_audio_bytes(raw: bytes) -> Dict[str, Any]:
+    """Igual que ``transcribe_audio`` para audio ya en memoria (p.ej. media de WhatsApp)."""
     if not raw:
         return {"error": "empty_file"}
 
-    model = get_model()
-    if model is None:
+    if not transcription_enabled():
         # Entorno sin modelo instalado -> forzar low confidence (MVP sin audio processing)
         return {"error": "audio_processing_not_available", "confidence": 0.0}
 
+    cache_key = transcription_cache_key(raw, settings.AUDIO_MODEL)
+    cached = await get_cached_transcription(cache_key)
+    if cached is not None:
+        return _transcription_response(cached["text"], cached["confidence"])
+
     try:
-        # whisper acepta path; para evitar escribir archivo generamos un temp en memoria
-        # Sin embargo la librería requiere filename; workaround: escribir temporal si fuese necesario.
-        # Para mantener simple y sin IO adicional intentamos usar decode con bytes buffer.
-        # Si falla (raise) devolvemos error genérico.
-        import os
-        import tempfile
-
-        with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as tmp:
-            tmp.write(raw)
-            tmp_path = tmp.name
-        result = model.transcribe(tmp_path, language="es")  # type: ignore
-        os.unlink(tmp_path)
-    except Exception:  # pragma: no cover - errores internos del modelo
-        return {"error": "processing_failed"}
-
-    text = result.get("text", "").strip()
-    segments = result.get("segments", [])
-
-    confidences = []
-    for seg in segments:  # type: ignore
-        if "avg_logprob" in seg and seg["avg_logprob"] is not None:
-            # Convertir logprob aprox (heurística) a pseudo confidence 0-1
-            # logprob suele estar negativo; aplicamos exp limitado
-            import math
-
-            conf = max(0.0, min(1.0, math.exp(seg["avg_logprob"])))
-            confidences.append(conf)
-
-    confidence = sum(confidences) / len(confidences) if confidences else 0.5
+        result = await get_transcription_pool().transcribe(raw, language="es")
+    except Exception as e:
+        return {"error": _pool_error_code(e)}
 
+    text = result["text"].strip()
+    confidence = round(confidence_from_logprobs(result["avg_logprobs"]), 3)
+    # Se cachea también el resultado de baja confianza: el mismo audio daría el mismo texto
+    await store_transcription(cache_key, text, confidence)
+    return _transcription_response(text, confidence)
+
+
+async def transcribe_audio_stream(raw: bytes) -> AsyncIterator[Dict[str, Any]]:
+    """Transcripción segmentada de notas largas con resultados parciales.
+
+    El audio se corta en silencios y los segmentos se transcriben en paralelo en el
+    pool; se emite un evento por segmento, en orden, para que el NLU pueda arrancar
+    con el primero sin esperar al resto:
+
+    - ``{"type": "partial", "index", "total", "segment_text", "text", "confidence", ...}``
+      (``text`` = texto acumulado hasta ese segmento)
+    - ``{"type": "final", ...}`` con la misma forma que ``transcribe_audio``
+    - ``{"type": "error", "error": ...}`` con los mismos códigos de error
+    """
+    if not raw:
+        yield {"type": "error", "error": "empty_file"}
+        return
+    if not transcription_enabled():
+        yield {"type": "error", "error": "audio_processing_not_available", "confidence": 0.0}
+        return
+
+    cache_key = transcription_cache_key(raw, settings.AUDIO_MODEL)
+    cached = await get_cached_transcription(cache_key)
+    if cached is not None:
+        yield _stream_final(cached["text"], cached["confidence"])
+        return
+
+    texts = []
+    avg_logprobs = []
+    try:
+        async for segment in get_transcription_pool().transcribe_segments(raw, language="es"):
+            segment_text = segment["text"].strip()
+            if segment_text:
+                texts.append(segment_text)
+            avg_logprobs.extend(segment["avg_logprobs"])
+            yield {
+                "type": "partial",
+                "index": segment["index"],
+                "total": segment["total"],
+                "start_seconds": round(segment["start_seconds"], 2),
+                "end_seconds": round(segment["end_seconds"], 2),
+                "segment_text": segment_text,
+                "text": " ".join(texts),
+                "confidence": round(confidence_from_logprobs(segment["avg_logprobs"]), 3),
+            }
+    except Exception as e:
+        yield {"type": "error", "error": _pool_error_code(e)}
+        return
+
+    text = " ".join(texts)
+    confidence = round(confidence_from_logprobs(avg_logprobs), 3)
+    await store_transcription(cache_key, text, confidence)
+    yield _stream_final(text, confidence)
+
+
+def _stream_final(text: str, confidence: float) -> Dict[str, Any]:
+    response = _transcription_response(text, confidence)
+    return {"type": "error" if "error" in response else "final", **response}
+
+
+def _pool_error_code(exc: Exception) -> str:
+    if isinstance(exc, TranscriptionQueueFull):
+        return "audio_busy"
+    if isinstance(exc, TranscriptionTimeout):
+        return "processing_timeout"
+    if isinstance(exc, AudioDecodeError):
+        return "invalid_audio"
+    return "processing_failed"  # errores internos del modelo
+
+
+def _transcription_response(text: str, confidence: float) -> Dict[str, Any]:
     if confidence < settings.AUDIO_MIN_CONFIDENCE:
-        return {"error": "audio_unclear", "confidence": round(confidence, 3)}
+        return {"error": "audio_unclear", "confidence": confidence}
 
     return {
-        "text": text.strip(),
-        "confidence": round(confidence, 3),
+        "text": text,
+        "confidence": confidence,
         "id": str(uuid.uuid4()),
     }
@@ -0,0 +1,219 @@
+"""Acciones admin en bloque sobre reservas (confirmar, cancelar, reenviar email).
+
+Las reservas se eligen por lista de códigos o por los filtros del listado
+(``reservation_filters``). Confirmar/cancelar es un único ``UPDATE ... WHERE id IN
+(...) AND <estado válido> RETURNING`` en una transacción, junto con la ocupación y
+el feed de cambios: las reservas que ya no están en un estado válido simplemente no
+se tocan y se informan como ``skipped``. Las notificaciones se encolan aparte: un
+solo evento WebSocket por lote y los emails en una tarea de fondo con concurrencia
+acotada.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import structlog
+from app.models import Accommodation, Reservation, ReservationStatus
+from app.services.change_feed import record_changes
+from app.services.email import email_service
+from app.services.occupancy import sync_reservation_nights
+from prometheus_client import Counter
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+MAX_BULK_RESERVATIONS = 5000
+EMAIL_CONCURRENCY = 10
+
+# acción -> (estados de origen válidos, estado destino)
+TRANSITIONS = {
+    "confirm": ((ReservationStatus.PRE_RESERVED.value,), ReservationStatus.CONFIRMED.value),
+    "cancel": (
+        (ReservationStatus.PRE_RESERVED.value, ReservationStatus.CONFIRMED.value),
+        ReservationStatus.CANCELLED.value,
+    ),
+}
+
+BULK_RESERVATIONS_UPDATED = Counter(
+    "admin_bulk_reservations_total", "Reservas procesadas por acciones admin en bloque", ["action"]
+)
+
+
+class BulkSelectionError(ValueError):
+    """Selección vacía, ambigua o más grande que ``MAX_BULK_RESERVATIONS``."""
+
+
+@dataclass
+class BulkResult:
+    action: str
+    requested: int
+    updated: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    notifications: List[Dict[str, Any]] = field(default_factory=list)
+
+
+async def select_targets(
+    db: AsyncSession, codes: Optional[Sequence[str]], filters: Optional[Sequence[Any]]
+) -> Dict[str, int]:
+    """``{code: id}`` de las reservas elegidas por códigos o por filtros (una sola opción)."""
+    if (codes is None) == (filters is None):
+        raise BulkSelectionError("indicar codes o filter (uno de los dos)")
+    if codes is not None:
+        unique = list(dict.fromkeys(codes))
+        if not unique:
+            raise BulkSelectionError("codes vacío")
+        if len(unique) > MAX_BULK_RESERVATIONS:
+            raise BulkSelectionError(f"máximo {MAX_BULK_RESERVATIONS} reservas por acción")
+        stmt = select(Reservation.code, Reservation.id).where(Reservation.code.in_(unique))
+    else:
+        stmt = (
+            select(Reservation.code, Reservation.id)
+            .where(*filters)
+            .order_by(Reservation.id)
+            .limit(MAX_BULK_RESERVATIONS + 1)
+        )
+    targets = {code: res_id for code, res_id in (await db.execute(stmt)).all()}
+    if len(targets) > MAX_BULK_RESERVATIONS:
+        raise BulkSelectionError(
+            f"el filtro abarca más de {MAX_BULK_RESERVATIONS} reservas; acotarlo"
+        )
+    return targets
+
+
+async def _notification_rows(db: AsyncSession, ids: Sequence[int]) -> List[Dict[str, Any]]:
+    """Datos para los emails (con nombre del alojamiento) en una sola consulta."""
+    if not ids:
+        return []
+    stmt = (
+        select(
+            Reservation.code,
+            Reservation.guest_name,
+            Reservation.guest_email,
+            Reservation.check_in,
+            Reservation.check_out,
+            Reservation.guests_count,
+            Reservation.total_price,
+            Reservation.expires_at,
+            Reservation.reservation_status,
+            Accommodation.name.label("accommodation_name"),
+        )
+        .join(Accommodation, Accommodation.id == Reservation.accommodation_id)
+        .where(Reservation.id.in_(ids), Reservation.guest_email.isnot(None))
+    )
+    return [dict(r) for r in (await db.execute(stmt)).mappings().all() if r["guest_email"]]
+
+
+async def apply_transition(
+    db: AsyncSession,
+    action: str,
+    targets: Dict[str, int],
+    reason: Optional[str] = None,
+) -> BulkResult:
+    """Transición ``action`` sobre ``targets`` en un UPDATE y una transacción."""
+    sources, target_status = TRANSITIONS[action]
+    now = datetime.now(UTC)
+    values: Dict[str, Any] = {"reservation_status": target_status}
+    if action == "confirm":
+        values.update(confirmed_at=now, payment_status="paid")
+    else:
+        values["cancelled_at"] = now
+        note = f"\n[Admin bulk cancellation] Reason: {reason}" if reason else ""
+        if note:
+            values["internal_notes"] = func.coalesce(Reservation.internal_notes, "") + note
+
+    result = BulkResult(action=action, requested=len(targets))
+    if targets:
+        stmt = (
+            update(Reservation)
+            .where(
+                Reservation.id.in_(list(targets.values())),
+                Reservation.reservation_status.in_(sources),
+            )
+            .values(**values)
+            .returning(Reservation.id, Reservation.code)
+            .execution_options(synchronize_session=False)
+        )
+        changed = (await db.execute(stmt)).all()
+        ids = [row.id for row in changed]
+        result.updated = sorted(row.code for row in changed)
+        await sync_reservation_nights(db, ids)
+        await record_changes(db, "reservation", ids)
+        result.notifications = await _notification_rows(db, ids)
+        if action == "cancel":
+            # Cancelación del admin: email propio (no el de pre-reserva expirada)
+            for row in result.notifications:
+                row["cancel_reason"] = reason
+        await db.commit()
+    updated = set(result.updated)
+    result.skipped = sorted(code for code in targets if code not in updated)
+    BULK_RESERVATIONS_UPDATED.labels(action=action).inc(len(result.updated))
+    logger.info(
+        "admin_bulk_action",
+        action=action,
+        requested=result.requested,
+        updated=len(result.updated),
+        skipped=len(result.skipped),
+    )
+    return result
+
+
+async def resend_targets(db: AsyncSession, targets: Dict[str, int]) -> BulkResult:
+    """Reenvío de emails: sin cambios de estado, solo arma las notificaciones."""
+    result = BulkResult(action="resend", requested=len(targets))
+    result.notifications = await _notification_rows(db, list(targets.values()))
+    result.updated = sorted(row["code"] for row in result.notifications)
+    result.skipped = sorted(set(targets) - set(result.updated))  # sin guest_email
+    return result
+
+
+async def _send_email(row: Dict[str, Any]) -> bool:
+    common = dict(
+        guest_email=str(row["guest_email"]),
+        guest_name=str(row["guest_name"] or "Cliente"),
+        reservation_code=str(row["code"]),
+        accommodation_name=str(row["accommodation_name"]),
+        check_in=str(row["check_in"]),
+        check_out=str(row["check_out"]),
+    )
+    status = row["reservation_status"]
+    if status == ReservationStatus.CONFIRMED.value:
+        return await email_service.send_reservation_confirmed(
+            **common,
+            guests_count=int(row["guests_count"] or 1),
+            total_amount=float(row["total_price"] or 0),
+        )
+    if status == ReservationStatus.CANCELLED.value:
+        if "cancel_reason" in row:
+            return await email_service.send_reservation_cancelled(
+                **common, reason=row["cancel_reason"]
+            )
+        return await email_service.send_reservation_expired(**common)
+    expires_at = row["expires_at"]
+    return await email_service.send_prereservation_confirmation(
+        **common,
+        guests_count=int(row["guests_count"] or 1),
+        total_amount=float(row["total_price"] or 0),
+        expires_at=expires_at.isoformat() if expires_at is not None else "",
+    )
+
+
+async def send_notification_emails(rows: Sequence[Dict[str, Any]]) -> int:
+    """Enviar los emails de un lote con concurrencia acotada (tarea de fondo)."""
+    semaphore = asyncio.Semaphore(EMAIL_CONCURRENCY)
+
+    async def send(row: Dict[str, Any]) -> bool:
+        async with semaphore:
+            try:
+                return await _send_email(row)
+            except Exception as e:
+                logger.warning("admin_bulk_email_failed", code=row["code"], error=str(e))
+                return False
+
+    sent = sum(await asyncio.gather(*(send(row) for row in rows)))
+    logger.info("admin_bulk_emails_sent", sent=sent, total=len(rows))
+    return sent
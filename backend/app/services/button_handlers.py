@@ -4,25 +4,17 @@
 from decimal import Decimal
 from typing import Any, Dict, Optional
 
-from app.models import Accommodation, Reservation
+from app.models import Reservation
 from app.services import whatsapp
-from app.services.conversation_state import (
-    delete_user_context,
-    get_user_context,
-    set_user_context,
-    update_user_context,
-)
+from app.services.catalog import get_accommodation, get_active_accommodations
+from app.services.conversation_state import ConversationSession, conversation_session
 from app.services.interactive_buttons import (
-    build_accommodations_list,
     build_confirmation_buttons,
-    build_date_ranges_list,
-    build_guests_selection_buttons,
-    build_help_topics_list,
     build_my_reservations_actions,
-    format_availability_prompt_with_dates,
     format_payment_link_with_buttons,
     format_prereservation_with_buttons,
-    format_welcome_with_menu,
+    get_template,
+    render_accommodations_list,
 )
 from app.services.reservations import ReservationService
 from sqlalchemy import select
@@ -45,33 +37,41 @@ async def handle_button_callback(
     Returns:
         Dict con resultado: {"action": "...", ...}
     """
-    # 🔄 Cargar contexto de conversación
-    context = await get_user_context(user_phone) or {}
+    # 🔄 Cargar contexto una sola vez; los cambios se escriben juntos al final
+    async with conversation_session(user_phone) as session:
+        # Actualizar último activity
+        session.update({"last_button": button_id})
+        return await _dispatch_button(button_id, user_phone, db, session)
 
-    # Actualizar último activity
-    await update_user_context(user_phone, {"last_button": button_id}, reset_ttl=True)
 
+async def _dispatch_button(
+    button_id: str,
+    user_phone: str,
+    db: AsyncSession,
+    session: ConversationSession,
+) -> Dict[str, Any]:
+    """Rutea el botón a su handler y registra los cambios de contexto en la sesión."""
     try:
         # ===== Menú Principal =====
         if button_id == "menu_availability":
             result = await _handle_menu_availability(user_phone)
             # Actualizar contexto: usuario quiere ver disponibilidad
-            await update_user_context(user_phone, {"current_step": "availability_flow"})
+            session.update({"current_step": "availability_flow"})
             return result
 
         elif button_id == "menu_reservations":
             result = await _handle_menu_reservations(user_phone, db)
-            await update_user_context(user_phone, {"current_step": "my_reservations"})
+            session.update({"current_step": "my_reservations"})
             return result
 
         elif button_id == "menu_help":
             result = await _handle_menu_help(user_phone)
-            await update_user_context(user_phone, {"current_step": "help_menu"})
+            session.update({"current_step": "help_menu"})
             return result
 
         elif button_id == "menu_back":
             # Reset a menú principal
-            await update_user_context(user_phone, {"current_step": "main_menu"})
+            session.update({"current_step": "main_menu"})
             return await _handle_menu_back(user_phone)
 
         # ===== Selección de Fechas =====
@@ -79,24 +79,22 @@ async def handle_button_callback(
             result = await _handle_date_selection(user_phone, db, "this_weekend")
             # Guardar fechas seleccionadas en contexto
             if result.get("action") == "show_accommodations" and "dates" in result:
-                await update_user_context(
-                    user_phone,
-                    {"selected_dates": result["dates"], "current_step": "selecting_accommodation"},
+                session.update(
+                    {"selected_dates": result["dates"], "current_step": "selecting_accommodation"}
                 )
             return result
 
         elif button_id == "date_next_weekend":
             result = await _handle_date_selection(user_phone, db, "next_weekend")
             if result.get("action") == "show_accommodations" and "dates" in result:
-                await update_user_context(
-                    user_phone,
-                    {"selected_dates": result["dates"], "current_step": "selecting_accommodation"},
+                session.update(
+                    {"selected_dates": result["dates"], "current_step": "selecting_accommodation"}
                 )
             return result
 
         elif button_id == "date_custom":
             result = await _handle_date_custom(user_phone)
-            await update_user_context(user_phone, {"current_step": "awaiting_custom_dates"})
+            session.update({"current_step": "awaiting_custom_dates"})
             return result
 
         elif button_id.startswith("date_range_"):
@@ -109,12 +107,11 @@ async def handle_button_callback(
                     result = await _handle_date_range_selected(user_phone, db, dates[0], dates[1])
                     # Guardar fechas seleccionadas
                     if result.get("action") == "show_accommodations" and "dates" in result:
-                        await update_user_context(
-                            user_phone,
+                        session.update(
                             {
                                 "selected_dates": result["dates"],
                                 "current_step": "selecting_accommodation",
-                            },
+                            }
                         )
                     return result
             return {"action": "error", "error": "invalid_date_format"}
@@ -124,9 +121,8 @@ async def handle_button_callback(
             accommodation_id = int(button_id.replace("acc_", ""))
             result = await _handle_accommodation_selected(user_phone, db, accommodation_id)
             # Guardar alojamiento seleccionado
-            await update_user_context(
-                user_phone,
-                {"accommodation_id": accommodation_id, "current_step": "confirming_reservation"},
+            session.update(
+                {"accommodation_id": accommodation_id, "current_step": "confirming_reservation"}
             )
             return result
 
@@ -136,7 +132,7 @@ async def handle_button_callback(
             result = await _handle_confirm_reservation(user_phone, db, reservation_code)
             # Reset contexto después de confirmación
             if result.get("action") == "reservation_confirmed":
-                await update_user_context(user_phone, {"current_step": "main_menu"})
+                session.update({"current_step": "main_menu"})
             return result
 
         # ===== Resto de handlers (sin cambios por ahora) =====
@@ -187,7 +183,7 @@ async def handle_button_callback(
                 try:
                     guests = int(guests_str)
                     # Guardar huéspedes en contexto
-                    await update_user_context(user_phone, {"guests_count": guests})
+                    session.update({"guests_count": guests})
                     return {"action": "guests_selected", "guests": guests}
                 except ValueError:
                     return {"action": "error", "error": "invalid_guests"}
@@ -195,7 +191,7 @@ async def handle_button_callback(
         # ===== Reservar de Nuevo =====
         elif button_id == "reserve_again":
             # Reset contexto y volver a disponibilidad
-            await update_user_context(user_phone, {"current_step": "availability_flow"})
+            session.update({"current_step": "availability_flow"})
             return await _handle_menu_availability(user_phone)
 
         # ===== Botón Desconocido =====
@@ -218,8 +214,7 @@ async def handle_button_callback(
 
 async def _handle_menu_availability(user_phone: str) -> Dict[str, Any]:
     """Mostrar opciones de disponibilidad."""
-    message, buttons = format_availability_prompt_with_dates()
-    await whatsapp.send_interactive_buttons(to_phone=user_phone, body_text=message, buttons=buttons)
+    await whatsapp.send_interactive_template(user_phone, get_template("availability_prompt"))
     return {"action": "menu_availability_shown"}
 
 
@@ -269,20 +264,13 @@ async def _handle_menu_reservations(user_phone: str, db: AsyncSession) -> Dict[s
 
 async def _handle_menu_help(user_phone: str) -> Dict[str, Any]:
     """Mostrar menú de ayuda."""
-    sections = build_help_topics_list()
-    await whatsapp.send_interactive_list(
-        to_phone=user_phone,
-        body_text="🆘 ¿En qué puedo ayudarte?",
-        button_text="Ver temas",
-        sections=sections,
-    )
+    await whatsapp.send_interactive_template(user_phone, get_template("help_topics"))
     return {"action": "help_shown"}
 
 
 async def _handle_menu_back(user_phone: str) -> Dict[str, Any]:
     """Volver al menú principal."""
-    message, buttons = format_welcome_with_menu()
-    await whatsapp.send_interactive_buttons(to_phone=user_phone, body_text=message, buttons=buttons)
+    await whatsapp.send_interactive_template(user_phone, get_template("main_menu"))
     return {"action": "main_menu_shown"}
 
 
@@ -342,9 +330,8 @@ async def _show_available_accommodations(
     user_phone: str, db: AsyncSession, check_in: date, check_out: date
 ) -> Dict[str, Any]:
     """Mostrar alojamientos disponibles para las fechas."""
-    # Obtener todos los alojamientos activos
-    query = await db.execute(select(Accommodation).where(Accommodation.active.is_(True)))
-    accommodations = query.scalars().all()
+    # Obtener todos los alojamientos activos (catálogo cacheado)
+    accommodations = await get_active_accommodations(db)
 
     if not accommodations:
         await whatsapp.send_text_message(
@@ -352,7 +339,7 @@ async def _show_available_accommodations(
         )
         return {"action": "no_accommodations"}
 
-    # Convertir a dict para build_accommodations_list
+    # Convertir a dict para las filas de la lista (template "accommodations_list")
     acc_list = [
         {
             "id": acc.id,
@@ -363,14 +350,8 @@ async def _show_available_accommodations(
         for acc in accommodations
     ]
 
-    sections = build_accommodations_list(acc_list, check_in, check_out)
-
-    await whatsapp.send_interactive_list(
-        to_phone=user_phone,
-        body_text=f"🏠 Alojamientos disponibles para:\n📅 {check_in.strftime('%d/%m')} - {check_out.strftime('%d/%m')}",
-        button_text="Ver opciones",
-        sections=sections,
-        header_text="Disponibilidad",
+    await whatsapp.send_interactive_template(
+        user_phone, render_accommodations_list(acc_list, check_in, check_out)
     )
 
     # Guardar contexto en sesión (simplificado: guardar en metadata del próximo mensaje)
@@ -439,8 +420,7 @@ async def _handle_change_dates(
 async def _handle_see_other_accommodations(user_phone: str, db: AsyncSession) -> Dict[str, Any]:
     """Ver otros alojamientos."""
     # Mostrar opciones de fecha de nuevo
-    message, buttons = format_availability_prompt_with_dates()
-    await whatsapp.send_interactive_buttons(to_phone=user_phone, body_text=message, buttons=buttons)
+    await whatsapp.send_interactive_template(user_phone, get_template("availability_prompt"))
     return {"action": "see_other_accommodations"}
 
 
@@ -584,8 +564,7 @@ async def _handle_accommodation_selected(
     # En producción: recuperar check_in/check_out de sesión Redis
     # Por ahora: solicitar número de huéspedes
 
-    query = await db.execute(select(Accommodation).where(Accommodation.id == accommodation_id))
-    accommodation = query.scalar_one_or_none()
+    accommodation = await get_accommodation(db, accommodation_id)
 
     if not accommodation:
         await whatsapp.send_text_message(user_phone, "❌ Alojamiento no encontrado.")
@@ -597,13 +576,9 @@ async def _handle_accommodation_selected(
         f"(Capacidad máxima: {accommodation.capacity})"
     )
 
-    buttons = [
-        {"id": "guests_2", "title": "👥 2 personas"},
-        {"id": "guests_4", "title": "👨‍👩‍👧‍👦 4 personas"},
-        {"id": "guests_other", "title": "✏️ Otro número"},
-    ]
-
-    await whatsapp.send_interactive_buttons(to_phone=user_phone, body_text=message, buttons=buttons)
+    await whatsapp.send_interactive_template(
+        user_phone, get_template("guests_selection"), body=message
+    )
 
     return {"action": "accommodation_selected", "accommodation_id": accommodation_id}
 
@@ -0,0 +1,233 @@
+"""Catálogo de alojamientos cacheado en memoria (L1) con invalidación versionada.
+
+El catálogo cambia pocas veces al día pero se consultaba en cada mensaje de
+WhatsApp, vista de disponibilidad, pre-reserva y export iCal. Este módulo mantiene
+un snapshot inmutable por proceso y lo invalida entre workers con un número de
+versión publicado en Redis:
+
+- ``invalidate_catalog()`` incrementa ``catalog:accommodations:version`` (INCR) y
+  descarta el L1 local. Debe llamarse después de cualquier escritura del catálogo.
+- Cada worker compara su versión con la de Redis como máximo cada
+  CATALOG_VERSION_CHECK_SECONDS; si difiere recarga desde la DB.
+- Si Redis no responde, el snapshot se sigue sirviendo hasta CATALOG_MAX_AGE_SECONDS.
+- Un id desconocido fuerza una recarga (alojamiento recién creado), como máximo una
+  vez cada CATALOG_VERSION_CHECK_SECONDS: ids inválidos repetidos (export iCal,
+  pre-reservas) no disparan una query completa por request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+
+import structlog
+from app.core.redis import get_redis_client
+from app.models import Accommodation
+from prometheus_client import Counter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+CATALOG_VERSION_KEY = "catalog:accommodations:version"
+CATALOG_VERSION_CHECK_SECONDS = 2.0
+CATALOG_MAX_AGE_SECONDS = 300.0
+
+CATALOG_LOADS = Counter(
+    "accommodation_catalog_loads_total",
+    "Recargas del catálogo de alojamientos desde la DB",
+    ["reason"],  # cold | version | max_age | miss
+)
+
+CATALOG_LOOKUPS = Counter(
+    "accommodation_catalog_lookups_total",
+    "Consultas al catálogo de alojamientos",
+    ["result"],  # hit | reload
+)
+
+
+def _freeze(value: Any) -> Any:
+    """Copia de solo lectura de un valor JSON (dict -> MappingProxy, list -> tuple)."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class AccommodationSnapshot:
+    """Vista inmutable de un alojamiento (sin estado de sesión SQLAlchemy)."""
+
+    id: int
+    name: str
+    type: str
+    capacity: int
+    base_price: Decimal
+    weekend_multiplier: Decimal
+    active: bool
+    ical_export_token: str
+    description: Optional[str] = None
+    amenities: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    photos: Tuple[Any, ...] = ()
+    location: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    policies: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_model(cls, acc: Accommodation) -> "AccommodationSnapshot":
+        return cls(
+            id=int(acc.id),
+            name=str(acc.name),
+            type=str(acc.type),
+            capacity=int(acc.capacity),
+            base_price=Decimal(str(acc.base_price)),
+            weekend_multiplier=Decimal(str(acc.weekend_multiplier or Decimal("1.2"))),
+            active=bool(acc.active),
+            ical_export_token=str(acc.ical_export_token),
+            description=acc.description,
+            amenities=_freeze(acc.amenities or {}),
+            photos=_freeze(acc.photos or []),
+            location=_freeze(acc.location or {}),
+            policies=_freeze(acc.policies or {}),
+        )
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Catálogo completo en un instante: ordenado por id e indexado por id."""
+
+    version: Optional[int]
+    accommodations: Tuple[AccommodationSnapshot, ...]
+    by_id: Mapping[int, AccommodationSnapshot]
+
+    @property
+    def active(self) -> Tuple[AccommodationSnapshot, ...]:
+        return tuple(acc for acc in self.accommodations if acc.active)
+
+    def get(self, accommodation_id: int) -> Optional[AccommodationSnapshot]:
+        return self.by_id.get(accommodation_id)
+
+
+class AccommodationCatalog:
+    """Cache L1 del catálogo por proceso (ver docstring del módulo)."""
+
+    def __init__(
+        self,
+        version_check_seconds: float = CATALOG_VERSION_CHECK_SECONDS,
+        max_age_seconds: float = CATALOG_MAX_AGE_SECONDS,
+    ) -> None:
+        self.version_check_seconds = version_check_seconds
+        self.max_age_seconds = max_age_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def clear(self) -> None:
+        """Descartar el snapshot local (la próxima consulta recarga desde la DB)."""
+        self._snapshot = None
+
+    async def _remote_version(self) -> Optional[int]:
+        try:
+            value = await get_redis_client().get(CATALOG_VERSION_KEY)
+        except Exception as e:
+            logger.warning("catalog_version_check_failed", error=str(e))
+            return None
+        return int(value) if value is not None else 0
+
+    async def _stale_reason(self) -> Optional[str]:
+        """Motivo para recargar el snapshot actual, o None si sigue vigente."""
+        if self._snapshot is None:
+            return "cold"
+        now = time.monotonic()
+        if now - self._checked_at >= self.version_check_seconds:
+            self._checked_at = now
+            remote = await self._remote_version()
+            if remote is not None and remote != self._snapshot.version:
+                return "version"
+        if now - self._loaded_at >= self.max_age_seconds:
+            return "max_age"
+        return None
+
+    async def _load(self, db: AsyncSession, reason: str) -> CatalogSnapshot:
+        # La versión se lee antes de la query: una invalidación concurrente deja el
+        # snapshot con versión vieja y fuerza otra recarga en el próximo chequeo.
+        version = await self._remote_version()
+        result = await db.execute(select(Accommodation).order_by(Accommodation.id))
+        accommodations = tuple(
+            AccommodationSnapshot.from_model(acc) for acc in result.scalars().all()
+        )
+        snapshot = CatalogSnapshot(
+            version=version,
+            accommodations=accommodations,
+            by_id=MappingProxyType({acc.id: acc for acc in accommodations}),
+        )
+        self._snapshot = snapshot
+        self._loaded_at = self._checked_at = time.monotonic()
+        CATALOG_LOADS.labels(reason=reason).inc()
+        logger.info(
+            "catalog_loaded", reason=reason, version=version, accommodations=len(accommodations)
+        )
+        return snapshot
+
+    async def snapshot(
+        self, db: AsyncSession, force_reason: Optional[str] = None
+    ) -> CatalogSnapshot:
+        """Snapshot vigente del catálogo (recarga si está frío, desactualizado o forzado)."""
+        reason = force_reason or await self._stale_reason()
+        if reason is None and self._snapshot is not None:
+            CATALOG_LOOKUPS.labels(result="hit").inc()
+            return self._snapshot
+        async with self._lock:
+            # Otro request pudo recargar mientras esperábamos el lock; un miss tampoco
+            # recarga de nuevo dentro de la misma ventana
+            if force_reason in (None, "miss") and self._snapshot is not None:
+                if time.monotonic() - self._loaded_at < self.version_check_seconds:
+                    CATALOG_LOOKUPS.labels(result="hit").inc()
+                    return self._snapshot
+            CATALOG_LOOKUPS.labels(result="reload").inc()
+            return await self._load(db, reason or "cold")
+
+    async def get(self, db: AsyncSession, accommodation_id: int) -> Optional[AccommodationSnapshot]:
+        """Alojamiento por id (activo o no); un id desconocido fuerza una recarga."""
+        snapshot = await self.snapshot(db)
+        acc = snapshot.get(accommodation_id)
+        if acc is None and time.monotonic() - self._loaded_at >= self.version_check_seconds:
+            snapshot = await self.snapshot(db, force_reason="miss")
+            acc = snapshot.get(accommodation_id)
+        return acc
+
+    async def active(self, db: AsyncSession) -> Tuple[AccommodationSnapshot, ...]:
+        """Alojamientos activos ordenados por id."""
+        return (await self.snapshot(db)).active
+
+    async def invalidate(self) -> None:
+        """Publicar una nueva versión del catálogo y descartar el L1 local."""
+        self.clear()
+        try:
+            version = await get_redis_client().incr(CATALOG_VERSION_KEY)
+            logger.info("catalog_invalidated", version=version)
+        except Exception as e:
+            # Los demás workers se actualizan igual al vencer CATALOG_MAX_AGE_SECONDS
+            logger.warning("catalog_invalidate_publish_failed", error=str(e))
+
+
+catalog = AccommodationCatalog()
+
+
+async def get_accommodation(
+    db: AsyncSession, accommodation_id: int
+) -> Optional[AccommodationSnapshot]:
+    return await catalog.get(db, accommodation_id)
+
+
+async def get_active_accommodations(db: AsyncSession) -> Tuple[AccommodationSnapshot, ...]:
+    return await catalog.active(db)
+
+
+async def invalidate_catalog() -> None:
+    await catalog.invalidate()
@@ -0,0 +1,213 @@
+"""Feed de cambios (delta-sync) para el panel admin.
+
+``change_log`` guarda una secuencia monotónica ``seq`` por cada alta/modificación/baja
+de reservas y pagos. El frontend guarda el último ``seq`` aplicado y pide
+``GET /admin/changes?since=seq`` (o se suscribe por SSE a ``/admin/changes/stream``):
+recibe solo las filas que cambiaron, con su estado actual, en lugar de volver a
+bajar listas y estadísticas completas.
+
+- Los ``seq`` se asignan al commitear (``before_commit``), no al primer flush.
+  Ventana de asentamiento: no se entregan cambios de los últimos
+  ``SETTLE_SECONDS``, que cubre el lapso entre ese INSERT y el COMMIT. Una
+  transacción cuyo COMMIT tarde más que eso después del INSERT (p.ej. bloqueada por
+  locks en el propio COMMIT) podría quedar salteada por un cliente que ya avanzó.
+- El punto de partida del cliente es el ``seq`` asentado (``head_seq``) que
+  devuelve el listado en ``X-Change-Seq``: nada commiteado después de esa lectura
+  queda afuera, y lo que se repita se aplica igual (cada cambio trae la fila actual).
+- Si ``since`` es anterior a lo retenido (``CHANGE_FEED_RETENTION_HOURS``) se
+  responde 410 y el cliente debe recargar todo. La poda conserva siempre la última
+  fila podable como marca de agua: aunque no queden cambios recientes, un ``since``
+  viejo se sigue detectando.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import structlog
+from app.core.config import get_settings
+from app.models import ChangeLog, Payment, Reservation
+from app.models.change_log import queue_changes
+from app.services.reservation_listing import LIST_COLUMNS
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+SETTLE_SECONDS = 2.0
+HEARTBEAT_SECONDS = 15.0
+
+# Mismas claves que el body de GET /admin/reservations
+RESERVATION_COLUMNS = tuple(
+    c.label("status") if c is Reservation.reservation_status else c for c in LIST_COLUMNS
+)
+PAYMENT_COLUMNS = (
+    Payment.id,
+    Payment.reservation_id,
+    Payment.external_reference,
+    Payment.status,
+    Payment.amount,
+    Payment.currency,
+    Payment.events_count,
+    Payment.updated_at,
+)
+ENTITY_QUERIES = {
+    "reservation": (Reservation, RESERVATION_COLUMNS),
+    "payment": (Payment, PAYMENT_COLUMNS),
+}
+
+
+class ChangesExpired(Exception):
+    """``since`` es anterior a los cambios retenidos: hace falta una recarga completa."""
+
+
+async def record_changes(
+    db: AsyncSession, entity: str, ids: Sequence[int], op: str = "upsert"
+) -> None:
+    """Registrar cambios hechos con ``UPDATE`` en bloque (se escriben al commitear)."""
+    if ids:
+        queue_changes(db.sync_session, [{"entity": entity, "entity_id": i, "op": op} for i in ids])
+
+
+async def _load_rows(db: AsyncSession, entity: str, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    model, columns = ENTITY_QUERIES[entity]
+    result = await db.execute(select(*columns).where(model.id.in_(ids)))
+    return {row["id"]: jsonable_encoder(dict(row)) for row in result.mappings().all()}
+
+
+def _settle_horizon(settle_seconds: Optional[float] = None) -> datetime:
+    settle = SETTLE_SECONDS if settle_seconds is None else settle_seconds
+    return datetime.now(UTC) - timedelta(seconds=settle)
+
+
+async def fetch_changes(
+    db: AsyncSession,
+    since: int = 0,
+    limit: int = DEFAULT_LIMIT,
+    settle_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Cambios con ``seq > since``, uno por entidad (el último) con su fila actual.
+
+    Devuelve ``{"changes": [...], "next": seq, "has_more": bool}``; ``next`` es el
+    ``since`` de la próxima llamada.
+    """
+    if since > 0:
+        oldest = await db.scalar(select(func.min(ChangeLog.seq)))
+        if oldest is not None and since < oldest - 1:
+            raise ChangesExpired(f"since={since} anterior al seq retenido {oldest}")
+
+    stmt = (
+        select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op)
+        .where(ChangeLog.seq > since, ChangeLog.created_at <= _settle_horizon(settle_seconds))
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Una entrada por entidad: la última operación del lote
+    latest: Dict[tuple, tuple] = {}
+    for seq, entity, entity_id, op in rows:
+        latest[(entity, entity_id)] = (seq, op)
+
+    current: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for entity in ENTITY_QUERIES:
+        ids = [i for (e, i), (_, op) in latest.items() if e == entity and op != "delete"]
+        current[entity] = await _load_rows(db, entity, ids) if ids else {}
+
+    changes = []
+    for (entity, entity_id), (seq, op) in sorted(latest.items(), key=lambda kv: kv[1][0]):
+        data = current.get(entity, {}).get(entity_id)
+        changes.append(
+            {
+                "seq": seq,
+                "entity": entity,
+                "id": entity_id,
+                "op": "upsert" if data is not None else "delete",
+                "data": data,
+            }
+        )
+    return {"changes": changes, "next": rows[-1][0] if rows else since, "has_more": has_more}
+
+
+async def head_seq(db: AsyncSession, settle_seconds: Optional[float] = None) -> int:
+    """Último ``seq`` fuera de la ventana de asentamiento (0 si no hay cambios).
+
+    Es el ``since`` para arrancar junto con una lectura hecha ahora: un ``seq`` menor
+    todavía sin commitear queda después de este punto y se entrega igual.
+    """
+    stmt = select(func.max(ChangeLog.seq)).where(
+        ChangeLog.created_at <= _settle_horizon(settle_seconds)
+    )
+    return int(await db.scalar(stmt) or 0)
+
+
+async def prune_change_log(db: AsyncSession, retention_hours: int) -> int:
+    """Borrar cambios más viejos que la retención (lo llama el worker de expiración).
+
+    Conserva el último cambio podable: ``min(seq)`` sigue marcando hasta dónde se podó
+    aunque no haya cambios nuevos, y ``fetch_changes`` responde 410 a un ``since`` viejo.
+    """
+    cutoff = datetime.now(UTC) - timedelta(hours=retention_hours)
+    keep = await db.scalar(select(func.max(ChangeLog.seq)).where(ChangeLog.created_at < cutoff))
+    if keep is None:
+        return 0
+    result = await db.execute(
+        delete(ChangeLog).where(ChangeLog.created_at < cutoff, ChangeLog.seq < keep)
+    )
+    await db.commit()
+    return int(result.rowcount or 0)
+
+
+def _sse(event: str, data: Any, event_id: Any = None) -> str:
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return frame + f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def stream_changes(
+    since: Optional[int],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    session_factory: Optional[Callable[[], Any]] = None,
+) -> AsyncIterator[str]:
+    """Eventos SSE ``change`` a medida que aparecen; ``reset`` si ``since`` expiró.
+
+    Sin ``since`` arranca desde el último cambio asentado (sin reenviar historia); lo
+    normal es pasar el ``X-Change-Seq`` del listado ya cargado. Envía ``id:`` con el
+    cursor inicial para que una reconexión temprana retome desde ahí. Abre una sesión corta por consulta (se consume dentro de un ``StreamingResponse``).
+    """
+    if session_factory is None:
+        # Import tardío: este módulo lo importa ReservationService
+        from app.core.database import async_session_maker as session_factory
+    poll_seconds = get_settings().CHANGE_FEED_POLL_SECONDS
+    if since is None:
+        async with session_factory() as session:
+            since = await head_seq(session)
+    cursor = since
+    last_sent = time.monotonic()
+    yield f"retry: {int(poll_seconds * 1000) + 1000}\n\n"
+    yield f"id: {cursor}\n\n"
+    while not await is_disconnected():
+        async with session_factory() as session:
+            try:
+                page = await fetch_changes(session, cursor)
+            except ChangesExpired:
+                yield _sse("reset", {"since": cursor})
+                return
+        for change in page["changes"]:
+            yield _sse("change", change, change["seq"])
+            last_sent = time.monotonic()
+        cursor = page["next"]
+        if page["has_more"]:
+            continue
+        if time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(poll_seconds)
@@ -5,20 +5,22 @@
 
 Filosofía:
 - Estado efímero (TTL 30 min, renovable)
-- Schema-less (JSON flexible)
+- Schema-less: cada campo del contexto es un field de un HASH Redis (valor JSON)
+- Escrituras atómicas por campo (HSET + EXPIRE en el mismo pipeline, sin read-modify-write)
 - Fail-safe (contexto perdido = reinicio conversación)
 """
 
 from __future__ import annotations
 
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
-import redis.asyncio as redis
 import structlog
-from app.core.redis import get_redis_pool
+from app.core.redis import get_redis_client
 from prometheus_client import Counter, Histogram
+from redis.exceptions import ResponseError, WatchError
 
 logger = structlog.get_logger()
 
@@ -47,6 +49,12 @@
     ["status"],
 )
 
+CONVERSATION_STATE_TRANSITION = Counter(
+    "conversation_state_transition_total",
+    "Total de transiciones compare-and-set (transition_user_context)",
+    ["status"],  # applied | conflict | retry_exhausted | error
+)
+
 CONVERSATION_STATE_TTL_REMAINING = Histogram(
     "conversation_state_ttl_remaining_seconds",
     "TTL restante del contexto al momento de get",
@@ -55,7 +63,9 @@
 
 # Configuración
 CONTEXT_TTL_SECONDS = 1800  # 30 minutos
+CONTEXT_MIN_TTL_SECONDS = 60  # Piso de TTL al actualizar sin reset_ttl
 CONTEXT_KEY_PREFIX = "user_context"
+TRANSITION_MAX_RETRIES = 3
 
 
 def _make_key(user_id: str) -> str:
@@ -63,12 +73,36 @@ def _make_key(user_id: str) -> str:
     return f"{CONTEXT_KEY_PREFIX}:{user_id}"
 
 
+def _encode_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+    """Serializar cada valor a JSON para almacenarlo como field del HASH."""
+    return {name: json.dumps(value, default=str) for name, value in fields.items()}
+
+
+def _decode_fields(raw: Dict[str, str]) -> Dict[str, Any]:
+    """Deserializar fields del HASH (inverso de _encode_fields)."""
+    return {name: json.loads(value) for name, value in raw.items()}
+
+
+def _queue_ttl(pipe: Any, key: str, reset_ttl: bool, ttl_seconds: int) -> None:
+    """Encolar el manejo de TTL en un pipeline ya abierto.
+
+    - reset_ttl=True: EXPIRE incondicional a ``ttl_seconds``.
+    - reset_ttl=False: conserva el TTL vigente (EXPIRE NX solo aplica si la key no
+      tenía expiración) y garantiza un piso de CONTEXT_MIN_TTL_SECONDS (EXPIRE GT).
+    """
+    if reset_ttl:
+        pipe.expire(key, ttl_seconds)
+    else:
+        pipe.expire(key, ttl_seconds, nx=True)
+        pipe.expire(key, CONTEXT_MIN_TTL_SECONDS, gt=True)
+
+
 async def set_user_context(
     user_id: str,
     context: Dict[str, Any],
     ttl_seconds: int = CONTEXT_TTL_SECONDS,
 ) -> bool:
-    """Guardar contexto completo de usuario en Redis.
+    """Guardar contexto completo de usuario en Redis (reemplaza el HASH existente).
 
     Args:
         user_id: Identificador del usuario (teléfono WhatsApp, email, etc.)
@@ -94,18 +128,20 @@ async def set_user_context(
         ... )
     """
     try:
-        pool = get_redis_pool()
-        redis_client = redis.Redis(connection_pool=pool)
+        redis_client = get_redis_client()
 
         key = _make_key(user_id)
         # Añadir timestamp para auditoría
         context["_updated_at"] = datetime.now(timezone.utc).isoformat()
-        value = json.dumps(context, default=str)
 
-        # SET con EX (expire)
-        result = await redis_client.set(key, value, ex=ttl_seconds)
+        # DEL + HSET + EXPIRE en una única transacción (1 round trip)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=_encode_fields(context))
+            pipe.expire(key, ttl_seconds)
+            _, _, expired_set = await redis_client.execute_pipeline(pipe)
 
-        if result:
+        if expired_set:
             CONVERSATION_STATE_SET.labels(status="success").inc()
             logger.debug(
                 "conversation_state_set",
@@ -117,8 +153,7 @@ async def set_user_context(
             CONVERSATION_STATE_SET.labels(status="failed").inc()
             logger.warning("conversation_state_set_failed", user_id=user_id)
 
-        await redis_client.aclose()
-        return bool(result)
+        return bool(expired_set)
 
     except Exception as e:
         CONVERSATION_STATE_SET.labels(status="error").inc()
@@ -134,6 +169,8 @@ async def set_user_context(
 async def get_user_context(user_id: str) -> Optional[Dict[str, Any]]:
     """Recuperar contexto de usuario desde Redis.
 
+    HGETALL y TTL viajan en el mismo pipeline (1 round trip).
+
     Args:
         user_id: Identificador del usuario
 
@@ -147,20 +184,28 @@ async def get_user_context(user_id: str) -> Optional[Dict[str, Any]]:
         ... else:
         ...     print("Conversación nueva o expirada")
     """
+    key = _make_key(user_id)
     try:
-        pool = get_redis_pool()
-        redis_client = redis.Redis(connection_pool=pool)
-
-        key = _make_key(user_id)
-        data = await redis_client.get(key)
+        redis_client = get_redis_client()
+
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hgetall(key)
+                pipe.ttl(key)
+                data, ttl = await redis_client.execute_pipeline(pipe)
+        except ResponseError as e:
+            # Key con formato anterior (string JSON): descartar y reiniciar conversación
+            CONVERSATION_STATE_GET.labels(status="decode_error").inc()
+            logger.warning("conversation_state_legacy_key_dropped", user_id=user_id, error=str(e))
+            await redis_client.delete(key)
+            return None
 
         if data:
             # Registrar TTL restante para métricas
-            ttl = await redis_client.ttl(key)
             if ttl > 0:
                 CONVERSATION_STATE_TTL_REMAINING.observe(ttl)
 
-            context = json.loads(data)
+            context = _decode_fields(data)
             CONVERSATION_STATE_GET.labels(status="found").inc()
             logger.debug(
                 "conversation_state_get",
@@ -168,12 +213,10 @@ async def get_user_context(user_id: str) -> Optional[Dict[str, Any]]:
                 ttl_remaining=ttl,
                 keys=list(context.keys()),
             )
-            await redis_client.aclose()
             return context
         else:
             CONVERSATION_STATE_GET.labels(status="not_found").inc()
             logger.debug("conversation_state_not_found", user_id=user_id)
-            await redis_client.aclose()
             return None
 
     except json.JSONDecodeError as e:
@@ -197,7 +240,10 @@ async def update_user_context(
     updates: Dict[str, Any],
     reset_ttl: bool = True,
 ) -> bool:
-    """Actualizar parcialmente el contexto (merge con datos existentes).
+    """Actualizar parcialmente el contexto (HSET atómico de los campos indicados).
+
+    No lee el contexto previo: los campos no incluidos en ``updates`` quedan intactos
+    y dos actualizaciones concurrentes sobre campos distintos no se pisan.
 
     Args:
         user_id: Identificador del usuario
@@ -214,37 +260,109 @@ async def update_user_context(
         ... )
     """
     try:
-        # Obtener contexto actual
-        context = await get_user_context(user_id) or {}
+        redis_client = get_redis_client()
+
+        key = _make_key(user_id)
+        fields = dict(updates)
+        fields["_updated_at"] = datetime.now(timezone.utc).isoformat()
 
-        # Merge updates
-        context.update(updates)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=_encode_fields(fields))
+            _queue_ttl(pipe, key, reset_ttl, CONTEXT_TTL_SECONDS)
+            await redis_client.execute_pipeline(pipe)
 
-        # Guardar con TTL renovado (o mantener el existente)
-        ttl = CONTEXT_TTL_SECONDS if reset_ttl else -1
+        CONVERSATION_STATE_UPDATE.labels(status="success").inc()
+        logger.debug(
+            "conversation_state_updated",
+            user_id=user_id,
+            reset_ttl=reset_ttl,
+            keys=list(updates.keys()),
+        )
+        return True
 
-        # Si reset_ttl=False, obtener TTL actual
-        if not reset_ttl:
-            pool = get_redis_pool()
-            redis_client = redis.Redis(connection_pool=pool)
-            key = _make_key(user_id)
-            current_ttl = await redis_client.ttl(key)
-            await redis_client.aclose()
-            ttl = max(current_ttl, 60) if current_ttl > 0 else CONTEXT_TTL_SECONDS
+    except Exception as e:
+        CONVERSATION_STATE_UPDATE.labels(status="error").inc()
+        logger.error(
+            "conversation_state_update_error",
+            user_id=user_id,
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        return False
 
-        result = await set_user_context(user_id, context, ttl_seconds=ttl)
 
-        if result:
-            CONVERSATION_STATE_UPDATE.labels(status="success").inc()
-        else:
-            CONVERSATION_STATE_UPDATE.labels(status="failed").inc()
+async def transition_user_context(
+    user_id: str,
+    expected: Dict[str, Any],
+    updates: Dict[str, Any],
+    reset_ttl: bool = True,
+) -> bool:
+    """Transición multi-campo compare-and-set (WATCH/MULTI/EXEC).
+
+    Aplica ``updates`` solo si los campos de ``expected`` tienen exactamente esos
+    valores en el contexto actual (un campo ausente equivale a None). Si otra
+    escritura modifica la key entre la lectura y el EXEC, reintenta hasta
+    TRANSITION_MAX_RETRIES veces.
+
+    Args:
+        user_id: Identificador del usuario
+        expected: Valores esperados, ej: {"current_step": "confirming_reservation"}
+        updates: Campos a escribir si la condición se cumple
+        reset_ttl: Igual que en update_user_context
+
+    Returns:
+        bool: True si se aplicó la transición, False si hubo conflicto o error
 
-        return result
+    Example:
+        >>> await transition_user_context(
+        ...     "+5491112345678",
+        ...     expected={"current_step": "selecting_accommodation"},
+        ...     updates={"current_step": "confirming_reservation", "accommodation_id": 5},
+        ... )
+    """
+    try:
+        redis_client = get_redis_client()
+
+        key = _make_key(user_id)
+        expected_fields = list(expected.keys())
+        fields = dict(updates)
+
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for _ in range(TRANSITION_MAX_RETRIES):
+                try:
+                    await pipe.watch(key)
+                    current_raw = await pipe.hmget(key, expected_fields)
+                    current = [
+                        json.loads(value) if value is not None else None for value in current_raw
+                    ]
+                    if current != [expected[name] for name in expected_fields]:
+                        CONVERSATION_STATE_TRANSITION.labels(status="conflict").inc()
+                        logger.debug(
+                            "conversation_state_transition_conflict",
+                            user_id=user_id,
+                            expected=expected,
+                        )
+                        return False
+
+                    fields["_updated_at"] = datetime.now(timezone.utc).isoformat()
+                    pipe.multi()
+                    pipe.hset(key, mapping=_encode_fields(fields))
+                    _queue_ttl(pipe, key, reset_ttl, CONTEXT_TTL_SECONDS)
+                    await redis_client.execute_pipeline(pipe)
+
+                    CONVERSATION_STATE_TRANSITION.labels(status="applied").inc()
+                    return True
+                except WatchError:
+                    continue
+
+        CONVERSATION_STATE_TRANSITION.labels(status="retry_exhausted").inc()
+        logger.warning("conversation_state_transition_retry_exhausted", user_id=user_id)
+        return False
 
     except Exception as e:
-        CONVERSATION_STATE_UPDATE.labels(status="error").inc()
+        CONVERSATION_STATE_TRANSITION.labels(status="error").inc()
         logger.error(
-            "conversation_state_update_error",
+            "conversation_state_transition_error",
             user_id=user_id,
             error=str(e),
             error_type=type(e).__name__,
@@ -265,15 +383,13 @@ async def delete_user_context(user_id: str) -> bool:
         >>> await delete_user_context("+5491112345678")  # Reset conversación
     """
     try:
-        pool = get_redis_pool()
-        redis_client = redis.Redis(connection_pool=pool)
+        redis_client = get_redis_client()
 
         key = _make_key(user_id)
         result = await redis_client.delete(key)
 
         CONVERSATION_STATE_DELETE.labels(status="success").inc()
         logger.debug("conversation_state_deleted", user_id=user_id, existed=bool(result))
-        await redis_client.aclose()
         return True
 
     except Exception as e:
@@ -297,14 +413,96 @@ async def get_ttl_remaining(user_id: str) -> int:
         int: Segundos restantes, -2 si no existe, -1 si no tiene expire, 0 si ya expiró
     """
     try:
-        pool = get_redis_pool()
-        redis_client = redis.Redis(connection_pool=pool)
+        redis_client = get_redis_client()
 
         key = _make_key(user_id)
-        ttl = await redis_client.ttl(key)
-        await redis_client.aclose()
-        return ttl
+        return await redis_client.ttl(key)
 
     except Exception as e:
         logger.error("conversation_state_ttl_error", user_id=user_id, error=str(e))
         return -2
+
+
+class ConversationSession:
+    """Unit-of-work del contexto de conversación para un mensaje entrante.
+
+    Carga el contexto una sola vez (HGETALL + TTL en un pipeline), acumula los
+    cambios en memoria y los escribe juntos en ``flush`` (HSET + EXPIRE en un
+    pipeline). Acota el tráfico Redis a dos round trips por mensaje sin importar
+    cuántas ramas del handler modifiquen el contexto.
+
+    Si los cambios incluyen ``current_step`` el flush es una transición
+    compare-and-set (``transition_user_context``) contra el paso leído en ``load``:
+    si otro mensaje del mismo usuario ya movió la conversación, los cambios no se
+    aplican y ``flush`` devuelve False.
+
+    Example:
+        >>> async with conversation_session("+5491112345678") as session:
+        ...     if session.get("current_step") == "selecting_accommodation":
+        ...         session.update({"accommodation_id": 5})
+    """
+
+    def __init__(self, user_id: str, reset_ttl: bool = True) -> None:
+        self.user_id = user_id
+        self.reset_ttl = reset_ttl
+        self.context: Dict[str, Any] = {}
+        self._dirty: Dict[str, Any] = {}
+        self._loaded_step: Any = None
+
+    async def load(self) -> Dict[str, Any]:
+        """Cargar el contexto desde Redis (vacío si no existe o expiró)."""
+        self.context = await get_user_context(self.user_id) or {}
+        self._loaded_step = self.context.get("current_step")
+        self._dirty.clear()
+        return self.context
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Leer un campo del contexto (incluye cambios aún no escritos)."""
+        return self.context.get(field, default)
+
+    def update(self, updates: Dict[str, Any]) -> None:
+        """Registrar cambios de campos; se escriben en el próximo ``flush``."""
+        self.context.update(updates)
+        self._dirty.update(updates)
+
+    @property
+    def dirty(self) -> bool:
+        """True si hay cambios pendientes de escribir."""
+        return bool(self._dirty)
+
+    async def flush(self) -> bool:
+        """Escribir los campos modificados (y renovar TTL) en un único pipeline.
+
+        Returns:
+            bool: True si no había cambios o se escribieron; False ante error Redis
+            o si ``current_step`` cambió desde ``load`` (transición concurrente)
+        """
+        if not self._dirty:
+            return True
+        if "current_step" in self._dirty:
+            written = await transition_user_context(
+                self.user_id,
+                expected={"current_step": self._loaded_step},
+                updates=self._dirty,
+                reset_ttl=self.reset_ttl,
+            )
+        else:
+            written = await update_user_context(self.user_id, self._dirty, reset_ttl=self.reset_ttl)
+        if written:
+            self._loaded_step = self.context.get("current_step")
+            self._dirty.clear()
+        return written
+
+
+@asynccontextmanager
+async def conversation_session(
+    user_id: str, reset_ttl: bool = True
+) -> AsyncIterator[ConversationSession]:
+    """Abrir un ConversationSession: carga al entrar, flush al salir sin errores.
+
+    Si el bloque lanza una excepción los cambios pendientes se descartan.
+    """
+    session = ConversationSession(user_id, reset_ttl=reset_ttl)
+    await session.load()
+    yield session
+    await session.flush()
@@ -0,0 +1,195 @@
+"""Snapshot de estadísticas del dashboard de administración.
+
+Todas las cifras de reservas salen de una única consulta agregada
+(``COUNT(*) FILTER (WHERE ...)`` en PostgreSQL, ``SUM(CASE ...)`` en SQLite) que
+también trae la última sync iCal como subconsulta escalar. El resultado se comparte:
+
+- L1 en memoria por worker con TTL ``DASHBOARD_STATS_TTL_SECONDS`` y un lock para
+  que los requests concurrentes de varios admins esperen una sola consulta.
+- Copia en Redis (``dashboard:stats:snapshot``) con el mismo TTL para que los demás
+  workers no repitan la consulta dentro del intervalo.
+
+Las latencias de DB/Redis son las medidas al construir/obtener el snapshot y el
+bloque de performance (p50/p95/p99 y tasa de errores de todos los workers) sale del
+agregador de latencias (``perf_aggregator``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+from app.core.config import get_settings
+from app.core.redis import get_redis_client
+from app.models import Accommodation, Reservation
+from app.services.perf_aggregator import perf_aggregator
+from prometheus_client import Counter
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+SNAPSHOT_KEY = "dashboard:stats:snapshot"
+
+DASHBOARD_SNAPSHOT_LOADS = Counter(
+    "dashboard_stats_snapshot_loads_total",
+    "Obtención del snapshot de estadísticas del dashboard por origen",
+    ["source"],  # memory | redis | db
+)
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    stats: Dict[str, Any]
+    performance: Dict[str, float]
+    redis_latency_ms: Optional[float]
+    loaded_at: float
+
+
+def _count_if(condition: Any, use_filter: bool) -> Any:
+    if use_filter:
+        return func.count().filter(condition)
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(column: Any, condition: Any, use_filter: bool) -> Any:
+    if use_filter:
+        return func.coalesce(func.sum(column).filter(condition), 0)
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def aggregate_statement(now: datetime, use_filter: bool = True) -> Any:
+    """SELECT único con todos los KPIs de reservas y la última sync iCal."""
+    last_24h = now - timedelta(hours=24)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    status = Reservation.reservation_status
+    confirmed = status == "confirmed"
+    return select(
+        func.count().label("total_created"),
+        _count_if(confirmed, use_filter).label("confirmed"),
+        _count_if(status == "pre_reserved", use_filter).label("pre_reserved"),
+        _count_if(status == "cancelled", use_filter).label("cancelled"),
+        _sum_if(Reservation.total_price, confirmed, use_filter).label("total_revenue"),
+        _sum_if(
+            Reservation.total_price,
+            confirmed & (Reservation.confirmed_at >= month_start),
+            use_filter,
+        ).label("month_revenue"),
+        _count_if(Reservation.created_at >= last_24h, use_filter).label("new_reservations_24h"),
+        _count_if(
+            (Reservation.payment_status == "paid") & (Reservation.confirmed_at >= last_24h),
+            use_filter,
+        ).label("payments_received_24h"),
+        select(func.max(Accommodation.last_ical_sync_at))
+        .scalar_subquery()
+        .label("last_ical_sync_at"),
+    ).select_from(Reservation)
+
+
+async def compute_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Ejecutar la consulta agregada; devuelve un dict serializable a JSON."""
+    now = datetime.now(timezone.utc)
+    use_filter = db.get_bind().dialect.name == "postgresql"
+    start = time.perf_counter()
+    row = (await db.execute(aggregate_statement(now, use_filter))).one()
+    db_latency_ms = (time.perf_counter() - start) * 1000
+
+    last_sync = row.last_ical_sync_at
+    if isinstance(last_sync, str):  # SQLite puede devolver texto en subconsultas
+        last_sync = datetime.fromisoformat(last_sync)
+    if last_sync is not None and last_sync.tzinfo is None:
+        last_sync = last_sync.replace(tzinfo=timezone.utc)
+    ical_age = (now - last_sync).total_seconds() / 60 if last_sync else None
+
+    return {
+        "total_created": int(row.total_created or 0),
+        "confirmed": int(row.confirmed or 0),
+        "pre_reserved": int(row.pre_reserved or 0),
+        "cancelled": int(row.cancelled or 0),
+        "total_revenue": str(Decimal(row.total_revenue or 0)),
+        "month_revenue": str(Decimal(row.month_revenue or 0)),
+        "new_reservations_24h": int(row.new_reservations_24h or 0),
+        "payments_received_24h": int(row.payments_received_24h or 0),
+        "ical_last_sync_age_minutes": round(ical_age, 2) if ical_age is not None else None,
+        "db_latency_ms": round(db_latency_ms, 2),
+        "computed_at": now.isoformat(),
+    }
+
+
+async def http_performance() -> Dict[str, float]:
+    """Tasa de errores 5xx (%) y p50/p95/p99 (ms) de la ventana del agregador."""
+    overall = (await perf_aggregator.summary())["overall"]
+    return {
+        "error_rate": overall["error_rate"],
+        "p50_latency_ms": overall["p50_latency_ms"],
+        "p95_latency_ms": overall["p95_latency_ms"],
+        "p99_latency_ms": overall["p99_latency_ms"],
+    }
+
+
+async def _load_shared(db: AsyncSession) -> Tuple[Dict[str, Any], Optional[float]]:
+    ttl = settings.DASHBOARD_STATS_TTL_SECONDS
+    redis_latency_ms: Optional[float] = None
+    try:
+        start = time.perf_counter()
+        cached = await get_redis_client().get(SNAPSHOT_KEY)
+        redis_latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        if cached:
+            DASHBOARD_SNAPSHOT_LOADS.labels(source="redis").inc()
+            return json.loads(cached), redis_latency_ms
+    except Exception as e:
+        logger.warning("dashboard_snapshot_redis_read_failed", error=str(e))
+
+    stats = await compute_stats(db)
+    DASHBOARD_SNAPSHOT_LOADS.labels(source="db").inc()
+    try:
+        await get_redis_client().set(SNAPSHOT_KEY, json.dumps(stats), ex=ttl)
+    except Exception as e:
+        logger.warning("dashboard_snapshot_redis_write_failed", error=str(e))
+    return stats, redis_latency_ms
+
+
+class DashboardSnapshotCache:
+    """Snapshot L1 por worker con TTL y carga única ante requests concurrentes."""
+
+    def __init__(self) -> None:
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> Optional[DashboardSnapshot]:
+        snap = self._snapshot
+        ttl = settings.DASHBOARD_STATS_TTL_SECONDS
+        if snap is not None and time.monotonic() - snap.loaded_at < ttl:
+            return snap
+        return None
+
+    async def get(self, db: AsyncSession) -> DashboardSnapshot:
+        snap = self._fresh()
+        if snap is None:
+            async with self._lock:
+                snap = self._fresh()
+                if snap is None:
+                    stats, redis_latency_ms = await _load_shared(db)
+                    snap = DashboardSnapshot(
+                        stats=stats,
+                        performance=await http_performance(),
+                        redis_latency_ms=redis_latency_ms,
+                        loaded_at=time.monotonic(),
+                    )
+                    self._snapshot = snap
+                    return snap
+        DASHBOARD_SNAPSHOT_LOADS.labels(source="memory").inc()
+        return snap
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+
+dashboard_snapshot = DashboardSnapshotCache()
@@ -0,0 +1,243 @@
+"""Gramática compilada de fechas en español para el NLU (sin dateparser).
+
+``dateparser`` tarda ~300 ms en importarse y decenas de ms por llamada; casi todos
+los mensajes de huéspedes usan un puñado de formas fijas. Esta gramática las
+resuelve con una sola regex compilada sobre el texto normalizado (minúsculas, sin
+tildes):
+
+- numéricas: ``20/10``, ``20-10-2025``, ``20/10/25`` y rangos ``20/10 al 22/10``
+- con mes: ``20 de octubre``, ``del 20 al 22 de octubre``, ``28 de dic al 2 de enero``
+- relativas: ``hoy``, ``mañana``, ``pasado mañana``, días de la semana
+- fin de semana: ``finde``, ``este fin de semana``, ``finde largo`` (sábado a lunes)
+
+Solo si no resolvió ninguna fecha y el texto tiene pistas de una forma desconocida
+(p.ej. ``dic 15``, ``20 octubre``, ``la semana que viene``, ``en 3 días``) se usa
+``dateparser``, importado de forma diferida.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional
+
+from app.utils.datetime_utils import get_next_weekend
+
+MONTHS = {
+    "enero": 1,
+    "ene": 1,
+    "febrero": 2,
+    "feb": 2,
+    "marzo": 3,
+    "mar": 3,
+    "abril": 4,
+    "abr": 4,
+    "mayo": 5,
+    "may": 5,
+    "junio": 6,
+    "jun": 6,
+    "julio": 7,
+    "jul": 7,
+    "agosto": 8,
+    "ago": 8,
+    "septiembre": 9,
+    "setiembre": 9,
+    "sept": 9,
+    "sep": 9,
+    "set": 9,
+    "octubre": 10,
+    "oct": 10,
+    "noviembre": 11,
+    "nov": 11,
+    "diciembre": 12,
+    "dic": 12,
+}
+
+WEEKDAYS = {
+    "lunes": 0,
+    "martes": 1,
+    "miercoles": 2,
+    "jueves": 3,
+    "viernes": 4,
+    "sabado": 5,
+    "domingo": 6,
+}
+
+_DAY = r"(?:3[01]|[12]\d|0?[1-9])"
+_MONTH_NUM = r"(?:1[0-2]|0?[1-9])"
+_MONTH_NAME = "|".join(sorted(MONTHS, key=len, reverse=True))
+_YEAR = r"(?:\d{4}|\d{2})"
+
+
+def _numeric(prefix: str) -> str:
+    return (
+        rf"(?<!\d)(?P<{prefix}d>{_DAY})[/-](?P<{prefix}m>{_MONTH_NUM})"
+        rf"(?:[/-](?P<{prefix}y>{_YEAR}))?(?!\d)"
+    )
+
+
+def _named(prefix: str, month_required: bool = True) -> str:
+    month = rf"\s+de\s+(?P<{prefix}m>{_MONTH_NAME})\b\.?"
+    return (
+        rf"(?<!\d)(?P<{prefix}d>{_DAY})(?:ro)?(?!\d)"
+        rf"{month if month_required else f'(?:{month})?'}"
+        rf"(?:\s+(?:de|del)\s+(?P<{prefix}y>\d{{4}}))?"
+    )
+
+
+_RANGE_SEP = r"\s*(?:al|a|hasta|-)\s*(?:el\s+)?"
+
+# Alternativas de la gramática (las más largas primero). El NLU las combina con sus
+# propias alternativas en una sola regex; ``resolve_match`` resuelve cualquier match
+# cuyo ``lastgroup`` esté en DATE_KINDS.
+DATE_ALTERNATIVES = "|".join(
+    [
+        rf"(?P<numrange>{_numeric('a')}{_RANGE_SEP}{_numeric('b')})",
+        rf"(?P<namedrange>(?:del\s+)?{_named('c', False)}\s+(?:al|a|hasta)\s+(?:el\s+)?"
+        rf"{_named('e')})",
+        rf"(?P<named>{_named('f')})",
+        rf"(?P<num>{_numeric('g')})",
+        r"(?P<longweekend>\b(?:finde|fin\s+de\s+semana)\s+largo\b)",
+        r"(?P<weekend>\b(?:finde|fin\s+de\s+semana)\b)",
+        r"(?P<relative>\bpasado\s+manana\b|(?<!la\s)\bmanana\b|\bhoy\b)",
+        rf"(?P<weekday>\b(?:{'|'.join(WEEKDAYS)})\b)",
+    ]
+)
+DATE_KINDS = frozenset(
+    {"numrange", "namedrange", "named", "num", "longweekend", "weekend", "relative", "weekday"}
+)
+DATE_GRAMMAR = re.compile(DATE_ALTERNATIVES)
+
+# Formas que la gramática no cubre pero dateparser sí: se usa como fallback diferido
+FALLBACK_HINT = re.compile(
+    rf"\d{{1,2}}\s+(?:{_MONTH_NAME})\b|\b(?:{_MONTH_NAME})\.?\s+\d{{1,2}}(?!\d)"
+    r"|\bproxim[oa]\s+(?:semana|mes)\b|\bsemana\s+que\s+viene\b|\ben\s+\d+\s+dias\b"
+)
+
+
+def _fold_table() -> dict:
+    table = {}
+    for code in range(0xC0, 0x250):
+        decomposed = unicodedata.normalize("NFD", chr(code))
+        if len(decomposed) > 1 and unicodedata.combining(decomposed[1]):
+            table[code] = decomposed[0]
+    return table
+
+
+_FOLD = _fold_table()
+
+
+def normalize(text: str) -> str:
+    """Minúsculas sin tildes (la ñ queda como n).
+
+    Reemplazo 1 a 1 por carácter: las posiciones en el texto normalizado coinciden con
+    las del original, así los spans de las entidades apuntan al mensaje recibido.
+    """
+    return text.lower().translate(_FOLD)
+
+
+def _year(raw: Optional[str], default: int) -> int:
+    if not raw:
+        return default
+    year = int(raw)
+    return year + 2000 if year < 100 else year
+
+
+def _make(day: str, month: int, year: int) -> Optional[date]:
+    try:
+        return date(year, month, int(day))
+    except ValueError:
+        return None  # p.ej. 31/02
+
+
+def _range(start: Optional[date], end: Optional[date], end_has_year: bool) -> List[date]:
+    if start and end and end < start and not end_has_year:
+        # "28/12 al 2/1": el fin cae en el año siguiente
+        end = _make(str(end.day), end.month, end.year + 1)
+    return [d for d in (start, end) if d]
+
+
+def resolve_match(m: re.Match, now: datetime) -> List[date]:
+    """Fechas de un match de la gramática (``m.lastgroup`` en DATE_KINDS)."""
+    today = now.date()
+    kind = m.lastgroup
+    g = m.group
+    if kind == "numrange":
+        start = _make(g("ad"), int(g("am")), _year(g("ay"), today.year))
+        end = _make(g("bd"), int(g("bm")), _year(g("by"), start.year if start else today.year))
+        return _range(start, end, bool(g("by")))
+    if kind == "namedrange":
+        end_month = MONTHS[g("em")]
+        year = _year(g("ey"), today.year)
+        start_month = MONTHS[g("cm")] if g("cm") else end_month
+        start = _make(g("cd"), start_month, _year(g("cy"), year))
+        end = _make(g("ed"), end_month, year)
+        return _range(start, end, bool(g("ey")))
+    if kind == "named":
+        d = _make(g("fd"), MONTHS[g("fm")], _year(g("fy"), today.year))
+        return [d] if d else []
+    if kind == "num":
+        d = _make(g("gd"), int(g("gm")), _year(g("gy"), today.year))
+        return [d] if d else []
+    if kind == "longweekend":
+        saturday, _ = get_next_weekend(now)
+        return [saturday, saturday + timedelta(days=2)]
+    if kind == "weekend":
+        return list(get_next_weekend(now))
+    if kind == "relative":
+        offset = {"hoy": 0, "manana": 1}.get(m.group(0), 2)
+        return [today + timedelta(days=offset)]
+    if kind == "weekday":
+        days_ahead = (WEEKDAYS[m.group(0)] - today.weekday()) % 7
+        return [today + timedelta(days=days_ahead)]
+    return []
+
+
+def grammar_dates(text: str, now: Optional[datetime] = None) -> List[date]:
+    """Fechas reconocidas por la gramática, en orden de aparición (sin fallback)."""
+    now = now or datetime.now()
+    dates: List[date] = []
+    for m in DATE_GRAMMAR.finditer(normalize(text)):
+        dates.extend(resolve_match(m, now))
+    return dates
+
+
+@lru_cache(maxsize=1000)
+def _fallback_dates(text: str, today: date) -> tuple:
+    """dateparser sobre el texto completo (import diferido: solo formas desconocidas)."""
+    try:
+        from dateparser.search import search_dates
+
+        found = search_dates(
+            text,
+            languages=["es"],
+            settings={
+                "DATE_ORDER": "DMY",
+                "PREFER_DATES_FROM": "future",
+                "RELATIVE_BASE": datetime.combine(today, datetime.min.time()),
+            },
+        )
+    except Exception:
+        return ()
+    return tuple(dt.date() for _, dt in found or [])
+
+
+def fallback_dates(text: str, now: datetime) -> List[date]:
+    """Fechas vía dateparser si el texto tiene pistas de una forma no cubierta."""
+    if FALLBACK_HINT.search(normalize(text)):
+        return list(_fallback_dates(text, now.date()))
+    return []
+
+
+def resolve_dates(text: str, now: Optional[datetime] = None) -> tuple[List[date], str]:
+    """Resolver fechas del texto; devuelve ``(fechas, path)`` con path grammar|fallback|none."""
+    now = now or datetime.now()
+    dates = grammar_dates(text, now)
+    if dates:
+        return dates, "grammar"
+    fallback = fallback_dates(text, now)
+    if fallback:
+        return fallback, "fallback"
+    return [], "none"
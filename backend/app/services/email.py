@@ -69,5 +69,20 @@ async def send_reservation_expired(
         EMAIL_SENT.labels(type="expired", status="logged").inc()
         return True
 
+    async def send_reservation_cancelled(
+        self,
+        guest_email: str,
+        guest_name: str,
+        reservation_code: str,
+        accommodation_name: str,
+        check_in: str,
+        check_out: str,
+        reason: Optional[str] = None,
+    ) -> bool:
+        """Send reservation cancelled by the administrator."""
+        logger.info("email_cancelled", email=guest_email[:15] + "...", code=reservation_code)
+        EMAIL_SENT.labels(type="cancelled", status="logged").inc()
+        return True
+
 
 email_service = EmailService()
@@ -0,0 +1,112 @@
+"""Búsqueda de reservas por huésped (nombre, email, teléfono) para el panel admin.
+
+En PostgreSQL se apoya en índices GIN ``pg_trgm`` (migración 008) sobre
+``lower(guest_name)``, ``lower(guest_email)`` y ``guest_phone_digits`` (teléfono
+normalizado a dígitos): ``LIKE '%term%'`` y el operador de similitud ``%`` usan el
+índice en lugar de recorrer la tabla, y el ranking es ``similarity()`` de pg_trgm.
+
+En SQLite (tests) el filtro es el mismo ``LIKE`` sin índice y el ranking se calcula
+en Python con la misma similitud de trigramas; no hay match difuso en SQL.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from app.models.reservation import Reservation
+from app.services.accommodation_index import trigrams
+from app.utils.phone import phone_digits
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MIN_PHONE_DIGITS = 3
+# SQLite: filas candidatas a rankear en Python
+FALLBACK_SCAN_LIMIT = 500
+
+SEARCH_COLUMNS = (
+    Reservation.id,
+    Reservation.code,
+    Reservation.accommodation_id,
+    Reservation.guest_name,
+    Reservation.guest_email,
+    Reservation.guest_phone,
+    Reservation.check_in,
+    Reservation.check_out,
+    Reservation.reservation_status,
+    Reservation.created_at,
+)
+
+
+def _terms(term: str) -> tuple[str, Optional[str]]:
+    text = term.strip().lower()
+    digits = phone_digits(text) or ""
+    return text, digits if len(digits) >= MIN_PHONE_DIGITS else None
+
+
+def search_condition(term: str, fuzzy: bool = False) -> Any:
+    """WHERE por substring (y similitud si ``fuzzy``, solo PostgreSQL) en los 3 campos."""
+    text, digits = _terms(term)
+    name = func.lower(Reservation.guest_name)
+    email = func.lower(Reservation.guest_email)
+    clauses = [name.contains(text, autoescape=True), email.contains(text, autoescape=True)]
+    if digits:
+        clauses.append(Reservation.guest_phone_digits.contains(digits, autoescape=True))
+    if fuzzy:
+        clauses.append(name.op("%")(text))
+    return or_(*clauses)
+
+
+def _score_expression(text: str, digits: Optional[str]) -> Any:
+    scores = [
+        func.similarity(func.lower(Reservation.guest_name), text),
+        func.coalesce(func.similarity(func.lower(Reservation.guest_email), text), 0),
+    ]
+    if digits:
+        scores.append(func.coalesce(func.similarity(Reservation.guest_phone_digits, digits), 0))
+    return func.greatest(*scores)
+
+
+def _similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+
+
+def _python_score(row: Dict[str, Any], text: str, digits: Optional[str]) -> float:
+    scores = [
+        _similarity((row["guest_name"] or "").lower(), text),
+        _similarity((row["guest_email"] or "").lower(), text),
+    ]
+    if digits:
+        scores.append(_similarity(phone_digits(row["guest_phone"]) or "", digits))
+    return max(scores)
+
+
+async def search_reservations(
+    db: AsyncSession, term: str, limit: int = DEFAULT_LIMIT
+) -> List[Dict[str, Any]]:
+    """Reservas que matchean ``term`` ordenadas por relevancia (``score`` 0..1)."""
+    text, digits = _terms(term)
+    if db.get_bind().dialect.name == "postgresql":
+        score = _score_expression(text, digits).label("score")
+        stmt = (
+            select(*SEARCH_COLUMNS, score)
+            .where(search_condition(term, fuzzy=True))
+            .order_by(score.desc(), Reservation.created_at.desc())
+            .limit(limit)
+        )
+        rows = (await db.execute(stmt)).mappings().all()
+        return [{**row, "score": round(float(row["score"] or 0), 3)} for row in rows]
+
+    stmt = (
+        select(*SEARCH_COLUMNS)
+        .where(search_condition(term))
+        .order_by(Reservation.created_at.desc())
+        .limit(FALLBACK_SCAN_LIMIT)
+    )
+    rows = [dict(r) for r in (await db.execute(stmt)).mappings().all()]
+    for row in rows:
+        row["score"] = round(_python_score(row, text, digits), 3)
+    rows.sort(key=lambda r: r["score"], reverse=True)
+    return rows[:limit]
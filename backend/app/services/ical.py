@@ -15,6 +15,8 @@
 
 from app.models import Accommodation, Reservation
 from app.models.enums import ChannelSource, ReservationStatus
+from app.services.catalog import get_accommodation
+from app.services.occupancy import sync_reservation_nights
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -32,10 +34,8 @@ def __init__(self, db: AsyncSession):
         self.db = db
 
     async def export_calendar(self, accommodation_id: int, token: str) -> Optional[str]:
-        # Validar accommodation + token
-        acc_stmt = select(Accommodation).where(Accommodation.id == accommodation_id)
-        acc_res = await self.db.execute(acc_stmt)
-        acc = acc_res.scalar_one_or_none()
+        # Validar accommodation + token (catálogo cacheado)
+        acc = await get_accommodation(self.db, accommodation_id)
         if not acc or acc.ical_export_token != token:
             return None
 
@@ -141,12 +141,15 @@ async def import_events(self, accommodation_id: int, ical_text: str, source: str
             )
             self.db.add(reservation)
             try:
+                await self.db.flush()
+                await sync_reservation_nights(self.db, [reservation.id])
                 await self.db.commit()
                 created += 1
             except Exception:
                 await self.db.rollback()
                 continue
         # Actualizar timestamp de última sync, independientemente de si se crearon eventos nuevos
+        # (no forma parte del snapshot del catálogo: no hace falta invalidate_catalog)
         try:
             acc.last_ical_sync_at = now
             self.db.add(acc)
@@ -1,8 +1,83 @@
-"""Interactive Buttons & Lists Helpers para WhatsApp."""
+"""Interactive Buttons & Lists Helpers para WhatsApp.
 
+Además de los builders (dicts), expone un registro de templates compilados
+(``InteractiveTemplate``): el objeto ``interactive`` se serializa a JSON una sola vez
+y en cada envío solo se insertan las partes variables (slots).
+"""
+
+import json
+import re
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+_MAIN_MENU_BUTTONS: Tuple[Dict[str, str], ...] = (
+    {"id": "menu_availability", "title": "🗓️ Disponibilidad"},
+    {"id": "menu_reservations", "title": "📋 Mis Reservas"},
+    {"id": "menu_help", "title": "❓ Ayuda"},
+)
+
+_DATE_SELECTION_BUTTONS: Tuple[Dict[str, str], ...] = (
+    {"id": "date_this_weekend", "title": "🗓️ Este finde"},
+    {"id": "date_next_weekend", "title": "📅 Próximo finde"},
+    {"id": "date_custom", "title": "✏️ Elegir fecha"},
+)
+
+_GUESTS_SELECTION_BUTTONS: Tuple[Dict[str, str], ...] = (
+    {"id": "guests_2", "title": "👥 2 personas"},
+    {"id": "guests_4", "title": "👨‍👩‍👧‍👦 4 personas"},
+    {"id": "guests_other", "title": "✏️ Otro número"},
+)
+
+_HELP_TOPIC_ROWS: Tuple[Dict[str, str], ...] = (
+    {
+        "id": "help_how_to_reserve",
+        "title": "¿Cómo reservar?",
+        "description": "Pasos para hacer una reserva",
+    },
+    {
+        "id": "help_payment_methods",
+        "title": "Métodos de pago",
+        "description": "Tarjetas, transferencia, etc.",
+    },
+    {
+        "id": "help_cancellation",
+        "title": "Políticas de cancelación",
+        "description": "Plazos y reembolsos",
+    },
+    {
+        "id": "help_check_in",
+        "title": "Check-in y check-out",
+        "description": "Horarios y procedimiento",
+    },
+    {
+        "id": "help_amenities",
+        "title": "Servicios incluidos",
+        "description": "WiFi, cocina, estacionamiento...",
+    },
+    {"id": "help_contact", "title": "Contacto directo", "description": "Teléfono y email"},
+)
+
+WELCOME_MESSAGE = (
+    "👋 ¡Hola! Soy el asistente de reservas.\n\n"
+    "Puedo ayudarte a:\n"
+    "• Consultar disponibilidad\n"
+    "• Hacer una reserva\n"
+    "• Ver tus reservas activas\n\n"
+    "¿Qué te gustaría hacer?"
+)
+
+AVAILABILITY_PROMPT_MESSAGE = (
+    "🗓️ ¿Para cuándo querés consultar disponibilidad?\n\n"
+    "Elegí una opción o escribí las fechas que prefieras:"
+)
+
+
+@lru_cache(maxsize=1024)
+def format_price(amount: Decimal) -> str:
+    """Formatear un monto como ``$15.000`` (separador de miles con punto)."""
+    return f"${amount:,.0f}".replace(",", ".")
 
 
 def build_main_menu_buttons() -> List[Dict[str, str]]:
@@ -11,11 +86,7 @@ def build_main_menu_buttons() -> List[Dict[str, str]]:
     Returns:
         Lista de 3 botones para el menú inicial
     """
-    return [
-        {"id": "menu_availability", "title": "🗓️ Disponibilidad"},
-        {"id": "menu_reservations", "title": "📋 Mis Reservas"},
-        {"id": "menu_help", "title": "❓ Ayuda"},
-    ]
+    return [dict(btn) for btn in _MAIN_MENU_BUTTONS]
 
 
 def build_date_selection_buttons() -> List[Dict[str, str]]:
@@ -24,14 +95,7 @@ def build_date_selection_buttons() -> List[Dict[str, str]]:
     Returns:
         Lista de 3 botones con opciones de fecha comunes
     """
-    today = date.today()
-    next_weekend = today + timedelta(days=(5 - today.weekday()) % 7 or 7)
-
-    return [
-        {"id": "date_this_weekend", "title": "🗓️ Este finde"},
-        {"id": "date_next_weekend", "title": "📅 Próximo finde"},
-        {"id": "date_custom", "title": "✏️ Elegir fecha"},
-    ]
+    return [dict(btn) for btn in _DATE_SELECTION_BUTTONS]
 
 
 def build_confirmation_buttons(action_prefix: str) -> List[Dict[str, str]]:
@@ -119,8 +183,8 @@ def build_accommodations_list(
         capacity = acc.get("capacity", 1)
 
         # Formatear precio por noche
-        price_per_night = f"${base_price:,.0f}".replace(",", ".")
-        total_price = f"${base_price * nights:,.0f}".replace(",", ".")
+        price_per_night = format_price(base_price)
+        total_price = format_price(base_price * nights)
 
         rows.append(
             {
@@ -186,11 +250,7 @@ def build_guests_selection_buttons() -> List[Dict[str, str]]:
     Returns:
         Lista de 3 botones con opciones comunes de huéspedes
     """
-    return [
-        {"id": "guests_2", "title": "👥 2 personas"},
-        {"id": "guests_4", "title": "👨‍👩‍👧‍👦 4 personas"},
-        {"id": "guests_other", "title": "✏️ Otro número"},
-    ]
+    return [dict(btn) for btn in _GUESTS_SELECTION_BUTTONS]
 
 
 def build_help_topics_list() -> List[Dict[str, Any]]:
@@ -199,34 +259,7 @@ def build_help_topics_list() -> List[Dict[str, Any]]:
     Returns:
         Lista de secciones con tópicos de ayuda
     """
-    rows = [
-        {
-            "id": "help_how_to_reserve",
-            "title": "¿Cómo reservar?",
-            "description": "Pasos para hacer una reserva",
-        },
-        {
-            "id": "help_payment_methods",
-            "title": "Métodos de pago",
-            "description": "Tarjetas, transferencia, etc.",
-        },
-        {
-            "id": "help_cancellation",
-            "title": "Políticas de cancelación",
-            "description": "Plazos y reembolsos",
-        },
-        {
-            "id": "help_check_in",
-            "title": "Check-in y check-out",
-            "description": "Horarios y procedimiento",
-        },
-        {
-            "id": "help_amenities",
-            "title": "Servicios incluidos",
-            "description": "WiFi, cocina, estacionamiento...",
-        },
-        {"id": "help_contact", "title": "Contacto directo", "description": "Teléfono y email"},
-    ]
+    rows = [dict(row) for row in _HELP_TOPIC_ROWS]
 
     return [{"title": "Temas de Ayuda", "rows": rows}]
 
@@ -270,16 +303,7 @@ def format_welcome_with_menu() -> tuple[str, List[Dict[str, str]]]:
     Returns:
         Tupla (mensaje, botones)
     """
-    message = (
-        "👋 ¡Hola! Soy el asistente de reservas.\n\n"
-        "Puedo ayudarte a:\n"
-        "• Consultar disponibilidad\n"
-        "• Hacer una reserva\n"
-        "• Ver tus reservas activas\n\n"
-        "¿Qué te gustaría hacer?"
-    )
-    buttons = build_main_menu_buttons()
-    return message, buttons
+    return WELCOME_MESSAGE, build_main_menu_buttons()
 
 
 def format_availability_prompt_with_dates() -> tuple[str, List[Dict[str, str]]]:
@@ -288,12 +312,7 @@ def format_availability_prompt_with_dates() -> tuple[str, List[Dict[str, str]]]:
     Returns:
         Tupla (mensaje, botones)
     """
-    message = (
-        "🗓️ ¿Para cuándo querés consultar disponibilidad?\n\n"
-        "Elegí una opción o escribí las fechas que prefieras:"
-    )
-    buttons = build_date_selection_buttons()
-    return message, buttons
+    return AVAILABILITY_PROMPT_MESSAGE, build_date_selection_buttons()
 
 
 def format_prereservation_with_buttons(
@@ -320,7 +339,7 @@ def format_prereservation_with_buttons(
         Tupla (header, body, botones)
     """
     nights = (check_out - check_in).days
-    price_formatted = f"${total_price:,.0f}".replace(",", ".")
+    price_formatted = format_price(total_price)
 
     header = f"✅ Pre-reserva #{reservation_code}"
 
@@ -355,7 +374,7 @@ def format_payment_link_with_buttons(
     Returns:
         Tupla (header, body, botones)
     """
-    amount_formatted = f"${amount:,.0f}".replace(",", ".")
+    amount_formatted = format_price(amount)
 
     header = f"💳 Pago - Reserva #{reservation_code}"
 
@@ -372,3 +391,194 @@ def format_payment_link_with_buttons(
     buttons = build_payment_action_buttons(reservation_code, payment_link)
 
     return header, body, buttons
+
+
+# ========== Templates Compilados ==========
+
+
+class RawJSON(bytes):
+    """Valor de slot ya serializado a JSON (se inserta sin re-encodear)."""
+
+
+_SLOT_MARK = "\x00"
+_SLOT_PATTERN = re.compile(rb'"\\u0000([a-z_]+)\\u0000"')
+
+
+def slot(name: str) -> str:
+    """Marcador de parte variable dentro de un template (ver InteractiveTemplate)."""
+    return f"{_SLOT_MARK}{name}{_SLOT_MARK}"
+
+
+def dumps_compact(value: Any) -> bytes:
+    """Serialización JSON compacta en UTF-8 (formato de todos los payloads salientes)."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_buttons_interactive(
+    body_text: str,
+    buttons: Iterable[Mapping[str, str]],
+    header_text: Optional[str] = None,
+    footer_text: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Objeto ``interactive`` de tipo button (hasta 3 botones reply)."""
+    interactive: Dict[str, Any] = {
+        "type": "button",
+        "body": {"text": body_text},
+        "action": {
+            "buttons": [
+                {"type": "reply", "reply": {"id": btn["id"], "title": btn["title"]}}
+                for btn in buttons
+            ]
+        },
+    }
+    if header_text:
+        interactive["header"] = {"type": "text", "text": header_text}
+    if footer_text:
+        interactive["footer"] = {"text": footer_text}
+    return interactive
+
+
+def build_list_interactive(
+    body_text: str,
+    button_text: str,
+    sections: Any,
+    header_text: Optional[str] = None,
+    footer_text: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Objeto ``interactive`` de tipo list."""
+    interactive: Dict[str, Any] = {
+        "type": "list",
+        "body": {"text": body_text},
+        "action": {"button": button_text, "sections": sections},
+    }
+    if header_text:
+        interactive["header"] = {"type": "text", "text": header_text}
+    if footer_text:
+        interactive["footer"] = {"text": footer_text}
+    return interactive
+
+
+def build_message_envelope(to_phone: str, interactive_json: bytes) -> bytes:
+    """Payload completo de la Cloud API alrededor de un ``interactive`` ya serializado."""
+    return (
+        b'{"messaging_product":"whatsapp","to":'
+        + dumps_compact(to_phone)
+        + b',"type":"interactive","interactive":'
+        + interactive_json
+        + b"}"
+    )
+
+
+class InteractiveTemplate:
+    """Mensaje interactivo compilado.
+
+    El objeto ``interactive`` se serializa una vez al compilar. Los valores creados
+    con ``slot(name)`` quedan como huecos que ``render`` completa: un ``str`` se
+    inserta como string JSON y un ``RawJSON`` se inserta tal cual (ej: filas de lista).
+    Un template sin slots devuelve siempre los mismos bytes.
+    """
+
+    def __init__(self, name: str, interactive: Dict[str, Any]) -> None:
+        self.name = name
+        self.kind: str = interactive["type"]
+        pieces = _SLOT_PATTERN.split(dumps_compact(interactive))
+        self._parts: Tuple[bytes, ...] = tuple(pieces[0::2])
+        self.slots: Tuple[str, ...] = tuple(piece.decode("ascii") for piece in pieces[1::2])
+
+    def render(self, **values: Union[str, RawJSON]) -> bytes:
+        """JSON del objeto ``interactive`` con los slots completados."""
+        if not self.slots:
+            return self._parts[0]
+        out = [self._parts[0]]
+        for name, part in zip(self.slots, self._parts[1:]):
+            value = values[name]
+            out.append(value if isinstance(value, RawJSON) else dumps_compact(value))
+            out.append(part)
+        return b"".join(out)
+
+    def render_message(self, to_phone: str, **values: Union[str, RawJSON]) -> bytes:
+        """Payload completo listo para enviar (ver build_message_envelope)."""
+        return build_message_envelope(to_phone, self.render(**values))
+
+
+TEMPLATES: Dict[str, InteractiveTemplate] = {}
+
+
+def register_template(name: str, interactive: Dict[str, Any]) -> InteractiveTemplate:
+    """Compilar y registrar un template (reemplaza uno existente con el mismo nombre)."""
+    template = InteractiveTemplate(name, interactive)
+    TEMPLATES[name] = template
+    return template
+
+
+def get_template(name: str) -> InteractiveTemplate:
+    """Template registrado por nombre (KeyError si no existe)."""
+    return TEMPLATES[name]
+
+
+@lru_cache(maxsize=256)
+def _accommodation_row_prefix(acc_id: Any, name: str, base_price: Decimal, capacity: Any) -> bytes:
+    """Fila de alojamiento serializada hasta el total (lo único que depende de las noches)."""
+    row = {
+        "id": f"acc_{acc_id}",
+        "title": name,
+        "description": f"{format_price(base_price)}/noche · {capacity} huéspedes · Total: ",
+    }
+    # Quitar '"}' final para poder concatenar el total dentro del string description
+    return dumps_compact(row)[:-2]
+
+
+def render_accommodation_rows(accommodations: List[Dict[str, Any]], nights: int) -> RawJSON:
+    """Filas de la lista de alojamientos (mismo contenido que build_accommodations_list)."""
+    rows = []
+    for acc in accommodations[:10]:  # WhatsApp limit: 10 items
+        base_price = Decimal(str(acc.get("base_price", 0)))
+        prefix = _accommodation_row_prefix(
+            acc.get("id"), acc.get("name", "Alojamiento"), base_price, acc.get("capacity", 1)
+        )
+        rows.append(prefix + format_price(base_price * nights).encode("utf-8") + b'"}')
+    return RawJSON(b"[" + b",".join(rows) + b"]")
+
+
+def render_accommodations_list(
+    accommodations: List[Dict[str, Any]], check_in: date, check_out: date
+) -> bytes:
+    """``interactive`` del template 'accommodations_list' para las fechas dadas."""
+    rows = render_accommodation_rows(accommodations, (check_out - check_in).days)
+    count = min(len(accommodations), 10)
+    return get_template("accommodations_list").render(
+        body=(
+            f"🏠 Alojamientos disponibles para:\n"
+            f"📅 {check_in.strftime('%d/%m')} - {check_out.strftime('%d/%m')}"
+        ),
+        section_title=f"Disponibles ({count} opciones)",
+        rows=rows,
+    )
+
+
+# Menús estáticos: compilados una sola vez al importar el módulo
+register_template("main_menu", build_buttons_interactive(WELCOME_MESSAGE, _MAIN_MENU_BUTTONS))
+register_template(
+    "availability_prompt",
+    build_buttons_interactive(AVAILABILITY_PROMPT_MESSAGE, _DATE_SELECTION_BUTTONS),
+)
+register_template(
+    "help_topics",
+    build_list_interactive(
+        "🆘 ¿En qué puedo ayudarte?",
+        "Ver temas",
+        [{"title": "Temas de Ayuda", "rows": list(_HELP_TOPIC_ROWS)}],
+    ),
+)
+register_template(
+    "guests_selection", build_buttons_interactive(slot("body"), _GUESTS_SELECTION_BUTTONS)
+)
+register_template(
+    "accommodations_list",
+    build_list_interactive(
+        slot("body"),
+        "Ver opciones",
+        [{"title": slot("section_title"), "rows": slot("rows")}],
+        header_text="Disponibilidad",
+    ),
+)
@@ -0,0 +1,195 @@
+"""Pipeline asíncrono de notas de voz recibidas por el webhook de WhatsApp.
+
+El webhook solo recibe el ``media_id`` del audio; el procesamiento completo tarda
+segundos y no puede bloquear la respuesta a Meta (que reintenta ante demoras). El
+webhook encola el trabajo con ``schedule_audio_message`` y responde de inmediato;
+en background:
+
+1. resolve: ``GET /{media_id}`` en Graph API -> URL temporal de descarga
+2. download: descarga en streaming con tope AUDIO_MAX_BYTES
+3. transcribe: ``transcribe_audio_bytes`` (cache por hash + pool de procesos)
+4. flow: mismo flujo NLU -> pre-reserva que los mensajes de texto
+
+Las llamadas HTTP usan un ``httpx.AsyncClient`` compartido por proceso (keep-alive
+y pool de conexiones hacia graph.facebook.com y el CDN de media). Cada etapa se
+mide en ``whatsapp_media_stage_seconds{stage}`` y el resultado final en
+``whatsapp_media_jobs_total{status}``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Set
+
+import httpx
+import structlog
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.services.audio import AudioTooLarge, transcribe_audio_bytes, transcription_enabled
+from app.services.message_flow import handle_text_message
+from app.services.whatsapp import send_text_message
+from prometheus_client import Counter, Histogram
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+GRAPH_API_URL = "https://graph.facebook.com/v17.0"
+MEDIA_HTTP_TIMEOUT = httpx.Timeout(10.0, read=30.0)
+MEDIA_HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+AUDIO_NOT_UNDERSTOOD_MESSAGE = (
+    "No pude entender bien tu audio 🙏 ¿Me lo podés escribir? "
+    "Por ejemplo: 'Quiero reservar del 10/12 al 12/12 para 2 personas'."
+)
+
+MEDIA_STAGE_DURATION = Histogram(
+    "whatsapp_media_stage_seconds",
+    "Duración por etapa del pipeline de notas de voz",
+    ["stage"],  # queue | resolve | download | transcribe | flow | total
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60],
+)
+
+MEDIA_JOBS = Counter(
+    "whatsapp_media_jobs_total",
+    "Notas de voz procesadas por resultado",
+    ["status"],  # processed | needs_text | too_large | download_error | error
+)
+
+
+class MediaDownloadError(Exception):
+    """No se pudo resolver o descargar el media desde Graph API."""
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_tasks: Set[asyncio.Task] = set()
+
+
+def get_media_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartido del proceso para Graph API y descargas de media."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=MEDIA_HTTP_TIMEOUT, limits=MEDIA_HTTP_LIMITS)
+    return _http_client
+
+
+async def close_media_pipeline() -> None:
+    """Shutdown (lifespan): cancelar trabajos en curso y cerrar el cliente HTTP."""
+    global _http_client
+    for task in list(_tasks):
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def media_pipeline_enabled() -> bool:
+    """Requiere transcripción disponible y credenciales reales de WhatsApp."""
+    token = settings.WHATSAPP_ACCESS_TOKEN
+    return transcription_enabled() and bool(token) and token != "dummy"  # nosec B105
+
+
+def _auth_headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}"}
+
+
+async def resolve_media_url(media_id: str) -> str:
+    """Intercambiar el ``media_id`` del webhook por la URL temporal de descarga."""
+    try:
+        resp = await get_media_http_client().get(
+            f"{GRAPH_API_URL}/{media_id}", headers=_auth_headers()
+        )
+        resp.raise_for_status()
+        url = resp.json().get("url")
+    except httpx.HTTPError as e:
+        raise MediaDownloadError(f"resolve {media_id}: {e}") from e
+    if not url:
+        raise MediaDownloadError(f"resolve {media_id}: respuesta sin url")
+    return url
+
+
+async def download_media(url: str, max_bytes: int) -> bytes:
+    """Descargar en streaming cortando apenas se supera ``max_bytes``."""
+    buffer = bytearray()
+    try:
+        async with get_media_http_client().stream("GET", url, headers=_auth_headers()) as resp:
+            resp.raise_for_status()
+            declared = int(resp.headers.get("content-length") or 0)
+            if declared > max_bytes:
+                raise AudioTooLarge()
+            async for chunk in resp.aiter_bytes():
+                buffer.extend(chunk)
+                if len(buffer) > max_bytes:
+                    raise AudioTooLarge()
+    except httpx.HTTPError as e:
+        raise MediaDownloadError(f"download: {e}") from e
+    return bytes(buffer)
+
+
+async def _timed(stage: str, coro: Any) -> Any:
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        MEDIA_STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+async def process_audio_message(
+    message_id: str, user_phone: str, media_id: str, enqueued_at: Optional[float] = None
+) -> Dict[str, Any]:
+    """Procesar una nota de voz de punta a punta (ver docstring del módulo)."""
+    started = time.perf_counter()
+    if enqueued_at is not None:
+        MEDIA_STAGE_DURATION.labels(stage="queue").observe(max(0.0, started - enqueued_at))
+    log = logger.bind(message_id=message_id, media_id=media_id)
+    status = "error"
+    try:
+        try:
+            url = await _timed("resolve", resolve_media_url(media_id))
+            raw = await _timed("download", download_media(url, settings.AUDIO_MAX_BYTES))
+        except AudioTooLarge:
+            status = "too_large"
+            await send_text_message(user_phone, AUDIO_NOT_UNDERSTOOD_MESSAGE)
+            return {"status": status}
+        except MediaDownloadError as e:
+            status = "download_error"
+            log.warning("whatsapp_media_download_failed", error=str(e))
+            return {"status": status}
+
+        transcription = await _timed("transcribe", transcribe_audio_bytes(raw))
+        if "error" in transcription:
+            status = "needs_text"
+            log.info("whatsapp_audio_needs_text", reason=transcription["error"])
+            await send_text_message(user_phone, AUDIO_NOT_UNDERSTOOD_MESSAGE)
+            return {"status": status, **transcription}
+
+        async with async_session_maker() as db:
+            outcome = await _timed(
+                "flow", handle_text_message(db, user_phone, transcription["text"])
+            )
+        status = "processed"
+        log.info(
+            "whatsapp_audio_processed",
+            confidence=transcription["confidence"],
+            auto_action=outcome.get("auto_action"),
+        )
+        return {"status": status, "text": transcription["text"], **outcome}
+    except Exception as e:
+        log.exception("whatsapp_audio_pipeline_error", error=str(e))
+        return {"status": status}
+    finally:
+        MEDIA_JOBS.labels(status=status).inc()
+        MEDIA_STAGE_DURATION.labels(stage="total").observe(time.perf_counter() - started)
+
+
+def schedule_audio_message(message_id: str, user_phone: str, media_id: str) -> asyncio.Task:
+    """Encolar el procesamiento en background y volver de inmediato (no bloquea el webhook)."""
+    task = asyncio.create_task(
+        process_audio_message(message_id, user_phone, media_id, enqueued_at=time.perf_counter())
+    )
+    # Referencia fuerte hasta que termine (el loop solo guarda referencias débiles)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
@@ -24,6 +24,7 @@
 from app.core.config import get_settings
 from app.models import Accommodation, Payment, Reservation
 from app.models.enums import PaymentStatus, ReservationStatus
+from app.services.occupancy import sync_reservation_nights
 from app.services.whatsapp import send_payment_approved, send_payment_pending, send_payment_rejected
 from app.utils.retry import retry_async
 from sqlalchemy import select
@@ -158,6 +159,7 @@ async def process_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
 
         # Nuevo payment
         reservation_id = None
+        confirmed_reservation = False
         if external_reference:
             reservation = await self._get_reservation_by_code(external_reference)
             if reservation:
@@ -170,6 +172,7 @@ async def process_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
                     reservation.reservation_status = ReservationStatus.CONFIRMED.value  # type: ignore
                     reservation.confirmed_at = now  # type: ignore
                     reservation.payment_status = PaymentStatus.PAID.value  # type: ignore
+                    confirmed_reservation = True
 
         payment = Payment(
             reservation_id=reservation_id if reservation_id is not None else None,
@@ -182,6 +185,8 @@ async def process_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
             event_last_received_at=now,
         )
         self.db.add(payment)
+        if confirmed_reservation:
+            await sync_reservation_nights(self.db, [reservation_id])
         await self.db.commit()
         await self.db.refresh(payment)
 
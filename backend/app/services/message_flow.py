@@ -0,0 +1,103 @@
+"""Orquestación NLU -> pre-reserva para mensajes de texto de WhatsApp.
+
+Compartida por el webhook (mensajes de texto) y el pipeline de media (notas de voz
+ya transcriptas), para que ambos canales sigan exactamente el mismo flujo.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, Optional
+
+from app.metrics import NLU_PRE_RESERVE
+from app.services import nlu
+from app.services.accommodation_index import resolve_accommodation_id
+from app.services.reservations import ReservationService
+from app.services.whatsapp import send_text_message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _count(action: str) -> None:
+    try:
+        NLU_PRE_RESERVE.labels(action=action, source="whatsapp").inc()
+    except Exception:  # nosec B110
+        pass
+
+
+async def _notify(user_phone: str, body: str) -> None:
+    try:
+        await send_text_message(user_phone, body)
+    except Exception:  # nosec B110  # no-op en dev/test; errores de envío no cortan el flujo
+        pass
+
+
+async def handle_text_message(db: AsyncSession, user_phone: str, text: str) -> Dict[str, Any]:
+    """Analizar ``text`` con NLU e intentar crear la pre-reserva.
+
+    Devuelve los campos a agregar al mensaje normalizado: ``nlu``, ``auto_action``
+    (needs_slots | pre_reserved | error) y, según el caso, ``missing``,
+    ``pre_reservation`` o ``error``.
+    """
+    analysis = nlu.analyze_cached(text)
+    out: Dict[str, Any] = {"nlu": analysis}
+
+    # Extraer slots
+    dates = analysis.get("dates") or []
+    guests = analysis.get("guests")
+    parsed: list[str] = [d for d in dates if isinstance(d, str)]
+    check_in_iso: Optional[str] = parsed[0] if parsed else None
+    check_out_iso: Optional[str] = parsed[1] if len(parsed) >= 2 else None
+
+    missing = []
+    # Resolver alojamiento: el único activo o el mencionado por nombre ("cabaña del lago")
+    acc_id = await resolve_accommodation_id(db, text)
+    if acc_id is None:
+        missing.append("accommodation_id")
+
+    if not check_in_iso:
+        missing.append("check_in")
+    if not check_out_iso:
+        missing.append("check_out")
+    if not guests:
+        missing.append("guests")
+
+    if missing:
+        out["auto_action"] = "needs_slots"
+        out["missing"] = missing
+        _count("needs_slots")
+        # Enviar prompt simple de slots faltantes (no-op en dev/test)
+        await _notify(user_phone, f"Para avanzar necesito: {', '.join(missing)}.")
+        return out
+
+    try:
+        ci = date.fromisoformat(check_in_iso)  # type: ignore[arg-type]
+        co = date.fromisoformat(check_out_iso)  # type: ignore[arg-type]
+    except Exception:
+        out["auto_action"] = "needs_slots"
+        out["missing"] = ["check_in", "check_out"]
+        return out
+
+    service = ReservationService(db)
+    result = await service.create_prereservation(
+        accommodation_id=acc_id,  # type: ignore[arg-type]
+        check_in=ci,
+        check_out=co,
+        guests=int(guests),
+        channel="whatsapp",
+        contact_name="Cliente WhatsApp",
+        contact_phone=user_phone,
+        contact_email=None,
+    )
+    if result.get("error"):
+        out["auto_action"] = "error"
+        out["error"] = result["error"]
+        _count("error")
+        await _notify(user_phone, f"No pude crear la pre-reserva: {result['error']}")
+    else:
+        out["auto_action"] = "pre_reserved"
+        out["pre_reservation"] = result
+        _count("pre_reserved")
+        code = result.get("code", "")
+        exp = result.get("expires_at", "")
+        await _notify(user_phone, f"Listo! Pre-reserva {code} creada. Vence: {exp}")
+    return out
@@ -1,111 +1,282 @@
+"""NLU por reglas: intents, fechas y huéspedes en una sola pasada.
+
+Todas las reglas (gramática de fechas, huéspedes y palabras clave de cada intent)
+forman una única regex con grupos nombrados que recorre el texto normalizado una
+vez. Se devuelven todos los intents presentes (un mensaje como "hay disponible y
+cuánto sale" tiene disponibilidad y precio) y cada entidad con su span en el texto
+original.
+
+``analyze_cached`` agrega un cache LRU/TTL acotado por worker: muchos mensajes son
+casi idénticos ("hola", "precio?", "Hay lugar este finde??") y se resuelven una sola
+vez por día (la fecha y el próximo sábado forman parte de la clave por las
+expresiones relativas: "finde" cambia el sábado a la noche).
+"""
+
+import copy
 import re
+import time
+from collections import OrderedDict
 from datetime import date, datetime
-from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from app.core.config import get_settings
+from app.services.date_grammar import (
+    DATE_ALTERNATIVES,
+    DATE_KINDS,
+    fallback_dates,
+    normalize,
+    resolve_match,
+)
 from app.utils.datetime_utils import get_next_weekend
-from dateparser import parse as dateparse
+from prometheus_client import Counter, Gauge
+
+settings = get_settings()
 
+# Orden de prioridad (frecuencia en tráfico): el primero es el intent principal
 INTENT_KEYWORDS = {
-    "disponibilidad": re.compile(r"disponib|libre|hay", re.IGNORECASE),
-    "precio": re.compile(r"precio|costo|sale|cuanto", re.IGNORECASE),
-    "reservar": re.compile(r"reserv|apart|tomo", re.IGNORECASE),
-    "servicios": re.compile(r"servicio|incluye|wifi", re.IGNORECASE),
+    "disponibilidad": r"disponib|libre|hay",
+    "reservar": r"reserv|apart|tomo",
+    "precio": r"precio|costo|cuesta|sale|cuanto",
+    "servicios": r"servicio|incluye|wifi",
 }
+INTENT_PRIORITY = {intent: i for i, intent in enumerate(INTENT_KEYWORDS)}
+
+GUESTS_ALTERNATIVE = r"(?P<guests>\b\d+\s*(?:personas?|pax|huespedes?)\b|\bsomos\s+\d+\b)"
+_DIGITS = re.compile(r"\d+")
 
-DATE_PATTERN = re.compile(r"(\d{1,2}[/-]\d{1,2}([/-]\d{2,4})?)")
-WEEKEND_PATTERN = re.compile(r"fin de semana|finde", re.IGNORECASE)
-RANGE_PATTERN = re.compile(
-    r"(\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?)\s*(?:al|-|a)\s*(\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?)",
-    re.IGNORECASE,
+NLU_GRAMMAR = re.compile(
+    "|".join(
+        [DATE_ALTERNATIVES, GUESTS_ALTERNATIVE]
+        + [rf"(?P<intent_{name}>\b(?:{kw})\w*)" for name, kw in INTENT_KEYWORDS.items()]
+    )
 )
-GUESTS_PATTERN = re.compile(r"(\d+)\s*(personas?|pax|hu[eé]spedes?)", re.IGNORECASE)
+
+NLU_DATE_RESOLUTION = Counter(
+    "nlu_date_resolutions_total",
+    "Resolución de fechas del NLU por camino",
+    ["path"],  # grammar | fallback | none
+)
+
+NLU_CACHE_LOOKUPS = Counter(
+    "nlu_cache_lookups_total",
+    "Consultas al cache de resultados del NLU",
+    ["result"],  # hit | miss
+)
+NLU_CACHE_ENTRIES = Gauge("nlu_cache_entries", "Entradas en el cache del NLU del worker")
+NLU_CACHE_HIT_RATIO = Gauge("nlu_cache_hit_ratio", "Hit ratio del cache del NLU del worker")
+
+# Puntuación y espacios que no cambian el análisis ("/" y "-" sí: forman fechas)
+_CANON_SEPARATORS = frozenset("¿?¡!.,;:\"'()[]*_~")
 
 
-@lru_cache(maxsize=1000)
-def _parse_date_cached(text: str, date_order: str = "DMY") -> Optional[datetime]:
-    """Parse date with LRU cache for common date strings.
+def _scan(text: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Una pasada de NLU_GRAMMAR; fechas por dateparser solo si la gramática no halló ninguna.
 
-    Cache hit esperado: 70% para fechas comunes como 'mañana', 'este finde', etc.
-    Mejora esperada: 50-70% en performance de parsing de fechas.
+    ``entities``: ``{"type": intent|date|guests, "value", "text", "start", "end"}`` con
+    spans sobre ``text`` (las fechas del fallback no llevan span).
     """
-    try:
-        return dateparse(text, settings={"DATE_ORDER": date_order})
-    except Exception:
-        return None
+    now = now or datetime.now()
+    intents: set = set()
+    dates: List[str] = []
+    guests: Optional[int] = None
+    entities: List[Dict[str, Any]] = []
 
+    for m in NLU_GRAMMAR.finditer(normalize(text)):
+        kind = m.lastgroup or ""
+        start, end = m.span()
+        if kind in DATE_KINDS:
+            resolved = [d.isoformat() for d in resolve_match(m, now)]
+            if not resolved:
+                continue
+            dates.extend(resolved)
+            value: Any = resolved
+            kind = "date"
+        elif kind == "guests":
+            value = int(_DIGITS.search(m.group()).group())  # type: ignore[union-attr]
+            if guests is None:
+                guests = value
+        else:
+            value = kind[len("intent_") :]
+            intents.add(value)
+            kind = "intent"
+        entities.append(
+            {"type": kind, "value": value, "text": text[start:end], "start": start, "end": end}
+        )
+
+    path = "grammar" if dates else "none"
+    if not dates:
+        dates = [d.isoformat() for d in fallback_dates(text, now)]
+        if dates:
+            path = "fallback"
+
+    return {
+        "intents": sorted(intents, key=INTENT_PRIORITY.__getitem__) or ["desconocido"],
+        "dates": dates,
+        "guests": guests,
+        "entities": entities,
+        "date_path": path,
+    }
 
-def detect_intent(text: str) -> Dict[str, Any]:
-    """Detecta intents ordenados por frecuencia (early exit).
 
-    Orden basado en análisis de tráfico:
-    1. disponibilidad (50% requests)
-    2. reservar (30%)
-    3. precio (15%)
-    4. servicios (5%)
+def detect_intent(text: str) -> Dict[str, Any]:
+    """Todos los intents presentes, ordenados por prioridad (el primero es el principal).
 
-    Mejora esperada: 20-30% al evitar checks innecesarios.
+    Prioridad basada en análisis de tráfico: disponibilidad (50%), reservar (30%),
+    precio (15%), servicios (5%).
     """
-    # Early exit - checks más comunes primero
-    if INTENT_KEYWORDS["disponibilidad"].search(text):
-        return {"intents": ["disponibilidad"]}
-
-    if INTENT_KEYWORDS["reservar"].search(text):
-        return {"intents": ["reservar"]}
-
-    if INTENT_KEYWORDS["precio"].search(text):
-        return {"intents": ["precio"]}
-
-    if INTENT_KEYWORDS["servicios"].search(text):
-        return {"intents": ["servicios"]}
-
-    return {"intents": ["desconocido"]}
-
-
-def extract_dates(text: str) -> Dict[str, Any]:
-    # weekend shortcut
-    if WEEKEND_PATTERN.search(text):
-        sat, sun = get_next_weekend()
-        return {"dates": [sat.isoformat(), sun.isoformat()]}
-
-    # explicit range like "15/12 al 18/12"
-    m = RANGE_PATTERN.search(text)
-    if m:
-        d1_raw, d2_raw = m.group(1), m.group(2)
-        d1 = _parse_date_cached(d1_raw, "DMY")
-        d2 = _parse_date_cached(d2_raw, "DMY")
-        results = []
-        if d1:
-            results.append(d1.date().isoformat())
-        if d2:
-            results.append(d2.date().isoformat())
-        if results:
-            return {"dates": results}
-
-    matches = DATE_PATTERN.findall(text)
-    results = []
-    for m, _ in matches:
-        parsed = _parse_date_cached(m, "DMY")
-        if parsed:
-            results.append(parsed.date().isoformat())
-    return {"dates": results}
+    return {"intents": _scan(text)["intents"]}
+
+
+def extract_dates(text: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Fechas ISO en orden de aparición (gramática compilada; dateparser solo como fallback)."""
+    scan = _scan(text, now)
+    NLU_DATE_RESOLUTION.labels(path=scan["date_path"]).inc()
+    return {"dates": scan["dates"]}
 
 
 def extract_guests(text: str) -> Dict[str, Any]:
-    m = GUESTS_PATTERN.search(text)
-    if m:
-        try:
-            return {"guests": int(m.group(1))}
-        except Exception:
-            return {}
-    return {}
-
-
-def analyze(text: str) -> Dict[str, Any]:
-    r = {}
-    r.update(detect_intent(text))
-    r.update(extract_dates(text))
-    guests = extract_guests(text)
-    if guests:
-        r.update(guests)
+    guests = _scan(text)["guests"]
+    return {"guests": guests} if guests is not None else {}
+
+
+def analyze(text: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Intents, fechas, huéspedes y entidades con spans en una sola pasada."""
+    scan = _scan(text, now)
+    NLU_DATE_RESOLUTION.labels(path=scan["date_path"]).inc()
+    r: Dict[str, Any] = {
+        "intents": scan["intents"],
+        "dates": scan["dates"],
+        "entities": scan["entities"],
+    }
+    if scan["guests"] is not None:
+        r["guests"] = scan["guests"]
     return r
+
+
+def analyze_many(texts: Iterable[str], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """``analyze`` para una lista de mensajes en una sola llamada (backfills, load tests).
+
+    Todos los mensajes se resuelven contra el mismo ``now`` (fechas relativas coherentes
+    dentro del lote) y los textos repetidos se analizan una sola vez; cada resultado es
+    una copia independiente.
+    """
+    now = now or datetime.now()
+    memo: Dict[str, Dict[str, Any]] = {}
+    results = []
+    for text in texts:
+        if text not in memo:
+            memo[text] = analyze(text, now)
+        results.append(copy.deepcopy(memo[text]))
+    return results
+
+
+def canonical(text: str) -> Tuple[str, List[int]]:
+    """Texto canónico (sin tildes, mayúsculas, puntuación ni espacios repetidos).
+
+    Devuelve también, para cada carácter canónico, su posición en ``text`` para
+    llevar los spans de las entidades de vuelta al mensaje original.
+    """
+    chars: List[str] = []
+    positions: List[int] = []
+    pending = -1
+    for i, c in enumerate(normalize(text)):
+        if c.isspace() or c in _CANON_SEPARATORS:
+            if chars and pending < 0:
+                pending = i
+            continue
+        if pending >= 0:
+            chars.append(" ")
+            positions.append(pending)
+            pending = -1
+        chars.append(c)
+        positions.append(i)
+    return "".join(chars), positions
+
+
+class AnalysisCache:
+    """LRU con TTL de resultados de ``analyze`` por ``(texto canónico, fecha)``."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, date], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[str, date]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            NLU_CACHE_LOOKUPS.labels(result="miss").inc()
+        else:
+            self.hits += 1
+            NLU_CACHE_LOOKUPS.labels(result="hit").inc()
+            self._entries.move_to_end(key)
+        NLU_CACHE_HIT_RATIO.set(self.hit_ratio)
+        return entry[1] if entry else None
+
+    def put(self, key: Tuple[str, date], value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        NLU_CACHE_ENTRIES.set(len(self._entries))
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+        NLU_CACHE_ENTRIES.set(0)
+
+
+analysis_cache = AnalysisCache(settings.NLU_CACHE_MAX_ENTRIES, settings.NLU_CACHE_TTL_SECONDS)
+
+
+def analyze_cached(text: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """``analyze`` con cache por texto canónico y día (webhook y router del NLU).
+
+    El análisis se hace sobre el texto canónico, así todas las variantes de un mismo
+    mensaje comparten resultado; los spans de las entidades se traducen al ``text``
+    recibido. Cada llamada devuelve una copia independiente.
+    """
+    if analysis_cache.max_entries <= 0:
+        return analyze(text, now)
+    now = now or datetime.now()
+    canon, positions = canonical(text)
+    # El próximo sábado depende de la hora (sábado después de las 18 -> el siguiente)
+    key = (canon, now.date(), get_next_weekend(now)[0])
+    result = analysis_cache.get(key)
+    if result is None:
+        result = analyze(canon, now)
+        analysis_cache.put(key, result)
+
+    entities = []
+    for entity in result["entities"]:
+        start = positions[entity["start"]]
+        end = positions[entity["end"] - 1] + 1
+        value = entity["value"]
+        entities.append(
+            {
+                **entity,
+                "value": list(value) if isinstance(value, list) else value,
+                "text": text[start:end],
+                "start": start,
+                "end": end,
+            }
+        )
+    return {
+        **result,
+        "intents": list(result["intents"]),
+        "dates": list(result["dates"]),
+        "entities": entities,
+    }
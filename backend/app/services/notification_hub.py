@@ -0,0 +1,212 @@
+"""Hub de notificaciones WebSocket del panel admin (fan-out entre workers).
+
+- ``publish`` envía el evento al canal Redis ``admin:notifications``; cada worker
+  está suscripto y lo reparte a sus sockets locales, así un admin conectado a
+  cualquier worker de gunicorn recibe todos los eventos.
+- El reparto local no espera a ningún socket: cada cliente tiene una cola acotada
+  y una tarea propia que envía en orden. Un cliente lento solo se atrasa él; con la
+  cola llena se aplica ``WS_SLOW_CLIENT_POLICY`` (``drop_oldest`` descarta el mensaje
+  más viejo, ``disconnect`` lo desconecta) y un envío que supera
+  ``WS_SEND_TIMEOUT_SECONDS`` lo desconecta.
+- Sin suscripción activa (Redis caído o tests) ``publish`` reparte solo en local.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+
+import structlog
+from app.core.config import get_settings
+from fastapi import WebSocket
+from prometheus_client import Counter, Gauge
+
+logger = structlog.get_logger()
+
+CHANNEL = "admin:notifications"
+SLOW_CLIENT_POLICIES = ("drop_oldest", "disconnect")
+RESUBSCRIBE_DELAY_SECONDS = 1.0
+# Close code 1013 "Try Again Later": el cliente puede reconectar
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+WS_CLIENTS = Gauge("ws_clients_connected", "Clientes WebSocket admin conectados a este worker")
+WS_NOTIFICATIONS_PUBLISHED = Counter(
+    "ws_notifications_published_total", "Notificaciones admin publicadas", ["transport"]
+)
+WS_MESSAGES_DROPPED = Counter(
+    "ws_messages_dropped_total", "Mensajes WebSocket descartados por cliente lento", ["reason"]
+)
+WS_SLOW_DISCONNECTS = Counter(
+    "ws_slow_client_disconnects_total", "Clientes WebSocket desconectados por lentos", ["reason"]
+)
+
+
+class ClientConnection:
+    """Socket de un admin con su cola de envío acotada y su tarea escritora."""
+
+    def __init__(
+        self,
+        hub: "NotificationHub",
+        websocket: WebSocket,
+        max_queue: int,
+        send_timeout: float,
+        policy: str,
+    ) -> None:
+        self.hub = hub
+        self.websocket = websocket
+        self.queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=max_queue)
+        self.send_timeout = send_timeout
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, message: Dict[str, Any]) -> bool:
+        """Encolar sin bloquear; devuelve False si el mensaje no se encoló."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.policy == "disconnect":
+            WS_MESSAGES_DROPPED.labels(reason="disconnected").inc()
+            self.close("queue_full")
+            return False
+        self.queue.get_nowait()
+        self.queue.put_nowait(message)
+        self.dropped += 1
+        WS_MESSAGES_DROPPED.labels(reason="queue_full").inc()
+        return True
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.close("send_timeout")
+        except Exception as e:
+            logger.info("websocket_send_failed", error=str(e))
+            self.close(None)
+
+    def close(self, reason: Optional[str]) -> None:
+        """Sacar al cliente del hub; con ``reason`` (lento) además cerrar el socket."""
+        if self.closed:
+            return
+        self.closed = True
+        self.hub.unregister(self)
+        if asyncio.current_task() is not self._writer:
+            self._writer.cancel()
+        if reason:
+            WS_SLOW_DISCONNECTS.labels(reason=reason).inc()
+            logger.warning("websocket_slow_client_disconnected", reason=reason)
+            asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.websocket.close(code=SLOW_CLIENT_CLOSE_CODE, reason="slow consumer")
+        except Exception:  # nosec B110 - el socket ya puede estar cerrado
+            pass
+
+
+class NotificationHub:
+    """Clientes locales + suscripción Redis compartida por todos los workers."""
+
+    def __init__(self) -> None:
+        self.clients: Set[ClientConnection] = set()
+        self._redis: Any = None
+        self._subscriber: Optional[asyncio.Task[None]] = None
+        self._subscribed = asyncio.Event()
+
+    async def connect(self, websocket: WebSocket) -> ClientConnection:
+        settings = get_settings()
+        policy = settings.WS_SLOW_CLIENT_POLICY
+        await websocket.accept()
+        client = ClientConnection(
+            self,
+            websocket,
+            max_queue=settings.WS_CLIENT_QUEUE_SIZE,
+            send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+            policy=policy if policy in SLOW_CLIENT_POLICIES else "drop_oldest",
+        )
+        self.clients.add(client)
+        WS_CLIENTS.set(len(self.clients))
+        logger.info("websocket_connected", total_connections=len(self.clients))
+        return client
+
+    def unregister(self, client: ClientConnection) -> None:
+        if client in self.clients:
+            self.clients.discard(client)
+            WS_CLIENTS.set(len(self.clients))
+            logger.info("websocket_disconnected", total_connections=len(self.clients))
+
+    def fan_out(self, message: Dict[str, Any]) -> int:
+        """Encolar ``message`` en cada cliente local (O(clientes), sin await)."""
+        return sum(client.offer(message) for client in list(self.clients))
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        """Publicar a todos los workers; sin suscripción activa, reparto local."""
+        if self._redis is not None and self._subscribed.is_set():
+            try:
+                await self._redis.publish(CHANNEL, json.dumps(message, default=str))
+                WS_NOTIFICATIONS_PUBLISHED.labels(transport="redis").inc()
+                return
+            except Exception as e:
+                logger.warning("ws_notification_publish_failed", error=str(e))
+        self.fan_out(message)
+        WS_NOTIFICATIONS_PUBLISHED.labels(transport="local").inc()
+
+    async def start(self, redis_client: Any) -> None:
+        """Suscribirse al canal (cliente Redis compartido) en una tarea de fondo."""
+        if self._subscriber is not None:
+            return
+        self._redis = redis_client
+        self._subscriber = asyncio.create_task(self._subscribe_loop())
+
+    async def stop(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            try:
+                await self._subscriber
+            except asyncio.CancelledError:
+                pass
+        self._subscriber = None
+        self._redis = None
+        self._subscribed.clear()
+        for client in list(self.clients):
+            client.close(None)
+
+    async def _subscribe_loop(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(CHANNEL)
+                self._subscribed.set()
+                logger.info("ws_hub_subscribed", channel=CHANNEL)
+                async for item in pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    try:
+                        self.fan_out(json.loads(item["data"]))
+                    except (TypeError, ValueError) as e:
+                        logger.warning("ws_hub_bad_message", error=str(e))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("ws_hub_subscription_lost", error=str(e))
+            finally:
+                self._subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:  # nosec B110
+                    pass
+            await asyncio.sleep(RESUBSCRIBE_DELAY_SECONDS)
+
+
+# Instancia global del hub (una por worker)
+notification_hub = NotificationHub()
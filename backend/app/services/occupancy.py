@@ -0,0 +1,171 @@
+"""Ocupación diaria precomputada (``occupancy_nights``) para calendario y métricas admin.
+
+Cada transición de una reserva (creación, confirmación, cancelación, expiración,
+import iCal) llama a ``sync_reservation_nights`` antes del commit: se borran las
+noches de esas reservas y se reinsertan las de las que siguen activas. Así el
+calendario y la ocupación son range scans por ``(accommodation_id, night)`` o
+``night`` en lugar de cargar reservas y recorrerlas en Python.
+
+Noche = ``[check_in, check_out)``: el día de check-out no está ocupado.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import structlog
+from app.models import Accommodation, OccupancyNight, Reservation, ReservationStatus
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+ACTIVE_STATUSES = (ReservationStatus.PRE_RESERVED.value, ReservationStatus.CONFIRMED.value)
+MAX_RANGE_DAYS = 366
+REBUILD_BATCH_SIZE = 500
+
+
+def nights(check_in: date, check_out: date) -> List[date]:
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+async def sync_reservation_nights(db: AsyncSession, reservation_ids: Sequence[int]) -> int:
+    """Reescribir las noches de ``reservation_ids`` según su estado actual (sin commit)."""
+    ids = list(reservation_ids)
+    if not ids:
+        return 0
+    # La sesión de la app usa autoflush=False: escribir los cambios ORM pendientes
+    # (estado de la reserva) antes de leerlos con el SELECT de abajo
+    await db.flush()
+    await db.execute(delete(OccupancyNight).where(OccupancyNight.reservation_id.in_(ids)))
+    result = await db.execute(
+        select(
+            Reservation.id,
+            Reservation.accommodation_id,
+            Reservation.check_in,
+            Reservation.check_out,
+            Reservation.reservation_status,
+        ).where(Reservation.id.in_(ids), Reservation.reservation_status.in_(ACTIVE_STATUSES))
+    )
+    rows = [
+        {
+            "accommodation_id": acc_id,
+            "night": night,
+            "reservation_id": res_id,
+            "status": status,
+        }
+        for res_id, acc_id, check_in, check_out, status in result.all()
+        for night in nights(check_in, check_out)
+    ]
+    if rows:
+        await db.execute(insert(OccupancyNight), rows)
+    return len(rows)
+
+
+async def rebuild_occupancy(db: AsyncSession) -> int:
+    """Regenerar la tabla completa desde ``reservations`` (reparación / backfill)."""
+    await db.execute(delete(OccupancyNight))
+    ids = (
+        await db.scalars(
+            select(Reservation.id).where(Reservation.reservation_status.in_(ACTIVE_STATUSES))
+        )
+    ).all()
+    total = 0
+    for start in range(0, len(ids), REBUILD_BATCH_SIZE):
+        total += await sync_reservation_nights(db, ids[start : start + REBUILD_BATCH_SIZE])
+    await db.commit()
+    logger.info("occupancy_rebuilt", reservations=len(ids), nights=total)
+    return total
+
+
+def _range_filters(
+    from_date: date, to_date: date, accommodation_id: Optional[int] = None
+) -> List[Any]:
+    """Noches en ``[from_date, to_date]`` (ambos inclusive)."""
+    filters = [OccupancyNight.night >= from_date, OccupancyNight.night <= to_date]
+    if accommodation_id:
+        filters.append(OccupancyNight.accommodation_id == accommodation_id)
+    return filters
+
+
+def reservation_ids_in_range(
+    from_date: date, to_date: date, accommodation_id: Optional[int] = None
+) -> Any:
+    """Subconsulta de ids de reservas con al menos una noche en el rango."""
+    return (
+        select(OccupancyNight.reservation_id)
+        .where(*_range_filters(from_date, to_date, accommodation_id))
+        .distinct()
+    )
+
+
+async def calendar_nights(
+    db: AsyncSession, from_date: date, to_date: date, accommodation_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Noches ocupadas del rango, ordenadas por alojamiento y fecha."""
+    stmt = (
+        select(
+            OccupancyNight.accommodation_id,
+            OccupancyNight.night,
+            OccupancyNight.status,
+            OccupancyNight.reservation_id,
+        )
+        .where(*_range_filters(from_date, to_date, accommodation_id))
+        .order_by(OccupancyNight.accommodation_id, OccupancyNight.night)
+    )
+    return [dict(r) for r in (await db.execute(stmt)).mappings().all()]
+
+
+async def count_accommodations(db: AsyncSession, accommodation_id: Optional[int] = None) -> int:
+    if accommodation_id:
+        return 1
+    total = await db.scalar(
+        select(func.count()).select_from(Accommodation).where(Accommodation.active.is_(True))
+    )
+    return int(total or 0)
+
+
+async def occupancy_summary(
+    db: AsyncSession, from_date: date, to_date: date, accommodation_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """Ocupación por día y total del rango ``[from_date, to_date]``.
+
+    La tasa es noches confirmadas / (días × alojamientos): con varios alojamientos un
+    día cuenta como 100% solo si están todos ocupados.
+    """
+    confirmed = func.sum(
+        case((OccupancyNight.status == ReservationStatus.CONFIRMED.value, 1), else_=0)
+    )
+    pre_reserved = func.count() - confirmed
+    stmt = (
+        select(OccupancyNight.night, confirmed.label("confirmed"), pre_reserved.label("pre"))
+        .where(*_range_filters(from_date, to_date, accommodation_id))
+        .group_by(OccupancyNight.night)
+    )
+    by_day = {night: (int(c or 0), int(p or 0)) for night, c, p in (await db.execute(stmt)).all()}
+
+    units = await count_accommodations(db, accommodation_id)
+    days = []
+    for night in nights(from_date, to_date + timedelta(days=1)):
+        c, p = by_day.get(night, (0, 0))
+        days.append(
+            {
+                "day": night,
+                "confirmed": c,
+                "pre_reserved": p,
+                "occupancy_rate": round(c / units * 100, 1) if units else 0.0,
+            }
+        )
+    available = len(days) * units
+    total_confirmed = sum(d["confirmed"] for d in days)
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "accommodations": units,
+        "nights_available": available,
+        "nights_confirmed": total_confirmed,
+        "nights_pre_reserved": sum(d["pre_reserved"] for d in days),
+        "occupancy_rate": round(total_confirmed / available * 100, 1) if available else 0.0,
+        "days": days,
+    }
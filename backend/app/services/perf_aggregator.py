@@ -0,0 +1,259 @@
+"""Agregador de latencias HTTP en proceso, combinado entre workers vía Redis.
+
+Cada request se registra (middleware) en un sketch de buckets logarítmicos por grupo
+de rutas (``admin``, ``reservations``, ``webhooks``, ...): bucket
+``i = ceil(log_γ(ms))`` con ``γ = (1+α)/(1-α)``, así cualquier cuantil sale con
+error relativo ≤ ``α`` (1%) y dos sketches se combinan sumando contadores (estilo
+DDSketch).
+
+Cada ``PERF_FLUSH_INTERVAL_SECONDS`` el worker suma sus contadores pendientes al hash
+Redis del minuto (``perf:latency:{minuto}``, campos ``grupo|bucket``) con
+``HINCRBY``: Redis hace el merge entre workers. ``summary()`` lee los últimos
+``PERF_WINDOW_MINUTES`` minutos y calcula p50/p95/p99 y tasa de errores 5xx; si
+Redis falla usa solo los datos del worker. Nada de esto consulta Prometheus.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import structlog
+from app.core.config import get_settings
+from app.core.redis import get_redis_client
+
+logger = structlog.get_logger()
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+MIN_LATENCY_MS = 0.01  # valores menores caen en el primer bucket
+KEY_PREFIX = "perf:latency:"
+KEY_TTL_SECONDS = 2 * 3600
+QUANTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+
+# Primer segmento después de /api/v1 -> grupo (cardinalidad acotada)
+ROUTE_GROUPS = {
+    "admin",
+    "reservations",
+    "webhooks",
+    "nlu",
+    "audio",
+    "ical",
+    "mercadopago",
+    "whatsapp",
+    "healthz",
+    "readyz",
+}
+# Contadores del grupo que no son buckets
+TOTAL_FIELD = "n"
+ERROR_FIELD = "err"
+
+
+def route_group(path: str) -> str:
+    """Grupo de la ruta: ``/api/v1/admin/reservations`` -> ``admin``."""
+    parts = [p for p in path.split("/") if p]
+    if parts[:2] == ["api", "v1"]:
+        parts = parts[2:]
+    if parts and parts[0] in ROUTE_GROUPS:
+        return parts[0]
+    return "other"
+
+
+def bucket_index(latency_ms: float) -> int:
+    return math.ceil(math.log(max(latency_ms, MIN_LATENCY_MS)) / _LOG_GAMMA)
+
+
+def bucket_value(index: int) -> float:
+    """Valor representativo del bucket (error relativo ≤ α para todo el bucket)."""
+    return 2 * GAMMA**index / (GAMMA + 1)
+
+
+class LatencySketch:
+    """Histograma de buckets logarítmicos; ``merge`` suma contadores."""
+
+    __slots__ = ("buckets", "count", "errors")
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.errors = 0
+
+    def add(self, latency_ms: float, error: bool = False) -> None:
+        self.buckets[bucket_index(latency_ms)] += 1
+        self.count += 1
+        self.errors += int(error)
+
+    def merge(self, other: "LatencySketch") -> None:
+        for index, n in other.buckets.items():
+            self.buckets[index] += n
+        self.count += other.count
+        self.errors += other.errors
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return bucket_value(index)
+        return bucket_value(max(self.buckets))
+
+    def summary(self) -> Dict[str, float]:
+        result = {f"{name}_latency_ms": round(self.quantile(q), 2) for name, q in QUANTILES.items()}
+        result["requests"] = self.count
+        result["error_rate"] = round(self.errors / self.count * 100, 2) if self.count else 0.0
+        return result
+
+    def fields(self, group: str) -> Iterable[Tuple[str, int]]:
+        """Campos ``grupo|clave`` -> incremento para el hash Redis."""
+        yield f"{group}|{TOTAL_FIELD}", self.count
+        if self.errors:
+            yield f"{group}|{ERROR_FIELD}", self.errors
+        for index, n in self.buckets.items():
+            yield f"{group}|{index}", n
+
+
+def _minute(ts: Optional[float] = None) -> int:
+    return int((ts if ts is not None else time.time()) // 60)
+
+
+def sketches_from_hashes(hashes: Iterable[Dict[Any, Any]]) -> Dict[str, LatencySketch]:
+    """Reconstruir sketches por grupo desde hashes Redis (uno por minuto)."""
+    groups: Dict[str, LatencySketch] = defaultdict(LatencySketch)
+    for data in hashes:
+        for raw_field, raw_value in (data or {}).items():
+            name = raw_field.decode() if isinstance(raw_field, bytes) else str(raw_field)
+            group, _, key = name.partition("|")
+            value = int(raw_value)
+            sketch = groups[group]
+            if key == TOTAL_FIELD:
+                sketch.count += value
+            elif key == ERROR_FIELD:
+                sketch.errors += value
+            else:
+                try:
+                    sketch.buckets[int(key)] += value
+                except ValueError:
+                    continue
+    return dict(groups)
+
+
+class PerfAggregator:
+    """Sketches del worker: pendientes de enviar a Redis + historial local por minuto."""
+
+    def __init__(self) -> None:
+        self._pending: Dict[Tuple[int, str], LatencySketch] = defaultdict(LatencySketch)
+        self._local: Dict[Tuple[int, str], LatencySketch] = defaultdict(LatencySketch)
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def record(self, path: str, latency_ms: float, status_code: int) -> None:
+        key = (_minute(), route_group(path))
+        error = status_code >= 500
+        self._pending[key].add(latency_ms, error)
+        self._local[key].add(latency_ms, error)
+
+    async def flush(self, redis_client: Any = None) -> int:
+        """Sumar los contadores pendientes a Redis (un pipeline); devuelve campos enviados."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, defaultdict(LatencySketch)
+        sent = 0
+        try:
+            client = redis_client or get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for (minute, group), sketch in pending.items():
+                key = f"{KEY_PREFIX}{minute}"
+                for name, increment in sketch.fields(group):
+                    pipe.hincrby(key, name, increment)
+                    sent += 1
+                pipe.expire(key, KEY_TTL_SECONDS)
+            if hasattr(client, "execute_pipeline"):
+                await client.execute_pipeline(pipe)
+            else:
+                await pipe.execute()
+        except Exception as e:
+            # Reintentar en el próximo flush (sin acumular minutos que ya expirarían)
+            oldest = _minute() - KEY_TTL_SECONDS // 60
+            for key, sketch in pending.items():
+                if key[0] >= oldest:
+                    self._pending[key].merge(sketch)
+            logger.warning("perf_flush_failed", error=str(e))
+            return 0
+        self._prune_local()
+        return sent
+
+    def _prune_local(self) -> None:
+        oldest = _minute() - get_settings().PERF_WINDOW_MINUTES
+        for key in [k for k in self._local if k[0] < oldest]:
+            del self._local[key]
+
+    def _local_window(self, minutes: int) -> Dict[str, LatencySketch]:
+        oldest = _minute() - minutes + 1
+        groups: Dict[str, LatencySketch] = defaultdict(LatencySketch)
+        for (minute, group), sketch in self._local.items():
+            if minute >= oldest:
+                groups[group].merge(sketch)
+        return dict(groups)
+
+    async def summary(self, redis_client: Any = None) -> Dict[str, Any]:
+        """p50/p95/p99 y tasa de errores por grupo y total de los últimos N minutos."""
+        minutes = get_settings().PERF_WINDOW_MINUTES
+        now = _minute()
+        source = "redis"
+        try:
+            client = redis_client or get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for minute in range(now - minutes + 1, now + 1):
+                pipe.hgetall(f"{KEY_PREFIX}{minute}")
+            if hasattr(client, "execute_pipeline"):
+                hashes = await client.execute_pipeline(pipe)
+            else:
+                hashes = await pipe.execute()
+            groups = sketches_from_hashes(hashes)
+        except Exception as e:
+            logger.warning("perf_summary_redis_failed", error=str(e))
+            groups, source = self._local_window(minutes), "local"
+
+        overall = LatencySketch()
+        for sketch in groups.values():
+            overall.merge(sketch)
+        return {
+            "window_minutes": minutes,
+            "source": source,
+            "overall": overall.summary(),
+            "groups": {name: groups[name].summary() for name in sorted(groups)},
+        }
+
+    async def _flush_loop(self) -> None:
+        interval = get_settings().PERF_FLUSH_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._local.clear()
+
+
+# Instancia global (una por worker)
+perf_aggregator = PerfAggregator()
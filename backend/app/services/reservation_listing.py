@@ -0,0 +1,146 @@
+"""Listado paginado de reservas para el panel admin (keyset + proyección).
+
+La paginación es por cursor sobre ``(columna de orden, id)``: cada página es un
+``WHERE (col, id) < (:v, :id) ORDER BY col DESC, id DESC LIMIT n+1`` que se resuelve
+con los índices ``idx_reservation_created_id`` / ``idx_reservation_checkin_id``, así
+que el costo por página no depende de cuántas reservas haya antes (a diferencia de
+OFFSET). Solo se leen las columnas que muestra la grilla, sin entidades ORM.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.models.reservation import Reservation
+from app.services.guest_search import search_condition
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# sort -> (columna, descendente); cada una con índice compuesto (col, id)
+SORTS = {
+    "created_desc": (Reservation.created_at, True),
+    "created_asc": (Reservation.created_at, False),
+    "check_in_desc": (Reservation.check_in, True),
+    "check_in_asc": (Reservation.check_in, False),
+}
+DEFAULT_SORT = "created_desc"
+COUNT_MODES = ("none", "exact", "estimate")
+
+LIST_COLUMNS = (
+    Reservation.id,
+    Reservation.code,
+    Reservation.accommodation_id,
+    Reservation.guest_name,
+    Reservation.guest_email,
+    Reservation.guest_phone,
+    Reservation.check_in,
+    Reservation.check_out,
+    Reservation.reservation_status,
+    Reservation.total_price,
+    Reservation.created_at,
+)
+
+
+class InvalidCursor(ValueError):
+    """Cursor malformado o generado para otro orden."""
+
+
+def reservation_filters(
+    status: Optional[str] = None,
+    accommodation_id: Optional[int] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    search: Optional[str] = None,
+) -> List[Any]:
+    """Condiciones WHERE comunes al listado y a los exports."""
+    filters: List[Any] = []
+    if status:
+        filters.append(Reservation.reservation_status == status)
+    if accommodation_id:
+        filters.append(Reservation.accommodation_id == accommodation_id)
+    if from_date:
+        filters.append(Reservation.check_in >= from_date)
+    if to_date:
+        filters.append(Reservation.check_out <= to_date)
+    if search:
+        # Nombre/email/teléfono por substring; en PostgreSQL usa los índices trigram
+        filters.append(search_condition(search))
+    return filters
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    payload = {"s": sort, "v": value.isoformat(), "i": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["s"] != sort:
+            raise InvalidCursor("cursor de otro orden")
+        column, _ = SORTS[sort]
+        parse = date.fromisoformat if column is Reservation.check_in else datetime.fromisoformat
+        return parse(payload["v"]), int(payload["i"])
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("cursor inválido") from e
+
+
+def page_statement(
+    filters: Sequence[Any], sort: str, limit: int, cursor: Optional[str] = None
+) -> Any:
+    """SELECT de una página (``limit + 1`` filas para saber si hay siguiente)."""
+    column, descending = SORTS[sort]
+    conditions = list(filters)
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort)
+        key = tuple_(column, Reservation.id)
+        conditions.append(key < (value, row_id) if descending else key > (value, row_id))
+    order = (column.desc(), Reservation.id.desc()) if descending else (column, Reservation.id)
+    return select(*LIST_COLUMNS).where(*conditions).order_by(*order).limit(limit + 1)
+
+
+async def fetch_page(
+    db: AsyncSession,
+    filters: Sequence[Any],
+    sort: str = DEFAULT_SORT,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Filas de la página como dicts y el cursor de la siguiente (None si es la última)."""
+    rows = (await db.execute(page_statement(filters, sort, limit, cursor))).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        column, _ = SORTS[sort]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, last[column.key], last["id"])
+    return [dict(r) for r in rows], next_cursor
+
+
+async def count_reservations(
+    db: AsyncSession, filters: Sequence[Any], mode: str = "exact"
+) -> Tuple[int, bool]:
+    """Total de reservas; devuelve ``(total, estimado)``.
+
+    ``estimate`` sin filtros en PostgreSQL usa ``pg_class.reltuples`` (O(1), se
+    actualiza con ANALYZE/autovacuum); en otro caso cae a ``COUNT(*)`` exacto.
+    """
+    if mode == "estimate" and not filters and db.get_bind().dialect.name == "postgresql":
+        estimate = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'reservations'::regclass")
+        )
+        if estimate is not None and estimate >= 0:
+            return int(estimate), True
+    total = await db.scalar(select(func.count()).select_from(Reservation).where(*filters))
+    return int(total or 0), False
@@ -18,11 +18,13 @@
 from decimal import Decimal
 from typing import Any, Dict, Optional
 
-import redis.asyncio as redis
-from app.core.redis import acquire_lock, get_redis_pool, release_lock
-from app.models import Accommodation, Reservation
+from app.core.redis import acquire_lock, get_redis_client, release_lock
+from app.models import Reservation
 from app.models.enums import PaymentStatus, ReservationStatus
+from app.services.catalog import AccommodationSnapshot, get_accommodation
+from app.services.change_feed import record_changes
 from app.services.email import email_service
+from app.services.occupancy import sync_reservation_nights
 from prometheus_client import Counter
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
@@ -51,10 +53,8 @@ class ReservationService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def _get_accommodation(self, accommodation_id: int) -> Optional[Accommodation]:
-        stmt = select(Accommodation).where(Accommodation.id == accommodation_id)
-        result = await self.db.execute(stmt)
-        return result.scalar_one_or_none()
+    async def _get_accommodation(self, accommodation_id: int) -> Optional[AccommodationSnapshot]:
+        return await get_accommodation(self.db, accommodation_id)
 
     async def _get_reservation_by_code(self, code: str) -> Optional[Reservation]:
         stmt = select(Reservation).where(Reservation.code == code)
@@ -101,94 +101,85 @@ async def create_prereservation(
         lock_key = f"lock:acc:{accommodation_id}:{check_in.isoformat()}:{check_out.isoformat()}"
         lock_value = str(uuid.uuid4())
 
-        # Redis lock
-        pool = get_redis_pool()
-        redis_client = redis.Redis(connection_pool=pool)
+        # Redis lock (cliente compartido del proceso)
+        redis_client = get_redis_client()
         try:
-            try:
-                locked = await acquire_lock(
-                    redis_client, lock_key, lock_value, ttl=LOCK_TTL_SECONDS
-                )
-            except Exception:  # Fallback: en entorno de test sin Redis operativo
-                locked = True  # confiamos en constraint DB para anti solapamiento
-            if not locked:
-                RESERVATIONS_LOCK_FAILED.labels(channel=channel).inc()
-                return {"error": "processing_or_unavailable"}
-
-            # Construir código simple (posible reemplazo futuro por secuencia) YYYYMMDD + uuid corto
-            now_utc = datetime.now(timezone.utc)
-            code = f"RES{now_utc:%y%m%d}{str(uuid.uuid4())[:6].upper()}"
-            expires_at = now_utc + timedelta(minutes=PRERESERVATION_EXPIRY_MINUTES)
+            locked = await acquire_lock(redis_client, lock_key, lock_value, ttl=LOCK_TTL_SECONDS)
+        except Exception:  # Fallback: en entorno de test sin Redis operativo
+            locked = True  # confiamos en constraint DB para anti solapamiento
+        if not locked:
+            RESERVATIONS_LOCK_FAILED.labels(channel=channel).inc()
+            return {"error": "processing_or_unavailable"}
 
-            reservation = Reservation(
-                code=code,
-                accommodation_id=accommodation_id,
-                check_in=check_in,
-                check_out=check_out,
-                guest_name=contact_name,
-                guest_phone=contact_phone,
-                guest_email=contact_email,
-                guests_count=guests,
-                nights=nights,
-                base_price_per_night=base_price,
-                total_price=total_price,
-                deposit_percentage=deposit_percentage,
-                deposit_amount=deposit_amount,
-                reservation_status=ReservationStatus.PRE_RESERVED.value,
-                payment_status=PaymentStatus.PENDING.value,
-                expires_at=expires_at,
-                lock_value=lock_value,
-                channel_source=channel,
-            )
-            self.db.add(reservation)
-            try:
-                await self.db.commit()
-                await self.db.refresh(reservation)
-            except IntegrityError:
-                await self.db.rollback()
-                # liberar lock al fallar por solapamiento
-                await release_lock(redis_client, lock_key, lock_value)
-                RESERVATIONS_DATE_OVERLAP.labels(channel=channel).inc()
-                return {"error": "date_overlap"}
+        # Construir código simple (posible reemplazo futuro por secuencia) YYYYMMDD + uuid corto
+        now_utc = datetime.now(timezone.utc)
+        code = f"RES{now_utc:%y%m%d}{str(uuid.uuid4())[:6].upper()}"
+        expires_at = now_utc + timedelta(minutes=PRERESERVATION_EXPIRY_MINUTES)
 
-            # Incrementar métrica (flush implícito la expone en /metrics inmediatamente)
-            RESERVATIONS_CREATED.labels(channel=channel).inc()
+        reservation = Reservation(
+            code=code,
+            accommodation_id=accommodation_id,
+            check_in=check_in,
+            check_out=check_out,
+            guest_name=contact_name,
+            guest_phone=contact_phone,
+            guest_email=contact_email,
+            guests_count=guests,
+            nights=nights,
+            base_price_per_night=base_price,
+            total_price=total_price,
+            deposit_percentage=deposit_percentage,
+            deposit_amount=deposit_amount,
+            reservation_status=ReservationStatus.PRE_RESERVED.value,
+            payment_status=PaymentStatus.PENDING.value,
+            expires_at=expires_at,
+            lock_value=lock_value,
+            channel_source=channel,
+        )
+        self.db.add(reservation)
+        try:
+            await self.db.flush()
+            await sync_reservation_nights(self.db, [reservation.id])
+            await self.db.commit()
+            await self.db.refresh(reservation)
+        except IntegrityError:
+            await self.db.rollback()
+            # liberar lock al fallar por solapamiento
+            await release_lock(redis_client, lock_key, lock_value)
+            RESERVATIONS_DATE_OVERLAP.labels(channel=channel).inc()
+            return {"error": "date_overlap"}
 
-            # Enviar email de pre-reserva si hay email (best-effort, no bloquea)
-            if contact_email:
-                try:
-                    await email_service.send_prereservation_confirmation(
-                        guest_email=contact_email,
-                        guest_name=contact_name,
-                        reservation_code=code,
-                        accommodation_name=str(acc.name),
-                        check_in=check_in.isoformat(),
-                        check_out=check_out.isoformat(),
-                        guests_count=guests,
-                        total_amount=float(total_price),
-                        expires_at=expires_at.isoformat(),
-                    )
-                except Exception:  # pragma: no cover
-                    pass  # log pero no fallar transacción
+        # Incrementar métrica (flush implícito la expone en /metrics inmediatamente)
+        RESERVATIONS_CREATED.labels(channel=channel).inc()
 
-            return {
-                "code": reservation.code,
-                "expires_at": (
-                    reservation.expires_at.isoformat()
-                    if reservation.expires_at is not None
-                    else None
-                ),
-                "deposit_amount": str(reservation.deposit_amount),
-                "total_price": str(reservation.total_price),
-                "nights": reservation.nights,
-            }
-        finally:
-            # NO liberamos lock inmediatamente si se creó la pre-reserva exitosamente;
-            # el lock expira solo para minimizar carrera hasta confirmación o expiración.
+        # Enviar email de pre-reserva si hay email (best-effort, no bloquea)
+        if contact_email:
             try:
-                await redis_client.aclose()  # type: ignore[attr-defined]
-            except AttributeError:  # pragma: no cover
-                await redis_client.close()
+                await email_service.send_prereservation_confirmation(
+                    guest_email=contact_email,
+                    guest_name=contact_name,
+                    reservation_code=code,
+                    accommodation_name=str(acc.name),
+                    check_in=check_in.isoformat(),
+                    check_out=check_out.isoformat(),
+                    guests_count=guests,
+                    total_amount=float(total_price),
+                    expires_at=expires_at.isoformat(),
+                )
+            except Exception:  # pragma: no cover
+                pass  # log pero no fallar transacción
+
+        # NO liberamos lock si se creó la pre-reserva exitosamente; el lock expira solo
+        # para minimizar carrera hasta confirmación o expiración.
+        return {
+            "code": reservation.code,
+            "expires_at": (
+                reservation.expires_at.isoformat() if reservation.expires_at is not None else None
+            ),
+            "deposit_amount": str(reservation.deposit_amount),
+            "total_price": str(reservation.total_price),
+            "nights": reservation.nights,
+        }
 
     async def confirm_reservation(self, code: str) -> Dict[str, Any]:
         """Confirmación atómica de una pre-reserva.
@@ -225,6 +216,8 @@ async def confirm_reservation(self, code: str) -> Dict[str, Any]:
                 .values(reservation_status=ReservationStatus.CANCELLED.value, cancelled_at=now)
             )
             await self.db.execute(upd_expired)
+            await sync_reservation_nights(self.db, [reservation.id])
+            await record_changes(self.db, "reservation", [reservation.id])
             await self.db.commit()
             return {
                 "code": original_code,
@@ -247,6 +240,8 @@ async def confirm_reservation(self, code: str) -> Dict[str, Any]:
                 "confirmed_at": None,
                 "error": "invalid_state",
             }
+        await sync_reservation_nights(self.db, [reservation.id])
+        await record_changes(self.db, "reservation", [reservation.id])
         await self.db.commit()
         # Realizar un SELECT ligero para obtener confirmed_at sin depender de estado expirado
         sel_after = select(Reservation.confirmed_at).where(Reservation.code == original_code)
@@ -305,6 +300,7 @@ async def cancel_reservation(self, code: str, reason: Optional[str] = None) -> D
             # Append reason to internal_notes
             existing = reservation.internal_notes or ""
             reservation.internal_notes = (existing + f"\nCancelled: {reason}").strip()  # type: ignore
+        await sync_reservation_nights(self.db, [reservation.id])
         await self.db.commit()
         return {
             "code": reservation.code,
@@ -0,0 +1,489 @@
+"""Pool de procesos para transcripción Whisper fuera del event loop.
+
+``model.transcribe`` es CPU-bound y tarda segundos por nota de voz; ejecutado dentro
+de una corrutina bloquea todos los requests concurrentes. Este módulo lo delega a un
+``ProcessPoolExecutor``:
+
+- Cada worker carga el modelo una sola vez (initializer) y lo reutiliza.
+- El audio viaja como bytes y se decodifica en el worker con ffmpeg por pipes
+  (stdin OGG/Opus -> stdout PCM float32), sin archivos temporales.
+- ``TranscriptionPool.transcribe`` es awaitable: el loop sigue atendiendo requests.
+- Profundidad máxima (en cola + en curso): el excedente se rechaza de inmediato con
+  ``TranscriptionQueueFull`` en lugar de acumular latencia.
+- Timeout por trabajo (``TranscriptionTimeout``); un trabajo que aún no empezó se cancela.
+  Uno ya en curso sigue ocupando su worker y cuenta en la profundidad hasta terminar.
+- Métricas de espera en cola, tiempo de inferencia, profundidad y resultado por trabajo.
+- Modo segmentado (``transcribe_segments``) para notas largas: el worker decodifica y
+  corta el audio en silencios, los segmentos se transcriben en paralelo y se entregan
+  en orden apenas están listos (el NLU puede arrancar con el primero).
+
+El módulo se importa en los procesos worker (start method ``spawn``): mantener
+livianos los imports de nivel módulo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import subprocess  # nosec B404  # ffmpeg con argumentos fijos, sin shell
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = structlog.get_logger()
+
+TRANSCRIPTION_QUEUE_WAIT = Histogram(
+    "audio_transcription_queue_wait_seconds",
+    "Tiempo desde el envío al pool hasta que un worker toma la transcripción",
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+)
+
+TRANSCRIPTION_INFERENCE = Histogram(
+    "audio_transcription_inference_seconds",
+    "Tiempo de inferencia Whisper dentro del worker",
+    buckets=[0.25, 0.5, 1, 2, 4, 8, 15, 30, 60],
+)
+
+TRANSCRIPTION_DECODE = Histogram(
+    "audio_transcription_decode_seconds",
+    "Tiempo de decodificación OGG/Opus -> PCM (ffmpeg por pipe) dentro del worker",
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+)
+
+TRANSCRIPTION_QUEUE_DEPTH = Gauge(
+    "audio_transcription_queue_depth",
+    "Transcripciones en cola o en curso en el pool",
+)
+
+TRANSCRIPTION_SEGMENTS = Histogram(
+    "audio_transcription_segments",
+    "Segmentos por nota de voz en modo segmentado",
+    buckets=[1, 2, 3, 4, 6, 8, 12, 20],
+)
+
+TRANSCRIPTION_FIRST_SEGMENT = Histogram(
+    "audio_transcription_first_segment_seconds",
+    "Tiempo hasta el texto del primer segmento en modo segmentado",
+    buckets=[0.25, 0.5, 1, 2, 4, 8, 15, 30, 60],
+)
+
+TRANSCRIPTION_JOBS = Counter(
+    "audio_transcription_jobs_total",
+    "Trabajos de transcripción por resultado",
+    ["status"],  # ok | rejected | timeout | error
+)
+
+
+class TranscriptionQueueFull(Exception):
+    """El pool alcanzó AUDIO_QUEUE_MAX_DEPTH trabajos pendientes."""
+
+
+class TranscriptionTimeout(Exception):
+    """La transcripción no terminó dentro del timeout."""
+
+
+class AudioDecodeError(Exception):
+    """ffmpeg no pudo decodificar el audio (formato inválido o ffmpeg ausente)."""
+
+
+AUDIO_SAMPLE_RATE = 16000  # Whisper trabaja con PCM mono a 16 kHz
+
+# Segmentación por silencios (modo segmentado)
+SEGMENT_FRAME_SECONDS = 0.03
+SEGMENT_SILENCE_DBFS = -40.0  # frames por debajo de este nivel RMS cuentan como silencio
+SEGMENT_MIN_SILENCE_SECONDS = 0.4  # pausa mínima donde se permite cortar
+SEGMENT_MIN_SECONDS = 8.0  # no cortar segmentos más cortos (contexto para el modelo)
+SEGMENT_MAX_SECONDS = 30.0  # ventana de Whisper; sin silencio se corta a la fuerza
+
+
+# ---------------------------------------------------------------------------
+# Código que corre dentro de los procesos worker
+# ---------------------------------------------------------------------------
+
+_worker_model: Any = None
+
+
+def _init_worker(model_name: str) -> None:
+    """Initializer del worker: carga el modelo Whisper una vez por proceso."""
+    global _worker_model
+    import whisper  # type: ignore
+
+    _worker_model = whisper.load_model(model_name)
+
+
+def _worker_ready() -> int:
+    """Tarea vacía para forzar el arranque (y la carga del modelo) de un worker."""
+    return os.getpid()
+
+
+def decode_audio(raw: bytes, sample_rate: int = AUDIO_SAMPLE_RATE) -> Any:
+    """Decodificar audio (OGG/Opus u otro formato de ffmpeg) a PCM float32 mono en memoria.
+
+    Los bytes entran por stdin de ffmpeg y el PCM sale por stdout: sin archivos
+    temporales (apto para filesystems read-only). Devuelve un ``numpy.ndarray``
+    normalizado a [-1, 1], el formato que ``model.transcribe`` acepta directamente.
+    """
+    import numpy as np  # dependencia de whisper; solo se importa en los workers
+
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads",
+        "0",
+        "-i",
+        "pipe:0",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sample_rate),
+        "pipe:1",
+    ]
+    try:
+        proc = subprocess.run(cmd, input=raw, capture_output=True, check=True)  # nosec B603
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg no disponible") from e
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(e.stderr.decode("utf-8", errors="ignore")[-200:]) from e
+    return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def decode_pcm(pcm: bytes) -> Any:
+    """PCM float32 crudo (un segmento ya decodificado) -> ``numpy.ndarray``."""
+    import numpy as np
+
+    return np.frombuffer(pcm, np.float32)
+
+
+def split_on_silence(
+    samples: Any,
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    min_seconds: float = SEGMENT_MIN_SECONDS,
+    max_seconds: float = SEGMENT_MAX_SECONDS,
+    min_silence_seconds: float = SEGMENT_MIN_SILENCE_SECONDS,
+    silence_dbfs: float = SEGMENT_SILENCE_DBFS,
+) -> List[Tuple[int, int]]:
+    """Rangos ``(inicio, fin)`` en muestras que cubren el audio, cortados en pausas.
+
+    Cada segmento dura entre ``min_seconds`` y ``max_seconds`` (salvo el último); se
+    corta en el centro de la primera pausa de al menos ``min_silence_seconds`` dentro
+    de esa ventana (segmentos cortos -> primer texto antes y más paralelismo), o en
+    ``max_seconds`` si no hay ninguna.
+    """
+    import numpy as np
+
+    total = len(samples)
+    min_len = int(min_seconds * sample_rate)
+    max_len = int(max_seconds * sample_rate)
+    if total <= max_len:
+        return [(0, total)]
+
+    frame = int(SEGMENT_FRAME_SECONDS * sample_rate)
+    n_frames = total // frame
+    frames = np.asarray(samples[: n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames**2, axis=1))
+    silent = 20 * np.log10(np.maximum(rms, 1e-10)) < silence_dbfs
+
+    # Puntos de corte candidatos: centro de cada pausa suficientemente larga
+    min_run = max(1, int(min_silence_seconds / SEGMENT_FRAME_SECONDS))
+    cut_points: List[int] = []
+    run_start: Optional[int] = None
+    for i, is_silent in enumerate(list(silent) + [False]):
+        if is_silent and run_start is None:
+            run_start = i
+        elif not is_silent and run_start is not None:
+            if i - run_start >= min_run:
+                cut_points.append((run_start + i) // 2 * frame)
+            run_start = None
+
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while total - start > max_len:
+        window = [c for c in cut_points if start + min_len <= c <= start + max_len]
+        end = window[0] if window else start + max_len
+        spans.append((start, end))
+        start = end
+    spans.append((start, total))
+    return spans
+
+
+def _transcribe_samples(audio: Any, language: str) -> Dict[str, Any]:
+    """Inferencia con el modelo del worker; solo lo que usa el proceso API."""
+    inference_start = time.perf_counter()
+    result = _worker_model.transcribe(audio, language=language)
+    return {
+        "text": (result.get("text") or "").strip(),
+        "avg_logprobs": [
+            seg["avg_logprob"]
+            for seg in result.get("segments", [])
+            if seg.get("avg_logprob") is not None
+        ],
+        "inference_seconds": time.perf_counter() - inference_start,
+    }
+
+
+def _run_transcription(raw: bytes, language: str, submitted_at: float) -> Dict[str, Any]:
+    """Decodificar y transcribir ``raw`` con el modelo del worker.
+
+    Devuelve solo lo que usa el proceso API (texto y avg_logprob por segmento) para
+    minimizar el costo de serialización entre procesos.
+    """
+    started_at = time.time()
+    decode_start = time.perf_counter()
+    audio = decode_audio(raw)
+    decode_seconds = time.perf_counter() - decode_start
+
+    result = _transcribe_samples(audio, language)
+    result["queue_wait_seconds"] = max(0.0, started_at - submitted_at)
+    result["decode_seconds"] = decode_seconds
+    return result
+
+
+def _run_split(raw: bytes, submitted_at: float) -> Dict[str, Any]:
+    """Decodificar y segmentar ``raw``; devuelve el PCM float32 de cada segmento."""
+    started_at = time.time()
+    decode_start = time.perf_counter()
+    audio = decode_audio(raw)
+    spans = split_on_silence(audio)
+    return {
+        "segments": [
+            {
+                "pcm": audio[start:end].tobytes(),
+                "start_seconds": start / AUDIO_SAMPLE_RATE,
+                "end_seconds": end / AUDIO_SAMPLE_RATE,
+            }
+            for start, end in spans
+        ],
+        "queue_wait_seconds": max(0.0, started_at - submitted_at),
+        "decode_seconds": time.perf_counter() - decode_start,
+    }
+
+
+def _run_segment_transcription(pcm: bytes, language: str, submitted_at: float) -> Dict[str, Any]:
+    """Transcribir un segmento ya decodificado (ver ``_run_split``)."""
+    started_at = time.time()
+    result = _transcribe_samples(decode_pcm(pcm), language)
+    result["queue_wait_seconds"] = max(0.0, started_at - submitted_at)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Lado API (event loop)
+# ---------------------------------------------------------------------------
+
+
+class TranscriptionPool:
+    """Pool de workers de transcripción con API async (ver docstring del módulo)."""
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        max_depth: int,
+        timeout_seconds: float,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.workers = workers
+        self.max_depth = max_depth
+        self.timeout_seconds = timeout_seconds
+        self._executor = executor
+        self.pending = 0
+
+    def _create_executor(self) -> Executor:
+        # spawn: no heredar el estado del proceso API (event loop, sockets, threads)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name,),
+        )
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._create_executor()
+            logger.info("transcription_pool_started", workers=self.workers, model=self.model_name)
+        return self._executor
+
+    def warm_up(self) -> None:
+        """Arrancar los workers en background para que carguen el modelo antes del primer audio."""
+        for _ in range(self.workers):
+            self.executor.submit(_worker_ready)
+
+    def _check_capacity(self) -> None:
+        if self.pending >= self.max_depth:
+            TRANSCRIPTION_JOBS.labels(status="rejected").inc()
+            logger.warning("transcription_queue_full", pending=self.pending)
+            raise TranscriptionQueueFull()
+
+    def _job_finished(self) -> None:
+        self.pending -= 1
+        TRANSCRIPTION_QUEUE_DEPTH.set(self.pending)
+
+    def _track(self, future: Future[Any]) -> None:
+        """Contar ``future`` en la profundidad hasta que el worker lo termine.
+
+        La profundidad se libera cuando el trabajo termina en el worker, no cuando el
+        caller deja de esperarlo: un timeout no libera el worker que sigue ocupado.
+        """
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        TRANSCRIPTION_QUEUE_DEPTH.set(self.pending)
+
+        def _done(_: Future[Any]) -> None:
+            # Corre en el thread del executor: volver al loop para tocar el contador
+            try:
+                loop.call_soon_threadsafe(self._job_finished)
+            except RuntimeError:  # loop cerrado (shutdown)
+                self._job_finished()
+
+        future.add_done_callback(_done)
+
+    async def _submit(self, fn: Any, *args: Any, timeout: Optional[float] = None) -> Any:
+        """Ejecutar ``fn`` en un worker contando profundidad, timeout y errores."""
+        future = self.executor.submit(fn, *args)
+        self._track(future)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout or self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            # Solo cancela si aún no empezó; un worker en curso termina y se descarta
+            future.cancel()
+            TRANSCRIPTION_JOBS.labels(status="timeout").inc()
+            logger.warning("transcription_timeout", timeout=timeout or self.timeout_seconds)
+            raise TranscriptionTimeout()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BrokenProcessPool:
+            # Un worker murió (p.ej. OOM): recrear el pool en el próximo envío
+            TRANSCRIPTION_JOBS.labels(status="error").inc()
+            logger.error("transcription_pool_broken")
+            self._executor = None
+            raise
+        except Exception:
+            TRANSCRIPTION_JOBS.labels(status="error").inc()
+            raise
+
+    async def transcribe(
+        self, raw: bytes, language: str = "es", timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Transcribir en un worker sin bloquear el event loop.
+
+        Raises:
+            TranscriptionQueueFull: si ya hay ``max_depth`` trabajos pendientes
+            TranscriptionTimeout: si no termina dentro del timeout
+        """
+        self._check_capacity()
+        result = await self._submit(_run_transcription, raw, language, time.time(), timeout=timeout)
+        TRANSCRIPTION_JOBS.labels(status="ok").inc()
+        TRANSCRIPTION_QUEUE_WAIT.observe(result["queue_wait_seconds"])
+        TRANSCRIPTION_DECODE.observe(result["decode_seconds"])
+        TRANSCRIPTION_INFERENCE.observe(result["inference_seconds"])
+        return result
+
+    async def transcribe_segments(
+        self, raw: bytes, language: str = "es", timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Transcribir por segmentos en paralelo, entregándolos en orden.
+
+        Cada item trae ``index``, ``total``, ``start_seconds``, ``end_seconds``, ``text``
+        y ``avg_logprobs``. La admisión se controla una sola vez por nota: los segmentos
+        de una nota admitida no se rechazan (solo suman profundidad). El timeout aplica
+        a cada etapa (segmentación y cada segmento).
+        """
+        self._check_capacity()
+        started = time.perf_counter()
+        split = await self._submit(_run_split, raw, time.time(), timeout=timeout)
+        TRANSCRIPTION_QUEUE_WAIT.observe(split["queue_wait_seconds"])
+        TRANSCRIPTION_DECODE.observe(split["decode_seconds"])
+
+        segments = split["segments"]
+        TRANSCRIPTION_SEGMENTS.observe(len(segments))
+        tasks = [
+            asyncio.ensure_future(
+                self._submit(
+                    _run_segment_transcription, seg["pcm"], language, time.time(), timeout=timeout
+                )
+            )
+            for seg in segments
+        ]
+        try:
+            for index, (seg, task) in enumerate(zip(segments, tasks)):
+                result = await task
+                if index == 0:
+                    TRANSCRIPTION_FIRST_SEGMENT.observe(time.perf_counter() - started)
+                TRANSCRIPTION_QUEUE_WAIT.observe(result["queue_wait_seconds"])
+                TRANSCRIPTION_INFERENCE.observe(result["inference_seconds"])
+                yield {
+                    "index": index,
+                    "total": len(segments),
+                    "start_seconds": seg["start_seconds"],
+                    "end_seconds": seg["end_seconds"],
+                    "text": result["text"],
+                    "avg_logprobs": result["avg_logprobs"],
+                }
+        finally:
+            # Error, timeout o consumidor que abandona el stream: liberar los pendientes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        TRANSCRIPTION_JOBS.labels(status="ok").inc()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("transcription_pool_stopped")
+
+
+transcription_pool: Optional[TranscriptionPool] = None
+
+
+def get_transcription_pool() -> TranscriptionPool:
+    """Pool compartido del proceso (configurado desde Settings)."""
+    global transcription_pool
+    if transcription_pool is None:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        transcription_pool = TranscriptionPool(
+            model_name=settings.AUDIO_MODEL,
+            workers=settings.AUDIO_WORKERS,
+            max_depth=settings.AUDIO_QUEUE_MAX_DEPTH,
+            timeout_seconds=settings.AUDIO_TRANSCRIBE_TIMEOUT_SECONDS,
+        )
+    return transcription_pool
+
+
+def start_transcription_pool() -> None:
+    """Arranque (lifespan): crear el pool y precargar el modelo en los workers."""
+    pool = get_transcription_pool()
+    if pool.workers > 0:
+        pool.warm_up()
+
+
+def stop_transcription_pool() -> None:
+    """Shutdown (lifespan)."""
+    global transcription_pool
+    if transcription_pool is not None:
+        transcription_pool.shutdown()
+        transcription_pool = None
+
+
+def confidence_from_logprobs(avg_logprobs: List[float]) -> float:
+    """Confidence 0-1 promedio a partir de avg_logprob por segmento (heurística exp)."""
+    import math
+
+    confidences = [max(0.0, min(1.0, math.exp(lp))) for lp in avg_logprobs]
+    return sum(confidences) / len(confidences) if confidences else 0.5
@@ -10,6 +10,14 @@
 from app.core.config import get_settings
 from app.utils.retry import retry_async
 
+from .interactive_buttons import (
+    InteractiveTemplate,
+    RawJSON,
+    build_buttons_interactive,
+    build_list_interactive,
+    build_message_envelope,
+    dumps_compact,
+)
 from .messages import (
     format_availability_response,
     format_error_date_overlap,
@@ -518,6 +526,42 @@ async def send_payment_pending(
 # ========== Interactive Buttons & Lists ==========
 
 
+async def _post_interactive(
+    to_phone: str, interactive_json: bytes, log_prefix: str, timeout: float = 10.0
+) -> Dict[str, Any]:
+    """POST de un mensaje interactivo cuyo objeto ``interactive`` ya está serializado.
+
+    El cuerpo se arma concatenando bytes (build_message_envelope): los templates
+    compilados no vuelven a pasar por el encoder JSON.
+    """
+    import httpx
+
+    url = f"https://graph.facebook.com/v17.0/{settings.WHATSAPP_PHONE_ID}/messages"
+    headers = {
+        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
+        "Content-Type": "application/json",
+    }
+    content = build_message_envelope(to_phone, interactive_json)
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        resp = await client.post(url, content=content, headers=headers)
+
+        if resp.status_code == 429:
+            raise ConnectionError(f"WhatsApp rate limit: {resp.status_code}")
+        elif resp.status_code >= 500:
+            raise ConnectionError(f"WhatsApp server error: {resp.status_code}")
+        elif resp.status_code >= 400:
+            logger.warning(
+                f"{log_prefix}_client_error", code=resp.status_code, text=resp.text[:200]
+            )
+            raise ValueError(f"WhatsApp client error {resp.status_code}: {resp.text[:100]}")
+
+        return {
+            "status": "sent",
+            "message_id": (await resp.json()).get("messages", [{}])[0].get("id"),
+        }
+
+
 @retry_async(max_attempts=3, base_delay=1.0, operation_name="whatsapp_send_buttons")
 async def _send_interactive_buttons_with_retry(
     to_phone: str,
@@ -543,61 +587,16 @@ async def _send_interactive_buttons_with_retry(
     Raises:
         ValueError: Si hay más de 3 botones o formato inválido
     """
-    import httpx
-
     if len(buttons) > 3:
         raise ValueError("WhatsApp solo soporta hasta 3 botones")
 
     if not all(isinstance(btn, dict) and "id" in btn and "title" in btn for btn in buttons):
         raise ValueError("Cada botón debe tener 'id' y 'title'")
 
-    url = f"https://graph.facebook.com/v17.0/{settings.WHATSAPP_PHONE_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
-        "Content-Type": "application/json",
-    }
-
-    # Construir payload de botones interactivos
-    interactive_payload: Dict[str, Any] = {
-        "type": "button",
-        "body": {"text": body_text},
-        "action": {
-            "buttons": [
-                {"type": "reply", "reply": {"id": btn["id"], "title": btn["title"]}}
-                for btn in buttons
-            ]
-        },
-    }
-
-    if header_text:
-        interactive_payload["header"] = {"type": "text", "text": header_text}
-    if footer_text:
-        interactive_payload["footer"] = {"text": footer_text}
-
-    payload = {
-        "messaging_product": "whatsapp",
-        "to": to_phone,
-        "type": "interactive",
-        "interactive": interactive_payload,
-    }
-
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        resp = await client.post(url, json=payload, headers=headers)
-
-        if resp.status_code == 429:
-            raise ConnectionError(f"WhatsApp rate limit: {resp.status_code}")
-        elif resp.status_code >= 500:
-            raise ConnectionError(f"WhatsApp server error: {resp.status_code}")
-        elif resp.status_code >= 400:
-            logger.warning(
-                "whatsapp_buttons_client_error", code=resp.status_code, text=resp.text[:200]
-            )
-            raise ValueError(f"WhatsApp client error {resp.status_code}: {resp.text[:100]}")
-
-        return {
-            "status": "sent",
-            "message_id": (await resp.json()).get("messages", [{}])[0].get("id"),
-        }
+    interactive_json = dumps_compact(
+        build_buttons_interactive(body_text, buttons, header_text, footer_text)
+    )
+    return await _post_interactive(to_phone, interactive_json, "whatsapp_buttons", timeout)
 
 
 async def send_interactive_buttons(
@@ -693,52 +692,10 @@ async def _send_interactive_list_with_retry(
             }
         ]
     """
-    import httpx
-
-    url = f"https://graph.facebook.com/v17.0/{settings.WHATSAPP_PHONE_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}",
-        "Content-Type": "application/json",
-    }
-
-    interactive_payload: Dict[str, Any] = {
-        "type": "list",
-        "body": {"text": body_text},
-        "action": {
-            "button": button_text,
-            "sections": sections,
-        },
-    }
-
-    if header_text:
-        interactive_payload["header"] = {"type": "text", "text": header_text}
-    if footer_text:
-        interactive_payload["footer"] = {"text": footer_text}
-
-    payload = {
-        "messaging_product": "whatsapp",
-        "to": to_phone,
-        "type": "interactive",
-        "interactive": interactive_payload,
-    }
-
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        resp = await client.post(url, json=payload, headers=headers)
-
-        if resp.status_code == 429:
-            raise ConnectionError(f"WhatsApp rate limit: {resp.status_code}")
-        elif resp.status_code >= 500:
-            raise ConnectionError(f"WhatsApp server error: {resp.status_code}")
-        elif resp.status_code >= 400:
-            logger.warning(
-                "whatsapp_list_client_error", code=resp.status_code, text=resp.text[:200]
-            )
-            raise ValueError(f"WhatsApp client error {resp.status_code}: {resp.text[:100]}")
-
-        return {
-            "status": "sent",
-            "message_id": (await resp.json()).get("messages", [{}])[0].get("id"),
-        }
+    interactive_json = dumps_compact(
+        build_list_interactive(body_text, button_text, sections, header_text, footer_text)
+    )
+    return await _post_interactive(to_phone, interactive_json, "whatsapp_list", timeout)
 
 
 async def send_interactive_list(
@@ -812,3 +769,56 @@ async def send_interactive_list(
     except Exception as e:  # pragma: no cover
         logger.exception("whatsapp_list_exception", error=str(e))
         return {"status": "error", "reason": "exception"}
+
+
+@retry_async(max_attempts=3, base_delay=1.0, operation_name="whatsapp_send_template")
+async def _send_interactive_template_with_retry(
+    to_phone: str, interactive_json: bytes, timeout: float = 10.0
+) -> Dict[str, Any]:
+    """Envía un ``interactive`` pre-serializado (ver send_interactive_template)."""
+    return await _post_interactive(to_phone, interactive_json, "whatsapp_template", timeout)
+
+
+async def send_interactive_template(
+    to_phone: str,
+    template: InteractiveTemplate | bytes,
+    **values: str | RawJSON,
+) -> Dict[str, Any]:
+    """Envía un template interactivo compilado (menús estáticos y listas dinámicas).
+
+    Args:
+        to_phone: Número de teléfono destino
+        template: InteractiveTemplate registrado o JSON ``interactive`` ya renderizado
+        **values: Valores de los slots del template
+
+    Returns:
+        Dict con status: "sent" | "skipped" | "error"
+
+    Example:
+        await send_interactive_template("+5491112345678", get_template("main_menu"))
+    """
+    name = template.name if isinstance(template, InteractiveTemplate) else "rendered"
+    # No-op en no producción o sin credenciales
+    if settings.ENVIRONMENT != "production":
+        logger.info(
+            "whatsapp_template_skipped_env", environment=settings.ENVIRONMENT, template=name
+        )
+        return {"status": "skipped", "reason": "non_production"}
+    if not settings.WHATSAPP_ACCESS_TOKEN or not settings.WHATSAPP_PHONE_ID:
+        logger.warning("whatsapp_template_skipped_missing_creds")
+        return {"status": "skipped", "reason": "missing_creds"}
+    if (
+        settings.WHATSAPP_ACCESS_TOKEN == "dummy"  # nosec B105
+        or settings.WHATSAPP_PHONE_ID == "dummy"  # nosec B105
+    ):
+        logger.info("whatsapp_template_skipped_dummy")
+        return {"status": "skipped", "reason": "dummy_creds"}
+
+    try:
+        interactive_json = (
+            template.render(**values) if isinstance(template, InteractiveTemplate) else template
+        )
+        return await _send_interactive_template_with_retry(to_phone, interactive_json)
+    except Exception as e:  # pragma: no cover
+        logger.exception("whatsapp_template_exception", template=name, error=str(e))
+        return {"status": "error", "reason": "exception"}
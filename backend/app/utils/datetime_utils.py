@@ -68,11 +68,12 @@ def calculate_nights(check_in: date, check_out: date) -> int:
     return (check_out - check_in).days
 
 
-def get_next_weekend() -> Tuple[date, date]:
+def get_next_weekend(now: Optional[datetime] = None) -> Tuple[date, date]:
     """Get next weekend dates (Saturday-Sunday)"""
-    today = date.today()
+    now = now or datetime.now()
+    today = now.date()
     days_until_saturday = (5 - today.weekday()) % 7
-    if days_until_saturday == 0 and datetime.now().hour > 18:
+    if days_until_saturday == 0 and now.hour > 18:
         days_until_saturday = 7
 
     saturday = today + timedelta(days=days_until_saturday)
@@ -0,0 +1,11 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def phone_digits(phone: Optional[str]) -> Optional[str]:
+    """Teléfono normalizado a dígitos ("+54 9 11-1234" -> "549111234")."""
+    if phone is None:
+        return None
+    return _NON_DIGITS.sub("", phone)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Export analítico de reservas, pagos y alojamientos a Parquet / Arrow IPC.
+
+Escribe un directorio particionado por la fecha de creación (estilo Hive):
+
+  {out}/reservations/month=2026-10/part-0.parquet
+  {out}/payments/month=2026-10/part-0.parquet
+
+Cada lote del cursor de la DB se escribe como un row group: la memoria queda
+acotada a EXPORT_BATCH_SIZE filas sin importar el rango exportado. Requiere
+``pyarrow`` (dependencia opcional).
+
+Uso (desde backend/):
+  python scripts/export_analytics.py --from 2026-01-01 [--to 2026-11-01] \\
+      [--tables reservations payments] [--format parquet|arrow] \\
+      [--partition month|day|none] [--out exports/]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.database import async_session_maker  # noqa: E402
+from app.services.analytics_export import (  # noqa: E402
+    EXPORT_TABLES,
+    FORMATS,
+    PARTITIONS,
+    PYARROW_AVAILABLE,
+    export_to_directory,
+)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat, required=True)
+    parser.add_argument(
+        "--to",
+        dest="to_date",
+        type=date.fromisoformat,
+        default=date.today() + timedelta(days=1),
+        help="fin exclusivo (default: mañana)",
+    )
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES), default=None)
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--partition", choices=PARTITIONS, default="month")
+    parser.add_argument("--out", type=Path, default=Path("exports"))
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("pyarrow no está instalado: pip install pyarrow", file=sys.stderr)
+        return 1
+
+    async with async_session_maker() as session:
+        for table_name in args.tables or list(EXPORT_TABLES):
+            start = time.perf_counter()
+            written = await export_to_directory(
+                session,
+                table_name,
+                args.format,
+                args.out,
+                args.from_date,
+                args.to_date,
+                args.partition,
+            )
+            rows = sum(n for _, n in written)
+            elapsed = time.perf_counter() - start
+            print(f"{table_name}: {rows} filas en {len(written)} archivos ({elapsed:.2f}s)")
+            for path, n in written:
+                print(f"  {path} ({n})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
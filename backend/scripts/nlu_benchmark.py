@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark del NLU sobre un corpus de mensajes (scripts/nlu_corpus.txt).
+
+Reporta:
+- tiempo de import en frío de app.services.nlu (proceso nuevo)
+- latencia de nlu.analyze por mensaje (mean/p50/p95) y camino de resolución de fechas
+- costo por mensaje de nlu.analyze_many sobre el corpus repetido en un solo lote
+- latencia de nlu.analyze_cached (cache caliente) y su hit ratio
+- con --compare, la misma latencia resolviendo fechas con dateparser (referencia)
+
+Uso (desde backend/):
+  python scripts/nlu_benchmark.py [--rounds 200] [--compare]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess  # nosec B404
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+CORPUS_PATH = Path(__file__).resolve().parent / "nlu_corpus.txt"
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> List[str]:
+    """Mensajes del corpus (ignora líneas vacías y comentarios)."""
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def cold_import_seconds(module: str) -> float:
+    """Tiempo de import de ``module`` en un intérprete nuevo."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run(  # nosec B603
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure(fn: Callable[[str], object], corpus: List[str], rounds: int) -> List[float]:
+    """Latencias por mensaje en ms (sin cache entre rondas: cada llamada es independiente)."""
+    samples = []
+    for _ in range(rounds):
+        for text in corpus:
+            start = time.perf_counter()
+            fn(text)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: List[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<22} mean={statistics.mean(samples):.3f}ms "
+        f"p50={statistics.median(samples):.3f}ms p95={p95:.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--compare", action="store_true", help="medir también con dateparser")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"corpus: {len(corpus)} mensajes, {args.rounds} rondas")
+    print(f"import app.services.nlu (frío): {cold_import_seconds('app.services.nlu') * 1000:.0f}ms")
+
+    from app.services import date_grammar, nlu
+
+    paths = [date_grammar.resolve_dates(text)[1] for text in corpus]
+    print("fechas por camino:", {p: paths.count(p) for p in sorted(set(paths))})
+    print("dateparser importado:", "dateparser" in sys.modules)
+    report("analyze (gramática)", measure(nlu.analyze, corpus, args.rounds))
+
+    batch = corpus * args.rounds
+    start = time.perf_counter()
+    nlu.analyze_many(batch)
+    per_message = (time.perf_counter() - start) * 1000 / len(batch)
+    print(f"{'analyze_many (lote)':<22} {per_message:.3f}ms/mensaje ({len(batch)} mensajes)")
+
+    nlu.analysis_cache.clear()
+    report("analyze_cached", measure(nlu.analyze_cached, corpus, args.rounds))
+    print(f"hit ratio cache NLU: {nlu.analysis_cache.hit_ratio:.3f}")
+
+    if args.compare:
+        print(f"import dateparser (frío): {cold_import_seconds('dateparser') * 1000:.0f}ms")
+        from dateparser.search import search_dates
+
+        def analyze_with_dateparser(text: str) -> None:
+            nlu.detect_intent(text)
+            search_dates(text, languages=["es"], settings={"DATE_ORDER": "DMY"})
+            nlu.extract_guests(text)
+
+        report("analyze (dateparser)", measure(analyze_with_dateparser, corpus, 1))
+
+
+if __name__ == "__main__":
+    main()
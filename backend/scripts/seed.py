@@ -7,6 +7,7 @@
 
 from app.core.database import async_session_maker
 from app.models import Accommodation
+from app.services.catalog import invalidate_catalog
 
 
 async def main():
@@ -20,6 +21,7 @@ async def main():
         db.add(acc)
         await db.commit()
         await db.refresh(acc)
+        await invalidate_catalog()
         print({"accommodation_id": acc.id})
 
 
@@ -13,6 +13,7 @@
 
 from app.core.database import async_session_maker
 from app.models import Accommodation
+from app.services.catalog import invalidate_catalog
 from sqlalchemy import select
 
 
@@ -45,6 +46,7 @@ async def seed_data():
         )
         session.add(acc)
         await session.commit()
+        await invalidate_catalog()
         print(f"✅ Created sample accommodation: {acc.name} (ID: {acc.id})")
 
 
@@ -15,6 +15,7 @@
 from app.core.database import async_session_maker
 from app.models import Accommodation, Reservation
 from app.models.enums import PaymentStatus, ReservationStatus
+from app.services.catalog import invalidate_catalog
 from sqlalchemy import select
 
 logger = structlog.get_logger()
@@ -142,6 +143,8 @@ async def seed_accommodations(session):
 
     session.add_all(accommodations)
     await session.commit()
+    # Los workers en marcha recargan el catálogo sin esperar CATALOG_MAX_AGE_SECONDS
+    await invalidate_catalog()
 
     logger.info("accommodations_seeded", count=len(accommodations))
 
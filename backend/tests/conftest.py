@@ -254,6 +254,21 @@ def test_settings():  # type: ignore
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(autouse=True)
+def _reset_process_singletons():  # type: ignore
+    """Caches por proceso (catálogo, snapshot del dashboard, latencias) limpios por test."""
+    from app.services.catalog import catalog
+    from app.services.dashboard import dashboard_snapshot
+    from app.services.perf_aggregator import perf_aggregator
+
+    singletons = (catalog, dashboard_snapshot, perf_aggregator)
+    for singleton in singletons:
+        singleton.clear()
+    yield
+    for singleton in singletons:
+        singleton.clear()
+
+
 @pytest.fixture()
 async def accommodation_factory(db_session):  # type: ignore
     try:
@@ -273,6 +288,10 @@ async def _create(**overrides):
         db_session.add(obj)
         await db_session.commit()
         await db_session.refresh(obj)
+        # Escritura del catálogo: descartar el snapshot local
+        from app.services.catalog import catalog
+
+        catalog.clear()
         return obj
 
     return _create
@@ -315,6 +334,16 @@ async def _create(**overrides):
     return _create
 
 
+@pytest.fixture()
+def admin_headers():  # type: ignore
+    """Header Authorization con un JWT de admin whitelisted."""
+    from app.core.config import get_settings
+    from app.core.security import create_access_token
+
+    email = get_settings().ADMIN_ALLOWED_EMAILS.split(",")[0].strip()
+    return {"Authorization": f"Bearer {create_access_token({'email': email})}"}
+
+
 # ---------------------------------------------------------------------------
 # Cliente HTTP para tests de API (se activa cuando exista app.main:app)
 # ---------------------------------------------------------------------------
@@ -358,6 +387,11 @@ async def test_client(test_engine, redis_client):  # type: ignore
     def mock_redis_constructor(connection_pool=None, **kwargs):
         return redis_client
 
+    # El cliente Redis compartido se crea lazy: resetearlo para que tome el de test
+    import app.core.redis as core_redis
+
+    core_redis.shared_client = None
+
     # Import tardío de la app ahora que el entorno está listo
     with patch("app.core.redis.get_redis_pool", return_value=mock_pool), patch(
         "redis.asyncio.Redis", side_effect=mock_redis_constructor
@@ -370,3 +404,5 @@ def mock_redis_constructor(connection_pool=None, **kwargs):
         transport = ASGITransport(app=app)  # type: ignore[arg-type]
         async with AsyncClient(transport=transport, base_url="http://test") as client:
             yield client
+
+    core_redis.shared_client = None
@@ -0,0 +1,142 @@
+"""Tests del catálogo de alojamientos cacheado (L1 + versión en Redis)."""
+
+import dataclasses
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from app.core.redis import RedisClient
+from app.services.catalog import CATALOG_VERSION_KEY, AccommodationCatalog
+
+
+@pytest.fixture
+def catalog_redis(redis_client):
+    client = RedisClient(redis_client)
+    with patch("app.services.catalog.get_redis_client", return_value=client):
+        yield redis_client
+
+
+@pytest.fixture
+def fresh_catalog(catalog_redis):
+    # Sin intervalo entre chequeos de versión para observar la invalidación
+    return AccommodationCatalog(version_check_seconds=0)
+
+
+def _count_executes(db_session):
+    calls = []
+    original = db_session.execute
+
+    async def _execute(*args, **kwargs):
+        calls.append(args)
+        return await original(*args, **kwargs)
+
+    return calls, patch.object(db_session, "execute", side_effect=_execute)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_cached_between_calls(db_session, accommodation_factory, fresh_catalog):
+    acc = await accommodation_factory(name="Cabaña Sol", amenities={"wifi": True})
+    calls, patcher = _count_executes(db_session)
+
+    with patcher:
+        first = await fresh_catalog.get(db_session, acc.id)
+        second = await fresh_catalog.get(db_session, acc.id)
+
+    assert first is second
+    assert first.name == "Cabaña Sol"
+    assert first.base_price == Decimal("12000.00")
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshots_are_immutable(db_session, accommodation_factory, fresh_catalog):
+    acc = await accommodation_factory(amenities={"wifi": True}, photos=["a.jpg"])
+    snap = await fresh_catalog.get(db_session, acc.id)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snap.name = "otro"  # type: ignore[misc]
+    with pytest.raises(TypeError):
+        snap.amenities["wifi"] = False  # type: ignore[index]
+    assert snap.photos == ("a.jpg",)
+
+
+@pytest.mark.asyncio
+async def test_active_excludes_inactive(db_session, accommodation_factory, fresh_catalog):
+    await accommodation_factory(name="Activa")
+    await accommodation_factory(name="Inactiva", active=False)
+
+    active = await fresh_catalog.active(db_session)
+
+    assert [a.name for a in active] == ["Activa"]
+
+
+@pytest.mark.asyncio
+async def test_remote_version_change_triggers_reload(
+    db_session, accommodation_factory, fresh_catalog, catalog_redis
+):
+    acc = await accommodation_factory(name="Original")
+    assert (await fresh_catalog.get(db_session, acc.id)).name == "Original"
+
+    acc.name = "Renombrada"
+    await db_session.commit()
+    # Sin nueva versión se sigue sirviendo el snapshot cacheado
+    assert (await fresh_catalog.get(db_session, acc.id)).name == "Original"
+
+    await catalog_redis.incr(CATALOG_VERSION_KEY)  # otro worker publicó un cambio
+    assert (await fresh_catalog.get(db_session, acc.id)).name == "Renombrada"
+
+
+@pytest.mark.asyncio
+async def test_unknown_id_forces_reload(db_session, accommodation_factory, fresh_catalog):
+    first = await accommodation_factory(name="Primera")
+    await fresh_catalog.get(db_session, first.id)
+
+    second = await accommodation_factory(name="Segunda")
+    snap = await fresh_catalog.get(db_session, second.id)
+
+    assert snap is not None and snap.name == "Segunda"
+    assert await fresh_catalog.get(db_session, 999999) is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_publishes_version(
+    db_session, accommodation_factory, fresh_catalog, catalog_redis
+):
+    acc = await accommodation_factory()
+    await fresh_catalog.get(db_session, acc.id)
+
+    await fresh_catalog.invalidate()
+    await fresh_catalog.invalidate()
+
+    assert await catalog_redis.get(CATALOG_VERSION_KEY) == "2"
+    snap = await fresh_catalog.snapshot(db_session)
+    assert snap.version == 2
+
+
+@pytest.mark.asyncio
+async def test_serves_snapshot_when_redis_is_down(
+    db_session, accommodation_factory, fresh_catalog, catalog_redis
+):
+    acc = await accommodation_factory(name="Sin Redis")
+    await fresh_catalog.get(db_session, acc.id)
+
+    with patch.object(catalog_redis, "get", side_effect=ConnectionError("down")):
+        snap = await fresh_catalog.get(db_session, acc.id)
+
+    assert snap.name == "Sin Redis"
+
+
+@pytest.mark.asyncio
+async def test_unknown_ids_reload_at_most_once_per_window(
+    db_session, accommodation_factory, catalog_redis
+):
+    acc = await accommodation_factory()
+    throttled = AccommodationCatalog(version_check_seconds=60)
+    await throttled.get(db_session, acc.id)
+    calls, patcher = _count_executes(db_session)
+
+    with patcher:
+        for bad_id in range(900000, 900020):
+            assert await throttled.get(db_session, bad_id) is None
+
+    assert calls == []
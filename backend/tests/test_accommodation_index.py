@@ -0,0 +1,68 @@
+"""Tests del índice de nombres de alojamientos usado por el NLU."""
+
+from unittest.mock import patch
+
+import pytest
+from app.core.redis import RedisClient
+from app.services.accommodation_index import get_accommodation_index
+
+
+@pytest.fixture(autouse=True)
+def catalog_redis(redis_client):
+    client = RedisClient(redis_client)
+    with patch("app.services.catalog.get_redis_client", return_value=client):
+        yield redis_client
+
+
+@pytest.fixture
+async def properties(accommodation_factory):
+    lago = await accommodation_factory(name="Cabaña del Lago")
+    bosque = await accommodation_factory(name="Cabaña El Bosque")
+    centro = await accommodation_factory(
+        name="Depto Centro", location={"aliases": ["el departamento de la plaza"]}
+    )
+    return {"lago": lago.id, "bosque": bosque.id, "centro": centro.id}
+
+
+@pytest.mark.asyncio
+async def test_resolves_exact_and_accent_folded_mentions(db_session, properties):
+    index = await get_accommodation_index(db_session)
+
+    assert index.resolve_id("Quiero la cabaña del lago del 10/12 al 12/12") == properties["lago"]
+    assert index.resolve_id("hay lugar en la CABANA DEL LAGO?") == properties["lago"]
+    assert index.resolve_id("el bosque para 2 personas") == properties["bosque"]
+    assert index.resolve_id("el departamento de la plaza") == properties["centro"]
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_match_tolerates_typos(db_session, properties):
+    index = await get_accommodation_index(db_session)
+
+    match = index.resolve("la del bosqe")
+
+    assert match is not None
+    assert match.accommodation_id == properties["bosque"]
+    assert match.method == "fuzzy"
+
+
+@pytest.mark.asyncio
+async def test_generic_or_ambiguous_mentions_are_not_resolved(db_session, properties):
+    index = await get_accommodation_index(db_session)
+
+    assert index.resolve_id("quiero una cabaña para el finde") is None
+    assert index.resolve_id("el lago o el bosque, cualquiera") is None
+
+
+@pytest.mark.asyncio
+async def test_index_rebuilds_when_catalog_changes(db_session, accommodation_factory):
+    only = await accommodation_factory(name="Cabaña del Lago")
+    first = await get_accommodation_index(db_session)
+    assert first.resolve_id("cualquier texto") == only.id
+    assert await get_accommodation_index(db_session) is first
+
+    other = await accommodation_factory(name="Domo Estrellas")
+    second = await get_accommodation_index(db_session)
+
+    assert second is not first
+    assert second.resolve_id("el domo estrellas") == other.id
+    assert second.resolve_id("cualquier texto") is None
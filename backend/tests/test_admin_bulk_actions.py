@@ -0,0 +1,151 @@
+"""Tests de las acciones admin en bloque (confirmar, cancelar, reenviar email)."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.models import ChangeLog, OccupancyNight, Reservation
+from app.services import bulk_actions
+from sqlalchemy import func, select
+
+
+async def _statuses(db_session, reservations):
+    ids = [r.id for r in reservations]
+    result = await db_session.execute(
+        select(Reservation.code, Reservation.reservation_status).where(Reservation.id.in_(ids))
+    )
+    return dict(result.all())
+
+
+@pytest.mark.asyncio
+async def test_bulk_confirm_by_codes_skips_invalid_states(
+    test_client, admin_headers, db_session, accommodation_factory, reservation_factory
+):
+    acc = await accommodation_factory()
+    pending = [
+        await reservation_factory(accommodation=acc, guest_email=f"g{i}@example.com")
+        for i in range(3)
+    ]
+    cancelled = await reservation_factory(accommodation=acc, reservation_status="cancelled")
+    codes = [r.code for r in pending] + [cancelled.code, "RESNOEXISTE"]
+
+    with patch.object(
+        bulk_actions.email_service, "send_reservation_confirmed", AsyncMock(return_value=True)
+    ) as send:
+        r = await test_client.post(
+            "/api/v1/admin/reservations/bulk/confirm", json={"codes": codes}, headers=admin_headers
+        )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["updated"] == sorted(p.code for p in pending)
+    assert body["skipped"] == sorted([cancelled.code, "RESNOEXISTE"])
+    assert body["requested"] == 5
+    assert body["notifications_queued"] == 3
+    assert send.await_count == 3
+
+    statuses = await _statuses(db_session, pending + [cancelled])
+    assert statuses == {**{p.code: "confirmed" for p in pending}, cancelled.code: "cancelled"}
+    # Ocupación y feed de cambios en la misma transacción
+    nights = await db_session.scalar(
+        select(func.count()).where(OccupancyNight.status == "confirmed")
+    )
+    assert nights == 3 * 2
+    changes = await db_session.scalar(
+        select(func.count()).where(ChangeLog.entity_id.in_([p.id for p in pending]))
+    )
+    assert changes >= 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_cancel_by_filter(
+    test_client, admin_headers, db_session, accommodation_factory, reservation_factory
+):
+    acc, other = await accommodation_factory(), await accommodation_factory()
+    targets = [
+        await reservation_factory(accommodation=acc, guest_email="c@example.com"),
+        await reservation_factory(accommodation=acc, reservation_status="confirmed"),
+    ]
+    untouched = await reservation_factory(accommodation=other)
+    request = {"filter": {"accommodation_id": acc.id}}
+
+    r = await test_client.post(
+        "/api/v1/admin/reservations/bulk/cancel", json=request, headers=admin_headers
+    )
+    assert r.status_code == 400  # reason obligatorio
+
+    with patch.object(
+        bulk_actions.email_service, "send_reservation_cancelled", AsyncMock(return_value=True)
+    ) as send, patch.object(bulk_actions.email_service, "send_reservation_expired") as expired:
+        r = await test_client.post(
+            "/api/v1/admin/reservations/bulk/cancel",
+            json={**request, "reason": "caída del canal"},
+            headers=admin_headers,
+        )
+    assert r.status_code == 200, r.text
+    assert r.json()["updated"] == sorted(t.code for t in targets)
+    # Email de cancelación (no el de pre-reserva expirada) con el motivo
+    assert send.await_count == 1
+    assert send.await_args.kwargs["reason"] == "caída del canal"
+    expired.assert_not_called()
+
+    statuses = await _statuses(db_session, targets + [untouched])
+    assert statuses == {
+        targets[0].code: "cancelled",
+        targets[1].code: "cancelled",
+        untouched.code: "pre_reserved",
+    }
+    notes = await db_session.scalar(
+        select(Reservation.internal_notes).where(Reservation.id == targets[0].id)
+    )
+    assert "caída del canal" in notes
+
+
+@pytest.mark.asyncio
+async def test_bulk_selection_errors(
+    test_client, admin_headers, accommodation_factory, reservation_factory, monkeypatch
+):
+    acc = await accommodation_factory()
+    reservations = [await reservation_factory(accommodation=acc) for _ in range(3)]
+    url = "/api/v1/admin/reservations/bulk/confirm"
+
+    r = await test_client.post(url, json={}, headers=admin_headers)
+    assert r.status_code == 400
+    r = await test_client.post(
+        url,
+        json={"codes": [reservations[0].code], "filter": {"accommodation_id": acc.id}},
+        headers=admin_headers,
+    )
+    assert r.status_code == 400
+
+    monkeypatch.setattr(bulk_actions, "MAX_BULK_RESERVATIONS", 2)
+    r = await test_client.post(
+        url, json={"filter": {"accommodation_id": acc.id}}, headers=admin_headers
+    )
+    assert r.status_code == 400
+    assert "acotarlo" in r.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_resend_requires_csrf_and_email(
+    test_client, admin_headers, accommodation_factory, reservation_factory
+):
+    acc = await accommodation_factory()
+    with_email = await reservation_factory(accommodation=acc, guest_email="a@example.com")
+    without_email = await reservation_factory(accommodation=acc)
+    payload = {"codes": [with_email.code, without_email.code]}
+    url = "/api/v1/admin/reservations/bulk/resend-email"
+
+    r = await test_client.post(url, json=payload, headers=admin_headers)
+    assert r.status_code == 403
+
+    with patch.object(
+        bulk_actions.email_service,
+        "send_prereservation_confirmation",
+        AsyncMock(return_value=True),
+    ) as send:
+        r = await test_client.post(
+            url, json=payload, headers={**admin_headers, "X-CSRF-Token": "csrf-token-123"}
+        )
+    assert r.status_code == 200, r.text
+    assert r.json()["updated"] == [with_email.code]
+    assert r.json()["skipped"] == [without_email.code]
+    assert send.await_count == 1
@@ -0,0 +1,64 @@
+"""Tests del export CSV de reservas en streaming."""
+
+import csv
+import gzip
+import io
+from unittest.mock import patch
+
+import pytest
+from app.services import reservation_export
+from app.services.reservation_listing import reservation_filters
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+URL = "/api/v1/admin/reservations/export.csv"
+
+
+@pytest.fixture(autouse=True)
+def export_sessions(test_engine):
+    """El export abre su propia sesión: apuntarla al engine de test."""
+    sessions = async_sessionmaker(test_engine, expire_on_commit=False)
+    with patch.object(reservation_export, "async_session_maker", sessions):
+        yield
+
+
+@pytest.fixture
+async def mixed_reservations(accommodation_factory, reservation_factory):
+    acc = await accommodation_factory()
+    for status in ("pre_reserved", "confirmed", "confirmed", "cancelled"):
+        await reservation_factory(accommodation=acc, reservation_status=status)
+
+
+def _rows(body: bytes):
+    return list(csv.reader(io.StringIO(body.decode("utf-8"))))
+
+
+@pytest.mark.asyncio
+async def test_export_streams_filtered_csv(test_client, admin_headers, mixed_reservations):
+    r = await test_client.get(URL, params={"status": "confirmed"}, headers=admin_headers)
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = _rows(r.content)
+    assert rows[0][:3] == ["code", "accommodation_id", "guest_name"]
+    assert len(rows) == 3
+    assert {row[7] for row in rows[1:]} == {"confirmed"}
+
+
+@pytest.mark.asyncio
+async def test_export_gzip(test_client, admin_headers, mixed_reservations):
+    r = await test_client.get(URL, params={"gzip": "true"}, headers=admin_headers)
+
+    assert r.status_code == 200
+    assert 'filename="reservations.csv.gz"' in r.headers["content-disposition"]
+    assert len(_rows(gzip.decompress(r.content))) == 5
+
+
+@pytest.mark.asyncio
+async def test_export_writes_one_chunk_per_batch(mixed_reservations):
+    with patch.object(reservation_export, "EXPORT_BATCH_SIZE", 2):
+        chunks = [
+            c async for c in reservation_export.stream_reservations_csv(reservation_filters())
+        ]
+
+    # encabezado + 2 lotes de 2 filas
+    assert [len(_rows(c)) for c in chunks] == [1, 2, 2]
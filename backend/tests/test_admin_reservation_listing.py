@@ -0,0 +1,82 @@
+"""Tests del listado admin de reservas paginado por cursor (keyset)."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from app.services.reservation_listing import encode_cursor, page_statement
+
+
+@pytest.fixture
+async def five_reservations(accommodation_factory, reservation_factory):
+    acc = await accommodation_factory()
+    created = []
+    for i in range(5):
+        created.append(
+            await reservation_factory(
+                accommodation=acc,
+                check_in=date(2026, 1, 1) + timedelta(days=10 * (4 - i)),
+                check_out=date(2026, 1, 3) + timedelta(days=10 * (4 - i)),
+            )
+        )
+    return created
+
+
+async def _all_pages(test_client, headers, **params):
+    codes, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        r = await test_client.get("/api/v1/admin/reservations", params=query, headers=headers)
+        assert r.status_code == 200, r.text
+        codes.extend(item["code"] for item in r.json())
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return codes, pages
+
+
+@pytest.mark.asyncio
+async def test_pages_cover_every_reservation_once(test_client, admin_headers, five_reservations):
+    codes, pages = await _all_pages(test_client, admin_headers, limit=2)
+
+    assert pages == 3
+    # created_desc por defecto: la más nueva primero
+    assert codes == [r.code for r in reversed(five_reservations)]
+
+
+@pytest.mark.asyncio
+async def test_sort_by_check_in_and_exact_count(test_client, admin_headers, five_reservations):
+    codes, _ = await _all_pages(test_client, admin_headers, limit=2, sort="check_in_asc")
+    assert codes == [r.code for r in reversed(five_reservations)]
+
+    r = await test_client.get(
+        "/api/v1/admin/reservations",
+        params={"limit": 2, "count": "estimate", "status": "pre_reserved"},
+        headers=admin_headers,
+    )
+    assert r.headers["X-Total-Count"] == "5"
+    assert r.headers["X-Total-Count-Estimated"] == "false"  # con filtros: exacto
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_and_sort_are_rejected(test_client, admin_headers):
+    url = "/api/v1/admin/reservations"
+    foreign = encode_cursor("check_in_asc", date(2026, 1, 1), 1)
+
+    assert (
+        await test_client.get(url, params={"cursor": "???"}, headers=admin_headers)
+    ).status_code == 400
+    assert (
+        await test_client.get(url, params={"cursor": foreign}, headers=admin_headers)
+    ).status_code == 400
+    assert (
+        await test_client.get(url, params={"sort": "guest"}, headers=admin_headers)
+    ).status_code == 400
+
+
+def test_page_statement_is_a_projected_keyset_query():
+    cursor = encode_cursor("created_desc", datetime(2026, 1, 1, 12, 0), 42)
+    sql = str(page_statement([], "created_desc", 50, cursor)).lower()
+
+    assert "(reservations.created_at, reservations.id) <" in sql
+    assert "order by reservations.created_at desc, reservations.id desc" in sql
+    assert "internal_notes" not in sql  # solo columnas de la grilla
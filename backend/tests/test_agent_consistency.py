@@ -180,16 +180,15 @@ async def test_special_characters_dont_break_parser(self):
             assert "intents" in result
 
     async def test_multiple_intents_in_same_message(self):
-        """Validar early-exit pattern: primer intent detectado gana."""
+        """Validar multi-intent: se devuelven todos, el de mayor prioridad primero."""
         text = "Quiero saber si hay disponibilidad y cuánto sale para reservar"
 
         result = analyze(text)
         assert "intents" in result
-        # Early-exit pattern: "disponibilidad" tiene prioridad 1
-        # (más frecuente: 50% tráfico), por tanto gana sobre precio/reservar
+        # "disponibilidad" tiene prioridad 1 (más frecuente: 50% tráfico) y sigue siendo
+        # el intent principal; precio y reservar ya no se pierden
         intents = result["intents"]
-        assert len(intents) == 1, "Early-exit debe devolver exactamente 1 intent"
-        assert intents[0] == "disponibilidad"
+        assert intents == ["disponibilidad", "reservar", "precio"]
 
     async def test_no_dates_returns_empty_list(self):
         """Validar que ausencia de fechas no causa error."""
@@ -0,0 +1,100 @@
+"""Tests del export analítico Parquet/Arrow (pyarrow opcional)."""
+
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from app.services import analytics_export
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+URL = "/api/v1/admin/exports"
+
+
+@pytest.fixture(autouse=True)
+def export_sessions(test_engine):
+    """El export abre su propia sesión: apuntarla al engine de test."""
+    sessions = async_sessionmaker(test_engine, expire_on_commit=False)
+    with patch.object(analytics_export, "async_session_maker", sessions):
+        yield
+
+
+@pytest.fixture
+async def october_and_november(accommodation_factory, reservation_factory):
+    acc = await accommodation_factory()
+    for day in (datetime(2026, 10, 5), datetime(2026, 10, 20), datetime(2026, 11, 2)):
+        await reservation_factory(
+            accommodation=acc,
+            total_price=Decimal("24000.50"),
+            created_at=day.replace(tzinfo=timezone.utc),
+        )
+
+
+def test_partition_ranges_cover_the_interval():
+    ranges = list(analytics_export.partition_ranges(date(2026, 10, 15), date(2026, 12, 3), "month"))
+
+    assert ranges == [
+        ("2026-10", date(2026, 10, 15), date(2026, 11, 1)),
+        ("2026-11", date(2026, 11, 1), date(2026, 12, 1)),
+        ("2026-12", date(2026, 12, 1), date(2026, 12, 3)),
+    ]
+    assert (
+        len(list(analytics_export.partition_ranges(date(2026, 1, 1), date(2026, 1, 8), "day"))) == 7
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_unavailable_without_pyarrow(test_client, admin_headers):
+    with patch.object(analytics_export, "PYARROW_AVAILABLE", False):
+        r = await test_client.get(f"{URL}/reservations", headers=admin_headers)
+    assert r.status_code == 503
+
+    assert (await test_client.get(f"{URL}/guests", headers=admin_headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_keeps_types(test_client, admin_headers, october_and_november):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    r = await test_client.get(
+        f"{URL}/reservations",
+        params={"from_date": "2026-10-01", "to_date": "2026-11-01"},
+        headers=admin_headers,
+    )
+
+    assert r.status_code == 200
+    table = pq.read_table(io.BytesIO(r.content))
+    assert table.num_rows == 2
+    assert str(table.schema.field("total_price").type) == "decimal128(12, 2)"
+    assert str(table.schema.field("created_at").type) == "timestamp[us, tz=UTC]"
+    assert table.column("total_price").to_pylist() == [Decimal("24000.50")] * 2
+    assert "guest_phone" not in table.column_names
+
+
+@pytest.mark.asyncio
+async def test_directory_export_partitions_by_month(db_session, tmp_path, october_and_november):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    written = await analytics_export.export_to_directory(
+        db_session, "reservations", "parquet", tmp_path, date(2026, 9, 1), date(2026, 12, 1)
+    )
+
+    assert [(p.relative_to(tmp_path).as_posix(), n) for p, n in written] == [
+        ("reservations/month=2026-10/part-0.parquet", 2),
+        ("reservations/month=2026-11/part-0.parquet", 1),
+    ]
+    assert pq.read_table(written[0][0]).num_rows == 2
+
+
+@pytest.mark.asyncio
+async def test_arrow_ipc_stream_export(test_client, admin_headers, october_and_november):
+    pa = pytest.importorskip("pyarrow")
+
+    r = await test_client.get(
+        f"{URL}/reservations", params={"format": "arrow"}, headers=admin_headers
+    )
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert pa.ipc.open_stream(r.content).read_all().num_rows == 3
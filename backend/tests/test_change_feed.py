@@ -0,0 +1,193 @@
+"""Tests del feed de cambios (delta-sync) del panel admin."""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from app.models import ChangeLog, Reservation
+from app.services import change_feed
+from app.services.reservations import ReservationService
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window(monkeypatch):
+    monkeypatch.setattr(change_feed, "SETTLE_SECONDS", 0)
+
+
+@pytest.mark.asyncio
+async def test_orm_and_bulk_writes_are_collapsed_per_entity(db_session, reservation_factory):
+    reservation = await reservation_factory()
+    other = await reservation_factory()
+    reservation.guest_name = "Nuevo Nombre"
+    await db_session.commit()
+    # UPDATE en bloque (Core) registrado explícitamente
+    assert "error" not in await ReservationService(db_session).confirm_reservation(reservation.code)
+
+    page = await change_feed.fetch_changes(db_session, since=0)
+    assert [(c["entity"], c["id"]) for c in page["changes"]] == [
+        ("reservation", other.id),
+        ("reservation", reservation.id),
+    ]
+    latest = page["changes"][-1]
+    assert latest["op"] == "upsert"
+    assert latest["data"]["guest_name"] == "Nuevo Nombre"
+    assert latest["data"]["status"] == "confirmed"
+    assert latest["seq"] == page["next"]
+    assert page["next"] == await db_session.scalar(select(func.max(ChangeLog.seq)))
+
+    assert (await change_feed.fetch_changes(db_session, since=page["next"]))["changes"] == []
+
+
+@pytest.mark.asyncio
+async def test_seq_is_assigned_at_commit_not_flush(db_session, reservation_factory):
+    reservation = await reservation_factory()
+    head = await change_feed.head_seq(db_session)
+
+    reservation.guest_name = "Flush Temprano"
+    await db_session.flush()
+    await change_feed.record_changes(db_session, "reservation", [reservation.id])
+    # Flusheado pero sin commit: todavía no tomó seq
+    assert await change_feed.head_seq(db_session) == head
+
+    await db_session.commit()
+    page = await change_feed.fetch_changes(db_session, since=head)
+    assert [c["id"] for c in page["changes"]] == [reservation.id]
+    assert page["changes"][0]["data"]["guest_name"] == "Flush Temprano"
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_changes_are_not_recorded(db_session, reservation_factory):
+    reservation = await reservation_factory()
+    head = await change_feed.head_seq(db_session)
+
+    reservation.guest_name = "Descartado"
+    await db_session.flush()
+    await db_session.rollback()
+    await db_session.commit()
+
+    assert await change_feed.head_seq(db_session) == head
+
+
+@pytest.mark.asyncio
+async def test_changes_endpoint_pages_deletes_and_expiry(
+    test_client, admin_headers, db_session, reservation_factory
+):
+    first = await reservation_factory()
+    second = await reservation_factory()
+    await db_session.delete(first)
+    await db_session.commit()
+
+    r = await test_client.get(
+        "/api/v1/admin/changes", params={"since": 0, "limit": 1}, headers=admin_headers
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["has_more"] is True
+    # La reserva ya no existe: se informa como baja aunque el seq sea del alta
+    assert [(c["id"], c["op"]) for c in body["changes"]] == [(first.id, "delete")]
+
+    r = await test_client.get(
+        "/api/v1/admin/changes", params={"since": body["next"]}, headers=admin_headers
+    )
+    assert [(c["id"], c["op"]) for c in r.json()["changes"]] == [
+        (second.id, "upsert"),
+        (first.id, "delete"),
+    ]
+
+    # Cambios podados: un cliente tan atrasado debe recargar todo
+    await db_session.execute(delete(ChangeLog).where(ChangeLog.seq <= 2))
+    await db_session.commit()
+    r = await test_client.get("/api/v1/admin/changes", params={"since": 1}, headers=admin_headers)
+    assert r.status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_emits_change_events(
+    db_session, test_engine, reservation_factory, monkeypatch
+):
+    reservation = await reservation_factory()
+    monkeypatch.setattr(change_feed.get_settings(), "CHANGE_FEED_POLL_SECONDS", 0.01)
+    polls = iter([False, True])
+
+    async def is_disconnected():
+        return next(polls)
+
+    session_factory = async_sessionmaker(test_engine, expire_on_commit=False)
+    frames = [f async for f in change_feed.stream_changes(0, is_disconnected, session_factory)]
+
+    assert frames[0].startswith("retry: ")
+    assert frames[1] == "id: 0\n\n"
+    event = frames[2].splitlines()
+    assert event[1] == "event: change"
+    data = json.loads(event[2].removeprefix("data: "))
+    assert (data["entity"], data["id"]) == ("reservation", reservation.id)
+    assert event[0] == f"id: {data['seq']}"
+    assert await db_session.scalar(select(func.count()).select_from(Reservation)) == 1
+
+
+@pytest.mark.asyncio
+async def test_sse_without_since_starts_at_head(
+    db_session, test_engine, reservation_factory, monkeypatch
+):
+    await reservation_factory()
+    head = await change_feed.head_seq(db_session)
+    monkeypatch.setattr(change_feed.get_settings(), "CHANGE_FEED_POLL_SECONDS", 0.01)
+    polls = iter([False, True])
+
+    async def is_disconnected():
+        return next(polls)
+
+    session_factory = async_sessionmaker(test_engine, expire_on_commit=False)
+    frames = [f async for f in change_feed.stream_changes(None, is_disconnected, session_factory)]
+
+    # Sin cambios nuevos igual se envía el cursor (Last-Event-ID al reconectar)
+    assert frames[0].startswith("retry: ") and frames[1:] == [f"id: {head}\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_head_seq_excludes_unsettled_changes(db_session, reservation_factory, monkeypatch):
+    first = await reservation_factory()
+    settled = await change_feed.head_seq(db_session)
+    await db_session.execute(
+        update(ChangeLog).values(created_at=datetime.now(UTC) - timedelta(minutes=1))
+    )
+    await db_session.commit()
+    await reservation_factory()
+    monkeypatch.setattr(change_feed, "SETTLE_SECONDS", 30)
+
+    # El cambio reciente puede tener un seq menor aún sin commitear: no se saltea
+    assert await change_feed.head_seq(db_session) == settled
+    page = await change_feed.fetch_changes(db_session, since=0)
+    assert [c["id"] for c in page["changes"]] == [first.id]
+
+
+@pytest.mark.asyncio
+async def test_reservation_listing_returns_change_seq(
+    test_client, admin_headers, db_session, reservation_factory
+):
+    await reservation_factory()
+
+    r = await test_client.get("/api/v1/admin/reservations", headers=admin_headers)
+
+    assert r.status_code == 200, r.text
+    assert int(r.headers["X-Change-Seq"]) == await change_feed.head_seq(db_session)
+
+
+@pytest.mark.asyncio
+async def test_fully_pruned_log_still_expires_old_since(db_session, reservation_factory):
+    for _ in range(3):
+        await reservation_factory()
+    head = await change_feed.head_seq(db_session)
+    await db_session.execute(
+        update(ChangeLog).values(created_at=datetime.now(UTC) - timedelta(hours=48))
+    )
+    await db_session.commit()
+
+    await change_feed.prune_change_log(db_session, retention_hours=24)
+
+    with pytest.raises(change_feed.ChangesExpired):
+        await change_feed.fetch_changes(db_session, since=1)
+    # Quien ya tenía todo hasta el último podado sigue al día
+    assert (await change_feed.fetch_changes(db_session, since=head))["changes"] == []
@@ -1,189 +1,164 @@
-"""Tests for conversation_state service."""
+"""Tests for conversation_state service (HASH storage en fakeredis)."""
 
 import json
-from unittest.mock import AsyncMock, patch
+from unittest.mock import patch
 
 import pytest
+from app.core.redis import RedisClient
 from app.services.conversation_state import (
     CONTEXT_TTL_SECONDS,
+    ConversationSession,
+    conversation_session,
     delete_user_context,
     get_ttl_remaining,
     get_user_context,
     set_user_context,
+    transition_user_context,
     update_user_context,
 )
 
-
-@pytest.fixture
-def mock_redis():
-    """Mock Redis client."""
-    redis_mock = AsyncMock()
-    redis_mock.set = AsyncMock(return_value=True)
-    redis_mock.get = AsyncMock(return_value=None)
-    redis_mock.ttl = AsyncMock(return_value=-2)
-    redis_mock.delete = AsyncMock(return_value=1)
-    redis_mock.aclose = AsyncMock()
-    return redis_mock
+USER_ID = "+5491112345678"
+KEY = f"user_context:{USER_ID}"
 
 
 @pytest.fixture
-def mock_redis_pool(mock_redis):
-    """Mock Redis connection pool."""
-    with patch("app.services.conversation_state.get_redis_pool") as mock_pool:
-        with patch("app.services.conversation_state.redis.Redis") as mock_redis_class:
-            mock_redis_class.return_value = mock_redis
-            yield mock_pool
+def state_redis(redis_client):
+    """Servicio apuntando al cliente de test (fakeredis)."""
+    client = RedisClient(redis_client)
+    with patch("app.services.conversation_state.get_redis_client", return_value=client):
+        yield redis_client
 
 
 @pytest.mark.asyncio
-async def test_set_user_context_success(mock_redis_pool, mock_redis):
+async def test_set_user_context_success(state_redis):
     """Test successful context storage."""
-    user_id = "+5491112345678"
     context = {
         "current_step": "selecting_accommodation",
         "selected_dates": {"check_in": "2025-10-20", "check_out": "2025-10-22"},
         "guests_count": 2,
     }
 
-    result = await set_user_context(user_id, context)
+    result = await set_user_context(USER_ID, context)
 
     assert result is True
-    mock_redis.set.assert_called_once()
-    call_args = mock_redis.set.call_args
-    assert call_args[0][0] == f"user_context:{user_id}"
-    assert call_args[1]["ex"] == CONTEXT_TTL_SECONDS
-
-    # Verify JSON contains context data
-    stored_json = call_args[0][1]
-    stored_data = json.loads(stored_json)
-    assert stored_data["current_step"] == "selecting_accommodation"
-    assert "_updated_at" in stored_data
+    assert await state_redis.type(KEY) == "hash"
+    stored = await state_redis.hgetall(KEY)
+    assert json.loads(stored["current_step"]) == "selecting_accommodation"
+    assert json.loads(stored["selected_dates"])["check_in"] == "2025-10-20"
+    assert json.loads(stored["guests_count"]) == 2
+    assert "_updated_at" in stored
+    assert 0 < await state_redis.ttl(KEY) <= CONTEXT_TTL_SECONDS
 
 
 @pytest.mark.asyncio
-async def test_set_user_context_custom_ttl(mock_redis_pool, mock_redis):
+async def test_set_user_context_custom_ttl(state_redis):
     """Test context storage with custom TTL."""
-    user_id = "+5491112345678"
-    context = {"test": "data"}
-    custom_ttl = 600
-
-    result = await set_user_context(user_id, context, ttl_seconds=custom_ttl)
+    result = await set_user_context(USER_ID, {"test": "data"}, ttl_seconds=600)
 
     assert result is True
-    call_args = mock_redis.set.call_args
-    assert call_args[1]["ex"] == custom_ttl
+    assert 0 < await state_redis.ttl(KEY) <= 600
 
 
 @pytest.mark.asyncio
-async def test_set_user_context_redis_error(mock_redis_pool, mock_redis):
-    """Test handling of Redis errors during set."""
-    mock_redis.set.side_effect = Exception("Redis connection error")
+async def test_set_user_context_replaces_previous_fields(state_redis):
+    """set_user_context reemplaza el contexto completo (no hace merge)."""
+    await set_user_context(USER_ID, {"current_step": "a", "guests_count": 2})
+    await set_user_context(USER_ID, {"current_step": "b"})
+
+    context = await get_user_context(USER_ID)
+    assert context["current_step"] == "b"
+    assert "guests_count" not in context
 
-    user_id = "+5491112345678"
-    context = {"test": "data"}
 
-    result = await set_user_context(user_id, context)
+@pytest.mark.asyncio
+async def test_set_user_context_redis_error(state_redis):
+    """Test handling of Redis errors during set."""
+    with patch.object(state_redis, "pipeline", side_effect=Exception("Redis connection error")):
+        result = await set_user_context(USER_ID, {"test": "data"})
 
     assert result is False
 
 
 @pytest.mark.asyncio
-async def test_get_user_context_found(mock_redis_pool, mock_redis):
+async def test_get_user_context_found(state_redis):
     """Test retrieving existing context."""
-    user_id = "+5491112345678"
-    stored_context = {
-        "current_step": "confirming",
-        "accommodation_id": 5,
-        "_updated_at": "2025-10-13T12:00:00",
-    }
+    await set_user_context(USER_ID, {"current_step": "confirming", "accommodation_id": 5})
 
-    mock_redis.get.return_value = json.dumps(stored_context)
-    mock_redis.ttl.return_value = 1200
-
-    result = await get_user_context(user_id)
+    result = await get_user_context(USER_ID)
 
     assert result is not None
     assert result["current_step"] == "confirming"
     assert result["accommodation_id"] == 5
-    mock_redis.get.assert_called_once_with(f"user_context:{user_id}")
-    mock_redis.ttl.assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_get_user_context_not_found(mock_redis_pool, mock_redis):
+async def test_get_user_context_not_found(state_redis):
     """Test retrieving non-existent context."""
-    user_id = "+5491112345678"
-    mock_redis.get.return_value = None
-
-    result = await get_user_context(user_id)
+    result = await get_user_context(USER_ID)
 
     assert result is None
 
 
 @pytest.mark.asyncio
-async def test_get_user_context_invalid_json(mock_redis_pool, mock_redis):
+async def test_get_user_context_invalid_json(state_redis):
     """Test handling of corrupted JSON data."""
-    user_id = "+5491112345678"
-    mock_redis.get.return_value = "invalid json {{"
+    await state_redis.hset(KEY, mapping={"current_step": "invalid json {{"})
 
-    result = await get_user_context(user_id)
+    result = await get_user_context(USER_ID)
 
     assert result is None
 
 
 @pytest.mark.asyncio
-async def test_get_user_context_redis_error(mock_redis_pool, mock_redis):
-    """Test handling of Redis errors during get."""
-    mock_redis.get.side_effect = Exception("Redis timeout")
+async def test_get_user_context_legacy_string_key(state_redis):
+    """Una key en formato anterior (string JSON) se descarta sin romper."""
+    await state_redis.set(KEY, json.dumps({"current_step": "old"}))
 
-    user_id = "+5491112345678"
-
-    result = await get_user_context(user_id)
+    result = await get_user_context(USER_ID)
 
     assert result is None
+    assert await state_redis.exists(KEY) == 0
 
 
 @pytest.mark.asyncio
-async def test_update_user_context_new_context(mock_redis_pool, mock_redis):
-    """Test updating when no previous context exists."""
-    user_id = "+5491112345678"
-    updates = {"accommodation_id": 3, "current_step": "payment_pending"}
+async def test_get_user_context_redis_error(state_redis):
+    """Test handling of Redis errors during get."""
+    with patch.object(state_redis, "pipeline", side_effect=Exception("Redis timeout")):
+        result = await get_user_context(USER_ID)
 
-    # First call to get_user_context returns None (no existing context)
-    mock_redis.get.return_value = None
-    # Second call from set_user_context
-    mock_redis.set.return_value = True
+    assert result is None
 
-    result = await update_user_context(user_id, updates)
+
+@pytest.mark.asyncio
+async def test_update_user_context_new_context(state_redis):
+    """Test updating when no previous context exists."""
+    result = await update_user_context(
+        USER_ID, {"accommodation_id": 3, "current_step": "payment_pending"}
+    )
 
     assert result is True
-    # Verify set was called with merged data
-    mock_redis.set.assert_called_once()
+    context = await get_user_context(USER_ID)
+    assert context["accommodation_id"] == 3
+    assert context["current_step"] == "payment_pending"
+    assert 0 < await state_redis.ttl(KEY) <= CONTEXT_TTL_SECONDS
 
 
 @pytest.mark.asyncio
-async def test_update_user_context_merge_existing(mock_redis_pool, mock_redis):
+async def test_update_user_context_merge_existing(state_redis):
     """Test updating existing context (merge)."""
-    user_id = "+5491112345678"
     existing_context = {
         "current_step": "selecting_accommodation",
         "selected_dates": {"check_in": "2025-10-20", "check_out": "2025-10-22"},
         "guests_count": 2,
     }
-    updates = {"accommodation_id": 5, "current_step": "confirming"}
-
-    mock_redis.get.return_value = json.dumps(existing_context)
-    mock_redis.set.return_value = True
+    await set_user_context(USER_ID, dict(existing_context))
 
-    result = await update_user_context(user_id, updates)
+    result = await update_user_context(
+        USER_ID, {"accommodation_id": 5, "current_step": "confirming"}
+    )
 
     assert result is True
-
-    # Verify merged context was saved
-    call_args = mock_redis.set.call_args
-    stored_json = call_args[0][1]
-    stored_data = json.loads(stored_json)
-
+    stored_data = await get_user_context(USER_ID)
     assert stored_data["accommodation_id"] == 5
     assert stored_data["current_step"] == "confirming"
     assert stored_data["selected_dates"] == existing_context["selected_dates"]
@@ -191,119 +166,268 @@ async def test_update_user_context_merge_existing(mock_redis_pool, mock_redis):
 
 
 @pytest.mark.asyncio
-async def test_update_user_context_no_reset_ttl(mock_redis_pool, mock_redis):
-    """Test updating without resetting TTL."""
-    user_id = "+5491112345678"
-    existing_context = {"current_step": "selecting"}
-    updates = {"accommodation_id": 5}
+async def test_update_user_context_does_not_read(state_redis):
+    """update_user_context no hace GET/HGETALL previo (sin read-modify-write)."""
+    with patch.object(state_redis, "hgetall") as hgetall, patch.object(state_redis, "get") as get:
+        await update_user_context(USER_ID, {"last_button": "menu_help"})
 
-    mock_redis.get.return_value = json.dumps(existing_context)
-    mock_redis.ttl.return_value = 600  # 10 minutes remaining
-    mock_redis.set.return_value = True
+    hgetall.assert_not_called()
+    get.assert_not_called()
 
-    result = await update_user_context(user_id, updates, reset_ttl=False)
+
+@pytest.mark.asyncio
+async def test_update_user_context_concurrent_fields_not_lost(state_redis):
+    """Dos updates sobre campos distintos no se pisan entre sí."""
+    import asyncio
+
+    await asyncio.gather(
+        update_user_context(USER_ID, {"guests_count": 4}),
+        update_user_context(USER_ID, {"accommodation_id": 7}),
+    )
+
+    context = await get_user_context(USER_ID)
+    assert context["guests_count"] == 4
+    assert context["accommodation_id"] == 7
+
+
+@pytest.mark.asyncio
+async def test_update_user_context_no_reset_ttl(state_redis):
+    """Test updating without resetting TTL."""
+    await set_user_context(USER_ID, {"current_step": "selecting"}, ttl_seconds=600)
+
+    result = await update_user_context(USER_ID, {"accommodation_id": 5}, reset_ttl=False)
 
     assert result is True
+    # TTL preservado (no reseteado a 1800)
+    assert 0 < await state_redis.ttl(KEY) <= 600
+
+
+@pytest.mark.asyncio
+async def test_update_user_context_no_reset_ttl_enforces_floor(state_redis):
+    """Sin reset_ttl, un TTL casi vencido se extiende al mínimo de 60s."""
+    await set_user_context(USER_ID, {"current_step": "selecting"}, ttl_seconds=5)
+
+    await update_user_context(USER_ID, {"accommodation_id": 5}, reset_ttl=False)
+
+    assert 5 < await state_redis.ttl(KEY) <= 60
+
+
+@pytest.mark.asyncio
+async def test_update_user_context_no_reset_ttl_new_key(state_redis):
+    """Sin reset_ttl y sin key previa, se aplica el TTL por defecto."""
+    await update_user_context(USER_ID, {"accommodation_id": 5}, reset_ttl=False)
+
+    assert 60 < await state_redis.ttl(KEY) <= CONTEXT_TTL_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_transition_user_context_applied(state_redis):
+    """La transición se aplica si los campos esperados coinciden."""
+    await set_user_context(USER_ID, {"current_step": "selecting_accommodation"})
+
+    applied = await transition_user_context(
+        USER_ID,
+        expected={"current_step": "selecting_accommodation"},
+        updates={"current_step": "confirming_reservation", "accommodation_id": 5},
+    )
 
-    # Verify TTL was preserved (not reset to 1800)
-    call_args = mock_redis.set.call_args
-    assert call_args[1]["ex"] == 600
+    assert applied is True
+    context = await get_user_context(USER_ID)
+    assert context["current_step"] == "confirming_reservation"
+    assert context["accommodation_id"] == 5
 
 
 @pytest.mark.asyncio
-async def test_delete_user_context_success(mock_redis_pool, mock_redis):
+async def test_transition_user_context_conflict(state_redis):
+    """La transición no se aplica si el estado cambió."""
+    await set_user_context(USER_ID, {"current_step": "main_menu"})
+
+    applied = await transition_user_context(
+        USER_ID,
+        expected={"current_step": "selecting_accommodation"},
+        updates={"current_step": "confirming_reservation"},
+    )
+
+    assert applied is False
+    context = await get_user_context(USER_ID)
+    assert context["current_step"] == "main_menu"
+
+
+@pytest.mark.asyncio
+async def test_transition_user_context_missing_field_matches_none(state_redis):
+    """Un campo ausente se compara como None."""
+    applied = await transition_user_context(
+        USER_ID, expected={"current_step": None}, updates={"current_step": "main_menu"}
+    )
+
+    assert applied is True
+    assert (await get_user_context(USER_ID))["current_step"] == "main_menu"
+
+
+@pytest.mark.asyncio
+async def test_delete_user_context_success(state_redis):
     """Test deleting context."""
-    user_id = "+5491112345678"
-    mock_redis.delete.return_value = 1  # Key existed
+    await set_user_context(USER_ID, {"current_step": "main_menu"})
 
-    result = await delete_user_context(user_id)
+    result = await delete_user_context(USER_ID)
 
     assert result is True
-    mock_redis.delete.assert_called_once_with(f"user_context:{user_id}")
+    assert await state_redis.exists(KEY) == 0
 
 
 @pytest.mark.asyncio
-async def test_delete_user_context_not_exists(mock_redis_pool, mock_redis):
+async def test_delete_user_context_not_exists(state_redis):
     """Test deleting non-existent context."""
-    user_id = "+5491112345678"
-    mock_redis.delete.return_value = 0  # Key didn't exist
-
-    result = await delete_user_context(user_id)
+    result = await delete_user_context(USER_ID)
 
     assert result is True  # Still successful (idempotent)
 
 
 @pytest.mark.asyncio
-async def test_delete_user_context_redis_error(mock_redis_pool, mock_redis):
+async def test_delete_user_context_redis_error(state_redis):
     """Test handling of Redis errors during delete."""
-    mock_redis.delete.side_effect = Exception("Redis error")
-
-    user_id = "+5491112345678"
-
-    result = await delete_user_context(user_id)
+    with patch.object(state_redis, "delete", side_effect=Exception("Redis error")):
+        result = await delete_user_context(USER_ID)
 
     assert result is False
 
 
 @pytest.mark.asyncio
-async def test_get_ttl_remaining_success(mock_redis_pool, mock_redis):
+async def test_get_ttl_remaining_success(state_redis):
     """Test getting TTL remaining."""
-    user_id = "+5491112345678"
-    mock_redis.ttl.return_value = 1200
+    await set_user_context(USER_ID, {"current_step": "main_menu"}, ttl_seconds=1200)
 
-    ttl = await get_ttl_remaining(user_id)
+    ttl = await get_ttl_remaining(USER_ID)
 
-    assert ttl == 1200
-    mock_redis.ttl.assert_called_once_with(f"user_context:{user_id}")
+    assert 0 < ttl <= 1200
 
 
 @pytest.mark.asyncio
-async def test_get_ttl_remaining_not_exists(mock_redis_pool, mock_redis):
+async def test_get_ttl_remaining_not_exists(state_redis):
     """Test getting TTL for non-existent key."""
-    user_id = "+5491112345678"
-    mock_redis.ttl.return_value = -2  # Key doesn't exist
-
-    ttl = await get_ttl_remaining(user_id)
+    ttl = await get_ttl_remaining(USER_ID)
 
     assert ttl == -2
 
 
 @pytest.mark.asyncio
-async def test_get_ttl_remaining_redis_error(mock_redis_pool, mock_redis):
+async def test_get_ttl_remaining_redis_error(state_redis):
     """Test handling of Redis errors during TTL check."""
-    mock_redis.ttl.side_effect = Exception("Redis error")
-
-    user_id = "+5491112345678"
-
-    ttl = await get_ttl_remaining(user_id)
+    with patch.object(state_redis, "ttl", side_effect=Exception("Redis error")):
+        ttl = await get_ttl_remaining(USER_ID)
 
     assert ttl == -2
 
 
 @pytest.mark.asyncio
-async def test_conversation_flow_integration(mock_redis_pool, mock_redis):
+async def test_conversation_flow_integration(state_redis):
     """Test complete conversation flow: set → get → update → delete."""
-    user_id = "+5491112345678"
-
     # Step 1: Initial context
-    initial_context = {"current_step": "awaiting_dates"}
-    mock_redis.set.return_value = True
-    result = await set_user_context(user_id, initial_context)
+    result = await set_user_context(USER_ID, {"current_step": "awaiting_dates"})
     assert result is True
 
     # Step 2: Get context
-    mock_redis.get.return_value = json.dumps(initial_context)
-    mock_redis.ttl.return_value = 1800
-    context = await get_user_context(user_id)
+    context = await get_user_context(USER_ID)
     assert context["current_step"] == "awaiting_dates"
 
     # Step 3: Update context
     updates = {"selected_dates": {"check_in": "2025-10-20", "check_out": "2025-10-22"}}
-    mock_redis.get.return_value = json.dumps({**initial_context, **updates})
-    result = await update_user_context(user_id, updates)
+    result = await update_user_context(USER_ID, updates)
     assert result is True
+    context = await get_user_context(USER_ID)
+    assert context["current_step"] == "awaiting_dates"
+    assert context["selected_dates"] == updates["selected_dates"]
 
     # Step 4: Delete context (reset conversation)
-    mock_redis.delete.return_value = 1
-    result = await delete_user_context(user_id)
+    result = await delete_user_context(USER_ID)
     assert result is True
+    assert await get_user_context(USER_ID) is None
+
+
+@pytest.mark.asyncio
+async def test_session_load_update_flush(state_redis):
+    """La sesión acumula cambios en memoria y los escribe juntos en flush."""
+    await set_user_context(USER_ID, {"current_step": "main_menu", "guests_count": 2})
+
+    session = ConversationSession(USER_ID)
+    await session.load()
+    session.update({"current_step": "availability_flow"})
+    session.update({"last_button": "menu_availability"})
+
+    assert session.get("current_step") == "availability_flow"
+    assert session.dirty is True
+    # Nada escrito todavía
+    assert (await get_user_context(USER_ID))["current_step"] == "main_menu"
+
+    assert await session.flush() is True
+    assert session.dirty is False
+    context = await get_user_context(USER_ID)
+    assert context["current_step"] == "availability_flow"
+    assert context["last_button"] == "menu_availability"
+    assert context["guests_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_session_step_change_conflicts_with_concurrent_transition(state_redis):
+    """Dos mensajes leen el mismo paso: solo la primera transición se aplica."""
+    await set_user_context(USER_ID, {"current_step": "selecting_accommodation"})
+    first, second = ConversationSession(USER_ID), ConversationSession(USER_ID)
+    await first.load()
+    await second.load()
+
+    first.update({"current_step": "confirming_reservation", "accommodation_id": 5})
+    second.update({"current_step": "main_menu", "accommodation_id": None})
+
+    assert await first.flush() is True
+    assert await second.flush() is False
+    context = await get_user_context(USER_ID)
+    assert context["current_step"] == "confirming_reservation"
+    assert context["accommodation_id"] == 5
+
+
+@pytest.mark.asyncio
+async def test_session_flush_without_changes_skips_redis(state_redis):
+    """flush sin cambios no toca Redis."""
+    session = ConversationSession(USER_ID)
+    await session.load()
+
+    with patch.object(state_redis, "pipeline") as pipeline:
+        assert await session.flush() is True
+
+    pipeline.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_conversation_session_round_trips(state_redis):
+    """Un mensaje = 1 pipeline de carga + 1 pipeline de escritura."""
+    await set_user_context(USER_ID, {"current_step": "main_menu"})
+    original_pipeline = state_redis.pipeline
+    calls = []
+
+    def counting_pipeline(*args, **kwargs):
+        calls.append(kwargs.get("transaction", True))
+        return original_pipeline(*args, **kwargs)
+
+    with patch.object(state_redis, "pipeline", side_effect=counting_pipeline):
+        async with conversation_session(USER_ID) as session:
+            session.update({"last_button": "acc_5"})
+            session.update({"accommodation_id": 5})
+            session.update({"current_step": "confirming_reservation"})
+
+    assert len(calls) == 2
+    context = await get_user_context(USER_ID)
+    assert context["accommodation_id"] == 5
+    assert context["current_step"] == "confirming_reservation"
+
+
+@pytest.mark.asyncio
+async def test_conversation_session_discards_on_exception(state_redis):
+    """Si el bloque falla, los cambios pendientes no se escriben."""
+    await set_user_context(USER_ID, {"current_step": "main_menu"})
+
+    with pytest.raises(RuntimeError):
+        async with conversation_session(USER_ID) as session:
+            session.update({"current_step": "help_menu"})
+            raise RuntimeError("boom")
+
+    assert (await get_user_context(USER_ID))["current_step"] == "main_menu"
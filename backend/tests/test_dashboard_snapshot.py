@@ -0,0 +1,134 @@
+"""Tests del snapshot de estadísticas del dashboard (consulta agregada + cache)."""
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.core.redis import RedisClient
+from app.services import dashboard
+from sqlalchemy.dialects import postgresql
+
+
+@pytest.fixture
+def dashboard_redis(redis_client):
+    client = RedisClient(redis_client)
+    with patch.object(dashboard, "get_redis_client", return_value=client):
+        yield redis_client
+
+
+async def _reservations(accommodation_factory, reservation_factory):
+    acc = await accommodation_factory(last_ical_sync_at=datetime.now(timezone.utc))
+    now = datetime.now(timezone.utc)
+    rows = [
+        ("pre_reserved", "pending", None),
+        ("pre_reserved", "pending", None),
+        ("confirmed", "paid", now),
+        ("cancelled", "pending", None),
+    ]
+    for i, (status, payment, confirmed_at) in enumerate(rows):
+        await reservation_factory(
+            accommodation=acc,
+            check_in=date.today() + timedelta(days=10 * i + 1),
+            check_out=date.today() + timedelta(days=10 * i + 3),
+            total_price=Decimal("300.00"),
+            reservation_status=status,
+            payment_status=payment,
+            confirmed_at=confirmed_at,
+        )
+
+
+@pytest.mark.asyncio
+async def test_compute_stats_uses_a_single_query(
+    db_session, accommodation_factory, reservation_factory
+):
+    await _reservations(accommodation_factory, reservation_factory)
+    calls = []
+    original = db_session.execute
+
+    async def _execute(*args, **kwargs):
+        calls.append(args)
+        return await original(*args, **kwargs)
+
+    with patch.object(db_session, "execute", side_effect=_execute):
+        stats = await dashboard.compute_stats(db_session)
+
+    assert len(calls) == 1
+    assert stats["total_created"] == 4
+    assert (stats["confirmed"], stats["pre_reserved"], stats["cancelled"]) == (1, 2, 1)
+    assert Decimal(stats["total_revenue"]) == Decimal("300.00")
+    assert Decimal(stats["month_revenue"]) == Decimal("300.00")
+    assert stats["new_reservations_24h"] == 4
+    assert stats["payments_received_24h"] == 1
+    assert 0 <= stats["ical_last_sync_age_minutes"] < 5
+
+
+def test_postgres_statement_uses_filter_clauses():
+    sql = str(
+        dashboard.aggregate_statement(datetime.now(timezone.utc)).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+    assert sql.count("FILTER (WHERE") == 7
+    assert "CASE" not in sql
+
+
+@pytest.mark.asyncio
+async def test_concurrent_admins_share_one_query(db_session, dashboard_redis):
+    stats = {"total_created": 0, "db_latency_ms": 1.0}
+    compute = AsyncMock(return_value=stats)
+
+    with patch.object(dashboard, "compute_stats", compute):
+        snaps = await asyncio.gather(
+            *(dashboard.dashboard_snapshot.get(db_session) for _ in range(5))
+        )
+        # Otro worker: L1 vacío, reutiliza la copia de Redis sin consultar la DB
+        other_worker = await dashboard.DashboardSnapshotCache().get(db_session)
+
+    assert compute.await_count == 1
+    assert all(s is snaps[0] for s in snaps)
+    assert other_worker.stats == stats
+    assert other_worker.redis_latency_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_http_performance_from_aggregator(redis_client):
+    from app.services.perf_aggregator import perf_aggregator
+
+    for _ in range(95):
+        perf_aggregator.record("/api/v1/reservations", 50.0, 200)
+    for _ in range(5):
+        perf_aggregator.record("/api/v1/reservations", 300.0, 503)
+    await perf_aggregator.flush(redis_client)
+
+    with patch(
+        "app.services.perf_aggregator.get_redis_client", return_value=RedisClient(redis_client)
+    ):
+        perf = await dashboard.http_performance()
+
+    assert perf["error_rate"] == 5.0
+    assert perf["p50_latency_ms"] == pytest.approx(50.0, rel=0.01)
+    assert perf["p99_latency_ms"] == pytest.approx(300.0, rel=0.01)
+
+
+@pytest.mark.asyncio
+async def test_dashboard_endpoint_reports_real_figures(
+    test_client, accommodation_factory, reservation_factory
+):
+    from app.core.config import get_settings
+    from app.core.security import create_access_token
+
+    await _reservations(accommodation_factory, reservation_factory)
+    admin_email = get_settings().ADMIN_ALLOWED_EMAILS.split(",")[0].strip()
+    headers = {"Authorization": f"Bearer {create_access_token({'email': admin_email})}"}
+
+    r = await test_client.get("/api/v1/admin/dashboard/stats", headers=headers)
+
+    assert r.status_code == 200
+    data = r.json()
+    assert data["totals"]["confirmed"] == 1
+    assert data["conversion_rate"] == 25.0
+    assert data["health"]["redis_latency_ms"] is not None
+    assert data["health"]["ical_last_sync_age_minutes"] == 0
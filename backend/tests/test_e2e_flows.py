@@ -219,7 +219,7 @@ async def test_button_flow_availability_to_prereservation(
             }
 
             with patch("app.core.security.verify_whatsapp_signature") as mock_verify, patch(
-                "app.services.whatsapp.send_interactive_buttons"
+                "app.services.whatsapp.send_interactive_template"
             ) as mock_send_buttons:
                 mock_verify.return_value = json.dumps(button_payload).encode()
                 mock_send_buttons.return_value = {"success": True, "message_id": "wamid.sent"}
@@ -236,9 +236,11 @@ async def test_button_flow_availability_to_prereservation(
 
                 # Verificar que se enviaron botones de fecha
                 assert mock_send_buttons.called
-                call_args = mock_send_buttons.call_args
-                assert len(call_args[1]["buttons"]) == 3  # 3 opciones de fecha
-                assert any("finde" in btn["title"] for btn in call_args[1]["buttons"])
+                template = mock_send_buttons.call_args[0][1]
+                assert template.name == "availability_prompt"
+                buttons = json.loads(template.render())["action"]["buttons"]
+                assert len(buttons) == 3  # 3 opciones de fecha
+                assert any("finde" in btn["reply"]["title"] for btn in buttons)
 
             # 2. Simular selección de "Este finde"
             weekend_payload = {
@@ -271,7 +273,7 @@ async def test_button_flow_availability_to_prereservation(
             }
 
             with patch("app.core.security.verify_whatsapp_signature") as mock_verify, patch(
-                "app.services.whatsapp.send_interactive_list"
+                "app.services.whatsapp.send_interactive_template"
             ) as mock_send_list:
                 mock_verify.return_value = json.dumps(weekend_payload).encode()
                 mock_send_list.return_value = {"success": True}
@@ -283,9 +285,8 @@ async def test_button_flow_availability_to_prereservation(
 
                 # Verificar que se mostró lista de alojamientos
                 if mock_send_list.called:  # Puede no llamarse si no hay alojamientos disponibles
-                    list_call = mock_send_list.call_args
-                    assert "sections" in list_call[1]
-                    assert len(list_call[1]["sections"]) > 0
+                    interactive = json.loads(mock_send_list.call_args[0][1])
+                    assert len(interactive["action"]["sections"]) > 0
 
 
 @pytest.mark.asyncio
@@ -80,6 +80,25 @@ async def test_send_reservation_expired_success(email_service):
         assert "expired@exampl" in call_kwargs["email"]
 
 
+@pytest.mark.asyncio
+async def test_send_reservation_cancelled_success(email_service):
+    """Test envío de email de reserva cancelada por el admin."""
+    with patch("app.services.email.logger") as mock_logger:
+        result = await email_service.send_reservation_cancelled(
+            guest_email="cancelled@example.com",
+            guest_name="Ana Ruiz",
+            reservation_code="RES2501230XYZ",
+            accommodation_name="Cabaña del Río",
+            check_in="2025-04-10",
+            check_out="2025-04-12",
+            reason="caída del canal",
+        )
+
+        assert result is True
+        mock_logger.info.assert_called_once()
+        assert mock_logger.info.call_args[1]["code"] == "RES2501230XYZ"
+
+
 @pytest.mark.asyncio
 async def test_email_metrics_incremented():
     """Test que las métricas se incrementan correctamente."""
@@ -0,0 +1,83 @@
+"""Tests de la búsqueda de reservas por huésped (nombre, email, teléfono)."""
+
+import pytest
+from app.services.guest_search import phone_digits, search_condition
+
+
+@pytest.fixture
+async def guests(accommodation_factory, reservation_factory):
+    acc = await accommodation_factory()
+    return {
+        "ana": await reservation_factory(
+            accommodation=acc,
+            guest_name="Ana Martínez",
+            guest_email="ana@example.com",
+            guest_phone="+54 9 11 5555-0001",
+        ),
+        "mariano": await reservation_factory(
+            accommodation=acc,
+            guest_name="Mariano Pérez",
+            guest_email="mp@example.com",
+            guest_phone="+54 9 351 444-0002",
+        ),
+        "percent": await reservation_factory(
+            accommodation=acc,
+            guest_name="Promo 100% Juan",
+            guest_email="juan@example.com",
+            guest_phone="+54 9 261 333-0003",
+        ),
+    }
+
+
+def test_phone_digits_and_model_sync():
+    from app.models.reservation import Reservation
+
+    assert phone_digits("+54 (9) 11 5555-0001") == "5491155550001"
+    reservation = Reservation(guest_phone="+54 11-4444")
+    assert reservation.guest_phone_digits == "54114444"
+
+
+def test_condition_uses_lower_like_and_digits_column():
+    sql = str(search_condition("Ana 351", fuzzy=True).compile())
+    assert "lower(reservations.guest_name) LIKE" in sql
+    assert "reservations.guest_phone_digits LIKE" in sql
+    assert "lower(reservations.guest_name) %" in sql
+
+
+@pytest.mark.asyncio
+async def test_ranked_search_prefers_closest_name(test_client, admin_headers, guests):
+    r = await test_client.get(
+        "/api/v1/admin/reservations/search", params={"q": "mari"}, headers=admin_headers
+    )
+    assert r.status_code == 200, r.text
+    # "mari" matchea Mariano (nombre) y Ana Martínez no: substring "mart" != "mari"
+    assert [item["code"] for item in r.json()] == [guests["mariano"].code]
+
+    r = await test_client.get(
+        "/api/v1/admin/reservations/search", params={"q": "example.com"}, headers=admin_headers
+    )
+    body = r.json()
+    assert len(body) == 3
+    assert body == sorted(body, key=lambda item: item["score"], reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_phone_search_ignores_formatting(test_client, admin_headers, guests):
+    for q in ("351 444", "3514440002", "(351)-444"):
+        r = await test_client.get(
+            "/api/v1/admin/reservations/search", params={"q": q}, headers=admin_headers
+        )
+        assert [item["code"] for item in r.json()] == [guests["mariano"].code], q
+
+
+@pytest.mark.asyncio
+async def test_listing_search_escapes_like_wildcards(test_client, admin_headers, guests):
+    r = await test_client.get(
+        "/api/v1/admin/reservations", params={"search": "100%"}, headers=admin_headers
+    )
+    assert [item["code"] for item in r.json()] == [guests["percent"].code]
+
+    r = await test_client.get(
+        "/api/v1/admin/reservations", params={"search": "ANA@"}, headers=admin_headers
+    )
+    assert [item["code"] for item in r.json()] == [guests["ana"].code]
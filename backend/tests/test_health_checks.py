@@ -168,7 +168,7 @@ async def test_readyz_no_dependencies(test_client):
     """Readiness check NO debe verificar dependencias externas."""
     # Mock todas las dependencias como fallidas
     with patch("app.routers.health.get_db", side_effect=Exception("DB error")):
-        with patch("app.routers.health.get_redis_pool", side_effect=Exception("Redis error")):
+        with patch("app.routers.health.get_redis_client", side_effect=Exception("Redis error")):
             response = await test_client.get("/api/v1/readyz")
 
             # Debe seguir respondiendo OK
@@ -1,5 +1,6 @@
 """Tests para botones interactivos de WhatsApp."""
 
+import json
 from datetime import date
 from decimal import Decimal
 from unittest.mock import patch
@@ -20,6 +21,10 @@
     format_payment_link_with_buttons,
     format_prereservation_with_buttons,
     format_welcome_with_menu,
+    InteractiveTemplate,
+    get_template,
+    render_accommodations_list,
+    slot,
 )
 
 
@@ -210,6 +215,65 @@ def test_format_payment_link_with_buttons(self):
         assert "pay_now_ABC123" == buttons[0]["id"]
 
 
+class TestCompiledTemplates:
+    """Tests para templates interactivos compilados."""
+
+    def test_static_template_is_serialized_once(self):
+        """Un template sin slots devuelve siempre los mismos bytes."""
+        template = get_template("main_menu")
+        assert template.slots == ()
+        assert template.render() is template.render()
+
+        message, buttons = format_welcome_with_menu()
+        interactive = json.loads(template.render())
+        assert interactive["type"] == "button"
+        assert interactive["body"]["text"] == message
+        assert [b["reply"]["id"] for b in interactive["action"]["buttons"]] == [
+            b["id"] for b in buttons
+        ]
+
+    def test_help_topics_template_matches_builder(self):
+        """El template de ayuda contiene las mismas filas que build_help_topics_list."""
+        interactive = json.loads(get_template("help_topics").render())
+        assert interactive["action"]["sections"] == build_help_topics_list()
+
+    def test_slots_are_json_escaped(self):
+        """Los valores de slots se escapan como strings JSON."""
+        template = InteractiveTemplate(
+            "test_slots", {"type": "button", "body": {"text": slot("body")}}
+        )
+        assert template.slots == ("body",)
+
+        rendered = json.loads(template.render(body='Línea 1\n"comillas"'))
+        assert rendered["body"]["text"] == 'Línea 1\n"comillas"'
+
+    def test_render_message_wraps_envelope(self):
+        """render_message arma el payload completo de la Cloud API."""
+        payload = json.loads(get_template("availability_prompt").render_message("+5491112345678"))
+        assert payload["messaging_product"] == "whatsapp"
+        assert payload["to"] == "+5491112345678"
+        assert payload["type"] == "interactive"
+        assert payload["interactive"]["body"]["text"] == format_availability_prompt_with_dates()[0]
+
+    def test_render_accommodations_list_matches_builder(self):
+        """Las filas pre-serializadas equivalen a build_accommodations_list."""
+        accommodations = [
+            {"id": i, "name": f'Cabaña "{i}"', "base_price": "15000", "capacity": 4}
+            for i in range(12)
+        ]
+        check_in = date(2025, 10, 20)
+        check_out = date(2025, 10, 23)
+
+        interactive = json.loads(render_accommodations_list(accommodations, check_in, check_out))
+
+        assert interactive["type"] == "list"
+        assert interactive["header"]["text"] == "Disponibilidad"
+        assert "20/10 - 23/10" in interactive["body"]["text"]
+        assert interactive["action"]["sections"] == build_accommodations_list(
+            accommodations, check_in, check_out
+        )
+
+
 @pytest.mark.asyncio
 class TestButtonHandlerIntegration:
     """Tests de integración para button handlers (requiere DB)."""
@@ -218,7 +282,7 @@ async def test_button_handler_menu_availability(self, db_session):
         """Debe manejar botón de menú disponibilidad."""
         from app.services.button_handlers import handle_button_callback
 
-        with patch("app.services.button_handlers.whatsapp.send_interactive_buttons") as mock_send:
+        with patch("app.services.button_handlers.whatsapp.send_interactive_template") as mock_send:
             mock_send.return_value = {"success": True}
 
             result = await handle_button_callback(
@@ -229,6 +293,7 @@ async def test_button_handler_menu_availability(self, db_session):
 
             assert result["action"] == "menu_availability_shown"
             assert mock_send.called
+            assert mock_send.call_args[0][1].name == "availability_prompt"
 
     async def test_button_handler_unknown_button(self, db_session):
         """Debe manejar botón desconocido."""
@@ -247,7 +312,7 @@ async def test_button_handler_date_this_weekend(self, db_session):
         """Debe manejar selección de 'este fin de semana'."""
         from app.services.button_handlers import handle_button_callback
 
-        with patch("app.services.button_handlers.whatsapp.send_interactive_list") as mock_send:
+        with patch("app.services.button_handlers.whatsapp.send_interactive_template") as mock_send:
             mock_send.return_value = {"success": True}
 
             result = await handle_button_callback(
@@ -0,0 +1,137 @@
+"""Tests del pipeline de notas de voz del webhook (Graph API mockeada con httpx)."""
+
+import hashlib
+import hmac
+import json
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from app.core.config import get_settings
+from app.services import media_pipeline
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+AUDIO_BYTES = b"OggS fake voice note"
+
+
+def _graph_handler(media_body=AUDIO_BYTES, resolve_status=200, headers=None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"].startswith("Bearer ")
+        if request.url.host == "graph.facebook.com":
+            if resolve_status != 200:
+                return httpx.Response(resolve_status, json={"error": "not found"})
+            return httpx.Response(200, json={"url": "https://cdn.example/media/1"})
+        return httpx.Response(200, content=media_body, headers=headers or {})
+
+    return handler
+
+
+@pytest.fixture
+def pipeline(test_engine):
+    """Pipeline con Graph API mockeada, sesiones sobre el engine de test y sin envíos."""
+    started = []
+
+    def factory(**handler_kwargs):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_graph_handler(**handler_kwargs)))
+        sessions = async_sessionmaker(test_engine, expire_on_commit=False)
+        for p in (
+            patch.object(media_pipeline, "get_media_http_client", return_value=client),
+            patch.object(media_pipeline, "async_session_maker", sessions),
+            patch.object(media_pipeline, "send_text_message", new_callable=AsyncMock),
+        ):
+            p.start()
+            started.append(p)
+
+    yield factory
+    for p in started:
+        p.stop()
+
+
+@pytest.mark.asyncio
+async def test_audio_message_reaches_text_flow(pipeline):
+    pipeline()
+    transcribe = AsyncMock(return_value={"text": "quiero reservar", "confidence": 0.9})
+    flow = AsyncMock(return_value={"auto_action": "needs_slots", "missing": ["check_in"]})
+
+    with patch.object(media_pipeline, "transcribe_audio_bytes", transcribe), patch.object(
+        media_pipeline, "handle_text_message", flow
+    ):
+        result = await media_pipeline.process_audio_message("wamid.1", "5491100000000", "m-1")
+
+    transcribe.assert_awaited_once_with(AUDIO_BYTES)
+    assert flow.await_args.args[1:] == ("5491100000000", "quiero reservar")
+    assert result["status"] == "processed"
+    assert result["auto_action"] == "needs_slots"
+
+
+@pytest.mark.asyncio
+async def test_unclear_audio_asks_for_text(pipeline):
+    pipeline()
+    transcribe = AsyncMock(return_value={"error": "audio_unclear", "confidence": 0.2})
+
+    with patch.object(media_pipeline, "transcribe_audio_bytes", transcribe):
+        result = await media_pipeline.process_audio_message("wamid.2", "5491100000000", "m-2")
+
+    assert result["status"] == "needs_text"
+    media_pipeline.send_text_message.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_declared_size_over_limit_skips_download(pipeline):
+    limit = get_settings().AUDIO_MAX_BYTES
+    pipeline(headers={"content-length": str(limit + 1)})
+    transcribe = AsyncMock()
+
+    with patch.object(media_pipeline, "transcribe_audio_bytes", transcribe):
+        result = await media_pipeline.process_audio_message("wamid.3", "5491100000000", "m-3")
+
+    assert result["status"] == "too_large"
+    transcribe.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_resolve_failure_is_reported(pipeline):
+    pipeline(resolve_status=404)
+
+    result = await media_pipeline.process_audio_message("wamid.4", "5491100000000", "m-4")
+
+    assert result == {"status": "download_error"}
+
+
+@pytest.mark.asyncio
+async def test_webhook_queues_audio_without_blocking(test_client):
+    settings = get_settings()
+    message = {
+        "entry": [
+            {
+                "changes": [
+                    {
+                        "value": {
+                            "messages": [
+                                {
+                                    "id": "wamid.audio",
+                                    "from": "12345",
+                                    "timestamp": "1700000000",
+                                    "type": "audio",
+                                    "audio": {"id": "media-123", "mime_type": "audio/ogg"},
+                                }
+                            ]
+                        }
+                    }
+                ]
+            }
+        ]
+    }
+    raw = json.dumps(message).encode("utf-8")
+    sig = hmac.new(settings.WHATSAPP_APP_SECRET.encode(), raw, hashlib.sha256).hexdigest()
+
+    with patch("app.routers.whatsapp.media_pipeline_enabled", return_value=True), patch(
+        "app.routers.whatsapp.schedule_audio_message"
+    ) as schedule:
+        r = await test_client.post(
+            "/api/v1/webhooks/whatsapp", data=raw, headers={"X-Hub-Signature-256": f"sha256={sig}"}
+        )
+
+    assert r.status_code == 200
+    assert r.json()["auto_action"] == "audio_queued"
+    schedule.assert_called_once_with("wamid.audio", "12345", "media-123")
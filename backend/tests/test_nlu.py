@@ -35,3 +35,159 @@ def test_nlu_extract_guests_and_range():  # type: ignore
     # Debe detectar 2 fechas y 4 huéspedes
     assert len(r.get("dates", [])) >= 2, r
     assert r.get("guests") == 4, r
+
+
+def test_date_grammar_common_forms():  # type: ignore
+    from datetime import date, datetime
+
+    from app.services.date_grammar import resolve_dates
+
+    now = datetime(2026, 10, 19, 10, 0)  # lunes
+    cases = [
+        ("llegamos el 20/10", [date(2026, 10, 20)]),
+        ("del 20 al 22 de octubre", [date(2026, 10, 20), date(2026, 10, 22)]),
+        ("28 de dic al 2 de enero", [date(2026, 12, 28), date(2027, 1, 2)]),
+        ("28/12 al 3/1", [date(2026, 12, 28), date(2027, 1, 3)]),
+        ("para mañana", [date(2026, 10, 20)]),
+        ("pasado mañana", [date(2026, 10, 21)]),
+        ("este finde", [date(2026, 10, 24), date(2026, 10, 25)]),
+        ("el finde largo", [date(2026, 10, 24), date(2026, 10, 26)]),
+        ("1ro de mayo de 2027", [date(2027, 5, 1)]),
+    ]
+    for text, expected in cases:
+        dates, path = resolve_dates(text, now)
+        assert (dates, path) == (expected, "grammar"), text
+
+
+def test_date_grammar_rejects_non_dates():  # type: ignore
+    from datetime import datetime
+
+    from app.services.date_grammar import resolve_dates
+
+    now = datetime(2026, 10, 19, 10, 0)
+    for text in ["por la mañana", "llamame al 11-2345-6789", "31/02", "cerca del mar"]:
+        assert resolve_dates(text, now) == ([], "none"), text
+
+
+def test_benchmark_corpus_never_imports_dateparser():  # type: ignore
+    import subprocess  # nosec B404
+    import sys
+    from pathlib import Path
+
+    backend = Path(__file__).resolve().parent.parent
+    code = (
+        "import sys; sys.path.insert(0, 'scripts'); from nlu_benchmark import load_corpus; "
+        "from app.services import nlu; [nlu.analyze(t) for t in load_corpus()]; "
+        "print('dateparser' in sys.modules)"
+    )
+    out = subprocess.run(  # nosec B603
+        [sys.executable, "-c", code], cwd=backend, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_date_grammar_falls_back_to_dateparser_for_unknown_forms():  # type: ignore
+    from datetime import date, datetime
+
+    from app.services.date_grammar import resolve_dates
+
+    dates, path = resolve_dates("llegamos dic 15", datetime(2026, 10, 19, 10, 0))
+    assert path == "fallback"
+    assert dates == [date(2026, 12, 15)]
+
+
+def test_nlu_multi_intent_and_spans():  # type: ignore
+    from datetime import datetime
+
+    from app.services import nlu
+
+    text = "Hay disponible y cuánto sale del 20 al 22 de octubre? Somos 4"
+    r = nlu.analyze(text, now=datetime(2026, 10, 19, 10, 0))
+
+    assert r["intents"] == ["disponibilidad", "precio"]
+    assert r["dates"] == ["2026-10-20", "2026-10-22"]
+    assert r["guests"] == 4
+    # Los spans apuntan al texto original (con tildes y mayúsculas)
+    by_type = {}
+    for e in r["entities"]:
+        by_type.setdefault(e["type"], []).append(e)
+        assert text[e["start"] : e["end"]] == e["text"]
+    assert [e["text"] for e in by_type["intent"]] == ["Hay", "disponible", "cuánto", "sale"]
+    assert by_type["date"][0]["text"] == "del 20 al 22 de octubre"
+    assert by_type["guests"][0]["text"] == "Somos 4"
+
+
+def test_analyze_many_matches_analyze():  # type: ignore
+    from datetime import datetime
+
+    from app.services import nlu
+
+    now = datetime(2026, 10, 19, 10, 0)
+    texts = ["hay lugar este finde?", "precio?", "hay lugar este finde?"]
+    results = nlu.analyze_many(texts, now=now)
+
+    assert results == [nlu.analyze(t, now=now) for t in texts]
+    # Resultados independientes aunque el texto se repita
+    assert results[0] is not results[2]
+
+
+def test_analyze_cached_shares_results_across_variants():  # type: ignore
+    from datetime import datetime
+    from unittest.mock import patch
+
+    from app.services import nlu
+
+    now = datetime(2026, 10, 19, 10, 0)
+    cache = nlu.AnalysisCache(max_entries=8, ttl_seconds=60)
+    variants = ["¿Hay lugar este FINDE?? Somos 4", "hay   lugar, este finde somos 4"]
+
+    with patch.object(nlu, "analysis_cache", cache):
+        first, second = (nlu.analyze_cached(t, now=now) for t in variants)
+        # Otro día: las fechas relativas cambian, no se reutiliza la entrada
+        tomorrow = nlu.analyze_cached(variants[0], now=datetime(2026, 10, 20, 10, 0))
+
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_ratio == 1 / 3
+    assert first["dates"] == second["dates"] == ["2026-10-24", "2026-10-25"]
+    assert tomorrow["dates"] != []
+    # Spans traducidos a cada mensaje original
+    for text, result in zip(variants, (first, second)):
+        for e in result["entities"]:
+            assert text[e["start"] : e["end"]] == e["text"]
+    assert [e["text"] for e in first["entities"]] == ["Hay", "FINDE", "Somos 4"]
+    assert [e["text"] for e in second["entities"]] == ["hay", "finde", "somos 4"]
+
+
+def test_analyze_cached_weekend_rolls_over_saturday_evening():  # type: ignore
+    from datetime import datetime
+    from unittest.mock import patch
+
+    from app.services import nlu
+
+    cache = nlu.AnalysisCache(max_entries=8, ttl_seconds=60)
+    with patch.object(nlu, "analysis_cache", cache):
+        morning = nlu.analyze_cached("este finde", now=datetime(2026, 10, 24, 10, 0))
+        evening = nlu.analyze_cached("este finde", now=datetime(2026, 10, 24, 20, 0))
+
+    assert morning["dates"] == ["2026-10-24", "2026-10-25"]
+    assert evening["dates"] == ["2026-10-31", "2026-11-01"]
+
+
+def test_analysis_cache_is_bounded_and_expires():  # type: ignore
+    from datetime import date
+    from unittest.mock import patch
+
+    from app.services import nlu
+
+    cache = nlu.AnalysisCache(max_entries=2, ttl_seconds=60)
+    day = date(2026, 10, 19)
+    for text in ("hola", "precio", "wifi"):
+        cache.put((text, day), {"intents": [text]})
+
+    assert len(cache) == 2
+    assert cache.get(("hola", day)) is None  # desalojada (LRU)
+    assert cache.get(("wifi", day)) == {"intents": ["wifi"]}
+
+    with patch.object(nlu.time, "monotonic", return_value=nlu.time.monotonic() + 61):
+        assert cache.get(("wifi", day)) is None
+    assert len(cache) == 1
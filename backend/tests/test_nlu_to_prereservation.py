@@ -28,3 +28,48 @@ async def test_nlu_analyze_pre_reserve_flow(test_client, accommodation_factory):
     assert d["action"] in ("pre_reserved", "error")
     if d["action"] == "pre_reserved":
         assert d["data"].get("code")
+
+
+async def test_nlu_analyze_batch(test_client, accommodation_factory):  # type: ignore
+    acc = await accommodation_factory(active=True)
+    ci = (date.today() + timedelta(days=10)).strftime("%d/%m/%Y")
+    co = (date.today() + timedelta(days=12)).strftime("%d/%m/%Y")
+    items = [
+        {"text": f"Hay libre {ci} al {co} para 3 personas?"},
+        {"text": "Hola"},
+        {"text": "Hola"},
+    ]
+    r = await test_client.post("/api/v1/nlu/analyze:batch", json={"items": items})
+    assert r.status_code == 200
+    d = r.json()
+    assert d["count"] == 3
+    ready, hola, hola_again = d["results"]
+    # Único alojamiento activo: se usa por defecto; no se crean pre-reservas
+    assert ready["action"] == "ready"
+    assert ready["accommodation_id"] == acc.id
+    assert ready["missing"] == []
+    assert hola["action"] == "needs_slots"
+    assert hola == hola_again
+
+
+async def test_nlu_analyze_batch_rejects_oversized(test_client):  # type: ignore
+    items = [{"text": "hola"}] * 501
+    r = await test_client.post("/api/v1/nlu/analyze:batch", json={"items": items})
+    assert r.status_code == 422
+
+
+async def test_nlu_analyze_batch_resolves_accommodation_by_name(
+    test_client, accommodation_factory
+):  # type: ignore
+    lago = await accommodation_factory(name="Cabaña del Lago")
+    await accommodation_factory(name="Cabaña El Bosque")
+    items = [
+        {"text": "La cabaña del lago del 10/12 al 12/12 para 2 personas"},
+        {"text": "Una cabaña del 10/12 al 12/12 para 2 personas"},
+    ]
+    r = await test_client.post("/api/v1/nlu/analyze:batch", json={"items": items})
+    assert r.status_code == 200
+    named, unnamed = r.json()["results"]
+    assert named["action"] == "ready"
+    assert named["accommodation_id"] == lago.id
+    assert unnamed["missing"] == ["accommodation_id"]
@@ -0,0 +1,109 @@
+"""Tests del hub de notificaciones WebSocket (colas por cliente + Redis pub/sub)."""
+
+import asyncio
+
+import pytest
+from app.core.config import get_settings
+from app.services.notification_hub import SLOW_CLIENT_CLOSE_CODE, NotificationHub
+
+
+class FakeSocket:
+    def __init__(self, stalled: bool = False) -> None:
+        self.sent = []
+        self.closed_with = None
+        self._release = asyncio.Event()
+        if not stalled:
+            self._release.set()
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_json(self, message) -> None:
+        await self._release.wait()
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.closed_with = code
+
+
+@pytest.fixture
+def ws_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "WS_CLIENT_QUEUE_SIZE", 2)
+    monkeypatch.setattr(settings, "WS_SEND_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "WS_SLOW_CLIENT_POLICY", "drop_oldest")
+    return settings
+
+
+async def _drain() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_stall_others(ws_settings):
+    hub = NotificationHub()
+    fast_socket, slow_socket = FakeSocket(), FakeSocket(stalled=True)
+    fast = await hub.connect(fast_socket)
+    slow = await hub.connect(slow_socket)
+
+    for i in range(5):
+        hub.fan_out({"n": i})
+        await _drain()
+
+    assert [m["n"] for m in fast_socket.sent] == [0, 1, 2, 3, 4]
+    # El lento tiene 1 envío en curso + cola de 2: se descartaron los más viejos
+    assert slow.dropped == 2
+    assert [m["n"] for m in slow.queue._queue] == [3, 4]
+
+    # El envío trabado supera el timeout: se desconecta y sale del hub
+    await asyncio.sleep(0.3)
+    await _drain()
+    assert slow.closed and slow_socket.closed_with == SLOW_CLIENT_CLOSE_CODE
+    assert hub.clients == {fast}
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_on_full_queue(ws_settings, monkeypatch):
+    monkeypatch.setattr(ws_settings, "WS_SLOW_CLIENT_POLICY", "disconnect")
+    hub = NotificationHub()
+    socket = FakeSocket(stalled=True)
+    client = await hub.connect(socket)
+
+    results = []
+    for i in range(4):
+        results.append(client.offer({"n": i}))
+        await _drain()
+
+    assert results == [True, True, True, False]
+    assert client.closed and socket.closed_with == SLOW_CLIENT_CLOSE_CODE
+    assert not hub.clients
+
+
+@pytest.mark.asyncio
+async def test_events_reach_clients_on_other_workers(ws_settings):
+    fakeredis = pytest.importorskip("fakeredis")
+    from fakeredis import aioredis
+
+    server = fakeredis.FakeServer()
+    worker_a, worker_b = NotificationHub(), NotificationHub()
+    await worker_a.start(aioredis.FakeRedis(server=server, decode_responses=True))
+    await worker_b.start(aioredis.FakeRedis(server=server, decode_responses=True))
+    await asyncio.wait_for(worker_a._subscribed.wait(), 1)
+    await asyncio.wait_for(worker_b._subscribed.wait(), 1)
+
+    socket_a, socket_b = FakeSocket(), FakeSocket()
+    await worker_a.connect(socket_a)
+    await worker_b.connect(socket_b)
+
+    await worker_a.publish({"type": "reservation_confirmed", "data": {"id": 1}})
+    for _ in range(50):
+        if socket_a.sent and socket_b.sent:
+            break
+        await asyncio.sleep(0.02)
+
+    # Una sola copia por cliente: el publicador no reparte además en local
+    assert socket_a.sent == socket_b.sent == [{"type": "reservation_confirmed", "data": {"id": 1}}]
+    await worker_a.stop()
+    await worker_b.stop()
@@ -0,0 +1,152 @@
+"""Tests de la tabla de ocupación diaria y los endpoints de calendario/ocupación."""
+
+from datetime import date
+
+import pytest
+from app.models import OccupancyNight
+from app.services.occupancy import rebuild_occupancy, sync_reservation_nights
+from app.services.reservations import ReservationService
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+async def _nights(db_session, reservation_id):
+    result = await db_session.execute(
+        select(OccupancyNight.night, OccupancyNight.status)
+        .where(OccupancyNight.reservation_id == reservation_id)
+        .order_by(OccupancyNight.night)
+    )
+    return result.all()
+
+
+@pytest.fixture
+async def app_session(test_engine):
+    """Sesión configurada como ``async_session_maker`` de la app (autoflush=False)."""
+    maker = async_sessionmaker(
+        test_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+    )
+    async with maker() as session:
+        yield session
+
+
+@pytest.fixture
+async def synced_reservation(db_session, reservation_factory):
+    async def _create(**overrides):
+        reservation = await reservation_factory(**overrides)
+        await sync_reservation_nights(db_session, [reservation.id])
+        await db_session.commit()
+        return reservation
+
+    return _create
+
+
+@pytest.mark.asyncio
+async def test_transitions_keep_nights_in_sync(app_session, synced_reservation):
+    reservation = await synced_reservation(
+        check_in=date(2026, 3, 30), check_out=date(2026, 4, 2), nights=3
+    )
+    # check_out no es noche ocupada
+    assert await _nights(app_session, reservation.id) == [
+        (date(2026, 3, 30), "pre_reserved"),
+        (date(2026, 3, 31), "pre_reserved"),
+        (date(2026, 4, 1), "pre_reserved"),
+    ]
+
+    service = ReservationService(app_session)
+    assert (await service.confirm_reservation(reservation.code))["status"] == "confirmed"
+    assert {s for _, s in await _nights(app_session, reservation.id)} == {"confirmed"}
+
+    assert "error" not in await service.cancel_reservation(reservation.code, "test")
+    assert await _nights(app_session, reservation.id) == []
+
+    assert await rebuild_occupancy(app_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_attribute_transition_syncs_without_autoflush(app_session, synced_reservation):
+    """Cambio de estado por atributo ORM (admin, MercadoPago) con la sesión de la app."""
+    from app.models import Reservation
+
+    created = await synced_reservation(
+        check_in=date(2026, 5, 1), check_out=date(2026, 5, 3), nights=2
+    )
+    reservation = await app_session.get(Reservation, created.id)
+    reservation.reservation_status = "cancelled"
+    await sync_reservation_nights(app_session, [reservation.id])
+    await app_session.commit()
+
+    assert await _nights(app_session, reservation.id) == []
+
+
+@pytest.mark.asyncio
+async def test_calendar_includes_spanning_reservations(
+    test_client, admin_headers, accommodation_factory, synced_reservation
+):
+    acc = await accommodation_factory()
+    whole_month = await synced_reservation(
+        accommodation=acc,
+        check_in=date(2026, 1, 28),
+        check_out=date(2026, 3, 2),
+        nights=33,
+        reservation_status="confirmed",
+    )
+    # Sale el 1/2: ninguna noche de febrero
+    await synced_reservation(check_in=date(2026, 1, 25), check_out=date(2026, 2, 1), nights=7)
+
+    r = await test_client.get(
+        "/api/v1/admin/calendar/availability",
+        params={"month": 2, "year": 2026, "accommodation_id": acc.id},
+        headers=admin_headers,
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert [e["code"] for e in body["events"]] == [whole_month.code]
+    assert body["occupancy_rate"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_occupancy_accounts_for_accommodation_count(
+    test_client, admin_headers, accommodation_factory, synced_reservation
+):
+    first, second = await accommodation_factory(), await accommodation_factory()
+    await synced_reservation(
+        accommodation=first,
+        check_in=date(2026, 5, 1),
+        check_out=date(2026, 5, 3),
+        nights=2,
+        reservation_status="confirmed",
+    )
+    await synced_reservation(
+        accommodation=second, check_in=date(2026, 5, 2), check_out=date(2026, 5, 4)
+    )
+
+    r = await test_client.get(
+        "/api/v1/admin/occupancy",
+        params={"from_date": "2026-05-01", "to_date": "2026-05-04"},
+        headers=admin_headers,
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["accommodations"] == 2
+    assert body["nights_available"] == 8
+    assert body["nights_confirmed"] == 2
+    assert body["nights_pre_reserved"] == 2
+    assert body["occupancy_rate"] == 25.0
+    assert [d["occupancy_rate"] for d in body["days"]] == [50.0, 50.0, 0.0, 0.0]
+
+    r = await test_client.get(
+        "/api/v1/admin/calendar/nights",
+        params={"from_date": "2026-05-02", "to_date": "2026-05-02"},
+        headers=admin_headers,
+    )
+    assert [(n["accommodation_id"], n["status"]) for n in r.json()["nights"]] == [
+        (first.id, "confirmed"),
+        (second.id, "pre_reserved"),
+    ]
+
+    r = await test_client.get(
+        "/api/v1/admin/occupancy",
+        params={"from_date": "2026-05-04", "to_date": "2026-05-01"},
+        headers=admin_headers,
+    )
+    assert r.status_code == 400
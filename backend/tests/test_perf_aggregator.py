@@ -0,0 +1,118 @@
+"""Tests del agregador de latencias HTTP (sketch, merge entre workers, /admin/perf)."""
+
+import random
+from unittest.mock import patch
+
+import pytest
+from app.core.redis import RedisClient
+from app.services.perf_aggregator import LatencySketch, PerfAggregator, route_group
+
+
+def test_route_group_is_bounded():
+    assert route_group("/api/v1/admin/reservations/RES1") == "admin"
+    assert route_group("/api/v1/reservations/pre-reserve") == "reservations"
+    assert route_group("/api/v1/healthz") == "healthz"
+    assert route_group("/api/v1/unknown/123") == "other"
+    assert route_group("/metrics") == "other"
+
+
+def test_sketch_quantiles_within_relative_error():
+    rng = random.Random(42)
+    values = sorted(rng.lognormvariate(4, 1) for _ in range(5000))
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+
+
+def test_sketch_merge_equals_single_sketch():
+    a, b, both = LatencySketch(), LatencySketch(), LatencySketch()
+    for i in range(1, 200):
+        (a if i % 2 else b).add(i, error=i % 50 == 0)
+        both.add(i, error=i % 50 == 0)
+
+    a.merge(b)
+
+    assert a.summary() == both.summary()
+    assert a.errors == 3
+
+
+@pytest.mark.asyncio
+async def test_workers_merge_through_redis(redis_client):
+    worker_a, worker_b = PerfAggregator(), PerfAggregator()
+    for _ in range(90):
+        worker_a.record("/api/v1/admin/dashboard/stats", 20.0, 200)
+    for _ in range(10):
+        worker_b.record("/api/v1/admin/dashboard/stats", 400.0, 500)
+    worker_b.record("/api/v1/reservations/pre-reserve", 80.0, 201)
+
+    assert await worker_a.flush(redis_client) > 0
+    assert await worker_b.flush(redis_client) > 0
+    assert await worker_a.flush(redis_client) == 0  # nada pendiente
+
+    summary = await worker_a.summary(RedisClient(redis_client))
+
+    assert summary["source"] == "redis"
+    admin = summary["groups"]["admin"]
+    assert admin["requests"] == 100
+    assert admin["error_rate"] == 10.0
+    assert admin["p50_latency_ms"] == pytest.approx(20.0, rel=0.01)
+    assert admin["p99_latency_ms"] == pytest.approx(400.0, rel=0.01)
+    assert summary["groups"]["reservations"]["requests"] == 1
+    assert summary["overall"]["requests"] == 101
+
+
+@pytest.mark.asyncio
+async def test_summary_falls_back_to_local_when_redis_fails():
+    worker = PerfAggregator()
+    worker.record("/api/v1/admin/perf", 15.0, 200)
+
+    with patch("app.services.perf_aggregator.get_redis_client", side_effect=RuntimeError("down")):
+        summary = await worker.summary()
+        assert await worker.flush() == 0
+
+    assert summary["source"] == "local"
+    assert summary["overall"]["requests"] == 1
+    # Lo no enviado queda pendiente para el próximo flush
+    assert worker._pending
+
+
+@pytest.mark.asyncio
+async def test_perf_endpoint_reports_recorded_requests(test_client, admin_headers):
+    from app.services.perf_aggregator import perf_aggregator
+
+    for _ in range(3):
+        await test_client.get("/api/v1/healthz")
+    await perf_aggregator.flush()
+
+    resp = await test_client.get("/api/v1/admin/perf", headers=admin_headers)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["source"] == "redis"
+    assert body["groups"]["healthz"]["requests"] == 3
+    assert body["overall"]["p95_latency_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_unhandled_exceptions_are_recorded_as_errors(test_client):
+    from app.main import app
+    from app.services.perf_aggregator import perf_aggregator
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_api_route("/api/v1/webhooks/perf-boom", boom)
+    try:
+        with pytest.raises(RuntimeError):
+            await test_client.get("/api/v1/webhooks/perf-boom")
+    finally:
+        app.router.routes.pop()
+    await perf_aggregator.flush()
+
+    webhooks = (await perf_aggregator.summary())["groups"]["webhooks"]
+    assert webhooks["requests"] == 1
+    assert webhooks["error_rate"] == 100.0
@@ -132,13 +132,13 @@ async def test_rate_limit_fail_open_on_redis_error(test_client: AsyncClient, mon
     Validar que si Redis falla, el rate limit hace fail-open (no bloquea).
     """
 
-    # Mockear get_redis_pool para que falle
-    async def mock_failing_redis():
+    # Mockear get_redis_client para que falle
+    def mock_failing_redis():
         raise ConnectionError("Redis connection failed")
 
     from app import main
 
-    monkeypatch.setattr(main, "get_redis_pool", mock_failing_redis)
+    monkeypatch.setattr(main, "get_redis_client", mock_failing_redis)
 
     # Request debe pasar aunque Redis falle
     response = await test_client.get("/api/v1/test-path")
@@ -0,0 +1,89 @@
+"""Tests del cliente Redis compartido (fachada, scripts EVALSHA e instrumentación)."""
+
+from unittest.mock import patch
+
+import pytest
+from app.core.redis import (
+    SCRIPT_SHAS,
+    RedisClient,
+    acquire_lock,
+    extend_lock,
+    release_lock,
+)
+
+pytest.importorskip("lupa")  # fakeredis necesita lupa para ejecutar Lua
+
+
+@pytest.fixture
+def client(redis_client):
+    calls = []
+    facade = RedisClient(redis_client, hooks=[lambda op, dur, err: calls.append((op, err))])
+    facade.calls = calls
+    return facade
+
+
+@pytest.mark.asyncio
+async def test_commands_are_delegated_and_instrumented(client):
+    await client.set("k", "v")
+    assert await client.get("k") == "v"
+    assert client.calls == [("set", False), ("get", False)]
+
+
+@pytest.mark.asyncio
+async def test_hook_reports_errors(client, redis_client):
+    with patch.object(redis_client, "get", side_effect=ConnectionError("down")):
+        with pytest.raises(ConnectionError):
+            await client.get("k")
+    assert client.calls == [("get", True)]
+
+
+@pytest.mark.asyncio
+async def test_sync_methods_pass_through_and_wrappers_are_cached(client):
+    pubsub = client.pubsub()
+    assert not hasattr(pubsub, "__await__")
+    await pubsub.aclose()
+    assert client.get is client.get
+    assert client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_execute_pipeline_is_one_operation(client):
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.incr("counter")
+        pipe.expire("counter", 60, nx=True)
+        count, _ = await client.execute_pipeline(pipe)
+
+    assert count == 1
+    assert client.calls == [("pipeline", False)]
+
+
+@pytest.mark.asyncio
+async def test_load_scripts_matches_precomputed_shas(client, redis_client):
+    await client.load_scripts()
+    assert await redis_client.script_exists(*SCRIPT_SHAS.values()) == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_release_lock_falls_back_to_eval_on_noscript(client, redis_client):
+    await redis_client.script_flush()
+    await acquire_lock(client, "lock:test", "owner", ttl=60)
+
+    assert await release_lock(client, "lock:test", "other") is False
+    # EVAL deja el script cacheado: la siguiente llamada va por EVALSHA
+    assert await redis_client.script_exists(SCRIPT_SHAS["release_lock"]) == [True]
+    assert await release_lock(client, "lock:test", "owner") is True
+    assert await redis_client.get("lock:test") is None
+
+    ops = [op for op, _ in client.calls]
+    assert ops.count("eval") == 1
+    assert ops.count("evalsha") == 2
+
+
+@pytest.mark.asyncio
+async def test_extend_lock_only_for_owner(client, redis_client):
+    await client.load_scripts()
+    await acquire_lock(client, "lock:test", "owner", ttl=10)
+
+    assert await extend_lock(client, "lock:test", "other", ttl=300) is False
+    assert await extend_lock(client, "lock:test", "owner", ttl=300) is True
+    assert 10 < await redis_client.ttl("lock:test") <= 300
@@ -0,0 +1,386 @@
+"""Tests del pool de transcripción (executor de threads + modelo fake)."""
+
+import asyncio
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from app.core.redis import RedisClient
+from app.services import audio, transcription
+from app.services.transcription import (
+    AudioDecodeError,
+    TranscriptionPool,
+    TranscriptionQueueFull,
+    TranscriptionTimeout,
+)
+from fastapi import UploadFile
+
+
+class FakeModel:
+    """Modelo fake: el 'audio' decodificado es el texto original."""
+
+    def __init__(self, release: threading.Event = None):
+        self.release = release
+
+    def transcribe(self, audio, language=None):
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        return {"text": f" {audio} ", "segments": [{"avg_logprob": -0.1}]}
+
+
+@pytest.fixture
+def fake_model():
+    model = FakeModel()
+    with patch.object(transcription, "_worker_model", model), patch.object(
+        transcription, "decode_audio", side_effect=lambda raw: raw.decode()
+    ):
+        yield model
+
+
+@pytest.fixture(autouse=True)
+def audio_redis(redis_client):
+    with patch.object(audio, "get_redis_client", return_value=RedisClient(redis_client)):
+        yield redis_client
+
+
+def _pool(max_depth=4, timeout=5.0):
+    return TranscriptionPool(
+        model_name="fake",
+        workers=2,
+        max_depth=max_depth,
+        timeout_seconds=timeout,
+        executor=ThreadPoolExecutor(max_workers=2),
+    )
+
+
+@pytest.mark.asyncio
+async def test_transcribe_runs_in_executor(fake_model):
+    pool = _pool()
+    try:
+        result = await pool.transcribe(b"hola quiero reservar")
+    finally:
+        pool.shutdown()
+
+    assert result["text"] == "hola quiero reservar"
+    assert result["avg_logprobs"] == [-0.1]
+    assert result["queue_wait_seconds"] >= 0
+    assert result["inference_seconds"] >= 0
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive(fake_model):
+    release = threading.Event()
+    fake_model.release = release
+    pool = _pool()
+    try:
+        job = asyncio.create_task(pool.transcribe(b"nota larga"))
+        await asyncio.sleep(0.05)
+        # El loop sigue atendiendo otras corrutinas mientras el worker transcribe
+        assert not job.done()
+        release.set()
+        assert (await job)["text"] == "nota larga"
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full(fake_model):
+    release = threading.Event()
+    fake_model.release = release
+    pool = _pool(max_depth=1)
+    try:
+        job = asyncio.create_task(pool.transcribe(b"uno"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(TranscriptionQueueFull):
+            await pool.transcribe(b"dos")
+        release.set()
+        await job
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises(fake_model):
+    release = threading.Event()
+    fake_model.release = release
+    pool = _pool(timeout=0.05)
+    try:
+        with pytest.raises(TranscriptionTimeout):
+            await pool.transcribe(b"lenta")
+        # El worker sigue ocupado con el trabajo abandonado
+        assert pool.pending == 1
+        release.set()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.pending == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_job_still_counts_toward_depth(fake_model):
+    release = threading.Event()
+    fake_model.release = release
+    pool = _pool(max_depth=1, timeout=0.05)
+    try:
+        with pytest.raises(TranscriptionTimeout):
+            await pool.transcribe(b"lenta")
+        with pytest.raises(TranscriptionQueueFull):
+            await pool.transcribe(b"otra")
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_decode_error_propagates(fake_model):
+    with patch.object(transcription, "decode_audio", side_effect=AudioDecodeError("bad ogg")):
+        pool = _pool()
+        upload = UploadFile(file=io.BytesIO(b"no es audio"), filename="nota.ogg")
+        try:
+            with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+                audio, "get_transcription_pool", return_value=pool
+            ):
+                result = await audio.transcribe_audio(upload)
+        finally:
+            pool.shutdown()
+
+    assert result == {"error": "invalid_audio"}
+
+
+def test_decode_audio_pipes_bytes_through_ffmpeg():
+    np = pytest.importorskip("numpy")
+    pcm = np.array([0, 16384, -32768], dtype=np.int16).tobytes()
+
+    with patch.object(transcription.subprocess, "run") as run:
+        run.return_value.stdout = pcm
+        samples = transcription.decode_audio(b"OggS...")
+
+    cmd = run.call_args[0][0]
+    assert cmd[0] == "ffmpeg" and "pipe:0" in cmd and cmd[-1] == "pipe:1"
+    assert run.call_args[1]["input"] == b"OggS..."
+    assert samples.dtype == np.float32
+    assert samples.tolist() == [0.0, 0.5, -1.0]
+
+
+def test_decode_audio_without_ffmpeg():
+    pytest.importorskip("numpy")
+    with patch.object(transcription.subprocess, "run", side_effect=FileNotFoundError):
+        with pytest.raises(AudioDecodeError):
+            transcription.decode_audio(b"OggS")
+
+
+@pytest.mark.asyncio
+async def test_read_upload_capped_rejects_large_files():
+    upload = UploadFile(file=io.BytesIO(b"x" * 1000), filename="nota.ogg")
+    with pytest.raises(audio.AudioTooLarge):
+        await audio.read_upload_capped(upload, max_bytes=999, chunk_size=100)
+
+    upload = UploadFile(file=io.BytesIO(b"x" * 1000), filename="nota.ogg")
+    assert await audio.read_upload_capped(upload, max_bytes=1000, chunk_size=128) == b"x" * 1000
+
+
+@pytest.mark.asyncio
+async def test_transcribe_audio_uses_pool(fake_model):
+    pool = _pool()
+    upload = UploadFile(file=io.BytesIO(b"dos personas"), filename="nota.ogg")
+    try:
+        with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+            audio, "get_transcription_pool", return_value=pool
+        ):
+            result = await audio.transcribe_audio(upload)
+    finally:
+        pool.shutdown()
+
+    assert result["text"] == "dos personas"
+    assert result["confidence"] == pytest.approx(0.905, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_transcribe_audio_reports_busy(fake_model):
+    upload = UploadFile(file=io.BytesIO(b"audio"), filename="nota.ogg")
+    pool = _pool(max_depth=0)
+    try:
+        with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+            audio, "get_transcription_pool", return_value=pool
+        ):
+            result = await audio.transcribe_audio(upload)
+    finally:
+        pool.shutdown()
+
+    assert result == {"error": "audio_busy"}
+
+
+@pytest.mark.asyncio
+async def test_transcription_cache_skips_inference_on_repeat(fake_model, audio_redis):
+    pool = _pool()
+    try:
+        with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+            audio, "get_transcription_pool", return_value=pool
+        ), patch.object(pool, "transcribe", wraps=pool.transcribe) as transcribe:
+            first = await audio.transcribe_audio(
+                UploadFile(file=io.BytesIO(b"para el finde"), filename="a.ogg")
+            )
+            second = await audio.transcribe_audio(
+                UploadFile(file=io.BytesIO(b"para el finde"), filename="reenviado.ogg")
+            )
+    finally:
+        pool.shutdown()
+
+    assert transcribe.call_count == 1
+    assert second["text"] == first["text"] == "para el finde"
+    assert second["confidence"] == first["confidence"]
+    key = audio.transcription_cache_key(b"para el finde", audio.settings.AUDIO_MODEL)
+    assert 0 < await audio_redis.ttl(key) <= audio.settings.AUDIO_TRANSCRIPTION_CACHE_TTL_SECONDS
+
+
+def test_transcription_cache_key_depends_on_model():
+    assert audio.transcription_cache_key(b"x", "base") != audio.transcription_cache_key(
+        b"x", "small"
+    )
+    assert audio.transcription_cache_key(b"x", "base") == audio.transcription_cache_key(
+        b"x", "base"
+    )
+
+
+@pytest.mark.asyncio
+async def test_transcription_cache_fails_open(fake_model, audio_redis):
+    pool = _pool()
+    upload = UploadFile(file=io.BytesIO(b"sin redis"), filename="nota.ogg")
+    try:
+        with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+            audio, "get_transcription_pool", return_value=pool
+        ), patch.object(audio_redis, "get", side_effect=ConnectionError("down")), patch.object(
+            audio_redis, "set", side_effect=ConnectionError("down")
+        ):
+            result = await audio.transcribe_audio(upload)
+    finally:
+        pool.shutdown()
+
+    assert result["text"] == "sin redis"
+
+
+def _fake_split(raw, submitted_at):
+    """Segmentación fake: cada palabra separada por '|' es un segmento de 10 s."""
+    return {
+        "segments": [
+            {"pcm": part.encode(), "start_seconds": i * 10.0, "end_seconds": (i + 1) * 10.0}
+            for i, part in enumerate(raw.decode().split("|"))
+        ],
+        "queue_wait_seconds": 0.0,
+        "decode_seconds": 0.0,
+    }
+
+
+@pytest.fixture
+def segmented_model(fake_model):
+    with patch.object(transcription, "_run_split", _fake_split), patch.object(
+        transcription, "decode_pcm", side_effect=lambda pcm: pcm.decode()
+    ):
+        yield fake_model
+
+
+@pytest.mark.asyncio
+async def test_transcribe_segments_yields_in_order(segmented_model):
+    pool = _pool(max_depth=2)
+    try:
+        # 3 segmentos con max_depth=2: la nota ya fue admitida, los segmentos no se rechazan
+        segments = [s async for s in pool.transcribe_segments(b"hola|quiero reservar|el finde")]
+    finally:
+        pool.shutdown()
+
+    assert [s["text"] for s in segments] == ["hola", "quiero reservar", "el finde"]
+    assert [s["index"] for s in segments] == [0, 1, 2]
+    assert segments[2]["start_seconds"] == 20.0 and segments[0]["total"] == 3
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_transcribe_audio_stream_emits_partials_and_final(segmented_model, audio_redis):
+    pool = _pool()
+    try:
+        with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+            audio, "get_transcription_pool", return_value=pool
+        ):
+            events = [e async for e in audio.transcribe_audio_stream(b"reservar|dos noches")]
+            cached = [e async for e in audio.transcribe_audio_stream(b"reservar|dos noches")]
+    finally:
+        pool.shutdown()
+
+    assert [e["type"] for e in events] == ["partial", "partial", "final"]
+    assert events[0]["text"] == "reservar"
+    assert events[1]["text"] == "reservar dos noches"
+    assert events[-1]["text"] == "reservar dos noches"
+    # Segunda vez: hit de cache, solo el evento final
+    assert [e["type"] for e in cached] == ["final"]
+
+
+@pytest.mark.asyncio
+async def test_transcribe_audio_stream_reports_errors(segmented_model):
+    pool = _pool()
+    try:
+        with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+            audio, "get_transcription_pool", return_value=pool
+        ), patch.object(transcription, "_run_split", side_effect=AudioDecodeError("bad")):
+            events = [e async for e in audio.transcribe_audio_stream(b"no es audio")]
+    finally:
+        pool.shutdown()
+
+    assert events == [{"type": "error", "error": "invalid_audio"}]
+
+
+def test_split_on_silence_cuts_at_pauses():
+    np = pytest.importorskip("numpy")
+    sr = 1000
+    tone = lambda seconds: np.full(int(seconds * sr), 0.5, dtype=np.float32)  # noqa: E731
+    pause = lambda seconds: np.zeros(int(seconds * sr), dtype=np.float32)  # noqa: E731
+    samples = np.concatenate([tone(12), pause(1), tone(15), pause(1), tone(20)])
+
+    spans = transcription.split_on_silence(samples, sample_rate=sr)
+
+    assert spans[0][0] == 0 and spans[-1][1] == len(samples)
+    assert all(b[0] == a[1] for a, b in zip(spans, spans[1:]))
+    # Cortes dentro de las pausas (12-13 s y 28-29 s)
+    assert 12 * sr <= spans[0][1] <= 13 * sr
+    assert 28 * sr <= spans[1][1] <= 29 * sr
+
+
+def test_split_on_silence_forces_cut_without_pauses():
+    np = pytest.importorskip("numpy")
+    samples = np.full(70 * 100, 0.5, dtype=np.float32)
+
+    spans = transcription.split_on_silence(samples, sample_rate=100)
+
+    assert spans == [(0, 3000), (3000, 6000), (6000, 7000)]
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_returns_ndjson_with_nlu(segmented_model, test_client):
+    pool = _pool()
+    try:
+        with patch.object(audio, "WHISPER_AVAILABLE", True), patch.object(
+            audio, "get_transcription_pool", return_value=pool
+        ):
+            resp = await test_client.post(
+                "/api/v1/audio/transcribe/stream",
+                files={"file": ("nota.ogg", b"quiero reservar|para 2 personas", "audio/ogg")},
+            )
+    finally:
+        pool.shutdown()
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    assert [e["type"] for e in events] == ["partial", "partial", "final"]
+    # La intención ya está disponible con el primer segmento
+    assert events[0]["nlu"]["intents"] == ["reservar"]
+    assert events[-1]["nlu"]["guests"] == 2
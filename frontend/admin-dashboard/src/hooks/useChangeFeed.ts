@@ -0,0 +1,142 @@
+import { useEffect } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { changesService, type ChangeEvent } from '../services/changesService';
+import type { ReservationFilters, ReservationListing } from '../services/reservationsService';
+import type { Reservation } from '../types';
+
+/**
+ * Indica si una reserva cumple los filtros de un listado (mismo criterio que el backend)
+ */
+const matchesFilters = (row: Reservation, filters: ReservationFilters = {}): boolean => {
+  if (filters.status && row.reservation_status !== filters.status) return false;
+  if (filters.statuses?.length && !filters.statuses.includes(row.reservation_status)) {
+    return false;
+  }
+  if (filters.accommodation_id && row.accommodation_id !== filters.accommodation_id) {
+    return false;
+  }
+  if (filters.from_date && row.check_in < filters.from_date) return false;
+  if (filters.to_date && row.check_out > filters.to_date) return false;
+  return true;
+};
+
+/**
+ * Aplica una reserva cambiada sobre una lista cacheada (completa para sus filtros)
+ *
+ * Actualiza la fila si está; la agrega al principio (orden por creación desc.) si
+ * ahora cumple los filtros y la quita si dejó de cumplirlos. No hace falta refetch.
+ */
+const applyReservationChange = (
+  rows: Reservation[],
+  change: ChangeEvent,
+  filters: ReservationFilters | undefined
+): Reservation[] => {
+  const index = rows.findIndex((row) => row.id === change.id);
+  if (change.op === 'delete' || !change.data) {
+    return index === -1 ? rows : rows.filter((row) => row.id !== change.id);
+  }
+  const data = change.data;
+  const updated = {
+    ...(index === -1 ? {} : rows[index]),
+    ...data,
+    reservation_status:
+      (data.status as Reservation['reservation_status']) ?? rows[index]?.reservation_status,
+  } as Reservation;
+  if (!matchesFilters(updated, filters)) {
+    return index === -1 ? rows : rows.filter((row) => row.id !== change.id);
+  }
+  if (index === -1) return [updated, ...rows];
+  return rows.map((row, i) => (i === index ? updated : row));
+};
+
+/**
+ * Hook que mantiene reservas y estadísticas al día con el feed de cambios (SSE)
+ *
+ * Reemplaza el refetch completo por deltas: solo se actualizan las filas que
+ * cambiaron; ante un `reset` (cambios ya no retenidos) se recarga todo.
+ *
+ * El stream arranca desde el `changeSeq` de los listados cargados (el menor), así
+ * no se pierde lo commiteado entre el fetch y la apertura del stream.
+ *
+ * @param enabled - Si el stream debe abrirse (default: true)
+ */
+export const useChangeFeed = (enabled = true) => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!enabled) return;
+    let source: EventSource | undefined;
+    let closed = false;
+
+    // Menor changeSeq entre los listados de reservas cargados (undefined si ninguno)
+    const listingSeq = (): number | undefined => {
+      const seqs = queryClient
+        .getQueriesData<ReservationListing>({ queryKey: ['reservations'] })
+        .map(([, listing]) => listing?.changeSeq)
+        .filter((seq): seq is number => seq !== undefined);
+      return seqs.length ? Math.min(...seqs) : undefined;
+    };
+
+    const whenListingLoaded = () =>
+      new Promise<number>((resolve) => {
+        const check = () => {
+          if (closed) {
+            unsubscribe();
+            return;
+          }
+          const seq = listingSeq();
+          if (seq === undefined) return;
+          unsubscribe();
+          resolve(seq);
+        };
+        const unsubscribe = queryClient.getQueryCache().subscribe(check);
+        check();
+      });
+
+    const onChange = (event: MessageEvent) => {
+      const change = JSON.parse(event.data) as ChangeEvent;
+      if (change.entity === 'reservation') {
+        // Cada listado cacheado se actualiza según sus propios filtros (queryKey[1])
+        queryClient
+          .getQueriesData<ReservationListing>({ queryKey: ['reservations'] })
+          .forEach(([queryKey, listing]) => {
+            if (!listing) return;
+            const filters = queryKey[1] as ReservationFilters | undefined;
+            queryClient.setQueryData<ReservationListing>(queryKey, {
+              ...listing,
+              reservations: applyReservationChange(listing.reservations, change, filters),
+            });
+          });
+      }
+      if (!queryClient.isFetching({ queryKey: ['dashboard-stats'] })) {
+        queryClient.invalidateQueries({ queryKey: ['dashboard-stats'] });
+      }
+    };
+
+    const onReset = async () => {
+      source?.close();
+      source = undefined;
+      queryClient.invalidateQueries({
+        predicate: (query) => query.queryKey[0] !== 'reservations',
+      });
+      // Descartar los listados viejos: el stream sigue desde el seq de los recargados
+      await queryClient.resetQueries({ queryKey: ['reservations'] });
+      subscribe();
+    };
+
+    const subscribe = async () => {
+      const since = await whenListingLoaded();
+      if (closed) return;
+      source = changesService.openStream(since);
+      source.addEventListener('change', onChange as EventListener);
+      source.addEventListener('reset', onReset);
+    };
+
+    subscribe();
+
+    return () => {
+      closed = true;
+      source?.close();
+    };
+  }, [enabled, queryClient]);
+};
@@ -1,20 +1,26 @@
 import { useQuery } from '@tanstack/react-query';
-import { reservationsService, type ReservationFilters } from '../services/reservationsService';
+import {
+  reservationsService,
+  type ReservationFilters,
+  type ReservationListing,
+} from '../services/reservationsService';
 import type { Reservation } from '../types';
 
 /**
  * Hook personalizado para obtener reservas con filtros
  *
- * Utiliza React Query para cache y refetch automático
+ * Utiliza React Query para cache y refetch automático. El cache guarda el listado
+ * con su `changeSeq` (lo usa useChangeFeed); el hook devuelve solo las reservas.
  *
  * @param filters - Filtros opcionales (status, accommodation_id, dates, search)
  * @param enabled - Si el query debe ejecutarse (default: true)
  * @returns Query result con reservations, loading y error
  */
 export const useReservations = (filters: ReservationFilters = {}, enabled = true) => {
-  return useQuery<Reservation[], Error>({
+  return useQuery<ReservationListing, Error, Reservation[]>({
     queryKey: ['reservations', filters],
     queryFn: () => reservationsService.getReservations(filters),
+    select: (listing) => listing.reservations,
     enabled,
     staleTime: 10000, // Considerar datos frescos por 10 segundos
     retry: 2,
@@ -3,10 +3,13 @@ import { StatsCard } from '../../components/dashboard/StatsCard';
 import { ReservationsTable } from '../../components/dashboard/ReservationsTable';
 import { FilterBar, type FilterState } from '../../components/dashboard/FilterBar';
 import { useDashboardStats } from '../../hooks/useDashboardStats';
+import { useChangeFeed } from '../../hooks/useChangeFeed';
 import type { ReservationFilters } from '../../services/reservationsService';
 
 const DashboardPage: React.FC = () => {
   const { data: stats, isLoading } = useDashboardStats();
+  // Deltas en vivo de reservas/estadísticas (SSE) en lugar de recargar listas completas
+  useChangeFeed();
 
   // Estado para los filtros de reservas
   const [filters, setFilters] = useState<FilterState>({
@@ -0,0 +1,44 @@
+import api from './api';
+
+/**
+ * Change feed API service
+ *
+ * Delta-sync del dashboard: cambios de reservas/pagos posteriores a un seq
+ */
+
+export interface ChangeEvent {
+  seq: number;
+  entity: 'reservation' | 'payment';
+  id: number;
+  op: 'upsert' | 'delete';
+  data: Record<string, unknown> | null;
+}
+
+export interface ChangesPage {
+  changes: ChangeEvent[];
+  next: number;
+  has_more: boolean;
+}
+
+export const changesService = {
+  /**
+   * Obtiene los cambios posteriores a `since` (410 si ya no están retenidos)
+   */
+  async getChanges(since: number): Promise<ChangesPage> {
+    const response = await api.get<ChangesPage>(`/admin/changes?since=${since}`);
+    return response.data;
+  },
+
+  /**
+   * Abre el stream SSE de cambios (sin `since`: desde ahora)
+   *
+   * EventSource no permite headers, el token va como query param
+   */
+  openStream(since?: number): EventSource {
+    const params = new URLSearchParams();
+    const token = localStorage.getItem('access_token');
+    if (token) params.append('token', token);
+    if (since !== undefined) params.append('since', since.toString());
+    return new EventSource(`${api.defaults.baseURL}/admin/changes/stream?${params.toString()}`);
+  },
+};
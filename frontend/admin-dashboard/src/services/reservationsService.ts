@@ -18,16 +18,26 @@ export interface ReservationFilters {
   search?: string;
 }
 
+export interface ReservationListing {
+  reservations: Reservation[];
+  /** Seq del feed de cambios tomado con esta lectura (header X-Change-Seq) */
+  changeSeq?: number;
+}
+
+// Máximo permitido por GET /admin/reservations
+const PAGE_SIZE = 500;
+
 export const reservationsService = {
   /**
    * Obtiene lista de reservas con filtros y paginación
    *
    * @param filters - Filtros opcionales (status, accommodation_id, dates, search)
-   * @returns Promise con lista de reservas
+   * @returns Promise con todas las reservas que cumplen los filtros y el seq del feed
+   * de cambios desde el que hay que seguirlas
    */
   async getReservations(
     filters: ReservationFilters = {}
-  ): Promise<Reservation[]> {
+  ): Promise<ReservationListing> {
     const params = new URLSearchParams();
 
     // Agregar filtros
@@ -44,10 +54,23 @@ export const reservationsService = {
     // TODO: Agregar búsqueda cuando backend lo soporte
     // if (filters.search) params.append('search', filters.search);
 
-    const response = await api.get<Reservation[]>(
-      `/admin/reservations?${params.toString()}`
-    );
-    return response.data;
+    // El backend pagina por cursor: recorrer todas las páginas (X-Next-Cursor)
+    params.set('limit', PAGE_SIZE.toString());
+    const reservations: Reservation[] = [];
+    let changeSeq: number | undefined;
+    let cursor: string | undefined;
+    do {
+      if (cursor) params.set('cursor', cursor);
+      const response = await api.get<Reservation[]>(
+        `/admin/reservations?${params.toString()}`
+      );
+      reservations.push(...response.data);
+      // El de la primera página: es el más viejo, cubre todo lo leído después
+      const seq = response.headers['x-change-seq'];
+      if (changeSeq === undefined && seq !== undefined) changeSeq = Number(seq);
+      cursor = response.headers['x-next-cursor'] || undefined;
+    } while (cursor);
+    return { reservations, changeSeq };
   },
 
   /**